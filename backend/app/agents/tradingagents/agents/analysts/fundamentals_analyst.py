@@ -1,4 +1,5 @@
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+from langchain_core.runnables import RunnableLambda
 import time
 import json
 from tradingagents.agents.utils.agent_utils import get_fundamentals, get_balance_sheet, get_cashflow, get_income_statement, get_insider_sentiment, get_insider_transactions
@@ -6,7 +7,7 @@ from tradingagents.dataflows.config import get_config
 
 
 def create_fundamentals_analyst(llm):
-    def fundamentals_analyst_node(state):
+    def fundamentals_analyst_chain(state):
         current_date = state["trade_date"]
         ticker = state["company_of_interest"]
         company_name = state["company_of_interest"]
@@ -46,10 +47,9 @@ def create_fundamentals_analyst(llm):
         prompt = prompt.partial(current_date=current_date)
         prompt = prompt.partial(ticker=ticker)
 
-        chain = prompt | llm.bind_tools(tools)
-
-        result = chain.invoke(state["messages"])
+        return prompt | llm.bind_tools(tools)
 
+    def fundamentals_analyst_update(result):
         report = ""
 
         if len(result.tool_calls) == 0:
@@ -60,4 +60,10 @@ def create_fundamentals_analyst(llm):
             "fundamentals_report": report,
         }
 
-    return fundamentals_analyst_node
+    def fundamentals_analyst_node(state):
+        return fundamentals_analyst_update(fundamentals_analyst_chain(state).invoke(state["messages"]))
+
+    async def afundamentals_analyst_node(state, config):
+        return fundamentals_analyst_update(await fundamentals_analyst_chain(state).ainvoke(state["messages"], config=config))
+
+    return RunnableLambda(fundamentals_analyst_node, afunc=afundamentals_analyst_node)
@@ -1,4 +1,5 @@
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+from langchain_core.runnables import RunnableLambda
 import time
 import json
 from tradingagents.agents.utils.agent_utils import get_stock_data, get_indicators
@@ -7,7 +8,7 @@ from tradingagents.dataflows.config import get_config
 
 def create_market_analyst(llm):
 
-    def market_analyst_node(state):
+    def market_analyst_chain(state):
         current_date = state["trade_date"]
         ticker = state["company_of_interest"]
         company_name = state["company_of_interest"]
@@ -68,18 +69,23 @@ Volume-Based Indicators:
         prompt = prompt.partial(current_date=current_date)
         prompt = prompt.partial(ticker=ticker)
 
-        chain = prompt | llm.bind_tools(tools)
-
-        result = chain.invoke(state["messages"])
+        return prompt | llm.bind_tools(tools)
 
+    def market_analyst_update(result):
         report = ""
 
         if len(result.tool_calls) == 0:
             report = result.content
-       
+
         return {
             "messages": [result],
             "market_report": report,
         }
 
-    return market_analyst_node
+    def market_analyst_node(state):
+        return market_analyst_update(market_analyst_chain(state).invoke(state["messages"]))
+
+    async def amarket_analyst_node(state, config):
+        return market_analyst_update(await market_analyst_chain(state).ainvoke(state["messages"], config=config))
+
+    return RunnableLambda(market_analyst_node, afunc=amarket_analyst_node)
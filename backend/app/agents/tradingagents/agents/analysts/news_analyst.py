@@ -1,4 +1,5 @@
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+from langchain_core.runnables import RunnableLambda
 import time
 import json
 from tradingagents.agents.utils.agent_utils import get_news, get_global_news
@@ -6,7 +7,7 @@ from tradingagents.dataflows.config import get_config
 
 
 def create_news_analyst(llm):
-    def news_analyst_node(state):
+    def news_analyst_chain(state):
         current_date = state["trade_date"]
         ticker = state["company_of_interest"]
 
@@ -42,9 +43,9 @@ def create_news_analyst(llm):
         prompt = prompt.partial(current_date=current_date)
         prompt = prompt.partial(ticker=ticker)
 
-        chain = prompt | llm.bind_tools(tools)
-        result = chain.invoke(state["messages"])
+        return prompt | llm.bind_tools(tools)
 
+    def news_analyst_update(result):
         report = ""
 
         if len(result.tool_calls) == 0:
@@ -55,4 +56,10 @@ def create_news_analyst(llm):
             "news_report": report,
         }
 
-    return news_analyst_node
+    def news_analyst_node(state):
+        return news_analyst_update(news_analyst_chain(state).invoke(state["messages"]))
+
+    async def anews_analyst_node(state, config):
+        return news_analyst_update(await news_analyst_chain(state).ainvoke(state["messages"], config=config))
+
+    return RunnableLambda(news_analyst_node, afunc=anews_analyst_node)
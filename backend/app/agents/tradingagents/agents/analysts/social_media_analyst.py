@@ -1,4 +1,5 @@
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+from langchain_core.runnables import RunnableLambda
 import time
 import json
 from tradingagents.agents.utils.agent_utils import get_news
@@ -6,7 +7,7 @@ from tradingagents.dataflows.config import get_config
 
 
 def create_social_media_analyst(llm):
-    def social_media_analyst_node(state):
+    def social_media_analyst_chain(state):
         current_date = state["trade_date"]
         ticker = state["company_of_interest"]
         company_name = state["company_of_interest"]
@@ -42,10 +43,9 @@ def create_social_media_analyst(llm):
         prompt = prompt.partial(current_date=current_date)
         prompt = prompt.partial(ticker=ticker)
 
-        chain = prompt | llm.bind_tools(tools)
-
-        result = chain.invoke(state["messages"])
+        return prompt | llm.bind_tools(tools)
 
+    def social_media_analyst_update(result):
         report = ""
 
         if len(result.tool_calls) == 0:
@@ -56,4 +56,10 @@ def create_social_media_analyst(llm):
             "sentiment_report": report,
         }
 
-    return social_media_analyst_node
+    def social_media_analyst_node(state):
+        return social_media_analyst_update(social_media_analyst_chain(state).invoke(state["messages"]))
+
+    async def asocial_media_analyst_node(state, config):
+        return social_media_analyst_update(await social_media_analyst_chain(state).ainvoke(state["messages"], config=config))
+
+    return RunnableLambda(social_media_analyst_node, afunc=asocial_media_analyst_node)
@@ -1,20 +1,13 @@
+from langchain_core.runnables import RunnableLambda
 import time
 import json
 
+from tradingagents.agents.utils.agent_utils import current_situation
+from tradingagents.agents.utils.compaction import ahistory_for_prompt, history_for_prompt
 
-def create_research_manager(llm, memory):
-    def research_manager_node(state) -> dict:
-        history = state["investment_debate_state"].get("history", "")
-        market_research_report = state["market_report"]
-        sentiment_report = state["sentiment_report"]
-        news_report = state["news_report"]
-        fundamentals_report = state["fundamentals_report"]
-
-        investment_debate_state = state["investment_debate_state"]
-
-        curr_situation = f"{market_research_report}\n\n{sentiment_report}\n\n{news_report}\n\n{fundamentals_report}"
-        past_memories = memory.get_memories(curr_situation, n_matches=2)
 
+def create_research_manager(llm, memory, compactor=None):
+    def research_manager_prompt(past_memories, prompt_history) -> str:
         past_memory_str = ""
         for i, rec in enumerate(past_memories, 1):
             past_memory_str += rec["recommendation"] + "\n\n"
@@ -35,8 +28,11 @@ Here are your past reflections on mistakes:
 
 Here is the debate:
 Debate History:
-{history}"""
-        response = llm.invoke(prompt)
+{prompt_history}"""
+        return prompt
+
+    def research_manager_update(state, response, history_updates) -> dict:
+        investment_debate_state = state["investment_debate_state"]
 
         new_investment_debate_state = {
             "judge_decision": response.content,
@@ -45,6 +41,7 @@ Debate History:
             "bull_history": investment_debate_state.get("bull_history", ""),
             "current_response": response.content,
             "count": investment_debate_state["count"],
+            **history_updates,
         }
 
         return {
@@ -52,4 +49,16 @@ Debate History:
             "investment_plan": response.content,
         }
 
-    return research_manager_node
+    def research_manager_node(state) -> dict:
+        past_memories = memory.get_memories(current_situation(state), n_matches=2)
+        prompt_history, history_updates = history_for_prompt(state["investment_debate_state"], compactor)
+        response = llm.invoke(research_manager_prompt(past_memories, prompt_history))
+        return research_manager_update(state, response, history_updates)
+
+    async def aresearch_manager_node(state, config) -> dict:
+        past_memories = await memory.aget_memories(current_situation(state), n_matches=2)
+        prompt_history, history_updates = await ahistory_for_prompt(state["investment_debate_state"], compactor, config)
+        response = await llm.ainvoke(research_manager_prompt(past_memories, prompt_history), config=config)
+        return research_manager_update(state, response, history_updates)
+
+    return RunnableLambda(research_manager_node, afunc=aresearch_manager_node)
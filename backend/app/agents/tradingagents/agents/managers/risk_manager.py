@@ -1,22 +1,35 @@
 import time
 import json
+import logging
+from typing import Literal
 
+from langchain_core.runnables import RunnableLambda
+from pydantic import BaseModel, Field
 
-def create_risk_manager(llm, memory):
-    def risk_manager_node(state) -> dict:
+from tradingagents.agents.utils.agent_utils import current_situation
+from tradingagents.agents.utils.compaction import ahistory_for_prompt, history_for_prompt
 
-        company_name = state["company_of_interest"]
+logger = logging.getLogger(__name__)
 
-        history = state["risk_debate_state"]["history"]
-        risk_debate_state = state["risk_debate_state"]
-        market_research_report = state["market_report"]
-        news_report = state["news_report"]
-        fundamentals_report = state["news_report"]
-        sentiment_report = state["sentiment_report"]
-        trader_plan = state["investment_plan"]
 
-        curr_situation = f"{market_research_report}\n\n{sentiment_report}\n\n{news_report}\n\n{fundamentals_report}"
-        past_memories = memory.get_memories(curr_situation, n_matches=2)
+class RiskJudgeDecision(BaseModel):
+    """Structured output of the Risk Judge."""
+
+    rationale: str = Field(description="Full reasoning and refined trader plan, in markdown")
+    decision: Literal["BUY", "HOLD", "SELL"] = Field(description="Final recommendation")
+    confidence: float = Field(ge=0.0, le=1.0, description="Confidence in the recommendation, 0.0 to 1.0")
+
+
+def create_risk_manager(llm, memory, structured_output=True, compactor=None):
+    structured_llm = None
+    if structured_output:
+        try:
+            structured_llm = llm.with_structured_output(RiskJudgeDecision)
+        except Exception as e:
+            logger.warning(f"Risk Judge structured output unavailable, using text markers: {e}")
+
+    def risk_manager_prompt(state, past_memories, prompt_history) -> str:
+        trader_plan = state["investment_plan"]
 
         past_memory_str = ""
         for i, rec in enumerate(past_memories, 1):
@@ -33,20 +46,34 @@ Guidelines for Decision-Making:
 Deliverables:
 - A clear and actionable recommendation: Buy, Sell, or Hold.
 - Detailed reasoning anchored in the debate and past reflections.
+- A confidence between 0.0 and 1.0 in your recommendation.
+- End with the lines 'FINAL TRANSACTION PROPOSAL: **BUY/HOLD/SELL**' and 'CONFIDENCE: <0.0-1.0>'.
 
 ---
 
 **Analysts Debate History:**  
-{history}
+{prompt_history}
 
 ---
 
 Focus on actionable insights and continuous improvement. Build on past lessons, critically evaluate all perspectives, and ensure each decision advances better outcomes."""
 
-        response = llm.invoke(prompt)
+        return prompt
+
+    def structured_decision(result):
+        trade_signal = {"decision": result.decision, "confidence": result.confidence}
+        judge_decision = (
+            f"{result.rationale}\n\n"
+            f"FINAL TRANSACTION PROPOSAL: **{result.decision}**\n"
+            f"CONFIDENCE: {result.confidence:.2f}"
+        )
+        return judge_decision, trade_signal
+
+    def risk_manager_update(state, judge_decision, trade_signal, history_updates) -> dict:
+        risk_debate_state = state["risk_debate_state"]
 
         new_risk_debate_state = {
-            "judge_decision": response.content,
+            "judge_decision": judge_decision,
             "history": risk_debate_state["history"],
             "risky_history": risk_debate_state["risky_history"],
             "safe_history": risk_debate_state["safe_history"],
@@ -56,11 +83,47 @@ Focus on actionable insights and continuous improvement. Build on past lessons,
             "current_safe_response": risk_debate_state["current_safe_response"],
             "current_neutral_response": risk_debate_state["current_neutral_response"],
             "count": risk_debate_state["count"],
+            **history_updates,
         }
 
         return {
             "risk_debate_state": new_risk_debate_state,
-            "final_trade_decision": response.content,
+            "final_trade_decision": judge_decision,
+            "final_trade_signal": trade_signal,
         }
 
-    return risk_manager_node
+    def risk_manager_node(state) -> dict:
+        past_memories = memory.get_memories(current_situation(state), n_matches=2)
+        prompt_history, history_updates = history_for_prompt(state["risk_debate_state"], compactor)
+        prompt = risk_manager_prompt(state, past_memories, prompt_history)
+
+        judge_decision, trade_signal = None, None
+        if structured_llm is not None:
+            try:
+                judge_decision, trade_signal = structured_decision(structured_llm.invoke(prompt))
+            except Exception as e:
+                logger.warning(f"Risk Judge structured output failed, using text markers: {e}")
+
+        if judge_decision is None:
+            judge_decision = llm.invoke(prompt).content
+
+        return risk_manager_update(state, judge_decision, trade_signal, history_updates)
+
+    async def arisk_manager_node(state, config) -> dict:
+        past_memories = await memory.aget_memories(current_situation(state), n_matches=2)
+        prompt_history, history_updates = await ahistory_for_prompt(state["risk_debate_state"], compactor, config)
+        prompt = risk_manager_prompt(state, past_memories, prompt_history)
+
+        judge_decision, trade_signal = None, None
+        if structured_llm is not None:
+            try:
+                judge_decision, trade_signal = structured_decision(await structured_llm.ainvoke(prompt, config=config))
+            except Exception as e:
+                logger.warning(f"Risk Judge structured output failed, using text markers: {e}")
+
+        if judge_decision is None:
+            judge_decision = (await llm.ainvoke(prompt, config=config)).content
+
+        return risk_manager_update(state, judge_decision, trade_signal, history_updates)
+
+    return RunnableLambda(risk_manager_node, afunc=arisk_manager_node)
@@ -1,27 +1,29 @@
 from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableLambda
 import time
 import json
 
+from tradingagents.agents.utils.agent_utils import current_situation
+from tradingagents.agents.utils.compaction import (
+    RESEARCH_REPORT_LABELS,
+    ahistory_for_prompt,
+    history_for_prompt,
+    reports_for_prompt,
+)
 
-def create_bear_researcher(llm, memory):
-    def bear_node(state) -> dict:
+
+def create_bear_researcher(llm, memory, compactor=None):
+    def bear_prompt(state, past_memories, prompt_history) -> str:
         investment_debate_state = state["investment_debate_state"]
-        history = investment_debate_state.get("history", "")
-        bear_history = investment_debate_state.get("bear_history", "")
 
         current_response = investment_debate_state.get("current_response", "")
-        market_research_report = state["market_report"]
-        sentiment_report = state["sentiment_report"]
-        news_report = state["news_report"]
-        fundamentals_report = state["fundamentals_report"]
-
-        curr_situation = f"{market_research_report}\n\n{sentiment_report}\n\n{news_report}\n\n{fundamentals_report}"
-        past_memories = memory.get_memories(curr_situation, n_matches=2)
 
         past_memory_str = ""
         for i, rec in enumerate(past_memories, 1):
             past_memory_str += rec["recommendation"] + "\n\n"
 
+        reports = reports_for_prompt(state, RESEARCH_REPORT_LABELS, compactor)
+
         prompt = f"""You are a Bear Analyst making the case against investing in the stock. Your goal is to present a well-reasoned argument emphasizing risks, challenges, and negative indicators. Leverage the provided research and data to highlight potential downsides and counter bullish arguments effectively.
 
 Key points to focus on:
@@ -34,17 +36,19 @@ Key points to focus on:
 
 Resources available:
 
-Market research report: {market_research_report}
-Social media sentiment report: {sentiment_report}
-Latest world affairs news: {news_report}
-Company fundamentals report: {fundamentals_report}
-Conversation history of the debate: {history}
+{reports}
+Conversation history of the debate: {prompt_history}
 Last bull argument: {current_response}
 Reflections from similar situations and lessons learned: {past_memory_str}
 Use this information to deliver a compelling bear argument, refute the bull's claims, and engage in a dynamic debate that demonstrates the risks and weaknesses of investing in the stock. You must also address reflections and learn from lessons and mistakes you made in the past.
 """
 
-        response = llm.invoke(prompt)
+        return prompt
+
+    def bear_update(state, response, history_updates) -> dict:
+        investment_debate_state = state["investment_debate_state"]
+        history = investment_debate_state.get("history", "")
+        bear_history = investment_debate_state.get("bear_history", "")
 
         argument = f"Bear Analyst: {response.content}"
 
@@ -54,8 +58,21 @@ Use this information to deliver a compelling bear argument, refute the bull's cl
             "bull_history": investment_debate_state.get("bull_history", ""),
             "current_response": argument,
             "count": investment_debate_state["count"] + 1,
+            **history_updates,
         }
 
         return {"investment_debate_state": new_investment_debate_state}
 
-    return bear_node
+    def bear_node(state) -> dict:
+        past_memories = memory.get_memories(current_situation(state), n_matches=2)
+        prompt_history, history_updates = history_for_prompt(state["investment_debate_state"], compactor)
+        response = llm.invoke(bear_prompt(state, past_memories, prompt_history))
+        return bear_update(state, response, history_updates)
+
+    async def abear_node(state, config) -> dict:
+        past_memories = await memory.aget_memories(current_situation(state), n_matches=2)
+        prompt_history, history_updates = await ahistory_for_prompt(state["investment_debate_state"], compactor, config)
+        response = await llm.ainvoke(bear_prompt(state, past_memories, prompt_history), config=config)
+        return bear_update(state, response, history_updates)
+
+    return RunnableLambda(bear_node, afunc=abear_node)
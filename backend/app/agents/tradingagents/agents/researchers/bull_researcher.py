@@ -1,27 +1,29 @@
 from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableLambda
 import time
 import json
 
+from tradingagents.agents.utils.agent_utils import current_situation
+from tradingagents.agents.utils.compaction import (
+    RESEARCH_REPORT_LABELS,
+    ahistory_for_prompt,
+    history_for_prompt,
+    reports_for_prompt,
+)
 
-def create_bull_researcher(llm, memory):
-    def bull_node(state) -> dict:
+
+def create_bull_researcher(llm, memory, compactor=None):
+    def bull_prompt(state, past_memories, prompt_history) -> str:
         investment_debate_state = state["investment_debate_state"]
-        history = investment_debate_state.get("history", "")
-        bull_history = investment_debate_state.get("bull_history", "")
 
         current_response = investment_debate_state.get("current_response", "")
-        market_research_report = state["market_report"]
-        sentiment_report = state["sentiment_report"]
-        news_report = state["news_report"]
-        fundamentals_report = state["fundamentals_report"]
-
-        curr_situation = f"{market_research_report}\n\n{sentiment_report}\n\n{news_report}\n\n{fundamentals_report}"
-        past_memories = memory.get_memories(curr_situation, n_matches=2)
 
         past_memory_str = ""
         for i, rec in enumerate(past_memories, 1):
             past_memory_str += rec["recommendation"] + "\n\n"
 
+        reports = reports_for_prompt(state, RESEARCH_REPORT_LABELS, compactor)
+
         prompt = f"""You are a Bull Analyst advocating for investing in the stock. Your task is to build a strong, evidence-based case emphasizing growth potential, competitive advantages, and positive market indicators. Leverage the provided research and data to address concerns and counter bearish arguments effectively.
 
 Key points to focus on:
@@ -32,17 +34,19 @@ Key points to focus on:
 - Engagement: Present your argument in a conversational style, engaging directly with the bear analyst's points and debating effectively rather than just listing data.
 
 Resources available:
-Market research report: {market_research_report}
-Social media sentiment report: {sentiment_report}
-Latest world affairs news: {news_report}
-Company fundamentals report: {fundamentals_report}
-Conversation history of the debate: {history}
+{reports}
+Conversation history of the debate: {prompt_history}
 Last bear argument: {current_response}
 Reflections from similar situations and lessons learned: {past_memory_str}
 Use this information to deliver a compelling bull argument, refute the bear's concerns, and engage in a dynamic debate that demonstrates the strengths of the bull position. You must also address reflections and learn from lessons and mistakes you made in the past.
 """
 
-        response = llm.invoke(prompt)
+        return prompt
+
+    def bull_update(state, response, history_updates) -> dict:
+        investment_debate_state = state["investment_debate_state"]
+        history = investment_debate_state.get("history", "")
+        bull_history = investment_debate_state.get("bull_history", "")
 
         argument = f"Bull Analyst: {response.content}"
 
@@ -52,8 +56,21 @@ Use this information to deliver a compelling bull argument, refute the bear's co
             "bear_history": investment_debate_state.get("bear_history", ""),
             "current_response": argument,
             "count": investment_debate_state["count"] + 1,
+            **history_updates,
         }
 
         return {"investment_debate_state": new_investment_debate_state}
 
-    return bull_node
+    def bull_node(state) -> dict:
+        past_memories = memory.get_memories(current_situation(state), n_matches=2)
+        prompt_history, history_updates = history_for_prompt(state["investment_debate_state"], compactor)
+        response = llm.invoke(bull_prompt(state, past_memories, prompt_history))
+        return bull_update(state, response, history_updates)
+
+    async def abull_node(state, config) -> dict:
+        past_memories = await memory.aget_memories(current_situation(state), n_matches=2)
+        prompt_history, history_updates = await ahistory_for_prompt(state["investment_debate_state"], compactor, config)
+        response = await llm.ainvoke(bull_prompt(state, past_memories, prompt_history), config=config)
+        return bull_update(state, response, history_updates)
+
+    return RunnableLambda(bull_node, afunc=abull_node)
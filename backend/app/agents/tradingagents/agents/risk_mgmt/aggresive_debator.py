@@ -1,38 +1,44 @@
 import time
 import json
 
+from langchain_core.runnables import RunnableLambda
 
-def create_risky_debator(llm):
-    def risky_node(state) -> dict:
+from tradingagents.agents.utils.compaction import (
+    RISK_REPORT_LABELS,
+    ahistory_for_prompt,
+    history_for_prompt,
+    reports_for_prompt,
+)
+
+
+def create_risky_debator(llm, compactor=None):
+    def risky_prompt(state, prompt_history) -> str:
         risk_debate_state = state["risk_debate_state"]
-        history = risk_debate_state.get("history", "")
-        risky_history = risk_debate_state.get("risky_history", "")
 
         current_safe_response = risk_debate_state.get("current_safe_response", "")
         current_neutral_response = risk_debate_state.get("current_neutral_response", "")
 
-        market_research_report = state["market_report"]
-        sentiment_report = state["sentiment_report"]
-        news_report = state["news_report"]
-        fundamentals_report = state["fundamentals_report"]
-
         trader_decision = state["trader_investment_plan"]
 
+        reports = reports_for_prompt(state, RISK_REPORT_LABELS, compactor)
+
         prompt = f"""As the Risky Risk Analyst, your role is to actively champion high-reward, high-risk opportunities, emphasizing bold strategies and competitive advantages. When evaluating the trader's decision or plan, focus intently on the potential upside, growth potential, and innovative benefits—even when these come with elevated risk. Use the provided market data and sentiment analysis to strengthen your arguments and challenge the opposing views. Specifically, respond directly to each point made by the conservative and neutral analysts, countering with data-driven rebuttals and persuasive reasoning. Highlight where their caution might miss critical opportunities or where their assumptions may be overly conservative. Here is the trader's decision:
 
 {trader_decision}
 
 Your task is to create a compelling case for the trader's decision by questioning and critiquing the conservative and neutral stances to demonstrate why your high-reward perspective offers the best path forward. Incorporate insights from the following sources into your arguments:
 
-Market Research Report: {market_research_report}
-Social Media Sentiment Report: {sentiment_report}
-Latest World Affairs Report: {news_report}
-Company Fundamentals Report: {fundamentals_report}
-Here is the current conversation history: {history} Here are the last arguments from the conservative analyst: {current_safe_response} Here are the last arguments from the neutral analyst: {current_neutral_response}. If there are no responses from the other viewpoints, do not halluncinate and just present your point.
+{reports}
+Here is the current conversation history: {prompt_history} Here are the last arguments from the conservative analyst: {current_safe_response} Here are the last arguments from the neutral analyst: {current_neutral_response}. If there are no responses from the other viewpoints, do not halluncinate and just present your point.
 
 Engage actively by addressing any specific concerns raised, refuting the weaknesses in their logic, and asserting the benefits of risk-taking to outpace market norms. Maintain a focus on debating and persuading, not just presenting data. Challenge each counterpoint to underscore why a high-risk approach is optimal. Output conversationally as if you are speaking without any special formatting."""
 
-        response = llm.invoke(prompt)
+        return prompt
+
+    def risky_update(state, response, history_updates) -> dict:
+        risk_debate_state = state["risk_debate_state"]
+        history = risk_debate_state.get("history", "")
+        risky_history = risk_debate_state.get("risky_history", "")
 
         argument = f"Risky Analyst: {response.content}"
 
@@ -48,8 +54,19 @@ Engage actively by addressing any specific concerns raised, refuting the weaknes
                 "current_neutral_response", ""
             ),
             "count": risk_debate_state["count"] + 1,
+            **history_updates,
         }
 
         return {"risk_debate_state": new_risk_debate_state}
 
-    return risky_node
+    def risky_node(state) -> dict:
+        prompt_history, history_updates = history_for_prompt(state["risk_debate_state"], compactor)
+        response = llm.invoke(risky_prompt(state, prompt_history))
+        return risky_update(state, response, history_updates)
+
+    async def arisky_node(state, config) -> dict:
+        prompt_history, history_updates = await ahistory_for_prompt(state["risk_debate_state"], compactor, config)
+        response = await llm.ainvoke(risky_prompt(state, prompt_history), config=config)
+        return risky_update(state, response, history_updates)
+
+    return RunnableLambda(risky_node, afunc=arisky_node)
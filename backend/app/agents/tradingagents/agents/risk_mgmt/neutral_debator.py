@@ -1,38 +1,44 @@
 import time
 import json
 
+from langchain_core.runnables import RunnableLambda
 
-def create_neutral_debator(llm):
-    def neutral_node(state) -> dict:
+from tradingagents.agents.utils.compaction import (
+    RISK_REPORT_LABELS,
+    ahistory_for_prompt,
+    history_for_prompt,
+    reports_for_prompt,
+)
+
+
+def create_neutral_debator(llm, compactor=None):
+    def neutral_prompt(state, prompt_history) -> str:
         risk_debate_state = state["risk_debate_state"]
-        history = risk_debate_state.get("history", "")
-        neutral_history = risk_debate_state.get("neutral_history", "")
 
         current_risky_response = risk_debate_state.get("current_risky_response", "")
         current_safe_response = risk_debate_state.get("current_safe_response", "")
 
-        market_research_report = state["market_report"]
-        sentiment_report = state["sentiment_report"]
-        news_report = state["news_report"]
-        fundamentals_report = state["fundamentals_report"]
-
         trader_decision = state["trader_investment_plan"]
 
+        reports = reports_for_prompt(state, RISK_REPORT_LABELS, compactor)
+
         prompt = f"""As the Neutral Risk Analyst, your role is to provide a balanced perspective, weighing both the potential benefits and risks of the trader's decision or plan. You prioritize a well-rounded approach, evaluating the upsides and downsides while factoring in broader market trends, potential economic shifts, and diversification strategies.Here is the trader's decision:
 
 {trader_decision}
 
 Your task is to challenge both the Risky and Safe Analysts, pointing out where each perspective may be overly optimistic or overly cautious. Use insights from the following data sources to support a moderate, sustainable strategy to adjust the trader's decision:
 
-Market Research Report: {market_research_report}
-Social Media Sentiment Report: {sentiment_report}
-Latest World Affairs Report: {news_report}
-Company Fundamentals Report: {fundamentals_report}
-Here is the current conversation history: {history} Here is the last response from the risky analyst: {current_risky_response} Here is the last response from the safe analyst: {current_safe_response}. If there are no responses from the other viewpoints, do not halluncinate and just present your point.
+{reports}
+Here is the current conversation history: {prompt_history} Here is the last response from the risky analyst: {current_risky_response} Here is the last response from the safe analyst: {current_safe_response}. If there are no responses from the other viewpoints, do not halluncinate and just present your point.
 
 Engage actively by analyzing both sides critically, addressing weaknesses in the risky and conservative arguments to advocate for a more balanced approach. Challenge each of their points to illustrate why a moderate risk strategy might offer the best of both worlds, providing growth potential while safeguarding against extreme volatility. Focus on debating rather than simply presenting data, aiming to show that a balanced view can lead to the most reliable outcomes. Output conversationally as if you are speaking without any special formatting."""
 
-        response = llm.invoke(prompt)
+        return prompt
+
+    def neutral_update(state, response, history_updates) -> dict:
+        risk_debate_state = state["risk_debate_state"]
+        history = risk_debate_state.get("history", "")
+        neutral_history = risk_debate_state.get("neutral_history", "")
 
         argument = f"Neutral Analyst: {response.content}"
 
@@ -48,8 +54,19 @@ Engage actively by analyzing both sides critically, addressing weaknesses in the
             "current_safe_response": risk_debate_state.get("current_safe_response", ""),
             "current_neutral_response": argument,
             "count": risk_debate_state["count"] + 1,
+            **history_updates,
         }
 
         return {"risk_debate_state": new_risk_debate_state}
 
-    return neutral_node
+    def neutral_node(state) -> dict:
+        prompt_history, history_updates = history_for_prompt(state["risk_debate_state"], compactor)
+        response = llm.invoke(neutral_prompt(state, prompt_history))
+        return neutral_update(state, response, history_updates)
+
+    async def aneutral_node(state, config) -> dict:
+        prompt_history, history_updates = await ahistory_for_prompt(state["risk_debate_state"], compactor, config)
+        response = await llm.ainvoke(neutral_prompt(state, prompt_history), config=config)
+        return neutral_update(state, response, history_updates)
+
+    return RunnableLambda(neutral_node, afunc=aneutral_node)
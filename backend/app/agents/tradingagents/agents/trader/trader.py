@@ -1,19 +1,15 @@
+from langchain_core.runnables import RunnableLambda
 import functools
 import time
 import json
 
+from tradingagents.agents.utils.agent_utils import current_situation
+
 
 def create_trader(llm, memory):
-    def trader_node(state, name):
+    def trader_messages(state, past_memories):
         company_name = state["company_of_interest"]
         investment_plan = state["investment_plan"]
-        market_research_report = state["market_report"]
-        sentiment_report = state["sentiment_report"]
-        news_report = state["news_report"]
-        fundamentals_report = state["fundamentals_report"]
-
-        curr_situation = f"{market_research_report}\n\n{sentiment_report}\n\n{news_report}\n\n{fundamentals_report}"
-        past_memories = memory.get_memories(curr_situation, n_matches=2)
 
         past_memory_str = ""
         if past_memories:
@@ -35,12 +31,24 @@ def create_trader(llm, memory):
             context,
         ]
 
-        result = llm.invoke(messages)
+        return messages
 
+    def trader_update(result, name):
         return {
             "messages": [result],
             "trader_investment_plan": result.content,
             "sender": name,
         }
 
-    return functools.partial(trader_node, name="Trader")
+    def trader_node(state, name):
+        past_memories = memory.get_memories(current_situation(state), n_matches=2)
+        return trader_update(llm.invoke(trader_messages(state, past_memories)), name)
+
+    async def atrader_node(state, config, name):
+        past_memories = await memory.aget_memories(current_situation(state), n_matches=2)
+        return trader_update(await llm.ainvoke(trader_messages(state, past_memories), config=config), name)
+
+    return RunnableLambda(
+        functools.partial(trader_node, name="Trader"),
+        afunc=functools.partial(atrader_node, name="Trader"),
+    )
@@ -19,6 +19,8 @@ class InvestDebateState(TypedDict):
     current_response: Annotated[str, "Latest response"]  # Last response
     judge_decision: Annotated[str, "Final judge decision"]  # Last response
     count: Annotated[int, "Length of the current conversation"]  # Conversation length
+    history_summary: Annotated[str, "Rolling summary of older turns (report compaction)"]
+    summarized_upto: Annotated[int, "Length of history folded into the summary"]
 
 
 # Risk management team state
@@ -45,6 +47,8 @@ class RiskDebateState(TypedDict):
     ]  # Last response
     judge_decision: Annotated[str, "Judge's decision"]
     count: Annotated[int, "Length of the current conversation"]  # Conversation length
+    history_summary: Annotated[str, "Rolling summary of older turns (report compaction)"]
+    summarized_upto: Annotated[int, "Length of history folded into the summary"]
 
 
 class AgentState(MessagesState):
@@ -60,6 +64,8 @@ class AgentState(MessagesState):
         str, "Report from the News Researcher of current world affairs"
     ]
     fundamentals_report: Annotated[str, "Report from the Fundamentals Researcher"]
+    research_brief: Annotated[str, "Bounded brief condensed from the analyst reports"]
+    compaction_stats: Annotated[dict, "Token estimates for the raw reports and the brief"]
 
     # researcher team discussion step
     investment_debate_state: Annotated[
@@ -74,3 +80,6 @@ class AgentState(MessagesState):
         RiskDebateState, "Current state of the debate on evaluating risk"
     ]
     final_trade_decision: Annotated[str, "Final decision made by the Risk Analysts"]
+    final_trade_signal: Annotated[
+        dict, "Structured decision and confidence from the Risk Judge, when available"
+    ]
@@ -20,6 +20,11 @@ from tradingagents.agents.utils.news_data_tools import (
     get_global_news
 )
 
+def current_situation(state):
+    """The analyst reports as one text, the key for agent memory lookups"""
+    return f"{state['market_report']}\n\n{state['sentiment_report']}\n\n{state['news_report']}\n\n{state['fundamentals_report']}"
+
+
 def create_msg_delete():
     def delete_messages(state):
         """Clear messages and add placeholder for Anthropic compatibility"""
@@ -0,0 +1,204 @@
+import threading
+from typing import Dict, Optional, Tuple
+
+from langchain_core.runnables import RunnableLambda
+
+COMPACTION_MODES = ("off", "brief")
+
+# Report labels as they appear in the researcher and risk debator prompts
+RESEARCH_REPORT_LABELS = (
+    ("market_report", "Market research report"),
+    ("sentiment_report", "Social media sentiment report"),
+    ("news_report", "Latest world affairs news"),
+    ("fundamentals_report", "Company fundamentals report"),
+)
+RISK_REPORT_LABELS = (
+    ("market_report", "Market Research Report"),
+    ("sentiment_report", "Social Media Sentiment Report"),
+    ("news_report", "Latest World Affairs Report"),
+    ("fundamentals_report", "Company Fundamentals Report"),
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token for English prose)."""
+    return len(text or "") // 4
+
+
+class ReportCompactor:
+    """
+    Bounds what downstream nodes put into their prompts.
+
+    - `create_brief_node()` runs once after the analysts and condenses the four
+      reports into a structured brief of at most `max_brief_words` words.
+    - `format_reports()` gives debate prompts the brief instead of the raw reports.
+    - `history()` keeps debate history under `history_budget_chars` by folding
+      older turns into a rolling summary (an LLM call only when over budget).
+
+    Prompt characters before/after compaction are counted per run so the
+    saving shows up in the run instrumentation.
+    """
+
+    def __init__(self, llm, max_brief_words: int = 400, history_budget_chars: int = 6000):
+        self.llm = llm
+        self.max_brief_words = max_brief_words
+        self.history_budget_chars = history_budget_chars
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    # Statistics
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats = {"raw_chars": 0, "compacted_chars": 0, "history_summaries": 0}
+
+    def _count(self, raw: str, used: str):
+        with self._lock:
+            self._stats["raw_chars"] += len(raw)
+            self._stats["compacted_chars"] += len(used)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["raw_tokens_est"] = stats.pop("raw_chars") // 4
+        stats["compacted_tokens_est"] = stats.pop("compacted_chars") // 4
+        stats["saved_tokens_est"] = stats["raw_tokens_est"] - stats["compacted_tokens_est"]
+        return stats
+
+    # Brief
+
+    def create_brief_node(self):
+        def report_compactor_node(state) -> dict:
+            reports, prompt = self._brief_prompt(state)
+            return self._brief_update(reports, self.llm.invoke(prompt).content)
+
+        async def areport_compactor_node(state, config) -> dict:
+            reports, prompt = self._brief_prompt(state)
+            return self._brief_update(reports, (await self.llm.ainvoke(prompt, config=config)).content)
+
+        return RunnableLambda(report_compactor_node, afunc=areport_compactor_node)
+
+    def _brief_prompt(self, state) -> Tuple[str, str]:
+        reports = "\n\n".join(
+            f"## {label}\n{state.get(key) or 'Not available.'}"
+            for key, label in RESEARCH_REPORT_LABELS
+        )
+
+        prompt = f"""You are preparing a research brief for a team of traders debating {state["company_of_interest"]} on {state["trade_date"]}. Condense the analyst reports below into at most {self.max_brief_words} words using exactly these sections:
+
+Key Metrics: the decisive numbers (price levels, indicator readings, valuation, growth, margins), with values.
+Catalysts: upcoming or recent events that could move the stock up.
+Risks: concrete threats and negative signals.
+Sentiment: the prevailing social and news tone, in one or two sentences.
+Bottom Line: what the evidence, taken together, points to.
+
+Keep figures exact, drop narrative and repetition, and do not add information that is not in the reports.
+
+{reports}"""
+        return reports, prompt
+
+    def _brief_update(self, reports: str, brief: str) -> dict:
+        # Hard bound in case the model overruns the word limit
+        words = brief.split()
+        if len(words) > self.max_brief_words * 1.25:
+            brief = " ".join(words[: int(self.max_brief_words * 1.25)]) + " ..."
+
+        return {
+            "research_brief": brief,
+            "compaction_stats": {
+                "raw_report_tokens_est": estimate_tokens(reports),
+                "brief_tokens_est": estimate_tokens(brief),
+            },
+        }
+
+    # Prompt inputs
+
+    def format_reports(self, state, labels) -> str:
+        raw = format_reports(state, labels)
+        brief = state.get("research_brief")
+        if not brief:
+            return raw
+        used = f"Research brief (condensed from the analyst reports):\n{brief}"
+        self._count(raw, used)
+        return used
+
+    def history(self, debate_state) -> Tuple[str, Dict]:
+        """
+        Debate history for a prompt, plus the summary fields to carry forward.
+
+        Returns:
+            (history text, dict of history_summary/summarized_upto updates)
+        """
+        history, summary, upto, tail, cut = self._split_history(debate_state)
+        if cut > 0:
+            summary = self.llm.invoke(self._summary_prompt(summary, tail[:cut])).content
+        return self._history_result(history, summary, upto, tail, cut)
+
+    async def ahistory(self, debate_state, config=None) -> Tuple[str, Dict]:
+        """Async variant of `history()`; `config` carries the caller's callbacks."""
+        history, summary, upto, tail, cut = self._split_history(debate_state)
+        if cut > 0:
+            summary = (await self.llm.ainvoke(self._summary_prompt(summary, tail[:cut]), config=config)).content
+        return self._history_result(history, summary, upto, tail, cut)
+
+    def _split_history(self, debate_state):
+        """Unsummarized tail of the history, and where to cut it (0 when within budget)."""
+        history = debate_state.get("history", "")
+        summary = debate_state.get("history_summary", "")
+        upto = debate_state.get("summarized_upto", 0)
+        tail = history[upto:]
+
+        cut = 0
+        if len(tail) > self.history_budget_chars:
+            # Fold everything except the most recent half-budget into the summary,
+            # cutting on a line boundary so the kept turns stay intact
+            cut = tail.find("\n", len(tail) - self.history_budget_chars // 2)
+        return history, summary, upto, tail, cut
+
+    def _history_result(self, history, summary, upto, tail, cut) -> Tuple[str, Dict]:
+        if cut > 0:
+            upto += cut
+            tail = tail[cut:]
+            with self._lock:
+                self._stats["history_summaries"] += 1
+
+        used = f"(Summary of earlier debate) {summary}\n{tail}" if summary else tail
+        self._count(history, used)
+        return used, {"history_summary": summary, "summarized_upto": upto}
+
+    def _summary_prompt(self, summary: str, turns: str) -> str:
+        return f"""Update the running summary of a trading debate with the new turns below. Keep each speaker's strongest arguments and any figures they cite, note points of agreement and open disagreements, and stay under 250 words.
+
+Current summary:
+{summary or "(none)"}
+
+New turns:
+{turns}"""
+
+
+def format_reports(state, labels) -> str:
+    """The raw analyst reports as labelled prompt lines."""
+    return "\n".join(f"{label}: {state[key]}" for key, label in labels)
+
+
+def reports_for_prompt(state, labels, compactor: Optional[ReportCompactor] = None) -> str:
+    """Reports section of a prompt: the brief when compaction is on, else the raw reports."""
+    if compactor is None:
+        return format_reports(state, labels)
+    return compactor.format_reports(state, labels)
+
+
+def history_for_prompt(debate_state, compactor: Optional[ReportCompactor] = None) -> Tuple[str, Dict]:
+    """Debate history for a prompt, and the summary fields to store back on the debate state."""
+    if compactor is None:
+        return debate_state.get("history", ""), {}
+    return compactor.history(debate_state)
+
+
+async def ahistory_for_prompt(
+    debate_state, compactor: Optional[ReportCompactor] = None, config=None
+) -> Tuple[str, Dict]:
+    """Async variant of `history_for_prompt()`."""
+    if compactor is None:
+        return debate_state.get("history", ""), {}
+    return await compactor.ahistory(debate_state, config)
@@ -1,9 +1,9 @@
-from langchain_core.tools import tool
+from tradingagents.agents.utils.tool_utils import vendor_tool
 from typing import Annotated
 from tradingagents.dataflows.interface import route_to_vendor
 
 
-@tool
+@vendor_tool
 def get_stock_data(
     symbol: Annotated[str, "ticker symbol of the company"],
     start_date: Annotated[str, "Start date in yyyy-mm-dd format"],
@@ -1,9 +1,9 @@
-from langchain_core.tools import tool
+from tradingagents.agents.utils.tool_utils import vendor_tool
 from typing import Annotated
 from tradingagents.dataflows.interface import route_to_vendor
 
 
-@tool
+@vendor_tool
 def get_fundamentals(
     ticker: Annotated[str, "ticker symbol"],
     curr_date: Annotated[str, "current date you are trading at, yyyy-mm-dd"],
@@ -20,7 +20,7 @@ def get_fundamentals(
     return route_to_vendor("get_fundamentals", ticker, curr_date)
 
 
-@tool
+@vendor_tool
 def get_balance_sheet(
     ticker: Annotated[str, "ticker symbol"],
     freq: Annotated[str, "reporting frequency: annual/quarterly"] = "quarterly",
@@ -39,7 +39,7 @@ def get_balance_sheet(
     return route_to_vendor("get_balance_sheet", ticker, freq, curr_date)
 
 
-@tool
+@vendor_tool
 def get_cashflow(
     ticker: Annotated[str, "ticker symbol"],
     freq: Annotated[str, "reporting frequency: annual/quarterly"] = "quarterly",
@@ -58,7 +58,7 @@ def get_cashflow(
     return route_to_vendor("get_cashflow", ticker, freq, curr_date)
 
 
-@tool
+@vendor_tool
 def get_income_statement(
     ticker: Annotated[str, "ticker symbol"],
     freq: Annotated[str, "reporting frequency: annual/quarterly"] = "quarterly",
@@ -1,25 +1,67 @@
+import hashlib
+import json
+
 import chromadb
 from chromadb.config import Settings
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
+
+from tradingagents.cassette import get_cassette
+from tradingagents.rate_governor import embedding_usage, estimate_tokens, governor
+
+
+def situation_id(situation: str, recommendation: str) -> str:
+    """Stable vector-store ID for a (situation, recommendation) memory."""
+    digest = hashlib.sha256(json.dumps([situation, recommendation]).encode("utf-8")).hexdigest()
+    return f"situation-{digest[:32]}"
 
 
 class FinancialSituationMemory:
-    def __init__(self, name, config):
+    def __init__(self, name, config, client=None):
         if config["backend_url"] == "http://localhost:11434/v1":
             self.embedding = "nomic-embed-text"
         else:
             self.embedding = "text-embedding-3-small"
         self.client = OpenAI(base_url=config["backend_url"])
-        self.chroma_client = chromadb.Client(Settings(allow_reset=True))
+        self.async_client = AsyncOpenAI(base_url=config["backend_url"])
+        # Use the injected (shared, persistent) client when provided
+        self.chroma_client = client or chromadb.Client(Settings(allow_reset=True))
         self.situation_collection = self.chroma_client.get_or_create_collection(name=name)
 
     def get_embedding(self, text):
-        """Get OpenAI embedding for a text"""
-        
-        response = self.client.embeddings.create(
-            model=self.embedding, input=text
-        )
-        return response.data[0].embedding
+        """Get OpenAI embedding for a text (recorded/replayed when a cassette is active)"""
+
+        def embed():
+            response = governor.call(
+                self.embedding,
+                lambda: self.client.embeddings.create(model=self.embedding, input=text),
+                tokens=estimate_tokens(text),
+                usage=embedding_usage,
+                vendor="openai",
+            )
+            return response.data[0].embedding
+
+        cassette = get_cassette()
+        if cassette is None:
+            return embed()
+        return cassette.call("embedding", self.embedding, text, embed)
+
+    async def aget_embedding(self, text):
+        """Get OpenAI embedding for a text without blocking the event loop"""
+
+        async def embed():
+            response = await governor.acall(
+                self.embedding,
+                lambda: self.async_client.embeddings.create(model=self.embedding, input=text),
+                tokens=estimate_tokens(text),
+                usage=embedding_usage,
+                vendor="openai",
+            )
+            return response.data[0].embedding
+
+        cassette = get_cassette()
+        if cassette is None:
+            return await embed()
+        return await cassette.acall("embedding", self.embedding, text, embed)
 
     def add_situations(self, situations_and_advice):
         """Add financial situations and their corresponding advice. Parameter is a list of tuples (situation, rec)"""
@@ -29,15 +71,15 @@ class FinancialSituationMemory:
         ids = []
         embeddings = []
 
-        offset = self.situation_collection.count()
-
-        for i, (situation, recommendation) in enumerate(situations_and_advice):
+        for situation, recommendation in situations_and_advice:
             situations.append(situation)
             advice.append(recommendation)
-            ids.append(str(offset + i))
+            ids.append(situation_id(situation, recommendation))
             embeddings.append(self.get_embedding(situation))
 
-        self.situation_collection.add(
+        # Content IDs: graphs sharing the persistent store can't overwrite each
+        # other's memories, and re-adding the same lesson is a no-op
+        self.situation_collection.upsert(
             documents=situations,
             metadatas=[{"recommendation": rec} for rec in advice],
             embeddings=embeddings,
@@ -47,7 +89,14 @@ class FinancialSituationMemory:
     def get_memories(self, current_situation, n_matches=1):
         """Find matching recommendations using OpenAI embeddings"""
         query_embedding = self.get_embedding(current_situation)
+        return self._query(query_embedding, n_matches)
 
+    async def aget_memories(self, current_situation, n_matches=1):
+        """Async variant of get_memories (the embedding call is awaited)"""
+        query_embedding = await self.aget_embedding(current_situation)
+        return self._query(query_embedding, n_matches)
+
+    def _query(self, query_embedding, n_matches):
         results = self.situation_collection.query(
             query_embeddings=[query_embedding],
             n_results=n_matches,
@@ -66,7 +115,6 @@ class FinancialSituationMemory:
 
         return matched_results
 
-
 if __name__ == "__main__":
     # Example usage
     matcher = FinancialSituationMemory()
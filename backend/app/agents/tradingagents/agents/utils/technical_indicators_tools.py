@@ -1,8 +1,8 @@
-from langchain_core.tools import tool
+from tradingagents.agents.utils.tool_utils import vendor_tool
 from typing import Annotated
 from tradingagents.dataflows.interface import route_to_vendor
 
-@tool
+@vendor_tool
 def get_indicators(
     symbol: Annotated[str, "ticker symbol of the company"],
     indicator: Annotated[str, "technical indicator to get the analysis and report of"],
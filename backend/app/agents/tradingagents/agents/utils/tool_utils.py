@@ -0,0 +1,18 @@
+import asyncio
+
+from langchain_core.tools import StructuredTool
+
+
+def vendor_tool(func):
+    """
+    Like `@tool`, but the tool also gets an async variant for `ainvoke`.
+
+    The data vendors (yfinance, Alpha Vantage, Google News, ...) use blocking
+    HTTP clients, so the async variant runs the call on a worker thread. The
+    context is copied, so vendor calls stay attributed to the graph run.
+    """
+
+    async def coroutine(**kwargs):
+        return await asyncio.to_thread(func, **kwargs)
+
+    return StructuredTool.from_function(func=func, coroutine=coroutine)
@@ -0,0 +1,265 @@
+# TradingAgents/cassette.py
+
+"""
+Record/replay cassettes for the external I/O of an analysis run.
+
+In "record" mode every data vendor call (`route_to_vendor`), chat model
+request and embedding request made while the cassette is active is passed
+through and its result, and how long it took, stored under a key derived
+from the call signature. In "replay" mode the same calls are served from the
+cassette without touching the network, sleeping for the recorded latency
+times `latency_scale` (0 = as fast as possible), and a call that was never
+recorded raises CassetteMissError.
+
+A call made several times with the same signature is recorded once per
+call and replayed in the same order (the last recording repeats); each
+activation (`with cassette:` or a graph run) replays from its own cursor,
+so concurrent runs sharing a cassette don't consume each other's
+recordings. The active cassette is context-local (a ContextVar), so it
+follows threads and tasks started from the run and nothing else. Errors
+are recorded too and replayed as RecordedCallError. Cassettes are gzipped
+JSON, so they can be checked in next to benchmarks and tests.
+"""
+
+import asyncio
+import contextlib
+import contextvars
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+CASSETTE_MODES = ("off", "record", "replay")
+CASSETTE_VERSION = 1
+
+
+class CassetteMissError(RuntimeError):
+    """Raised in replay mode when a call has no recording."""
+
+
+class RecordedCallError(RuntimeError):
+    """A call that failed while recording, replayed as a failure."""
+
+
+def _identity(value):
+    return value
+
+
+class Cassette:
+    """Recorded interactions keyed by call kind, name and signature."""
+
+    def __init__(self, path: str, mode: str = "replay", latency_scale: float = 1.0):
+        if mode not in CASSETTE_MODES or mode == "off":
+            raise ValueError(f"Unsupported cassette mode: {mode}")
+
+        self.path = path
+        self.mode = mode
+        self.latency_scale = latency_scale
+        self.recorded = 0
+        self.replayed = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._interactions: Dict[str, List[Dict[str, Any]]] = {}
+        # key -> index of the next recording to replay
+        self._cursor: Dict[str, int] = {}
+        self._dirty = False
+
+        if os.path.exists(path):
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != CASSETTE_VERSION:
+                raise ValueError(f"Unsupported cassette version {data.get('version')} in {path}")
+            self._interactions = data["interactions"]
+        elif mode == "replay":
+            raise FileNotFoundError(f"Cassette not found: {path}")
+
+    @staticmethod
+    def make_key(kind: str, name: str, signature: Any) -> str:
+        payload = json.dumps([kind, name, signature], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _next(self, kind: str, name: str, key: str) -> Dict[str, Any]:
+        cursor = _run_cursor.get()
+        if cursor is None:
+            cursor = self._cursor
+        with self._lock:
+            recordings = self._interactions.get(key)
+            if not recordings:
+                self.misses += 1
+                raise CassetteMissError(f"No recorded {kind} call '{name}' (key {key[:12]}) in {self.path}")
+            index = cursor.get(key, 0)
+            cursor[key] = index + 1
+            self.replayed += 1
+            return recordings[min(index, len(recordings) - 1)]
+
+    def _record(self, key: str, kind: str, name: str, started: float, result: Any = None, error: Optional[BaseException] = None):
+        interaction = {"kind": kind, "name": name, "latency": round(time.perf_counter() - started, 6)}
+        if error is not None:
+            interaction["error"] = f"{type(error).__name__}: {error}"
+        else:
+            interaction["result"] = result
+        with self._lock:
+            self._interactions.setdefault(key, []).append(interaction)
+            self.recorded += 1
+            self._dirty = True
+
+    @staticmethod
+    def _replayed(interaction: Dict[str, Any], decode: Callable[[Any], Any]):
+        if "error" in interaction:
+            raise RecordedCallError(interaction["error"])
+        return decode(interaction["result"])
+
+    def call(
+        self,
+        kind: str,
+        name: str,
+        signature: Any,
+        fn: Callable[[], Any],
+        encode: Callable[[Any], Any] = _identity,
+        decode: Callable[[Any], Any] = _identity,
+    ):
+        """Record `fn()` or replay its recording. `encode`/`decode` convert the result to/from JSON."""
+        key = self.make_key(kind, name, signature)
+        if self.mode == "replay":
+            interaction = self._next(kind, name, key)
+            if self.latency_scale:
+                time.sleep(interaction["latency"] * self.latency_scale)
+            return self._replayed(interaction, decode)
+
+        started = time.perf_counter()
+        try:
+            result = fn()
+        except Exception as e:
+            self._record(key, kind, name, started, error=e)
+            raise
+        self._record(key, kind, name, started, encode(result))
+        return result
+
+    async def acall(
+        self,
+        kind: str,
+        name: str,
+        signature: Any,
+        fn: Callable[[], Any],
+        encode: Callable[[Any], Any] = _identity,
+        decode: Callable[[Any], Any] = _identity,
+    ):
+        """Async `call`; `fn()` returns an awaitable."""
+        key = self.make_key(kind, name, signature)
+        if self.mode == "replay":
+            interaction = self._next(kind, name, key)
+            if self.latency_scale:
+                await asyncio.sleep(interaction["latency"] * self.latency_scale)
+            return self._replayed(interaction, decode)
+
+        started = time.perf_counter()
+        try:
+            result = await fn()
+        except Exception as e:
+            self._record(key, kind, name, started, error=e)
+            raise
+        self._record(key, kind, name, started, encode(result))
+        return result
+
+    def save(self):
+        """Write recordings to disk (no-op when nothing new was recorded)."""
+        with self._lock:
+            if not self._dirty:
+                return
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+                json.dump({"version": CASSETTE_VERSION, "interactions": self._interactions}, f)
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+        logger.info(f"Cassette saved to {self.path} ({self.recorded} new recordings)")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            by_kind: Dict[str, int] = {}
+            for recordings in self._interactions.values():
+                for interaction in recordings:
+                    by_kind[interaction["kind"]] = by_kind.get(interaction["kind"], 0) + 1
+            return {
+                "mode": self.mode,
+                "path": self.path,
+                "recordings": by_kind,
+                "recorded": self.recorded,
+                "replayed": self.replayed,
+                "misses": self.misses,
+            }
+
+    def __enter__(self):
+        self._tokens = getattr(self, "_tokens", [])
+        self._tokens.append(_activate(self))
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _deactivate(self._tokens.pop())
+        if self.mode == "record":
+            self.save()
+
+
+# The cassette in use by this context (vendor routing, chat models and embeddings check
+# it) and the replay cursor of the current activation
+_active: contextvars.ContextVar[Optional[Cassette]] = contextvars.ContextVar("cassette", default=None)
+_run_cursor: contextvars.ContextVar[Optional[Dict[str, int]]] = contextvars.ContextVar("cassette_cursor", default=None)
+_cassettes: Dict[str, Cassette] = {}
+_cassettes_lock = threading.Lock()
+
+
+def get_cassette() -> Optional[Cassette]:
+    return _active.get()
+
+
+def _activate(cassette: Optional[Cassette]):
+    return _active.set(cassette), _run_cursor.set({} if cassette is not None else None)
+
+
+def _deactivate(tokens):
+    active_token, cursor_token = tokens
+    _run_cursor.reset(cursor_token)
+    _active.reset(active_token)
+
+
+@contextlib.contextmanager
+def use_cassette(cassette: Optional[Cassette]):
+    """Make `cassette` active (with a fresh replay cursor) for this block; None keeps the current one."""
+    if cassette is None:
+        yield get_cassette()
+        return
+    tokens = _activate(cassette)
+    try:
+        yield cassette
+    finally:
+        _deactivate(tokens)
+
+
+def configure_cassette(config: Dict[str, Any]) -> Optional[Cassette]:
+    """
+    The cassette configured by `cassette_mode` (one shared instance per file), or None when off.
+
+    Does not activate it: runs wrap themselves in `use_cassette`. "off" leaves
+    any cassette already active in the caller's context (`with Cassette(...)`) alone.
+    """
+    mode = config.get("cassette_mode", "off")
+    if mode == "off":
+        return None
+
+    path = config["cassette_path"]
+    with _cassettes_lock:
+        cassette = _cassettes.get(path)
+        if cassette is None or cassette.mode != mode:
+            cassette = Cassette(path, mode=mode, latency_scale=config.get("cassette_latency_scale", 1.0))
+            _cassettes[path] = cassette
+            logger.info(f"Cassette opened at {path} ({mode})")
+        cassette.latency_scale = config.get("cassette_latency_scale", cassette.latency_scale)
+    return cassette
@@ -1,4 +1,5 @@
 from typing import Annotated
+import time
 
 # Import from vendor-specific modules
 from .local import get_YFin_data, get_finnhub_news, get_finnhub_company_insider_sentiment, get_finnhub_company_insider_transactions, get_simfin_balance_sheet, get_simfin_cashflow, get_simfin_income_statements, get_reddit_global_news, get_reddit_company_news
@@ -19,6 +20,8 @@ from .alpha_vantage_common import AlphaVantageRateLimitError
 
 # Configuration and routing logic
 from .config import get_config
+from tradingagents.instrumentation import record_vendor_call
+from tradingagents.cassette import get_cassette
 
 # Tools organized by category
 TOOLS_CATEGORIES = {
@@ -139,7 +142,17 @@ def get_vendor(category: str, method: str = None) -> str:
     return config.get("data_vendors", {}).get(category, "default")
 
 def route_to_vendor(method: str, *args, **kwargs):
-    """Route method calls to appropriate vendor implementation with fallback support."""
+    """Route method calls to appropriate vendor implementation with fallback support.
+
+    While a cassette is active the call is recorded, or replayed from it.
+    """
+    cassette = get_cassette()
+    if cassette is not None:
+        return cassette.call("vendor", method, [list(args), kwargs], lambda: _route_to_vendor(method, *args, **kwargs))
+    return _route_to_vendor(method, *args, **kwargs)
+
+
+def _route_to_vendor(method: str, *args, **kwargs):
     category = get_category_for_method(method)
     vendor_config = get_vendor(category, method)
 
@@ -197,19 +210,23 @@ def route_to_vendor(method: str, *args, **kwargs):
         # Run methods for this vendor
         vendor_results = []
         for impl_func, vendor_name in vendor_methods:
+            started = time.perf_counter()
             try:
                 print(f"DEBUG: Calling {impl_func.__name__} from vendor '{vendor_name}'...")
                 result = impl_func(*args, **kwargs)
                 vendor_results.append(result)
+                record_vendor_call(method, vendor_name, time.perf_counter() - started, fallback=not is_primary_vendor)
                 print(f"SUCCESS: {impl_func.__name__} from vendor '{vendor_name}' completed successfully")
                     
             except AlphaVantageRateLimitError as e:
+                record_vendor_call(method, vendor_name, time.perf_counter() - started, ok=False, fallback=not is_primary_vendor)
                 if vendor == "alpha_vantage":
                     print(f"RATE_LIMIT: Alpha Vantage rate limit exceeded, falling back to next available vendor")
                     print(f"DEBUG: Rate limit details: {e}")
                 # Continue to next vendor for fallback
                 continue
             except Exception as e:
+                record_vendor_call(method, vendor_name, time.perf_counter() - started, ok=False, fallback=not is_primary_vendor)
                 # Log error but continue with other implementations
                 print(f"FAILED: {impl_func.__name__} from vendor '{vendor_name}' failed: {e}")
                 continue
@@ -13,10 +13,37 @@ DEFAULT_CONFIG = {
     "deep_think_llm": "o4-mini",
     "quick_think_llm": "gpt-4o-mini",
     "backend_url": "https://api.openai.com/v1",
+    # LLM response cache: off, read_write, replay (fail on miss)
+    "llm_cache_mode": "off",
+    "llm_cache_path": os.path.join(
+        os.path.abspath(os.path.join(os.path.dirname(__file__), ".")),
+        "dataflows/data_cache/llm_cache.sqlite",
+    ),
+    "llm_cache_ttl_seconds": 24 * 60 * 60,
+    # Process-wide rate governor: per-model budgets ({"gpt-4o-mini": {"rpm": 500, "tpm": 200000, "max_concurrency": 8}}),
+    # applied to models without an entry too; 0 = unlimited. Rate-limited calls retry with jittered backoff
+    "llm_rate_limits": {},
+    "llm_rate_default_limits": {"rpm": 0, "tpm": 0, "max_concurrency": 0},
+    "llm_rate_max_retries": 4,
+    "llm_rate_backoff_seconds": 1.0,
+    # Record/replay cassette for vendor, LLM and embedding calls: off, record, replay (offline; fails on miss)
+    "cassette_mode": "off",
+    "cassette_path": os.path.join(
+        os.path.abspath(os.path.join(os.path.dirname(__file__), ".")),
+        "dataflows/data_cache/cassette.json.gz",
+    ),
+    # Replayed calls sleep for their recorded latency times this (0 = no delay)
+    "cassette_latency_scale": 1.0,
     # Debate and discussion settings
     "max_debate_rounds": 1,
     "max_risk_discuss_rounds": 1,
     "max_recur_limit": 100,
+    # Risk Judge returns decision + confidence via structured output (needs tool-calling support)
+    "structured_risk_judge": True,
+    # Report compaction: "off" (raw reports in every prompt) or "brief" (condensed brief + rolling debate summaries)
+    "report_compaction": "off",
+    "compaction_brief_words": 400,
+    "compaction_history_chars": 6000,
     # Data vendor configuration
     # Category-level configuration (default for all tools in category)
     "data_vendors": {
@@ -0,0 +1,135 @@
+# TradingAgents/graph/llm_cache.py
+
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.load import dumps, loads
+
+logger = logging.getLogger(__name__)
+
+CACHE_MODES = ("off", "read_write", "replay")
+
+
+class LLMCacheMissError(RuntimeError):
+    """Raised in replay mode when a call has no recorded response."""
+
+
+class LLMResponseCache(BaseCache):
+    """
+    Exact-match, persistent cache for chat model responses.
+
+    Plugged into the quick/deep chat models through LangChain's `cache`
+    hook, so every `invoke` (including tool-bound and structured-output
+    calls) is covered. The key is a SHA-256 of the model's `llm_string`
+    (model name, params, bound tools) and the serialized messages.
+
+    Modes:
+    - "read_write": serve hits younger than the TTL, record misses
+    - "replay": serve recorded responses regardless of age and raise
+      LLMCacheMissError on a miss, so tests and benchmarks never hit the API
+    """
+
+    def __init__(self, path: str, mode: str = "read_write", ttl_seconds: Optional[int] = None):
+        if mode not in CACHE_MODES or mode == "off":
+            raise ValueError(f"Unsupported LLM cache mode: {mode}")
+
+        self.path = path
+        self.mode = mode
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            " key TEXT PRIMARY KEY,"
+            " llm_string TEXT NOT NULL,"
+            " response TEXT NOT NULL,"
+            " created_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(prompt: str, llm_string: str) -> str:
+        return hashlib.sha256(f"{llm_string}\x00{prompt}".encode("utf-8")).hexdigest()
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        key = self.make_key(prompt, llm_string)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, created_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+
+        if row is not None and self.mode != "replay" and self.ttl_seconds:
+            if time.time() - row[1] > self.ttl_seconds:
+                row = None
+
+        if row is None:
+            self.misses += 1
+            if self.mode == "replay":
+                raise LLMCacheMissError(f"No recorded LLM response for key {key[:12]} in {self.path}")
+            return None
+
+        self.hits += 1
+        return loads(row[0])
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        key = self.make_key(prompt, llm_string)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, llm_string, response, created_at) VALUES (?, ?, ?, ?)",
+                (key, llm_string, dumps(return_val), time.time()),
+            )
+            self._conn.commit()
+
+    def clear(self, **kwargs: Any) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+            self._conn.commit()
+
+    def purge_expired(self) -> int:
+        """Delete entries older than the TTL. Returns the number removed."""
+        if not self.ttl_seconds:
+            return 0
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM llm_cache WHERE created_at < ?", (time.time() - self.ttl_seconds,)
+            )
+            self._conn.commit()
+        return cursor.rowcount
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        return {"mode": self.mode, "entries": entries, "hits": self.hits, "misses": self.misses}
+
+
+# One cache per file, shared by every graph built in this process
+_caches: Dict[str, LLMResponseCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_llm_cache(config: Dict[str, Any]) -> Optional[LLMResponseCache]:
+    """Get the LLM cache configured by `llm_cache_mode`, or None when off."""
+    mode = config.get("llm_cache_mode", "off")
+    if mode == "off":
+        return None
+
+    path = config["llm_cache_path"]
+    with _caches_lock:
+        cache = _caches.get(path)
+        if cache is None or cache.mode != mode:
+            cache = LLMResponseCache(path, mode=mode, ttl_seconds=config.get("llm_cache_ttl_seconds"))
+            _caches[path] = cache
+            logger.info(f"LLM cache opened at {path} ({mode})")
+    return cache
@@ -7,6 +7,7 @@ from langgraph.prebuilt import ToolNode
 
 from tradingagents.agents import *
 from tradingagents.agents.utils.agent_states import AgentState
+from tradingagents.agents.utils.compaction import ReportCompactor
 
 from .conditional_logic import ConditionalLogic
 
@@ -25,6 +26,8 @@ class GraphSetup:
         invest_judge_memory,
         risk_manager_memory,
         conditional_logic: ConditionalLogic,
+        structured_risk_judge: bool = True,
+        compactor: ReportCompactor = None,
     ):
         """Initialize with required components."""
         self.quick_thinking_llm = quick_thinking_llm
@@ -36,6 +39,8 @@ class GraphSetup:
         self.invest_judge_memory = invest_judge_memory
         self.risk_manager_memory = risk_manager_memory
         self.conditional_logic = conditional_logic
+        self.structured_risk_judge = structured_risk_judge
+        self.compactor = compactor
 
     def setup_graph(
         self, selected_analysts=["market", "social", "news", "fundamentals"]
@@ -87,22 +92,22 @@ class GraphSetup:
 
         # Create researcher and manager nodes
         bull_researcher_node = create_bull_researcher(
-            self.quick_thinking_llm, self.bull_memory
+            self.quick_thinking_llm, self.bull_memory, self.compactor
         )
         bear_researcher_node = create_bear_researcher(
-            self.quick_thinking_llm, self.bear_memory
+            self.quick_thinking_llm, self.bear_memory, self.compactor
         )
         research_manager_node = create_research_manager(
-            self.deep_thinking_llm, self.invest_judge_memory
+            self.deep_thinking_llm, self.invest_judge_memory, self.compactor
         )
         trader_node = create_trader(self.quick_thinking_llm, self.trader_memory)
 
         # Create risk analysis nodes
-        risky_analyst = create_risky_debator(self.quick_thinking_llm)
-        neutral_analyst = create_neutral_debator(self.quick_thinking_llm)
-        safe_analyst = create_safe_debator(self.quick_thinking_llm)
+        risky_analyst = create_risky_debator(self.quick_thinking_llm, self.compactor)
+        neutral_analyst = create_neutral_debator(self.quick_thinking_llm, self.compactor)
+        safe_analyst = create_safe_debator(self.quick_thinking_llm, self.compactor)
         risk_manager_node = create_risk_manager(
-            self.deep_thinking_llm, self.risk_manager_memory
+            self.deep_thinking_llm, self.risk_manager_memory, self.structured_risk_judge, self.compactor
         )
 
         # Create workflow
@@ -116,6 +121,10 @@ class GraphSetup:
             )
             workflow.add_node(f"tools_{analyst_type}", tool_nodes[analyst_type])
 
+        # Condense the analyst reports once for all downstream prompts
+        if self.compactor is not None:
+            workflow.add_node("Report Compactor", self.compactor.create_brief_node())
+
         # Add other nodes
         workflow.add_node("Bull Researcher", bull_researcher_node)
         workflow.add_node("Bear Researcher", bear_researcher_node)
@@ -145,10 +154,13 @@ class GraphSetup:
             )
             workflow.add_edge(current_tools, current_analyst)
 
-            # Connect to next analyst or to Bull Researcher if this is the last analyst
+            # Connect to next analyst or to Bull Researcher (via the compactor) if this is the last analyst
             if i < len(selected_analysts) - 1:
                 next_analyst = f"{selected_analysts[i+1].capitalize()} Analyst"
                 workflow.add_edge(current_clear, next_analyst)
+            elif self.compactor is not None:
+                workflow.add_edge(current_clear, "Report Compactor")
+                workflow.add_edge("Report Compactor", "Bull Researcher")
             else:
                 workflow.add_edge(current_clear, "Bull Researcher")
 
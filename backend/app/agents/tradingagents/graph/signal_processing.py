@@ -1,7 +1,65 @@
 # TradingAgents/graph/signal_processing.py
 
+import re
+from typing import Any, Dict, Optional, Tuple
+
 from langchain_openai import ChatOpenAI
 
+DECISIONS = ("BUY", "HOLD", "SELL")
+
+# FINAL TRANSACTION PROPOSAL: **BUY** (bold and case optional). A decision followed by
+# "/" or "|" is the prompt's template echoed back ("**BUY/HOLD/SELL**"), not a decision
+_MARKER_RE = re.compile(r"FINAL\s+TRANSACTION\s+PROPOSAL\s*:?\s*\**\s*(BUY|HOLD|SELL)\b(?!\s*[/|])", re.IGNORECASE)
+# Stand-alone bold decision, e.g. "Recommendation: **Sell**"
+_BOLD_RE = re.compile(r"\*\*\s*(BUY|HOLD|SELL)\s*\*\*", re.IGNORECASE)
+# CONFIDENCE: 0.8 / Confidence: 80% / confidence = **0.75** / Confidence: 8/10
+# (not a range such as the prompt's "<0.0-1.0>")
+_CONFIDENCE_RE = re.compile(
+    r"CONFIDENCE\s*(?:LEVEL)?\s*[:=]\s*\**\s*(\d+(?:\.\d+)?)(?!\.?\d)\s*(?:(%)|/\s*(10|100)\b)?(?!\s*-\s*\d)",
+    re.IGNORECASE,
+)
+
+
+def parse_signal(full_signal: str) -> Tuple[Optional[str], Optional[float]]:
+    """
+    Deterministically extract (decision, confidence) from a decision text.
+
+    The last FINAL TRANSACTION PROPOSAL marker wins. Without a marker, a
+    bold BUY/HOLD/SELL is used only if every bold decision agrees. Decision
+    is None when the text is ambiguous; confidence is None when not stated.
+    """
+    if not full_signal:
+        return None, None
+
+    decision = None
+    markers = _MARKER_RE.findall(full_signal)
+    if markers:
+        decision = markers[-1].upper()
+    else:
+        bold = {d.upper() for d in _BOLD_RE.findall(full_signal)}
+        if len(bold) == 1:
+            decision = bold.pop()
+
+    confidence = None
+    matches = _CONFIDENCE_RE.findall(full_signal)
+    if matches:
+        confidence = _parse_confidence(*matches[-1])
+
+    return decision, confidence
+
+
+def _parse_confidence(value: str, percent: str, denominator: str) -> Optional[float]:
+    """0-1 confidence from a number, a percentage or an x/10 (x/100) score; None when unclear."""
+    number = float(value)
+    if denominator:
+        number /= float(denominator)
+    elif percent or 10.0 < number <= 100.0:
+        number /= 100.0
+    elif number > 1.0:
+        # e.g. 1.5 or 7: neither a fraction nor clearly a percentage (7 could be 7/10)
+        return None
+    return min(max(number, 0.0), 1.0)
+
 
 class SignalProcessor:
     """Processes trading signals to extract actionable decisions."""
@@ -10,22 +68,86 @@ class SignalProcessor:
         """Initialize with an LLM for processing."""
         self.quick_thinking_llm = quick_thinking_llm
 
-    def process_signal(self, full_signal: str) -> str:
+    def extract_signal(
+        self,
+        full_signal: str,
+        structured: Optional[Dict[str, Any]] = None,
+        config=None,
+    ) -> Dict[str, Any]:
+        """
+        Get the decision and confidence for a final trade decision.
+
+        Uses the Risk Judge's structured output when present, then the text
+        markers, and only calls the LLM when the text is ambiguous.
+
+        Args:
+            full_signal: Complete trading signal text
+            structured: Structured decision from the Risk Judge, if any
+            config: Optional runnable config for the LLM fallback
+
+        Returns:
+            Dict with decision (BUY/SELL/HOLD or None), confidence (float or
+            None) and source ("structured", "parsed" or "llm")
+        """
+        signal = self._deterministic_signal(full_signal, structured)
+        if signal["decision"] is not None:
+            return signal
+
+        decision = self.process_signal(full_signal, config=config).strip().upper()
+        return {**signal, "decision": decision if decision in DECISIONS else None}
+
+    async def aextract_signal(
+        self,
+        full_signal: str,
+        structured: Optional[Dict[str, Any]] = None,
+        config=None,
+    ) -> Dict[str, Any]:
+        """Async variant of `extract_signal()`."""
+        signal = self._deterministic_signal(full_signal, structured)
+        if signal["decision"] is not None:
+            return signal
+
+        decision = (await self.aprocess_signal(full_signal, config=config)).strip().upper()
+        return {**signal, "decision": decision if decision in DECISIONS else None}
+
+    def _deterministic_signal(self, full_signal: str, structured: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Structured or parsed signal; decision is None (source "llm") when the LLM must decide."""
+        if structured and structured.get("decision") in DECISIONS:
+            return {
+                "decision": structured["decision"],
+                "confidence": structured.get("confidence"),
+                "source": "structured",
+            }
+
+        decision, confidence = parse_signal(full_signal)
+        return {
+            "decision": decision,
+            "confidence": confidence,
+            "source": "parsed" if decision is not None else "llm",
+        }
+
+    def process_signal(self, full_signal: str, config=None) -> str:
         """
-        Process a full trading signal to extract the core decision.
+        Process a full trading signal to extract the core decision with the LLM.
 
         Args:
             full_signal: Complete trading signal text
+            config: Optional runnable config (e.g. instrumentation callbacks)
 
         Returns:
             Extracted decision (BUY, SELL, or HOLD)
         """
-        messages = [
+        return self.quick_thinking_llm.invoke(self._messages(full_signal), config=config).content
+
+    async def aprocess_signal(self, full_signal: str, config=None) -> str:
+        """Async variant of `process_signal()`."""
+        return (await self.quick_thinking_llm.ainvoke(self._messages(full_signal), config=config)).content
+
+    def _messages(self, full_signal: str):
+        return [
             (
                 "system",
                 "You are an efficient assistant designed to analyze paragraphs or financial reports provided by a group of analysts. Your task is to extract the investment decision: SELL, BUY, or HOLD. Provide only the extracted decision (SELL, BUY, or HOLD) as your output, without adding any additional text or information.",
             ),
             ("human", full_signal),
         ]
-
-        return self.quick_thinking_llm.invoke(messages).content
@@ -21,6 +21,10 @@ from tradingagents.agents.utils.agent_states import (
     RiskDebateState,
 )
 from tradingagents.dataflows.config import set_config
+from tradingagents.instrumentation import GraphInstrumentation
+from tradingagents.rate_governor import configure_governor, governed
+from tradingagents.cassette import configure_cassette, use_cassette
+from tradingagents.agents.utils.compaction import COMPACTION_MODES, ReportCompactor
 
 # Import the new abstract tool methods from agent_utils
 from tradingagents.agents.utils.agent_utils import (
@@ -41,6 +45,7 @@ from .setup import GraphSetup
 from .propagation import Propagator
 from .reflection import Reflector
 from .signal_processing import SignalProcessor
+from .llm_cache import get_llm_cache
 
 
 class TradingAgentsGraph:
@@ -51,6 +56,7 @@ class TradingAgentsGraph:
         selected_analysts=["market", "social", "news", "fundamentals"],
         debug=False,
         config: Dict[str, Any] = None,
+        memory_client=None,
     ):
         """Initialize the trading agents graph and components.
 
@@ -58,6 +64,7 @@ class TradingAgentsGraph:
             selected_analysts: List of analyst types to include
             debug: Whether to run in debug mode
             config: Configuration dictionary. If None, uses default config
+            memory_client: Shared vector store client for agent memories. If None, memories are in-process only
         """
         self.debug = debug
         self.config = config or DEFAULT_CONFIG
@@ -71,29 +78,49 @@ class TradingAgentsGraph:
             exist_ok=True,
         )
 
-        # Initialize LLMs
+        # Record/replay vendor, LLM and embedding calls when a cassette is configured
+        # (active only during this graph's runs)
+        self.cassette = configure_cassette(self.config)
+
+        # Initialize LLMs (optionally behind the exact-match response cache); API calls
+        # go through the process-wide rate governor
+        configure_governor(self.config)
+        self.llm_cache = get_llm_cache(self.config)
+        llm_kwargs = {"cache": self.llm_cache} if self.llm_cache else {}
         if self.config["llm_provider"].lower() == "openai" or self.config["llm_provider"] == "ollama" or self.config["llm_provider"] == "openrouter":
-            self.deep_thinking_llm = ChatOpenAI(model=self.config["deep_think_llm"], base_url=self.config["backend_url"])
-            self.quick_thinking_llm = ChatOpenAI(model=self.config["quick_think_llm"], base_url=self.config["backend_url"])
+            self.deep_thinking_llm = governed(ChatOpenAI)(model=self.config["deep_think_llm"], base_url=self.config["backend_url"], **llm_kwargs)
+            self.quick_thinking_llm = governed(ChatOpenAI)(model=self.config["quick_think_llm"], base_url=self.config["backend_url"], **llm_kwargs)
         elif self.config["llm_provider"].lower() == "anthropic":
-            self.deep_thinking_llm = ChatAnthropic(model=self.config["deep_think_llm"], base_url=self.config["backend_url"])
-            self.quick_thinking_llm = ChatAnthropic(model=self.config["quick_think_llm"], base_url=self.config["backend_url"])
+            self.deep_thinking_llm = governed(ChatAnthropic)(model=self.config["deep_think_llm"], base_url=self.config["backend_url"], **llm_kwargs)
+            self.quick_thinking_llm = governed(ChatAnthropic)(model=self.config["quick_think_llm"], base_url=self.config["backend_url"], **llm_kwargs)
         elif self.config["llm_provider"].lower() == "google":
-            self.deep_thinking_llm = ChatGoogleGenerativeAI(model=self.config["deep_think_llm"])
-            self.quick_thinking_llm = ChatGoogleGenerativeAI(model=self.config["quick_think_llm"])
+            self.deep_thinking_llm = governed(ChatGoogleGenerativeAI)(model=self.config["deep_think_llm"], **llm_kwargs)
+            self.quick_thinking_llm = governed(ChatGoogleGenerativeAI)(model=self.config["quick_think_llm"], **llm_kwargs)
         else:
             raise ValueError(f"Unsupported LLM provider: {self.config['llm_provider']}")
         
         # Initialize memories
-        self.bull_memory = FinancialSituationMemory("bull_memory", self.config)
-        self.bear_memory = FinancialSituationMemory("bear_memory", self.config)
-        self.trader_memory = FinancialSituationMemory("trader_memory", self.config)
-        self.invest_judge_memory = FinancialSituationMemory("invest_judge_memory", self.config)
-        self.risk_manager_memory = FinancialSituationMemory("risk_manager_memory", self.config)
+        self.bull_memory = FinancialSituationMemory("bull_memory", self.config, memory_client)
+        self.bear_memory = FinancialSituationMemory("bear_memory", self.config, memory_client)
+        self.trader_memory = FinancialSituationMemory("trader_memory", self.config, memory_client)
+        self.invest_judge_memory = FinancialSituationMemory("invest_judge_memory", self.config, memory_client)
+        self.risk_manager_memory = FinancialSituationMemory("risk_manager_memory", self.config, memory_client)
 
         # Create tool nodes
         self.tool_nodes = self._create_tool_nodes()
 
+        # Report compaction: condensed brief + rolling debate summaries for downstream prompts
+        compaction_mode = self.config.get("report_compaction", "off")
+        if compaction_mode not in COMPACTION_MODES:
+            raise ValueError(f"Unsupported report compaction mode: {compaction_mode}")
+        self.compactor = None
+        if compaction_mode == "brief":
+            self.compactor = ReportCompactor(
+                self.quick_thinking_llm,
+                max_brief_words=self.config.get("compaction_brief_words", 400),
+                history_budget_chars=self.config.get("compaction_history_chars", 6000),
+            )
+
         # Initialize components
         self.conditional_logic = ConditionalLogic()
         self.graph_setup = GraphSetup(
@@ -106,6 +133,8 @@ class TradingAgentsGraph:
             self.invest_judge_memory,
             self.risk_manager_memory,
             self.conditional_logic,
+            structured_risk_judge=self.config.get("structured_risk_judge", True),
+            compactor=self.compactor,
         )
 
         self.propagator = Propagator()
@@ -116,6 +145,8 @@ class TradingAgentsGraph:
         self.curr_state = None
         self.ticker = None
         self.log_states_dict = {}  # date to full state dict
+        self.last_run_metrics = None
+        self.last_signal = None
 
         # Set up the graph
         self.graph = self.graph_setup.setup_graph(selected_analysts)
@@ -157,9 +188,100 @@ class TradingAgentsGraph:
             ),
         }
 
-    def propagate(self, company_name, trade_date):
-        """Run the trading agents graph for a company on a specific date."""
+    def propagate(self, company_name, trade_date, on_update=None):
+        """Run the trading agents graph for a company on a specific date.
 
+        The parsed decision and confidence are left in `self.last_signal`, and
+        per-node/tool/vendor timings and token counts in `self.last_run_metrics`.
+
+        Args:
+            company_name: Ticker to analyze
+            trade_date: Analysis date
+            on_update: Optional callable(node_name, state_update) invoked as
+                each graph node completes, for streaming progress
+        """
+        init_agent_state, args, instrumentation = self._start_run(company_name, trade_date)
+
+        with use_cassette(self.cassette) as cassette, instrumentation:
+            if self.debug:
+                # Debug mode with tracing
+                trace = []
+                for chunk in self.graph.stream(init_agent_state, **args):
+                    if len(chunk["messages"]) == 0:
+                        pass
+                    else:
+                        chunk["messages"][-1].pretty_print()
+                        trace.append(chunk)
+
+                final_state = trace[-1]
+            elif on_update is not None:
+                # Streaming mode: per-node updates to the callback, full state kept
+                final_state = None
+                for mode, chunk in self.graph.stream(
+                    init_agent_state, config=args["config"], stream_mode=["updates", "values"]
+                ):
+                    if mode == "values":
+                        final_state = chunk
+                        continue
+                    for node, update in chunk.items():
+                        on_update(node, update)
+            else:
+                # Standard mode without tracing
+                final_state = self.graph.invoke(init_agent_state, **args)
+
+            # Deterministic unless the decision text is ambiguous (then one LLM call)
+            self.last_signal = self.signal_processor.extract_signal(
+                final_state["final_trade_decision"],
+                structured=final_state.get("final_trade_signal"),
+                config=self._signal_config(instrumentation),
+            )
+
+        return self._finish_run(trade_date, final_state, instrumentation, cassette)
+
+    async def apropagate(self, company_name, trade_date, on_update=None):
+        """Async variant of `propagate()`, running the graph on the event loop.
+
+        LLM and embedding calls are awaited; data vendor tools run on worker
+        threads. `on_update` is called on the event loop. The async nodes pass
+        their `config` on explicitly, since callbacks don't follow `ainvoke`
+        through the context before Python 3.11.
+        """
+        init_agent_state, args, instrumentation = self._start_run(company_name, trade_date)
+
+        with use_cassette(self.cassette) as cassette, instrumentation:
+            if self.debug:
+                trace = []
+                async for chunk in self.graph.astream(init_agent_state, **args):
+                    if len(chunk["messages"]) == 0:
+                        pass
+                    else:
+                        chunk["messages"][-1].pretty_print()
+                        trace.append(chunk)
+
+                final_state = trace[-1]
+            elif on_update is not None:
+                final_state = None
+                async for mode, chunk in self.graph.astream(
+                    init_agent_state, config=args["config"], stream_mode=["updates", "values"]
+                ):
+                    if mode == "values":
+                        final_state = chunk
+                        continue
+                    for node, update in chunk.items():
+                        on_update(node, update)
+            else:
+                final_state = await self.graph.ainvoke(init_agent_state, **args)
+
+            self.last_signal = await self.signal_processor.aextract_signal(
+                final_state["final_trade_decision"],
+                structured=final_state.get("final_trade_signal"),
+                config=self._signal_config(instrumentation),
+            )
+
+        return self._finish_run(trade_date, final_state, instrumentation, cassette)
+
+    def _start_run(self, company_name, trade_date):
+        """Initial state, graph args and instrumentation for a run."""
         self.ticker = company_name
 
         # Initialize state
@@ -168,20 +290,29 @@ class TradingAgentsGraph:
         )
         args = self.propagator.get_graph_args()
 
-        if self.debug:
-            # Debug mode with tracing
-            trace = []
-            for chunk in self.graph.stream(init_agent_state, **args):
-                if len(chunk["messages"]) == 0:
-                    pass
-                else:
-                    chunk["messages"][-1].pretty_print()
-                    trace.append(chunk)
-
-            final_state = trace[-1]
-        else:
-            # Standard mode without tracing
-            final_state = self.graph.invoke(init_agent_state, **args)
+        instrumentation = GraphInstrumentation()
+        if self.compactor is not None:
+            self.compactor.reset_stats()
+        args["config"] = {**args["config"], "callbacks": [instrumentation]}
+        return init_agent_state, args, instrumentation
+
+    def _signal_config(self, instrumentation):
+        return {"callbacks": [instrumentation], "metadata": {"langgraph_node": "Signal Processor"}}
+
+    def _finish_run(self, trade_date, final_state, instrumentation, cassette=None):
+        """Record metrics and state for a finished run; returns (final_state, decision)."""
+        self.last_run_metrics = instrumentation.summary()
+        self.last_run_metrics["signal_source"] = self.last_signal["source"]
+        if self.compactor is not None:
+            # Raw vs compacted prompt inputs, to compare against the per-node prompt tokens
+            self.last_run_metrics["compaction"] = {
+                **(final_state.get("compaction_stats") or {}),
+                **self.compactor.stats(),
+            }
+        if cassette is not None:
+            if cassette.mode == "record" and cassette is self.cassette:
+                cassette.save()
+            self.last_run_metrics["cassette"] = cassette.stats()
 
         # Store current state for reflection
         self.curr_state = final_state
@@ -190,7 +321,7 @@ class TradingAgentsGraph:
         self._log_state(trade_date, final_state)
 
         # Return decision and processed signal
-        return final_state, self.process_signal(final_state["final_trade_decision"])
+        return final_state, self.last_signal["decision"]
 
     def _log_state(self, trade_date, final_state):
         """Log the final state to a JSON file."""
@@ -252,6 +383,6 @@ class TradingAgentsGraph:
             self.curr_state, returns_losses, self.risk_manager_memory
         )
 
-    def process_signal(self, full_signal):
+    def process_signal(self, full_signal, config=None):
         """Process a signal to extract the core decision."""
-        return self.signal_processor.process_signal(full_signal)
+        return self.signal_processor.process_signal(full_signal, config=config)
@@ -0,0 +1,250 @@
+# TradingAgents/instrumentation.py
+
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+# Instrumentation for the graph run in the current context (copied into
+# LangGraph's worker threads, so vendor calls made by tools are attributed)
+_active: ContextVar[Optional["GraphInstrumentation"]] = ContextVar("graph_instrumentation", default=None)
+
+UNATTRIBUTED = "_graph"
+
+# Process-wide listeners for outbound vendor, LLM and embedding calls, called
+# as fn(vendor, operation, seconds, ok) (e.g. the app's metrics registry)
+_call_listeners: List[Callable[[str, str, float, bool], None]] = []
+
+
+def _node_entry() -> Dict[str, Any]:
+    return {
+        "calls": 0,
+        "wall_seconds": 0.0,
+        "llm_calls": 0,
+        "llm_seconds": 0.0,
+        "prompt_tokens": 0,
+        "completion_tokens": 0,
+        "retries": 0,
+        "errors": 0,
+    }
+
+
+class GraphInstrumentation(BaseCallbackHandler):
+    """
+    Callback handler recording where the time of a graph run goes.
+
+    Per graph node: wall time, LLM time, prompt/completion tokens, retries.
+    Per tool: wall time and errors. Per data vendor (via `route_to_vendor`):
+    call time, errors and fallbacks.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._started = time.perf_counter()
+        self._finished: Optional[float] = None
+        self._runs: Dict[UUID, tuple] = {}
+        self.nodes: Dict[str, Dict[str, Any]] = {}
+        self.tools: Dict[str, Dict[str, Any]] = {}
+        self.vendors: Dict[str, Dict[str, Any]] = {}
+
+    # Context management
+
+    def __enter__(self):
+        self._token = _active.set(self)
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._finished = time.perf_counter()
+        _active.reset(self._token)
+        return False
+
+    # Helpers
+
+    def _node(self, metadata: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        name = (metadata or {}).get("langgraph_node") or UNATTRIBUTED
+        return self.nodes.setdefault(name, _node_entry())
+
+    def _start(self, run_id: UUID, kind: str, key: str):
+        with self._lock:
+            self._runs[run_id] = (kind, key, time.perf_counter())
+
+    def _stop(self, run_id: UUID):
+        with self._lock:
+            run = self._runs.pop(run_id, None)
+        if run is None:
+            return None, None, 0.0
+        kind, key, started = run
+        return kind, key, time.perf_counter() - started
+
+    # Node (chain) callbacks
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, tags=None, metadata=None, **kwargs):
+        node = (metadata or {}).get("langgraph_node")
+        # Only the node runnable itself, not the prompt/LLM chains inside it
+        if node and kwargs.get("name") == node:
+            self._start(run_id, "node", node)
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        kind, node, elapsed = self._stop(run_id)
+        if kind == "node":
+            with self._lock:
+                entry = self.nodes.setdefault(node, _node_entry())
+                entry["calls"] += 1
+                entry["wall_seconds"] += elapsed
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        kind, node, elapsed = self._stop(run_id)
+        if kind == "node":
+            with self._lock:
+                entry = self.nodes.setdefault(node, _node_entry())
+                entry["calls"] += 1
+                entry["errors"] += 1
+                entry["wall_seconds"] += elapsed
+
+    # LLM callbacks
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, tags=None, metadata=None, **kwargs):
+        self._start(run_id, "llm", (metadata or {}).get("langgraph_node") or UNATTRIBUTED)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, parent_run_id=None, tags=None, metadata=None, **kwargs):
+        self._start(run_id, "llm", (metadata or {}).get("langgraph_node") or UNATTRIBUTED)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        kind, node, elapsed = self._stop(run_id)
+        if kind != "llm":
+            return
+        prompt_tokens, completion_tokens = _token_usage(response)
+        with self._lock:
+            entry = self._node({"langgraph_node": node})
+            entry["llm_calls"] += 1
+            entry["llm_seconds"] += elapsed
+            entry["prompt_tokens"] += prompt_tokens
+            entry["completion_tokens"] += completion_tokens
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        kind, node, elapsed = self._stop(run_id)
+        if kind != "llm":
+            return
+        with self._lock:
+            entry = self._node({"langgraph_node": node})
+            entry["llm_calls"] += 1
+            entry["llm_seconds"] += elapsed
+            entry["errors"] += 1
+
+    def on_retry(self, retry_state, *, run_id, parent_run_id=None, **kwargs):
+        with self._lock:
+            run = self._runs.get(run_id) or self._runs.get(parent_run_id)
+            node = run[1] if run and run[0] in ("node", "llm") else UNATTRIBUTED
+            self.nodes.setdefault(node, _node_entry())["retries"] += 1
+
+    # Tool callbacks
+
+    def on_tool_start(self, serialized, input_str, *, run_id, parent_run_id=None, tags=None, metadata=None, **kwargs):
+        name = kwargs.get("name") or (serialized or {}).get("name") or "unknown"
+        self._start(run_id, "tool", name)
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._finish_tool(run_id, error=False)
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._finish_tool(run_id, error=True)
+
+    def _finish_tool(self, run_id: UUID, error: bool):
+        kind, name, elapsed = self._stop(run_id)
+        if kind != "tool":
+            return
+        with self._lock:
+            entry = self.tools.setdefault(name, {"calls": 0, "wall_seconds": 0.0, "errors": 0})
+            entry["calls"] += 1
+            entry["wall_seconds"] += elapsed
+            entry["errors"] += int(error)
+
+    # Vendor calls (reported by route_to_vendor)
+
+    def record_vendor_call(self, method: str, vendor: str, seconds: float, ok: bool, fallback: bool):
+        with self._lock:
+            entry = self.vendors.setdefault(
+                f"{method}:{vendor}", {"calls": 0, "seconds": 0.0, "errors": 0, "fallbacks": 0}
+            )
+            entry["calls"] += 1
+            entry["seconds"] += seconds
+            entry["errors"] += int(not ok)
+            entry["fallbacks"] += int(fallback)
+
+    # Results
+
+    def summary(self) -> Dict[str, Any]:
+        """JSON-serializable breakdown of the run."""
+        finished = self._finished or time.perf_counter()
+        with self._lock:
+            nodes = {name: dict(entry) for name, entry in self.nodes.items()}
+            tools = {name: dict(entry) for name, entry in self.tools.items()}
+            vendors = {name: dict(entry) for name, entry in self.vendors.items()}
+
+        return {
+            "total_seconds": round(finished - self._started, 3),
+            "llm_seconds": round(sum(n["llm_seconds"] for n in nodes.values()), 3),
+            "tool_seconds": round(sum(t["wall_seconds"] for t in tools.values()), 3),
+            "vendor_seconds": round(sum(v["seconds"] for v in vendors.values()), 3),
+            "llm_calls": sum(n["llm_calls"] for n in nodes.values()),
+            "prompt_tokens": sum(n["prompt_tokens"] for n in nodes.values()),
+            "completion_tokens": sum(n["completion_tokens"] for n in nodes.values()),
+            "retries": sum(n["retries"] for n in nodes.values()),
+            "nodes": _rounded(nodes),
+            "tools": _rounded(tools),
+            "vendors": _rounded(vendors),
+        }
+
+
+def add_call_listener(listener: Callable[[str, str, float, bool], None]):
+    """Report every outbound call to `listener` as well."""
+    if listener not in _call_listeners:
+        _call_listeners.append(listener)
+
+
+def remove_call_listener(listener: Callable[[str, str, float, bool], None]):
+    if listener in _call_listeners:
+        _call_listeners.remove(listener)
+
+
+def notify_outbound_call(vendor: str, operation: str, seconds: float, ok: bool = True):
+    """Report an outbound call to the process-wide listeners."""
+    for listener in _call_listeners:
+        listener(vendor, operation, seconds, ok)
+
+
+def record_vendor_call(method: str, vendor: str, seconds: float, ok: bool = True, fallback: bool = False):
+    """Report a vendor call to the listeners and to the active instrumentation, if any."""
+    notify_outbound_call(vendor, method, seconds, ok)
+    instrumentation = _active.get()
+    if instrumentation is not None:
+        instrumentation.record_vendor_call(method, vendor, seconds, ok, fallback)
+
+
+def _token_usage(response) -> tuple:
+    """(prompt, completion) tokens from an LLMResult, across providers."""
+    prompt_tokens = completion_tokens = 0
+    for generations in response.generations:
+        for generation in generations:
+            usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if usage:
+                prompt_tokens += usage.get("input_tokens", 0)
+                completion_tokens += usage.get("output_tokens", 0)
+
+    if not (prompt_tokens or completion_tokens) and response.llm_output:
+        usage = response.llm_output.get("token_usage") or response.llm_output.get("usage") or {}
+        prompt_tokens = usage.get("prompt_tokens", usage.get("input_tokens", 0)) or 0
+        completion_tokens = usage.get("completion_tokens", usage.get("output_tokens", 0)) or 0
+
+    return prompt_tokens, completion_tokens
+
+
+def _rounded(entries: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    return {
+        name: {k: round(v, 3) if isinstance(v, float) else v for k, v in entry.items()}
+        for name, entry in entries.items()
+    }
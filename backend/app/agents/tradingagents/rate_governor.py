@@ -0,0 +1,500 @@
+# TradingAgents/rate_governor.py
+
+"""
+Process-wide rate governor for LLM and embedding API calls.
+
+Every chat model and embedding client in the process shares one governor,
+which enforces per-model requests-per-minute, tokens-per-minute and
+in-flight budgets over a sliding 60s window. Callers that would exceed a
+budget wait in a per-model queue ordered by priority (interactive before
+background, then FIFO) instead of bursting into 429s. A call that is still
+rate limited by the provider puts the whole model into a jittered,
+exponentially growing cool-down and is retried.
+
+Chat models are governed by constructing them through `governed(ChatX)`,
+which only governs real API calls (cache hits pass straight through) and
+also routes them through the active record/replay cassette.
+Priority is taken from the `llm_priority` context, so a scheduler job can
+mark everything it triggers as background.
+"""
+
+import asyncio
+import bisect
+import contextlib
+import contextvars
+import itertools
+import logging
+import random
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+from langchain_core.load import dumps, loads
+from langchain_core.outputs import ChatResult
+
+from tradingagents.cassette import get_cassette
+from tradingagents.instrumentation import notify_outbound_call
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = 0
+BACKGROUND = 10
+
+WINDOW_SECONDS = 60.0
+# Upper bound on a single sleep while queued, so released capacity is noticed quickly
+MAX_POLL_SECONDS = 0.25
+# Wait used when blocked behind another caller rather than a budget
+QUEUE_POLL_SECONDS = 0.02
+
+_priority: contextvars.ContextVar[int] = contextvars.ContextVar("llm_priority", default=INTERACTIVE)
+# Set while inside a governed call, so nested calls (e.g. a default async
+# implementation running the sync one in a thread) are not counted twice
+_inside_governed_call: contextvars.ContextVar[bool] = contextvars.ContextVar("inside_governed_call", default=False)
+
+
+@contextlib.contextmanager
+def llm_priority(priority: int):
+    """Run LLM and embedding calls made in this context at `priority` (lower runs first)."""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+@dataclass
+class ModelLimits:
+    """Budgets for one model; 0 means unlimited."""
+
+    rpm: int = 0
+    tpm: int = 0
+    max_concurrency: int = 0
+
+
+class _ModelState:
+    def __init__(self, limits: ModelLimits):
+        self.limits = limits
+        self.window: deque = deque()  # [admitted_at, tokens] per request in the last minute
+        self.window_tokens = 0
+        self.in_flight = 0
+        self.waiting: list = []  # sorted (priority, seq) tickets
+        self.cooldown_until = 0.0
+        self.requests = 0
+        self.queued = 0
+        self.rate_limited = 0
+        self.retries = 0
+        self.wait_seconds = 0.0
+
+    def prune(self, now: float):
+        while self.window and now - self.window[0][0] >= WINDOW_SECONDS:
+            _, tokens = self.window.popleft()
+            self.window_tokens -= tokens
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token) used until the provider reports usage."""
+    return len(text) // 4 + 1
+
+
+def _on_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+def is_rate_limited(error: BaseException) -> bool:
+    """Whether an exception from a provider SDK is a rate-limit / overload response."""
+    status = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    if status in (429, 529):
+        return True
+    return type(error).__name__ in ("RateLimitError", "ResourceExhausted", "TooManyRequests")
+
+
+def _retry_after(error: BaseException) -> Optional[float]:
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class RateGovernor:
+    """Sliding-window RPM/TPM/concurrency budgets per model, with a priority queue and retries."""
+
+    def __init__(
+        self,
+        limits: Optional[Dict[str, ModelLimits]] = None,
+        default_limits: Optional[ModelLimits] = None,
+        max_retries: int = 4,
+        backoff_seconds: float = 1.0,
+        max_backoff_seconds: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._lock = threading.Lock()
+        self._states: Dict[str, _ModelState] = {}
+        self._seq = itertools.count()
+        self.limits = dict(limits or {})
+        self.default_limits = default_limits or ModelLimits()
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.clock = clock
+
+    def configure(
+        self,
+        limits: Optional[Dict[str, Any]] = None,
+        default_limits: Optional[Any] = None,
+        max_retries: Optional[int] = None,
+        backoff_seconds: Optional[float] = None,
+    ):
+        """Update budgets in place; limits may be ModelLimits or dicts of its fields."""
+        with self._lock:
+            if limits is not None:
+                self.limits = {model: _as_limits(value) for model, value in limits.items()}
+            if default_limits is not None:
+                self.default_limits = _as_limits(default_limits)
+            if max_retries is not None:
+                self.max_retries = max_retries
+            if backoff_seconds is not None:
+                self.backoff_seconds = backoff_seconds
+            for model, state in self._states.items():
+                state.limits = self.limits.get(model, self.default_limits)
+
+    def _state(self, model: str) -> _ModelState:
+        state = self._states.get(model)
+        if state is None:
+            state = self._states[model] = _ModelState(self.limits.get(model, self.default_limits))
+        return state
+
+    # Admission
+
+    def _enqueue(self, model: str, priority: Optional[int]):
+        with self._lock:
+            state = self._state(model)
+            ticket = (_priority.get() if priority is None else priority, next(self._seq))
+            bisect.insort(state.waiting, ticket)
+            return state, ticket
+
+    def _dequeue(self, state: _ModelState, ticket):
+        with self._lock:
+            if ticket in state.waiting:
+                state.waiting.remove(ticket)
+
+    def _try_admit(self, state: _ModelState, ticket, tokens: int):
+        """Admit the ticket (returns its window entry) or return seconds to wait."""
+        with self._lock:
+            now = self.clock()
+            state.prune(now)
+            limits = state.limits
+
+            if state.waiting[0] != ticket:
+                return QUEUE_POLL_SECONDS
+            if now < state.cooldown_until:
+                return state.cooldown_until - now
+            if limits.max_concurrency and state.in_flight >= limits.max_concurrency:
+                return QUEUE_POLL_SECONDS
+            if limits.rpm and len(state.window) >= limits.rpm:
+                return state.window[0][0] + WINDOW_SECONDS - now
+            if limits.tpm and state.window and state.window_tokens + tokens > limits.tpm:
+                # Wait until enough of the window expires (a request larger than the whole budget runs alone)
+                freed = 0
+                for admitted_at, used in state.window:
+                    freed += used
+                    if state.window_tokens - freed + tokens <= limits.tpm:
+                        break
+                return admitted_at + WINDOW_SECONDS - now
+
+            state.waiting.pop(0)
+            entry = [now, tokens]
+            state.window.append(entry)
+            state.window_tokens += tokens
+            state.in_flight += 1
+            state.requests += 1
+            return entry
+
+    def acquire(self, model: str, tokens: int = 0, priority: Optional[int] = None):
+        """
+        Block until `model` has budget for a request of ~`tokens`; returns a handle for `release`.
+
+        Must not be called on an event loop thread: waiting would stall the loop
+        (and with max_concurrency, deadlock it against in-flight `aacquire` holders).
+        Async code uses `aacquire`/`acall`, or runs sync work in `asyncio.to_thread`.
+        """
+        if _on_event_loop():
+            raise RuntimeError(f"Blocking rate governor acquire for {model} on a running event loop; use acall/aacquire")
+        state, ticket = self._enqueue(model, priority)
+        started = self.clock()
+        try:
+            while True:
+                admitted = self._try_admit(state, ticket, tokens)
+                if isinstance(admitted, list):
+                    return self._admitted(state, admitted, started)
+                time.sleep(min(admitted, MAX_POLL_SECONDS))
+        except BaseException:
+            self._dequeue(state, ticket)
+            raise
+
+    async def aacquire(self, model: str, tokens: int = 0, priority: Optional[int] = None):
+        """Async `acquire`: waits without blocking the event loop."""
+        state, ticket = self._enqueue(model, priority)
+        started = self.clock()
+        try:
+            while True:
+                admitted = self._try_admit(state, ticket, tokens)
+                if isinstance(admitted, list):
+                    return self._admitted(state, admitted, started)
+                await asyncio.sleep(min(admitted, MAX_POLL_SECONDS))
+        except BaseException:
+            self._dequeue(state, ticket)
+            raise
+
+    def _admitted(self, state: _ModelState, entry, started: float):
+        waited = self.clock() - started
+        if waited > QUEUE_POLL_SECONDS:
+            with self._lock:
+                state.queued += 1
+                state.wait_seconds += waited
+        return state, entry
+
+    def release(self, handle, used_tokens: Optional[int] = None):
+        """Finish a request, replacing its token estimate with the reported usage."""
+        state, entry = handle
+        with self._lock:
+            state.in_flight -= 1
+            if used_tokens is not None and any(e is entry for e in state.window):
+                state.window_tokens += used_tokens - entry[1]
+                entry[1] = used_tokens
+
+    def _rate_limited(self, model: str, state: _ModelState, attempt: int, error: BaseException) -> float:
+        """Put the model into a jittered exponential cool-down."""
+        delay = min(self.max_backoff_seconds, self.backoff_seconds * 2 ** attempt) * random.uniform(0.5, 1.0)
+        delay = max(delay, _retry_after(error) or 0.0)
+        with self._lock:
+            state.rate_limited += 1
+            state.retries += 1
+            state.cooldown_until = max(state.cooldown_until, self.clock() + delay)
+        logger.warning(f"{model} rate limited (attempt {attempt + 1}); backing off {delay:.1f}s")
+        return delay
+
+    # Governed calls
+
+    def call(
+        self,
+        model: str,
+        fn: Callable[[], Any],
+        tokens: int = 0,
+        usage: Optional[Callable[[Any], Optional[int]]] = None,
+        vendor: str = "llm",
+    ):
+        """Run `fn()` within `model`'s budget, retrying provider rate limits; each attempt is reported as a `vendor` call."""
+        if _inside_governed_call.get():
+            return fn()
+        for attempt in itertools.count():
+            handle = self.acquire(model, tokens)
+            token = _inside_governed_call.set(True)
+            started = time.perf_counter()
+            try:
+                result = fn()
+                notify_outbound_call(vendor, model, time.perf_counter() - started)
+            except Exception as e:
+                notify_outbound_call(vendor, model, time.perf_counter() - started, ok=False)
+                self.release(handle)
+                if not is_rate_limited(e) or attempt >= self.max_retries:
+                    raise
+                self._rate_limited(model, handle[0], attempt, e)
+                continue
+            finally:
+                _inside_governed_call.reset(token)
+            self.release(handle, usage(result) if usage else None)
+            return result
+
+    async def acall(
+        self,
+        model: str,
+        fn: Callable[[], Any],
+        tokens: int = 0,
+        usage: Optional[Callable[[Any], Optional[int]]] = None,
+        vendor: str = "llm",
+    ):
+        """Async `call`; `fn()` returns an awaitable."""
+        if _inside_governed_call.get():
+            return await fn()
+        for attempt in itertools.count():
+            handle = await self.aacquire(model, tokens)
+            token = _inside_governed_call.set(True)
+            started = time.perf_counter()
+            try:
+                result = await fn()
+                notify_outbound_call(vendor, model, time.perf_counter() - started)
+            except Exception as e:
+                notify_outbound_call(vendor, model, time.perf_counter() - started, ok=False)
+                self.release(handle)
+                if not is_rate_limited(e) or attempt >= self.max_retries:
+                    raise
+                self._rate_limited(model, handle[0], attempt, e)
+                continue
+            finally:
+                _inside_governed_call.reset(token)
+            self.release(handle, usage(result) if usage else None)
+            return result
+
+    def utilization(self) -> Dict[str, Dict[str, Any]]:
+        """Current per-model usage against budgets, queue depth and retry counters."""
+        with self._lock:
+            now = self.clock()
+            snapshot = {}
+            for model, state in self._states.items():
+                state.prune(now)
+                limits = state.limits
+                snapshot[model] = {
+                    "rpm": len(state.window),
+                    "rpm_limit": limits.rpm or None,
+                    "rpm_utilization": round(len(state.window) / limits.rpm, 3) if limits.rpm else None,
+                    "tpm": state.window_tokens,
+                    "tpm_limit": limits.tpm or None,
+                    "tpm_utilization": round(state.window_tokens / limits.tpm, 3) if limits.tpm else None,
+                    "in_flight": state.in_flight,
+                    "max_concurrency": limits.max_concurrency or None,
+                    "waiting": len(state.waiting),
+                    "waiting_background": sum(1 for priority, _ in state.waiting if priority >= BACKGROUND),
+                    "cooldown_seconds": round(max(0.0, state.cooldown_until - now), 3),
+                    "requests": state.requests,
+                    "queued": state.queued,
+                    "wait_seconds": round(state.wait_seconds, 3),
+                    "rate_limited": state.rate_limited,
+                    "retries": state.retries,
+                }
+            return snapshot
+
+    def reset(self):
+        with self._lock:
+            self._states.clear()
+
+
+def _as_limits(value) -> ModelLimits:
+    return value if isinstance(value, ModelLimits) else ModelLimits(**value)
+
+
+# Global governor shared by every model in the process
+governor = RateGovernor()
+
+
+def configure_governor(config: Dict[str, Any]):
+    """Apply the `llm_rate_*` keys of a TradingAgents config to the global governor."""
+    governor.configure(
+        limits=config.get("llm_rate_limits"),
+        default_limits=config.get("llm_rate_default_limits"),
+        max_retries=config.get("llm_rate_max_retries"),
+        backoff_seconds=config.get("llm_rate_backoff_seconds"),
+    )
+
+
+# Usage extractors
+
+def message_tokens(messages) -> int:
+    return sum(estimate_tokens(str(message.content)) for message in messages)
+
+
+def chat_usage(result) -> Optional[int]:
+    """Total tokens reported on a ChatResult's messages, if any."""
+    total = 0
+    for generation in result.generations:
+        usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+        if usage:
+            total += usage.get("total_tokens", 0)
+    return total or None
+
+
+def embedding_usage(response) -> Optional[int]:
+    usage = getattr(response, "usage", None)
+    return getattr(usage, "total_tokens", None)
+
+
+def response_usage(response) -> Optional[int]:
+    """Total tokens reported on an OpenAI Responses API response."""
+    usage = getattr(response, "usage", None)
+    return getattr(usage, "total_tokens", None)
+
+
+def encode_chat_result(result: ChatResult) -> str:
+    return dumps(result.generations)
+
+
+def decode_chat_result(data: str) -> ChatResult:
+    return ChatResult(generations=loads(data))
+
+
+class GovernedChatModel:
+    """
+    Mixin routing a chat model's API calls (after the response cache) through
+    the governor, and through the active cassette when recording or replaying.
+    """
+
+    def _governor_key(self) -> str:
+        return getattr(self, "model_name", None) or getattr(self, "model", None) or type(self).__name__
+
+    def _vendor(self) -> str:
+        """Provider name for call metrics, from the integration package (langchain_openai -> openai)."""
+        return type(self).__module__.split(".")[0].replace("langchain_", "")
+
+    def _cassette_signature(self, messages, stop, **kwargs):
+        return [self._get_llm_string(stop=stop, **kwargs), dumps(messages)]
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        generate = super()._generate
+        model = self._governor_key()
+
+        def governed_call():
+            return governor.call(
+                model,
+                lambda: generate(messages, stop=stop, run_manager=run_manager, **kwargs),
+                tokens=message_tokens(messages),
+                usage=chat_usage,
+                vendor=self._vendor(),
+            )
+
+        cassette = get_cassette()
+        if cassette is None:
+            return governed_call()
+        return cassette.call(
+            "llm", model, self._cassette_signature(messages, stop, **kwargs), governed_call,
+            encode=encode_chat_result, decode=decode_chat_result,
+        )
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        agenerate = super()._agenerate
+        model = self._governor_key()
+
+        def governed_call():
+            return governor.acall(
+                model,
+                lambda: agenerate(messages, stop=stop, run_manager=run_manager, **kwargs),
+                tokens=message_tokens(messages),
+                usage=chat_usage,
+                vendor=self._vendor(),
+            )
+
+        cassette = get_cassette()
+        if cassette is None:
+            return await governed_call()
+        return await cassette.acall(
+            "llm", model, self._cassette_signature(messages, stop, **kwargs), governed_call,
+            encode=encode_chat_result, decode=decode_chat_result,
+        )
+
+
+_governed_classes: Dict[type, type] = {}
+
+
+def governed(model_cls: type) -> type:
+    """Subclass of a chat model class whose API calls go through the global governor."""
+    cls = _governed_classes.get(model_cls)
+    if cls is None:
+        # Same name as the original class, so serialized LLM cache keys and run names are unchanged
+        cls = type(model_cls.__name__, (GovernedChatModel, model_cls), {"__module__": model_cls.__module__})
+        _governed_classes[model_cls] = cls
+    return cls
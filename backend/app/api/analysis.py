@@ -2,15 +2,20 @@
 Analysis API endpoints.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Header
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+import json
 import logging
 
 from app.core.database import get_db
 from app.core.security import verify_api_key
+from app.core.metrics import metrics
 from app.models.trading import AnalysisRequest, AnalysisResponse
 from app.services.analysis_service import AnalysisService
+from app.services.analysis_stream import analysis_runs, AnalysisRun
+from tradingagents.rate_governor import governor
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -40,7 +45,8 @@ async def run_analysis(
         result = await service.run_analysis(
             ticker=request.ticker,
             date=request.date,
-            analysts=request.analysts
+            analysts=request.analysts,
+            reuse=not request.force_refresh
         )
         return result
     except Exception as e:
@@ -48,6 +54,71 @@ async def run_analysis(
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
 
 
+def _sse_stream(run: AnalysisRun, after_id: int = 0) -> StreamingResponse:
+    """Stream a run's events as Server-Sent Events (id = event sequence number)."""
+    async def events():
+        async for event in run.follow(after_id):
+            if event is None:
+                yield ": keep-alive\n\n"
+                continue
+            yield f"id: {event['id']}\nevent: {event['event']}\ndata: {json.dumps(event['data'])}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/analysis/stream", dependencies=[Depends(verify_api_key)])
+async def stream_analysis(request: AnalysisRequest):
+    """
+    Run analysis and stream progress as Server-Sent Events.
+    
+    Events:
+    - run_started: {run_id, ticker, ...} (keep run_id to reconnect)
+    - progress: {node, kind, content?} as each node completes; kind is one of
+      report, research_brief, debate_turn, investment_plan, trader_plan,
+      final_decision, node_complete
+    - complete: the full AnalysisResponse
+    - error: {message}
+    
+    The analysis keeps running if the client disconnects; reconnect with
+    GET /analysis/stream/{run_id}.
+    """
+    run = analysis_runs.start(request.ticker, request.date, request.analysts, reuse=not request.force_refresh)
+    return _sse_stream(run)
+
+
+@router.get("/analysis/stream/{run_id}", dependencies=[Depends(verify_api_key)])
+async def resume_analysis_stream(
+    run_id: str,
+    last_event_id: Optional[int] = None,
+    last_event_id_header: Optional[str] = Header(None, alias="Last-Event-ID"),
+):
+    """Resume a streaming analysis, replaying events after Last-Event-ID."""
+    run = analysis_runs.get(run_id)
+    if not run:
+        raise HTTPException(status_code=404, detail="Analysis run not found or expired")
+
+    after_id = last_event_id
+    if after_id is None and last_event_id_header and last_event_id_header.isdigit():
+        after_id = int(last_event_id_header)
+    return _sse_stream(run, after_id or 0)
+
+
+@router.post("/analysis/runs", response_model=Dict[str, Any], dependencies=[Depends(verify_api_key)])
+async def start_analysis_run(request: AnalysisRequest):
+    """
+    Start an analysis in the background without holding the request open.
+    
+    Follow it with GET /analysis/stream/{run_id} or the WebSocket
+    {"type": "subscribe_analysis", "run_id": ...} message.
+    """
+    run = analysis_runs.start(request.ticker, request.date, request.analysts, reuse=not request.force_refresh)
+    return run.summary()
+
+
 @router.post("/analysis/latest-batch", response_model=List[AnalysisResponse], dependencies=[Depends(verify_api_key)])
 async def get_latest_analysis_batch(
     tickers: List[str],
@@ -103,6 +174,28 @@ async def get_analysis_history(
         raise HTTPException(status_code=500, detail=f"Failed to fetch history: {str(e)}")
 
 
+@router.get("/analysis/metrics", response_model=Dict[str, Any], dependencies=[Depends(verify_api_key)])
+async def get_analysis_metrics():
+    """
+    Latency and token histograms aggregated over analysis runs in this process.
+
+    Series are labelled by graph node, tool or data vendor (`method:vendor`),
+    so the slowest agents and vendors can be identified.
+    """
+    return metrics.snapshot(prefix="analysis_")
+
+
+@router.get("/analysis/rate-limits", response_model=Dict[str, Any], dependencies=[Depends(verify_api_key)])
+async def get_rate_limits():
+    """
+    Current LLM and embedding usage per model against the rate governor's budgets.
+
+    Shows requests and tokens in the last minute, in-flight and queued calls
+    (and how many of those are background), any 429 cool-down, and retry counters.
+    """
+    return governor.utilization()
+
+
 @router.get("/analysis/{analysis_id}", response_model=AnalysisResponse, dependencies=[Depends(verify_api_key)])
 async def get_analysis(
     analysis_id: int,
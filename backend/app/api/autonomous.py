@@ -11,7 +11,7 @@ from app.core.database import get_db
 from app.core.security import verify_api_key, verify_kill_switch
 from app.models.trading import AutonomousStatus, TradingConfigUpdate, SignalResponse, PortfolioConfigUpdate, PortfolioConfigResponse
 from app.services.autonomous_service import AutonomousService
-from app.core.scheduler import scheduler, setup_autonomous_jobs
+from app.core.scheduler import scheduler, setup_autonomous_jobs, tracker
 from app.config import settings
 
 router = APIRouter()
@@ -125,6 +125,31 @@ async def get_logs(
         raise HTTPException(status_code=500, detail=f"Failed to get logs: {str(e)}")
 
 
+@router.get("/autonomous/prescreen", dependencies=[Depends(verify_api_key)])
+async def get_prescreen_report():
+    """Get the pre-screen funnel report of the latest analysis cycle."""
+    from app.services.prescreen_service import PreScreenService
+    return {"enabled": settings.prescreen_enabled, "report": PreScreenService.last_report}
+
+
+@router.get("/autonomous/scheduler", dependencies=[Depends(verify_api_key)])
+async def get_scheduler_status():
+    """
+    Scheduled job health: per-job run durations and outcomes, skipped
+    (overlapping) and missed runs, lag behind schedule and the current
+    (possibly stretched) interval.
+    """
+    return tracker.status()
+
+
+@router.get("/autonomous/scheduler/{job_id}", dependencies=[Depends(verify_api_key)])
+async def get_scheduler_job_runs(job_id: str):
+    """Recent runs of one scheduled job, oldest first."""
+    if job_id not in tracker.jobs:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    return {"job_id": job_id, "runs": tracker.history(job_id)}
+
+
 @router.post("/autonomous/kill", dependencies=[Depends(verify_kill_switch)])
 async def kill_switch(db: AsyncSession = Depends(get_db)):
     """
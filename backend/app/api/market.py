@@ -16,11 +16,11 @@ async def get_market_quote(
 ):
     """
     Get real-time quote for a symbol.
-    Proxies to Alpaca Data API.
+    Served from the quote cache while fresh, else proxied to Alpaca Data API.
     """
     try:
         alpaca = AlpacaService()
-        quote = await alpaca.get_latest_quote(symbol)
+        quote = await alpaca.get_recent_quote(symbol)
         
         if not quote:
             raise HTTPException(status_code=404, detail=f"Quote not found for {symbol}")
@@ -94,7 +94,7 @@ async def get_popular_stocks():
             try:
                 # Fetch quote and historical bars in parallel
                 quote, bars = await asyncio.gather(
-                    alpaca.get_latest_quote(symbol),
+                    alpaca.get_recent_quote(symbol),
                     alpaca.get_historical_bars(symbol, "1d", 2),
                     return_exceptions=True
                 )
@@ -0,0 +1,28 @@
+"""
+Prometheus metrics endpoint.
+"""
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import PlainTextResponse
+
+from app.core.metrics import metrics
+from app.core.security import verify_api_key
+
+router = APIRouter()
+
+# Prometheus text exposition format
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@router.get("/metrics", response_class=PlainTextResponse, dependencies=[Depends(verify_api_key)])
+async def get_metrics():
+    """
+    Request latency per route, SQL query and session time, scheduler job
+    durations and overruns, outbound vendor/LLM call latency and errors, and
+    WebSocket connections and messages.
+
+    Scrape with the API key as a bearer token.
+    """
+    if not metrics.enabled:
+        raise HTTPException(status_code=404, detail="Metrics are disabled (METRICS_ENABLED=false)")
+    return PlainTextResponse(metrics.render_prometheus(), media_type=CONTENT_TYPE)
@@ -11,6 +11,8 @@ from app.core.database import get_db
 from app.core.security import verify_api_key
 from app.models.trading import PositionResponse, TradeResponse, ManualTradeRequest
 from app.services.autonomous_service import AutonomousService
+from app.services.exit_triggers import exit_levels
+from app.utils.market_hours import is_crypto_symbol
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -86,17 +88,36 @@ async def execute_trade(
 ):
     """
     Execute a manual trade (Buy/Sell) and log it to the Observer.
+    
+    With `bracket`, a buy is submitted as a bracket order: the broker holds
+    take-profit and stop-loss legs priced off the current ask.
     """
     try:
+        if trade_request.bracket and (trade_request.side != "buy" or is_crypto_symbol(trade_request.symbol)):
+            raise HTTPException(status_code=400, detail="Bracket orders are only available for stock buys")
+        
         # 1. Execute via Alpaca
         from app.services.alpaca_service import AlpacaService
         alpaca = AlpacaService()
         
-        result = await alpaca.place_market_order(
-            symbol=trade_request.symbol,
-            quantity=trade_request.quantity,
-            side=trade_request.side
-        )
+        bracket_levels = None
+        if trade_request.bracket:
+            quote = await alpaca.get_latest_quote(trade_request.symbol) or {}
+            if not quote.get("ask_price"):
+                raise HTTPException(status_code=503, detail=f"No quote to price the bracket legs of {trade_request.symbol}")
+            config = await AutonomousService(db).get_config()
+            bracket_levels = exit_levels(
+                quote["ask_price"],
+                trade_request.take_profit_pct or config.get("take_profit_pct", 10.0),
+                trade_request.stop_loss_pct or config.get("stop_loss_pct", 5.0),
+            )
+            result = await alpaca.place_bracket_order(trade_request.symbol, trade_request.quantity, *bracket_levels)
+        else:
+            result = await alpaca.place_market_order(
+                symbol=trade_request.symbol,
+                quantity=trade_request.quantity,
+                side=trade_request.side
+            )
         
         # 2. Log metadata for the trade
         actual_price = None
@@ -104,6 +125,12 @@ async def execute_trade(
         if not actual_price:
              quote = await alpaca.get_latest_quote(trade_request.symbol)
              actual_price = quote.get("ask_price") if trade_request.side == "buy" else quote.get("bid_price")
+        
+        meta_data = {"alpaca_order_id": result.get("order_id"), "estimated_price": actual_price}
+        if bracket_levels:
+            meta_data["bracket"] = {"take_profit_price": round(bracket_levels[0], 2),
+                                    "stop_loss_price": round(bracket_levels[1], 2),
+                                    "leg_order_ids": [leg["order_id"] for leg in result.get("legs", [])]}
              
         # 3. Log to Observer (PsychTrade)
         from app.services.observer_service import ObserverService
@@ -116,7 +143,7 @@ async def execute_trade(
             side=trade_request.side,
             quantity=trade_request.quantity,
             client_context=trade_request.reason or "Manual Execution via API",
-            meta_data={"alpaca_order_id": result.get("order_id"), "estimated_price": actual_price}
+            meta_data=meta_data
         ))
         
         return {
@@ -125,6 +152,8 @@ async def execute_trade(
             "message": f"Order submitted and logged to Observer."
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Failed to execute trade: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Failed to execute trade: {str(e)}")
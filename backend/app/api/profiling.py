@@ -0,0 +1,130 @@
+"""
+Profiling endpoints (admin only).
+
+Profile one analysis or scheduled job run on demand, or arm a job so its
+next scheduled runs are profiled. Results are stored under PROFILE_DIR and
+listed here; `/folded` serves the flamegraph input and `/pstats` the
+cProfile dump.
+"""
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse
+from typing import Any, Dict
+import logging
+
+from app.core.database import AsyncSessionLocal
+from app.core.profiling import profiler
+from app.core.scheduler import tracker
+from app.core.security import verify_admin
+from app.models.trading import ProfileAnalysisRequest, ProfileArmRequest
+from tradingagents.rate_governor import BACKGROUND, llm_priority
+
+router = APIRouter(dependencies=[Depends(verify_admin)])
+logger = logging.getLogger(__name__)
+
+
+def _job(job_id: str):
+    """Scheduled job function by job ID (each takes a DB session)."""
+    from app.services.autonomous_service import gather_signals_job, monitor_positions_job, run_analysis_job
+    jobs = {
+        "gather_signals": gather_signals_job,
+        "run_analysis": run_analysis_job,
+        "monitor_positions": monitor_positions_job,
+    }
+    if job_id not in jobs:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id} (one of {', '.join(jobs)})")
+    return jobs[job_id]
+
+
+def _ensure_idle():
+    if profiler.busy:
+        raise HTTPException(status_code=409, detail="Another profile is in progress")
+
+
+@router.post("/profiling/analysis")
+async def profile_analysis(request: ProfileAnalysisRequest) -> Dict[str, Any]:
+    """Run one analysis (never reusing a stored one) under the profiler and return its summary."""
+    from app.services.analysis_service import AnalysisService
+    _ensure_idle()
+
+    async def run():
+        async with AsyncSessionLocal() as db:
+            await AnalysisService(db).run_analysis(
+                request.ticker.upper(), request.date, request.analysts, save_db=request.save_db, reuse=False
+            )
+
+    return await profiler.run(f"analysis:{request.ticker.upper()}", run)
+
+
+@router.post("/profiling/jobs/{job_id}")
+async def profile_job(job_id: str) -> Dict[str, Any]:
+    """
+    Run a scheduled job now under the profiler and return its summary.
+
+    Holds the job's lock for the run: refused while the scheduler is running
+    the same job, and scheduled runs due meanwhile are skipped, so the two
+    never overlap. The job has its usual effects (run_analysis may place
+    orders).
+    """
+    job = _job(job_id)
+    _ensure_idle()
+    lock = tracker.lock(job_id)
+    if lock.locked():
+        raise HTTPException(status_code=409, detail=f"Job {job_id} is running; arm it instead")
+
+    async def run():
+        with llm_priority(BACKGROUND):
+            async with AsyncSessionLocal() as db:
+                await job(db)
+
+    async with lock:
+        return await profiler.run(f"job:{job_id}", run)
+
+
+@router.post("/profiling/jobs/{job_id}/arm")
+async def arm_job(job_id: str, request: ProfileArmRequest):
+    """Profile the next N scheduled runs of a job (takes effect without a restart)."""
+    _job(job_id)
+    profiler.arm(job_id, request.runs)
+    logger.info(f"Profiling armed for the next {request.runs} run(s) of {job_id}")
+    return {"armed": dict(profiler.armed)}
+
+
+@router.get("/profiling/armed")
+async def get_armed():
+    """Jobs armed for profiling and their remaining runs."""
+    return {"armed": dict(profiler.armed)}
+
+
+@router.get("/profiling/profiles")
+async def list_profiles():
+    """Stored profiles, newest first."""
+    return {"profiles": profiler.list()}
+
+
+@router.get("/profiling/profiles/{profile_id}")
+async def get_profile(profile_id: str):
+    """Summary of one profile: duration, top functions and allocation sites."""
+    summary = profiler.get(profile_id)
+    if summary is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return summary
+
+
+@router.get("/profiling/profiles/{profile_id}/folded")
+async def get_profile_folded(profile_id: str):
+    """Folded stack samples (flamegraph.pl, speedscope, inferno)."""
+    return _file(profile_id, "folded", "text/plain")
+
+
+@router.get("/profiling/profiles/{profile_id}/pstats")
+async def get_profile_pstats(profile_id: str):
+    """cProfile dump of the event loop thread (snakeviz, pstats)."""
+    return _file(profile_id, "pstats", "application/octet-stream")
+
+
+def _file(profile_id: str, suffix: str, media_type: str) -> FileResponse:
+    path = profiler.file(profile_id, suffix)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type=media_type, filename=f"{profile_id}.{suffix}")
@@ -4,13 +4,34 @@ Clients can subscribe to specific tickers and receive live price updates.
 """
 
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from app.core.market_stream import market_feed
+from app.core.metrics import metrics
 from app.core.websocket_manager import manager
+from app.services.analysis_stream import analysis_runs, AnalysisRun
+import asyncio
 import logging
 import json
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+# Client message types counted by name; anything else is counted as "other"
+CLIENT_MESSAGE_TYPES = {"subscribe", "unsubscribe", "subscribe_analysis", "ping"}
+
+
+async def _forward_analysis_events(websocket: WebSocket, run: AnalysisRun, after_id: int):
+    """Relay a streaming analysis run's events to one socket."""
+    async for event in run.follow(after_id):
+        if event is None:
+            continue
+        await manager.send_personal_message({
+            "type": "analysis_event",
+            "run_id": run.run_id,
+            "id": event["id"],
+            "event": event["event"],
+            "data": event["data"]
+        }, websocket)
+
 
 @router.websocket("/ws/market")
 async def market_websocket(websocket: WebSocket):
@@ -19,17 +40,28 @@ async def market_websocket(websocket: WebSocket):
     
     Client Messages:
     - {"type": "subscribe", "tickers": ["AAPL", "NVDA", ...]}
+      optionally with "batch": true and/or "encoding": "msgpack" (kept until changed)
     - {"type": "unsubscribe", "tickers": ["AAPL"]}
     - {"type": "ping"}
+    - {"type": "subscribe_analysis", "run_id": "...", "last_event_id": 0}
     
     Server Messages:
-    - {"type": "subscribed", "tickers": [...]}
+    - {"type": "subscribed", "tickers": [...], "batch": false, "encoding": "json"}
     - {"type": "price_update", "ticker": "AAPL", "data": {...}}
+    - {"type": "price_updates", "updates": [{"ticker": "AAPL", "data": {...}}, ...]} (batch)
     - {"type": "pong"}
+    - {"type": "analysis_event", "run_id": "...", "id": 3, "event": "progress", "data": {...}}
     - {"type": "error", "message": "..."}
+
+    Subscribing sends the tickers' current prices at once; after that,
+    price updates are sent only when bid/ask/mid changed, at most once per
+    ticker per flush interval (WEBSOCKET_FLUSH_INTERVAL_MS). With msgpack,
+    `price_updates` arrive as binary frames; every other message stays JSON
+    text. The `subscribed` reply reports the delivery options in effect.
     """
     # Generate client ID from connection headers
     client_id = websocket.headers.get("sec-websocket-key", "unknown")
+    analysis_tasks = set()
     
     try:
         # Accept connection
@@ -48,17 +80,23 @@ async def market_websocket(websocket: WebSocket):
                 # Receive message from client
                 data = await websocket.receive_json()
                 message_type = data.get("type")
+                metrics.inc("websocket_messages_total", direction="received",
+                            type=message_type if message_type in CLIENT_MESSAGE_TYPES else "other")
                 
                 if message_type == "subscribe":
                     # Client wants to subscribe to tickers
                     tickers = data.get("tickers", [])
                     if tickers:
+                        delivery = manager.set_delivery(websocket, data.get("batch"), data.get("encoding"))
                         manager.subscribe(websocket, tickers)
                         await manager.send_personal_message({
                             "type": "subscribed",
                             "tickers": tickers,
-                            "message": f"Subscribed to {len(tickers)} ticker(s)"
+                            "message": f"Subscribed to {len(tickers)} ticker(s)",
+                            **delivery
                         }, websocket)
+                        # Current prices right away, not on the next change
+                        await market_feed.send_snapshot(websocket, tickers)
                         logger.info(f"Client {client_id} subscribed to {tickers}")
                 
                 elif message_type == "unsubscribe":
@@ -72,6 +110,21 @@ async def market_websocket(websocket: WebSocket):
                         }, websocket)
                         logger.info(f"Client {client_id} unsubscribed from {tickers}")
                 
+                elif message_type == "subscribe_analysis":
+                    # Follow a streaming analysis (started via POST /analysis/runs or /analysis/stream)
+                    run = analysis_runs.get(data.get("run_id", ""))
+                    if not run:
+                        await manager.send_personal_message({
+                            "type": "error",
+                            "message": f"Analysis run not found: {data.get('run_id')}"
+                        }, websocket)
+                        continue
+                    task = asyncio.create_task(
+                        _forward_analysis_events(websocket, run, int(data.get("last_event_id") or 0))
+                    )
+                    analysis_tasks.add(task)
+                    task.add_done_callback(analysis_tasks.discard)
+                
                 elif message_type == "ping":
                     # Heartbeat ping
                     await manager.send_personal_message({
@@ -86,6 +139,9 @@ async def market_websocket(websocket: WebSocket):
                         "message": f"Unknown message type: {message_type}"
                     }, websocket)
             
+            except WebSocketDisconnect:
+                raise
+
             except json.JSONDecodeError:
                 await manager.send_personal_message({
                     "type": "error",
@@ -102,7 +158,6 @@ async def market_websocket(websocket: WebSocket):
             logger.info(f"Client {client_id} disconnected normally ({e.code})")
         else:
             logger.warning(f"Client {client_id} disconnected with code {e.code}")
-        manager.disconnect(websocket, client_id)
     
     except Exception as e:
         # Check if it's a "Component unmounting" error which comes as a tuple or similar
@@ -111,4 +166,9 @@ async def market_websocket(websocket: WebSocket):
              logger.info(f"Client {client_id} disconnected (component unmounting)")
         else:
              logger.error(f"WebSocket error for client {client_id}: {e}")
+    
+    finally:
+        # Also reached after a broken connection ends the receive loop
         manager.disconnect(websocket, client_id)
+        for task in list(analysis_tasks):
+            task.cancel()
@@ -2,7 +2,7 @@
 Configuration management using Pydantic Settings.
 """
 
-from typing import Optional, List
+from typing import Dict, Optional, List
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -22,10 +22,28 @@ class Settings(BaseSettings):
     app_version: str = "0.1.0"
     debug: bool = False
     api_prefix: str = "/api/v1"
+    metrics_enabled: bool = Field(default=True, description="Collect request/SQL/job/vendor metrics and serve /metrics")
+    profile_dir: str = Field(default="./profiles", description="Where profiled runs are stored")
+    profile_sample_interval_ms: float = Field(default=5.0, description="Stack sampling interval of profiled runs")
+    profile_keep: int = Field(default=20, description="Profiles kept on disk (oldest removed first)")
+    websocket_flush_interval_ms: float = Field(
+        default=250.0, description="How often conflated price updates are flushed to /ws/market clients"
+    )
+    broadcast_backend: str = Field(
+        default="memory", description="Market data fan-out backend: memory (one worker), redis (pub/sub across workers)"
+    )
+    broadcast_url: str = Field(default="redis://localhost:6379/0", description="Redis-compatible server for the redis backend")
+    quote_cache_max_age_seconds: float = Field(
+        default=5.0, description="Cached quotes younger than this serve quote lookups and WebSocket snapshots"
+    )
+    market_publisher_lease_seconds: float = Field(
+        default=10.0, description="Lease of the one worker that polls prices (a new one takes over this long after it dies)"
+    )
     
     # Security
     api_key: str = Field(..., description="API key for authentication")
     kill_switch_secret: Optional[str] = Field(None, description="Emergency kill switch secret")
+    admin_api_key: Optional[str] = Field(None, description="Admin key for the profiling endpoints (unset disables them)")
     
     # Database
     database_url: str = Field(
@@ -38,6 +56,7 @@ class Settings(BaseSettings):
     alpaca_api_secret: str = Field(..., description="Alpaca API secret")
     alpaca_paper: bool = Field(default=True, description="Use paper trading")
     alpaca_base_url: Optional[str] = Field(None, description="Alpaca base URL override")
+    alpaca_data_url: Optional[str] = Field(None, description="Alpaca market data URL override")
     
     # LLM Configuration
     llm_provider: str = Field(default="openai", description="LLM provider: openai, anthropic, google")
@@ -47,6 +66,21 @@ class Settings(BaseSettings):
     anthropic_api_key: Optional[str] = Field(None, description="Anthropic API key")
     google_api_key: Optional[str] = Field(None, description="Google AI API key")
     backend_url: str = Field(default="https://api.openai.com/v1", description="LLM backend URL")
+    llm_cache_mode: str = Field(default="off", description="LLM response cache: off, read_write, replay (fail on miss)")
+    llm_cache_path: str = Field(default="./llm_cache.sqlite", description="SQLite file for cached LLM responses")
+    llm_cache_ttl_seconds: int = Field(default=86400, description="Max age of a cached LLM response (ignored in replay)")
+    cassette_mode: str = Field(default="off", description="Record/replay vendor, LLM and embedding calls: off, record, replay")
+    cassette_path: str = Field(default="./cassettes/analysis.json.gz", description="Gzipped JSON cassette file")
+    cassette_latency_scale: float = Field(default=1.0, description="Replay delay as a multiple of recorded latency (0 = none)")
+    llm_rate_limits: Dict[str, Dict[str, int]] = Field(
+        default={},
+        description='Per-model budgets, e.g. {"gpt-4o-mini": {"rpm": 500, "tpm": 200000, "max_concurrency": 8}}',
+    )
+    llm_rate_default_rpm: int = Field(default=0, description="Requests/minute for models without an entry (0 = unlimited)")
+    llm_rate_default_tpm: int = Field(default=0, description="Tokens/minute for models without an entry (0 = unlimited)")
+    llm_rate_default_max_concurrency: int = Field(default=0, description="In-flight requests per model (0 = unlimited)")
+    llm_rate_max_retries: int = Field(default=4, description="Retries of a provider rate-limited (429) LLM call")
+    llm_rate_backoff_seconds: float = Field(default=1.0, description="Base of the jittered exponential 429 backoff")
     
     # Data Sources
     alpha_vantage_api_key: Optional[str] = Field(None, description="Alpha Vantage API key")
@@ -63,11 +97,35 @@ class Settings(BaseSettings):
     take_profit_pct: float = Field(default=10.0, description="Take profit percentage")
     stop_loss_pct: float = Field(default=5.0, description="Stop loss percentage")
     position_size_pct_of_cash: float = Field(default=25.0, description="% of cash per trade")
+    bracket_orders_enabled: bool = Field(default=False, description="Submit autopilot entries as bracket orders with broker-side take-profit/stop-loss legs")
     
     # Autonomous Trading
     autonomous_enabled: bool = Field(default=False, description="Enable autonomous trading")
     data_poll_interval_seconds: int = Field(default=30, description="Data gathering interval")
     analyst_interval_seconds: int = Field(default=120, description="Analysis interval")
+    scheduler_adaptive_intervals: bool = Field(default=True, description="Stretch the interval of a job that keeps overrunning it")
+    scheduler_overrun_streak: int = Field(default=3, description="Overruns in a row before stretching (and fitting runs before relaxing)")
+    reconcile_interval_seconds: int = Field(default=60, description="Interval of the DB/Alpaca position reconciliation")
+    reconcile_on_trade_updates: bool = Field(default=True, description="Also reconcile on Alpaca trade update (fill) events")
+    reconcile_fill_delay_seconds: float = Field(default=1.0, description="Wait after a fill event before reconciling (coalesces bursts)")
+    scheduler_max_interval_stretch: float = Field(default=4.0, description="Largest stretched interval, as a multiple of the configured one")
+    
+    # Pre-screen (cheap quantitative filters before the agent graph)
+    prescreen_enabled: bool = Field(default=True, description="Screen signals on bars/quotes before running analysis")
+    prescreen_filters: List[str] = Field(
+        default=["tradable", "exposure", "liquidity", "spread", "volatility", "trend"],
+        description="Pre-screen filters, applied in order",
+    )
+    prescreen_max_candidates: int = Field(default=50, description="Signals considered per analysis cycle")
+    prescreen_max_survivors: int = Field(default=5, description="Survivors passed on to full analysis")
+    prescreen_lookback_days: int = Field(default=30, description="Daily bars used for the screen")
+    prescreen_bar_ttl_seconds: int = Field(default=900, description="How long fetched daily bars are reused")
+    prescreen_min_dollar_volume: float = Field(default=1_000_000.0, description="Min average daily $ volume")
+    prescreen_max_spread_pct: float = Field(default=1.0, description="Max bid/ask spread, % of mid")
+    prescreen_min_volatility_pct: float = Field(default=0.5, description="Min daily return volatility, %")
+    prescreen_max_volatility_pct: float = Field(default=10.0, description="Max daily return volatility, %")
+    prescreen_trend_sma_days: int = Field(default=20, description="SMA length for the trend filter")
+    prescreen_min_trend_pct: float = Field(default=-2.0, description="Min % of last close above the SMA")
     
     # Staleness Detection
     stale_position_enabled: bool = Field(default=True, description="Enable staleness detection")
@@ -83,12 +141,22 @@ class Settings(BaseSettings):
     crypto_enabled: bool = Field(default=False, description="Enable crypto trading")
     crypto_symbols: List[str] = Field(default=["BTC/USD", "ETH/USD"], description="Crypto symbols to trade")
     
+    # Vector Memory
+    vector_store_path: str = Field(default="./vector_store", description="Directory for the persistent vector store")
+    vector_store_backend: str = Field(default="flat", description="Vector store backend: flat (NumPy, memory-mapped), chroma")
+    vector_store_precision: str = Field(default="float32", description="Flat index precision: float32, int8 (quantized scan + exact re-rank)")
+
     # Testing
     ignore_market_hours: bool = Field(default=False, description="Bypass market hours check (TESTING ONLY!)")
     
     # TradingAgents Configuration
     max_debate_rounds: int = Field(default=1, description="Max debate rounds")
     max_risk_discuss_rounds: int = Field(default=1, description="Max risk discussion rounds")
+    report_compaction: str = Field(default="off", description="Report compaction for debate prompts: off, brief")
+    max_concurrent_analyses: int = Field(default=2, description="Max graph runs in flight at once (on the event loop)")
+    analysis_reuse_ttl_minutes: int = Field(default=60, description="Reuse a stored analysis for the same ticker/date this long (0 disables)")
+    analysis_reuse_max_price_move_pct: float = Field(default=2.0, description="Re-run when price moved more than this % since the stored analysis")
+    analysis_reuse_max_sentiment_move: float = Field(default=0.2, description="Re-run when average signal sentiment moved more than this")
     data_vendors: dict = Field(
         default={
             "core_stock_apis": "yfinance",
@@ -117,8 +185,23 @@ class Settings(BaseSettings):
             "deep_think_llm": self.deep_think_llm,
             "quick_think_llm": self.quick_think_llm,
             "backend_url": self.backend_url,
+            "llm_cache_mode": self.llm_cache_mode,
+            "llm_cache_path": self.llm_cache_path,
+            "llm_cache_ttl_seconds": self.llm_cache_ttl_seconds,
+            "cassette_mode": self.cassette_mode,
+            "cassette_path": self.cassette_path,
+            "cassette_latency_scale": self.cassette_latency_scale,
+            "llm_rate_limits": self.llm_rate_limits,
+            "llm_rate_default_limits": {
+                "rpm": self.llm_rate_default_rpm,
+                "tpm": self.llm_rate_default_tpm,
+                "max_concurrency": self.llm_rate_default_max_concurrency,
+            },
+            "llm_rate_max_retries": self.llm_rate_max_retries,
+            "llm_rate_backoff_seconds": self.llm_rate_backoff_seconds,
             "max_debate_rounds": self.max_debate_rounds,
             "max_risk_discuss_rounds": self.max_risk_discuss_rounds,
+            "report_compaction": self.report_compaction,
             "data_vendors": self.data_vendors,
         }
 
@@ -4,6 +4,7 @@ Database connection and session management.
 
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import declarative_base
+from sqlalchemy import inspect, text
 from sqlalchemy.pool import NullPool
 import logging
 
@@ -36,11 +37,32 @@ AsyncSessionLocal = async_sessionmaker(
 Base = declarative_base()
 
 
+def _add_missing_columns(sync_conn):
+    """
+    Add nullable columns declared on models but missing from existing tables.
+
+    `create_all` only creates missing tables, so databases created before a
+    column was introduced would otherwise fail on every query touching it.
+    """
+    inspector = inspect(sync_conn)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing or not column.nullable:
+                continue
+            column_type = column.type.compile(dialect=sync_conn.dialect)
+            sync_conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN "{column.name}" {column_type}'))
+            logger.info(f"Added column {table.name}.{column.name}")
+
+
 async def init_db():
     """Initialize database tables."""
     logger.info("Initializing database...")
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(_add_missing_columns)
     logger.info("Database initialized successfully")
 
 
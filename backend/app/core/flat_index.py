@@ -0,0 +1,406 @@
+"""
+Memory-mapped flat vector index with optional int8 scalar quantization.
+
+Implements the subset of the Chroma collection API the memory classes use
+(`add`, `upsert`, `query`, `count`), so it can be swapped in behind
+`VectorStore`. Vectors are L2-normalized on insert and stored as one
+contiguous float32 matrix; similarity search is a single matmul.
+
+In int8 mode each vector is also stored as int8 codes plus a per-vector
+scale. Queries scan the codes (4x less memory traffic), then re-rank the
+top candidates exactly against the float32 rows, which stay on disk and
+are only paged in for those candidates.
+
+On disk, row metadata is a JSON snapshot plus an append-only journal of
+upserted rows, compacted into the snapshot once it outgrows it, so an
+upsert costs O(batch) rather than rewriting every row. Access is guarded
+by a thread lock and, on POSIX, a per-collection file lock (shared for
+reads, exclusive for writes); a process that sees another process's write
+reloads before using the collection, so several workers can share a path.
+"""
+
+import numpy as np
+from typing import Any, Dict, List, Optional
+import contextlib
+import json
+import logging
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows: in-process locking only
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+PRECISIONS = ("float32", "int8")
+
+# Rows scanned per matmul in int8 mode (bounds the float32 upcast buffer)
+INT8_BLOCK_ROWS = 4096
+
+# Journal rows always allowed before compacting into the snapshot
+COMPACT_MIN_ROWS = 1024
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalize rows, leaving zero vectors at zero."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1.0, norms)
+
+
+def quantize(vectors: np.ndarray):
+    """Symmetric per-vector int8 quantization. Returns (codes, scales)."""
+    scales = np.abs(vectors).max(axis=1) / 127.0
+    safe = np.where(scales == 0, 1.0, scales)
+    codes = np.clip(np.rint(vectors / safe[:, None]), -127, 127).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+class FlatIndexCollection:
+    """A named collection of vectors, documents and metadata."""
+
+    def __init__(
+        self,
+        name: str,
+        path: Optional[str] = None,
+        precision: str = "float32",
+        rerank_factor: int = 4,
+    ):
+        """
+        Args:
+            name: Collection name (used for file names)
+            path: Directory for the memory-mapped files; in-memory if None
+            precision: "float32" for exact search, "int8" for quantized scan + exact re-rank
+            rerank_factor: Candidates re-ranked per requested result in int8 mode
+        """
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unsupported precision: {precision}")
+
+        self.name = name
+        self.path = path
+        self.precision = precision
+        self.rerank_factor = rerank_factor
+
+        self._lock = threading.RLock()
+        self._lock_file = None
+        # Identity of the on-disk metadata this instance last loaded or wrote
+        self._signature = None
+        self._reset()
+
+        if path:
+            os.makedirs(path, exist_ok=True)
+            if fcntl is not None:
+                self._lock_file = open(self._file("lock"), "a")
+            with self._locked():
+                self._refresh()
+
+    def _reset(self):
+        self.dim: Optional[int] = None
+        self._count = 0
+        self._ids: List[str] = []
+        self._documents: List[Optional[str]] = []
+        self._metadatas: List[Optional[Dict[str, Any]]] = []
+        self._rows: Dict[str, int] = {}
+        self._journal_rows = 0
+
+        self._vectors: Optional[np.ndarray] = None
+        self._codes: Optional[np.ndarray] = None
+        self._scales: Optional[np.ndarray] = None
+
+    @contextlib.contextmanager
+    def _locked(self, exclusive: bool = False):
+        """Hold the thread lock and the file lock, reloading if another process wrote."""
+        with self._lock:
+            if self._lock_file is None:
+                yield
+                return
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                self._refresh()
+                yield
+            finally:
+                fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    # Chroma-compatible API
+
+    def count(self) -> int:
+        """Number of stored vectors."""
+        with self._locked():
+            return self._count
+
+    def add(self, ids, embeddings, documents=None, metadatas=None):
+        """Add vectors. Existing IDs are rejected, as in Chroma."""
+        with self._locked(exclusive=True):
+            duplicates = [i for i in ids if i in self._rows]
+            if duplicates:
+                raise ValueError(f"IDs already exist in {self.name}: {duplicates[:5]}")
+            self._upsert(ids, embeddings, documents, metadatas)
+
+    def upsert(self, ids, embeddings, documents=None, metadatas=None):
+        """Insert vectors, overwriting rows whose ID already exists."""
+        with self._locked(exclusive=True):
+            self._upsert(ids, embeddings, documents, metadatas)
+
+    def _upsert(self, ids, embeddings, documents, metadatas):
+        vectors = normalize(np.atleast_2d(np.asarray(embeddings, dtype=np.float32)))
+        if len(ids) != len(vectors):
+            raise ValueError("ids and embeddings must have the same length")
+
+        if self.dim is None:
+            self.dim = vectors.shape[1]
+        elif vectors.shape[1] != self.dim:
+            raise ValueError(f"Embedding dimension {vectors.shape[1]} != collection dimension {self.dim}")
+
+        documents = documents or [None] * len(ids)
+        metadatas = metadatas or [None] * len(ids)
+
+        rows = []
+        for doc_id, document, metadata in zip(ids, documents, metadatas):
+            row = self._rows.get(doc_id)
+            if row is None:
+                row = self._count
+                self._rows[doc_id] = row
+                self._ids.append(doc_id)
+                self._documents.append(document)
+                self._metadatas.append(metadata)
+                self._count += 1
+            else:
+                self._documents[row] = document
+                self._metadatas[row] = metadata
+            rows.append(row)
+
+        self._ensure_capacity(self._count)
+        rows = np.asarray(rows)
+        self._vectors[rows] = vectors
+        if self.precision == "int8":
+            codes, scales = quantize(vectors)
+            self._codes[rows] = codes
+            self._scales[rows] = scales
+
+        self._save(list(zip(ids, documents, metadatas)))
+
+    def query(self, query_embeddings, n_results: int = 10, include=None):
+        """Return the nearest neighbours of each query, shaped like a Chroma result."""
+        result = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+
+        with self._locked():
+            for query in np.atleast_2d(np.asarray(query_embeddings, dtype=np.float32)):
+                rows, scores = self._search(query, n_results)
+                result["ids"].append([self._ids[r] for r in rows])
+                result["documents"].append([self._documents[r] for r in rows])
+                result["metadatas"].append([self._metadatas[r] for r in rows])
+                # Squared L2 between unit vectors (2 - 2cos), Chroma's default metric, so
+                # callers' `1 - distance` similarity thresholds mean the same on both backends
+                result["distances"].append([float(2.0 - 2.0 * s) for s in scores])
+
+        return result
+
+    # Search
+
+    def search(self, query: np.ndarray, k: int):
+        """
+        Find the k most similar rows to a query vector.
+
+        Returns:
+            (rows, scores) ordered by descending cosine similarity
+        """
+        with self._locked():
+            return self._search(query, k)
+
+    def _search(self, query: np.ndarray, k: int):
+        n = self._count
+        k = min(k, n)
+        if k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        query = normalize(query)
+
+        if self.precision == "int8":
+            approx = np.empty(n, dtype=np.float32)
+            for start in range(0, n, INT8_BLOCK_ROWS):
+                stop = min(start + INT8_BLOCK_ROWS, n)
+                approx[start:stop] = self._codes[start:stop] @ query
+            approx *= self._scales[:n]
+
+            # Sorted so the float32 reads below walk the file forwards
+            candidates = np.sort(_top_k(approx, min(n, k * self.rerank_factor)))
+            # Exact re-rank: only the candidate float32 rows are read
+            exact = self._vectors[candidates] @ query
+            order = np.argsort(-exact)[:k]
+            return candidates[order], exact[order]
+
+        scores = self._vectors[:n] @ query
+        rows = _top_k(scores, k)
+        rows = rows[np.argsort(-scores[rows])]
+        return rows, scores[rows]
+
+    def nbytes(self) -> int:
+        """Bytes held by the arrays scanned at query time."""
+        with self._locked():
+            return self._nbytes()
+
+    def _nbytes(self) -> int:
+        if self._count == 0:
+            return 0
+        if self.precision == "int8":
+            return self._codes[:self._count].nbytes + self._scales[:self._count].nbytes
+        return self._vectors[:self._count].nbytes
+
+    # Storage
+
+    def _file(self, suffix: str) -> str:
+        return os.path.join(self.path, f"{self.name}.{suffix}")
+
+    def _ensure_capacity(self, needed: int):
+        """Grow the arrays (doubling) so they can hold `needed` rows."""
+        capacity = 0 if self._vectors is None else self._vectors.shape[0]
+        if needed <= capacity:
+            return
+
+        new_capacity = max(64, capacity * 2, needed)
+        self._vectors = self._grow("vectors.npy", self._vectors, (new_capacity, self.dim), np.float32)
+        if self.precision == "int8":
+            self._codes = self._grow("codes.npy", self._codes, (new_capacity, self.dim), np.int8)
+            self._scales = self._grow("scales.npy", self._scales, (new_capacity,), np.float32)
+
+    def _grow(self, suffix: str, old: Optional[np.ndarray], shape, dtype) -> np.ndarray:
+        if not self.path:
+            new = np.zeros(shape, dtype=dtype)
+        else:
+            tmp = self._file(suffix + ".tmp")
+            new = np.lib.format.open_memmap(tmp, mode="w+", dtype=dtype, shape=shape)
+        if old is not None:
+            new[:old.shape[0]] = old
+        if self.path:
+            new.flush()
+            del old
+            os.replace(tmp, self._file(suffix))
+            new = np.lib.format.open_memmap(self._file(suffix), mode="r+")
+        return new
+
+    def _disk_signature(self):
+        signature = []
+        for suffix in ("meta.json", "meta.log"):
+            try:
+                stat = os.stat(self._file(suffix))
+                signature.append((stat.st_ino, stat.st_size, stat.st_mtime_ns))
+            except FileNotFoundError:
+                signature.append(None)
+        return tuple(signature)
+
+    def _refresh(self):
+        """(Re)load from disk when the files changed since this instance last saw them."""
+        if not self.path:
+            return
+        if self._disk_signature() != self._signature:
+            self._reset()
+            self._load()
+            self._signature = self._disk_signature()
+
+    def _save(self, entries):
+        """Flush arrays and journal the upserted rows' metadata (compacting when it grows)."""
+        if not self.path:
+            return
+        for array in (self._vectors, self._codes, self._scales):
+            if isinstance(array, np.memmap):
+                array.flush()
+
+        if not os.path.exists(self._file("meta.json")) or self._journal_rows + len(entries) > max(COMPACT_MIN_ROWS, self._count):
+            self._write_snapshot()
+        else:
+            with open(self._file("meta.log"), "a") as f:
+                f.write("".join(json.dumps([doc_id, document, metadata]) + "\n" for doc_id, document, metadata in entries))
+            self._journal_rows += len(entries)
+        self._signature = self._disk_signature()
+
+    def _write_snapshot(self):
+        """Write all row metadata to the snapshot and drop the journal."""
+        tmp = self._file("meta.json.tmp")
+        with open(tmp, "w") as f:
+            json.dump(
+                {
+                    "dim": self.dim,
+                    "precision": self.precision,
+                    "ids": self._ids,
+                    "documents": self._documents,
+                    "metadatas": self._metadatas,
+                },
+                f,
+            )
+        os.replace(tmp, self._file("meta.json"))
+        # Replaying a journal left by a crash here is harmless: its rows are already in the snapshot
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(self._file("meta.log"))
+        self._journal_rows = 0
+
+    def _load(self):
+        """Open an existing collection from disk, if present."""
+        meta_file = self._file("meta.json")
+        if not os.path.exists(meta_file):
+            return
+
+        with open(meta_file) as f:
+            meta = json.load(f)
+
+        self.dim = meta["dim"]
+        self._ids = meta["ids"]
+        self._documents = meta["documents"]
+        self._metadatas = meta["metadatas"]
+        self._rows = {doc_id: row for row, doc_id in enumerate(self._ids)}
+
+        if os.path.exists(self._file("meta.log")):
+            with open(self._file("meta.log")) as f:
+                for line in f:
+                    try:
+                        doc_id, document, metadata = json.loads(line)
+                    except ValueError:
+                        break  # torn final line from an interrupted write
+                    row = self._rows.get(doc_id)
+                    if row is None:
+                        self._rows[doc_id] = len(self._ids)
+                        self._ids.append(doc_id)
+                        self._documents.append(document)
+                        self._metadatas.append(metadata)
+                    else:
+                        self._documents[row] = document
+                        self._metadatas[row] = metadata
+                    self._journal_rows += 1
+        self._count = len(self._ids)
+
+        if self._count == 0:
+            return
+
+        self._vectors = np.lib.format.open_memmap(self._file("vectors.npy"), mode="r+")
+        if self.precision == "int8":
+            if meta.get("precision") == "int8" and os.path.exists(self._file("codes.npy")):
+                self._codes = np.lib.format.open_memmap(self._file("codes.npy"), mode="r+")
+                self._scales = np.lib.format.open_memmap(self._file("scales.npy"), mode="r+")
+            else:
+                # Collection was written at float32: build the codes once
+                capacity = self._vectors.shape[0]
+                self._codes = self._grow("codes.npy", None, (capacity, self.dim), np.int8)
+                self._scales = self._grow("scales.npy", None, (capacity,), np.float32)
+                codes, scales = quantize(np.asarray(self._vectors[:self._count]))
+                self._codes[:self._count] = codes
+                self._scales[:self._count] = scales
+                self._codes.flush()
+                self._scales.flush()
+                self._write_snapshot()
+
+        logger.debug(f"Loaded flat index {self.name} ({self._count} vectors, {self.precision})")
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k largest scores (unordered)."""
+    if k >= len(scores):
+        return np.arange(len(scores))
+    return np.argpartition(-scores, k - 1)[:k]
+
+
+def list_collections(path: str) -> List[str]:
+    """Names of the flat-index collections stored under a directory."""
+    if not os.path.isdir(path):
+        return []
+    return sorted(f[: -len(".meta.json")] for f in os.listdir(path) if f.endswith(".meta.json"))
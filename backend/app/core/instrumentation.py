@@ -0,0 +1,207 @@
+"""
+Hooks feeding the metrics registry from the API, database, scheduler and outbound calls.
+
+Installed once at startup by `install_instrumentation` when METRICS_ENABLED
+is set; with metrics disabled none of them are, so the request path pays
+nothing. Outbound calls are labelled by vendor (alpaca, stocktwits, reddit,
+yfinance, alpha_vantage, openai, ...) and operation.
+"""
+
+from typing import Any, Dict, Optional
+import logging
+import time
+
+import httpx
+
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Hosts of outbound HTTP calls made directly with httpx, by vendor
+VENDOR_HOSTS = {
+    "api.stocktwits.com": "stocktwits",
+    "www.reddit.com": "reddit",
+    "reddit.com": "reddit",
+}
+
+metrics.register("http_request_duration_seconds", (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30))
+metrics.register("outbound_request_duration_seconds", (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60))
+metrics.register("db_query_duration_seconds", (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1))
+metrics.register("db_session_duration_seconds", (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1, 5, 30))
+
+_installed = False
+
+
+def record_outbound_call(vendor: str, operation: str, seconds: float, ok: bool = True):
+    """Latency and outcome of one call to an external service."""
+    metrics.observe("outbound_request_duration_seconds", seconds, vendor=vendor, operation=operation)
+    metrics.inc("outbound_requests_total", vendor=vendor, operation=operation, outcome="ok" if ok else "error")
+
+
+class InstrumentedClient:
+    """
+    Proxy for a synchronous SDK client (e.g. Alpaca's) timing every method call.
+
+    Calls that raise count as errors, even when the caller swallows the exception.
+    """
+
+    def __init__(self, client: Any, vendor: str):
+        self._client = client
+        self._vendor = vendor
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._client, name)
+        if not callable(attr) or name.startswith("_") or not metrics.enabled:
+            return attr
+
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                result = attr(*args, **kwargs)
+            except Exception:
+                record_outbound_call(self._vendor, name, time.perf_counter() - started, ok=False)
+                raise
+            record_outbound_call(self._vendor, name, time.perf_counter() - started)
+            return result
+
+        return timed
+
+
+class VendorTransport(httpx.AsyncHTTPTransport):
+    """httpx transport timing each request, labelled by vendor (from VENDOR_HOSTS) and path."""
+
+    def __init__(self, operation: Optional[str] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.operation = operation
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        vendor = VENDOR_HOSTS.get(request.url.host, request.url.host)
+        operation = self.operation or request.method.lower()
+        started = time.perf_counter()
+        try:
+            response = await super().handle_async_request(request)
+        except Exception:
+            record_outbound_call(vendor, operation, time.perf_counter() - started, ok=False)
+            raise
+        record_outbound_call(vendor, operation, time.perf_counter() - started, ok=response.status_code < 400)
+        return response
+
+
+def vendor_transport(operation: Optional[str] = None) -> Optional[VendorTransport]:
+    """Transport for an httpx client calling a vendor, or None (the default) when metrics are off."""
+    return VendorTransport(operation) if metrics.enabled else None
+
+
+# API routes
+
+def instrument_app(app):
+    """Request latency per route template, method and status class."""
+
+    @app.middleware("http")
+    async def record_request(request, call_next):
+        started = time.perf_counter()
+        status = 500
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            return response
+        finally:
+            route = request.scope.get("route")
+            metrics.observe(
+                "http_request_duration_seconds",
+                time.perf_counter() - started,
+                route=getattr(route, "path", "unmatched"),
+                method=request.method,
+                status=f"{status // 100}xx",
+            )
+
+
+# Database
+
+def instrument_engine(engine):
+    """Per-statement query time (by SQL verb) and time each session holds a transaction."""
+    from sqlalchemy import event
+    from sqlalchemy.orm import Session
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metrics_query_started", []).append(time.perf_counter())
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["metrics_query_started"].pop()
+        verb = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "OTHER"
+        metrics.observe("db_query_duration_seconds", time.perf_counter() - started, statement=verb)
+
+    def handle_error(context):
+        conn = context.connection
+        if conn is not None and conn.info.get("metrics_query_started"):
+            conn.info["metrics_query_started"].pop()
+        metrics.inc("db_query_errors_total")
+
+    def after_transaction_create(session, transaction):
+        if transaction.parent is None:
+            session.info["metrics_transaction_started"] = time.perf_counter()
+
+    def after_transaction_end(session, transaction):
+        started = session.info.pop("metrics_transaction_started", None) if transaction.parent is None else None
+        if started is not None:
+            metrics.observe("db_session_duration_seconds", time.perf_counter() - started)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(engine.sync_engine, "after_cursor_execute", after_cursor_execute)
+    event.listen(engine.sync_engine, "handle_error", handle_error)
+    event.listen(Session, "after_transaction_create", after_transaction_create)
+    event.listen(Session, "after_transaction_end", after_transaction_end)
+
+
+# Scheduler
+
+def instrument_scheduler(scheduler):
+    """Job durations and outcomes, and overruns (runs skipped because the last one was still going, or missed)."""
+    from apscheduler.events import (
+        EVENT_JOB_ERROR,
+        EVENT_JOB_EXECUTED,
+        EVENT_JOB_MAX_INSTANCES,
+        EVENT_JOB_MISSED,
+        EVENT_JOB_SUBMITTED,
+    )
+
+    # Start of each job's current run (jobs run with max_instances=1)
+    started: Dict[str, float] = {}
+
+    def on_submitted(event):
+        started[event.job_id] = time.perf_counter()
+
+    def on_finished(event):
+        begun = started.pop(event.job_id, None)
+        if begun is not None:
+            metrics.observe(
+                "scheduler_job_duration_seconds",
+                time.perf_counter() - begun,
+                job=event.job_id,
+                outcome="error" if event.code == EVENT_JOB_ERROR else "ok",
+            )
+
+    def on_overrun(event):
+        reason = "max_instances" if event.code == EVENT_JOB_MAX_INSTANCES else "missed"
+        metrics.inc("scheduler_job_overruns_total", job=event.job_id, reason=reason)
+
+    scheduler.add_listener(on_submitted, EVENT_JOB_SUBMITTED)
+    scheduler.add_listener(on_finished, EVENT_JOB_EXECUTED | EVENT_JOB_ERROR)
+    scheduler.add_listener(on_overrun, EVENT_JOB_MAX_INSTANCES | EVENT_JOB_MISSED)
+
+
+def install_instrumentation(app, engine, scheduler, enabled: bool = True):
+    """Enable or disable metrics; when enabled, install every hook (once)."""
+    global _installed
+    metrics.enabled = enabled
+    if not enabled or _installed:
+        return
+    instrument_app(app)
+    instrument_engine(engine)
+    instrument_scheduler(scheduler)
+
+    # Data vendors (route_to_vendor) and LLM/embedding calls (rate governor)
+    from tradingagents.instrumentation import add_call_listener
+    add_call_listener(record_outbound_call)
+    _installed = True
+    logger.info("Metrics instrumentation installed")
@@ -1,103 +1,300 @@
 """
 Background task for streaming real-time market prices via WebSocket.
 Fetches latest prices for subscribed tickers and broadcasts to clients.
+
+Every worker process fans price updates out to its own sockets, but only
+one polls Alpaca: the worker holding the publisher lease on the broadcast
+backend (BROADCAST_BACKEND). Workers announce the tickers their clients
+subscribe to on the interest channel; the publisher polls the union and
+publishes each cycle's quotes on the prices channel, which every worker
+(the publisher included) hands to its ConnectionManager and quote cache.
+With the memory backend the single worker is always the publisher.
+
+The publisher also polls the tickers of its `watch` sources (e.g. symbols
+with open positions) and hands each cycle's updates to its tick listeners.
+
+A new subscriber gets a snapshot at once: the last update sent for each
+ticker, else a fresh cached quote, else a quote fetched on the spot.
 """
 
 import asyncio
+import json
 import logging
-from app.core.websocket_manager import manager
+import os
+import socket
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from app.config import settings
+from app.core.metrics import metrics
+from app.core.pubsub import PubSubBackend, create_backend
+from app.core.quote_cache import quote_cache
+from app.core.websocket_manager import ConnectionManager, manager
 from app.services.alpaca_service import AlpacaService
 
 logger = logging.getLogger(__name__)
 
+PRICES_CHANNEL = "market:prices"
+INTEREST_CHANNEL = "market:interest"
+PUBLISHER_LEASE = "market:publisher"
+# Seconds between price polls (and interest announcements)
+POLL_INTERVAL = 2
+# A worker's interest is dropped after this many poll intervals without an announcement
+INTEREST_EXPIRY_CYCLES = 3
+
+
+def price_update(quote: Dict[str, Any]) -> dict:
+    """WebSocket price update data from an AlpacaService quote."""
+    bid = quote.get("bid_price", 0)
+    ask = quote.get("ask_price", 0)
+    mid_price = (bid + ask) / 2 if bid and ask else bid or ask
+    return {
+        "price": round(mid_price, 2),
+        "bid": round(bid, 2),
+        "ask": round(ask, 2),
+        "timestamp": quote.get("timestamp", "")
+    }
+
+
+class MarketFeed:
+    """
+    One worker's side of the market data fan-out.
+
+    Announces this worker's subscribed tickers, relays published quotes to
+    its ConnectionManager, and runs `source` (the price poller) while it
+    holds the publisher lease.
+    """
+
+    def __init__(
+        self,
+        backend: PubSubBackend,
+        manager: ConnectionManager,
+        source: Optional[Callable[["MarketFeed"], Awaitable[None]]] = None,
+        worker_id: Optional[str] = None,
+        poll_interval: float = POLL_INTERVAL,
+        lease_seconds: float = 10.0,
+    ):
+        self.backend = backend
+        self.manager = manager
+        self.source = source or stream_market_prices
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        # Map of worker_id -> (announced at, subscribed tickers)
+        self.interest: Dict[str, Tuple[float, Set[str]]] = {}
+        self.is_publisher = False
+        self._publisher: Optional[asyncio.Task] = None
+        self._tasks: list = []
+        self._alpaca: Optional[AlpacaService] = None
+        self._watched: List[Callable[[], Set[str]]] = []
+        self._tick_listeners: List[Callable[[Dict[str, dict]], Awaitable[None]]] = []
+
+    async def start(self):
+        await self.backend.start()
+        await self.backend.subscribe(PRICES_CHANNEL, self._on_prices)
+        await self.backend.subscribe(INTEREST_CHANNEL, self._on_interest)
+        self._tasks = [asyncio.create_task(self._announce_loop()), asyncio.create_task(self._election_loop())]
+        logger.info(f"Market feed started on the {self.backend.name} backend as {self.worker_id}")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+        if self.is_publisher:
+            self._step_down()
+            try:
+                # Let another worker take over now rather than when the lease expires
+                await self.backend.release_lease(PUBLISHER_LEASE, self.worker_id)
+            except Exception as e:
+                logger.warning(f"Could not release the publisher lease: {e}")
+        await self.backend.stop()
+
+    def subscribed_tickers(self) -> Set[str]:
+        """Tickers subscribed on any worker that announced recently."""
+        cutoff = time.monotonic() - self.poll_interval * INTEREST_EXPIRY_CYCLES
+        for worker_id in [w for w, (seen, _) in self.interest.items() if seen < cutoff]:
+            del self.interest[worker_id]
+        return set().union(*(tickers for _, tickers in self.interest.values()))
+
+    def watch(self, tickers: Callable[[], Set[str]]):
+        """Have the publisher also poll the tickers this returns (read every cycle)."""
+        self._watched.append(tickers)
+
+    def add_tick_listener(self, listener: Callable[[Dict[str, dict]], Awaitable[None]]):
+        """Call `listener(updates)` with every published cycle, on the publisher only."""
+        self._tick_listeners.append(listener)
+
+    def polled_tickers(self) -> Set[str]:
+        """What the publisher polls: subscribed tickers plus watched ones."""
+        return self.subscribed_tickers().union(*(tickers() for tickers in self._watched))
+
+    async def publish_prices(self, updates: Dict[str, dict], quotes: Optional[Dict[str, dict]] = None):
+        """Send one poll cycle's price updates (ticker -> data) and raw quotes to every worker."""
+        await self.backend.publish(PRICES_CHANNEL, json.dumps({"updates": updates, "quotes": quotes or {}}))
+
+    async def send_snapshot(self, websocket, tickers: List[str]):
+        """Send a new subscriber the current price of each ticker now rather than on the next change."""
+        updates = {}
+        missing = []
+        for ticker in tickers:
+            if ticker in self.manager.last_prices:
+                # Already queued by the manager's catch-up on subscribe
+                continue
+            quote = quote_cache.get(ticker)
+            if quote:
+                updates[ticker] = price_update(quote)
+            else:
+                missing.append(ticker)
+        # Only a running feed polls Alpaca (not, e.g., a manager driven by a test feed)
+        if missing and self._tasks:
+            if self._alpaca is None:
+                self._alpaca = AlpacaService()
+            for ticker, quote in (await self._alpaca.get_latest_quotes(missing)).items():
+                updates[ticker] = price_update(quote)
+        self.manager.send_snapshot(websocket, updates)
+
+    async def _on_prices(self, message: str):
+        payload = json.loads(message)
+        for ticker, quote in payload.get("quotes", {}).items():
+            quote_cache.put(ticker, quote)
+        for ticker, data in payload["updates"].items():
+            await self.manager.broadcast_price_update(ticker, data)
+        if self.is_publisher:
+            for listener in self._tick_listeners:
+                try:
+                    await listener(payload["updates"])
+                except Exception as e:
+                    logger.error(f"Tick listener failed: {e}", exc_info=True)
+
+    async def _on_interest(self, message: str):
+        payload = json.loads(message)
+        self.interest[payload["worker"]] = (time.monotonic(), set(payload["tickers"]))
+
+    async def _announce_loop(self):
+        while True:
+            try:
+                await self.backend.publish(INTEREST_CHANNEL, json.dumps({
+                    "worker": self.worker_id,
+                    "tickers": sorted(self.manager.get_all_subscribed_tickers()),
+                }))
+            except Exception as e:
+                logger.warning(f"Could not announce subscribed tickers: {e}")
+            await asyncio.sleep(self.poll_interval)
+
+    async def _election_loop(self):
+        while True:
+            try:
+                leader = await self.backend.hold_lease(PUBLISHER_LEASE, self.worker_id, self.lease_seconds)
+            except Exception as e:
+                # Without a renewal the lease expires; stop polling so two publishers never overlap long
+                logger.warning(f"Could not renew the publisher lease: {e}")
+                leader = False
+            if leader and not self.is_publisher:
+                logger.info(f"Worker {self.worker_id} is now the market data publisher")
+                self.is_publisher = True
+                self._publisher = asyncio.create_task(self.source(self))
+            elif not leader and self.is_publisher:
+                logger.info(f"Worker {self.worker_id} is no longer the market data publisher")
+                self._step_down()
+            metrics.set_gauge("market_data_publisher", 1 if self.is_publisher else 0)
+            await asyncio.sleep(self.lease_seconds / 3)
+
+    def _step_down(self):
+        self.is_publisher = False
+        if self._publisher is not None:
+            self._publisher.cancel()
+            self._publisher = None
+
 
-async def stream_market_prices():
+async def stream_market_prices(feed: MarketFeed):
     """
     Background task to stream real-time prices to WebSocket clients.
-    Runs continuously, fetching prices for all subscribed tickers.
+    Runs while this worker is the publisher, fetching prices for all subscribed tickers.
     """
     logger.info("Starting market price streaming task...")
-    
+
     # Reuse AlpacaService instance to avoid creating too many connections
     alpaca = AlpacaService()
     error_count = 0
     last_error_log_time = 0
-    
+
     while True:
         try:
-            # Get all tickers that clients are subscribed to
-            subscribed_tickers = manager.get_all_subscribed_tickers()
-            
+            # Get all tickers that clients of any worker are subscribed to (plus watched ones)
+            subscribed_tickers = feed.polled_tickers()
+
             if not subscribed_tickers:
                 # No subscriptions, wait before checking again
-                await asyncio.sleep(2)
+                await asyncio.sleep(feed.poll_interval)
                 continue
-            
+
             # Fetch latest prices for all subscribed tickers in parallel
             async def fetch_price(ticker: str):
                 """Fetch latest quote for a single ticker."""
                 try:
+                    # Always from Alpaca: this poll is what keeps the quote cache fresh
                     quote = await alpaca.get_latest_quote(ticker)
-                    
-                    if quote:
-                        bid = quote.get("bid_price", 0)
-                        ask = quote.get("ask_price", 0)
-                        mid_price = (bid + ask) / 2 if bid and ask else bid or ask
-                        
-                        return ticker, {
-                            "price": round(mid_price, 2),
-                            "bid": round(bid, 2),
-                            "ask": round(ask, 2),
-                            "timestamp": quote.get("timestamp", "")
-                        }
-                    return ticker, None
+                    return ticker, quote
                 except Exception as e:
                     # Rate-limit error logging to prevent spam
-                    import time
                     current_time = time.time()
                     nonlocal error_count, last_error_log_time
                     error_count += 1
-                    
+
                     # Only log every 10 seconds
                     if current_time - last_error_log_time > 10:
                         logger.warning(f"Errors fetching prices (count: {error_count}). Last error for {ticker}: {e}")
                         last_error_log_time = current_time
                         error_count = 0
-                    
+
                     return ticker, None
-            
+
             # Fetch all prices in parallel
             results = await asyncio.gather(
                 *[fetch_price(ticker) for ticker in subscribed_tickers],
                 return_exceptions=True
             )
-            
-            # Broadcast updates to subscribers
-            broadcast_count = 0
+
+            # Publish the cycle's quotes in one message; each worker's manager sends only changes
+            updates, quotes = {}, {}
             for result in results:
                 if isinstance(result, Exception):
                     continue
-                
-                ticker, data = result
-                if data:
-                    await manager.broadcast_price_update(ticker, data)
-                    broadcast_count += 1
-            
+
+                ticker, quote = result
+                if quote:
+                    quotes[ticker] = quote
+                    updates[ticker] = price_update(quote)
+            if updates:
+                await feed.publish_prices(updates, quotes)
+
             # Log successful broadcasts occasionally (every 30 seconds)
-            import time
-            if broadcast_count > 0 and int(time.time()) % 30 == 0:
-                logger.debug(f"Broadcasting prices for {broadcast_count} tickers to {manager.get_connection_count()} clients")
-            
+            if updates and int(time.time()) % 30 == 0:
+                logger.debug(f"Published prices for {len(updates)} tickers")
+
             # Update every 2 seconds (reduced from 1 to lower load)
-            await asyncio.sleep(2)
-        
+            await asyncio.sleep(feed.poll_interval)
+
         except Exception as e:
             logger.error(f"Critical error in price streaming task: {e}", exc_info=True)
             await asyncio.sleep(10)  # Wait longer on critical error
 
 
+# This worker's market feed
+market_feed = MarketFeed(
+    create_backend(settings.broadcast_backend, settings.broadcast_url),
+    manager,
+    lease_seconds=settings.market_publisher_lease_seconds,
+)
+
+
 async def start_market_stream():
-    """Start the background price streaming task."""
-    import asyncio
-    asyncio.create_task(stream_market_prices())
+    """Join the market data fan-out (and poll prices while this worker is the publisher)."""
+    await market_feed.start()
     logger.info("Market price streaming task started")
+
+
+async def stop_market_stream():
+    """Stop the market feed, handing the publisher role to another worker."""
+    await market_feed.stop()
@@ -0,0 +1,175 @@
+"""
+In-process metrics registry.
+
+Fixed-bucket histograms, counters and gauges keyed by metric name and label
+values, cheap enough to update on every request and exposed as JSON by the
+API and in the Prometheus text format at `/metrics`. When disabled
+(METRICS_ENABLED=false) every update returns immediately and the request,
+SQL and scheduler hooks are not installed.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import bisect
+import threading
+
+# Seconds; covers sub-second vendor calls up to multi-minute graph runs
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+class Histogram:
+    """Cumulative-bucket histogram (Prometheus semantics)."""
+
+    def __init__(self, buckets: Iterable[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bucket bound containing the q-quantile (None when empty)."""
+        if self.count == 0:
+            return None
+        target = q * self.count
+        running = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            running += count
+            if running >= target:
+                return bound
+        return float("inf")
+
+    def snapshot(self) -> Dict:
+        cumulative, running = {}, 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            running += count
+            cumulative["+Inf" if bound == float("inf") else str(bound)] = running
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "buckets": cumulative,
+        }
+
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class MetricsRegistry:
+    """Named histograms, counters and gauges, one per label combination."""
+
+    def __init__(self):
+        self.enabled = True
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, Dict[LabelKey, Histogram]] = {}
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._gauges: Dict[str, Dict[LabelKey, float]] = {}
+        self._buckets: Dict[str, Tuple[float, ...]] = {}
+
+    def register(self, name: str, buckets: Iterable[float]):
+        """Set custom buckets for a metric (before its first observation)."""
+        self._buckets[name] = tuple(buckets)
+
+    def observe(self, name: str, value: float, **labels):
+        if not self.enabled:
+            return
+        key = _key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram(self._buckets.get(name, DEFAULT_BUCKETS))
+            histogram.observe(value)
+
+    def inc(self, name: str, amount: float = 1.0, **labels):
+        """Add to a counter (name it `*_total`)."""
+        if not self.enabled:
+            return
+        key = _key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + amount
+
+    def set_gauge(self, name: str, value: float, **labels):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._gauges.setdefault(name, {})[_key(labels)] = value
+
+    def add_gauge(self, name: str, delta: float, **labels):
+        if not self.enabled:
+            return
+        key = _key(labels)
+        with self._lock:
+            series = self._gauges.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + delta
+
+    def snapshot(self, prefix: str = "") -> Dict[str, list]:
+        """All series for metrics whose name starts with `prefix`."""
+        with self._lock:
+            return {
+                name: [{"labels": dict(key), **histogram.snapshot()} for key, histogram in series.items()]
+                for name, series in self._histograms.items()
+                if name.startswith(prefix)
+            }
+
+    def values(self, name: str) -> Dict[LabelKey, float]:
+        """Current values of a counter or gauge, by label key."""
+        with self._lock:
+            return dict(self._counters.get(name) or self._gauges.get(name) or {})
+
+    def render_prometheus(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        lines: List[str] = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                lines.append(f"# TYPE {name} counter")
+                lines.extend(f"{name}{_labels(key)} {_number(value)}" for key, value in series.items())
+            for name, series in sorted(self._gauges.items()):
+                lines.append(f"# TYPE {name} gauge")
+                lines.extend(f"{name}{_labels(key)} {_number(value)}" for key, value in series.items())
+            for name, series in sorted(self._histograms.items()):
+                lines.append(f"# TYPE {name} histogram")
+                for key, histogram in series.items():
+                    running = 0
+                    for bound, count in zip(histogram.buckets + (float("inf"),), histogram.counts):
+                        running += count
+                        le = "+Inf" if bound == float("inf") else _number(bound)
+                        lines.append(f"{name}_bucket{_labels(key + (('le', le),))} {running}")
+                    lines.append(f"{name}_sum{_labels(key)} {_number(histogram.sum)}")
+                    lines.append(f"{name}_count{_labels(key)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+            self._gauges.clear()
+
+
+def _labels(key: LabelKey) -> str:
+    if not key:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in key) + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+# Global registry
+metrics = MetricsRegistry()
+
+metrics.register("analysis_node_tokens", (100, 500, 1000, 2500, 5000, 10000, 25000, 50000, 100000))
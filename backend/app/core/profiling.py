@@ -0,0 +1,246 @@
+"""
+On-demand profiling of one analysis or scheduled job run.
+
+A profiled run collects three views, stored under PROFILE_DIR:
+- `<id>.folded`: stack samples of every thread (the event loop and the
+  worker threads running vendor calls), in the collapsed format read by
+  flamegraph.pl, speedscope and inferno
+- `<id>.pstats`: cProfile of the event loop thread (snakeviz, pstats);
+  coroutines interleave there, so other requests running meanwhile show up
+- `<id>.json`: summary with the top functions and the allocation sites
+  that grew the most (tracemalloc)
+
+Scheduled jobs can be armed to profile their next N runs; the wrapper
+installed by `add_interval_job` checks the armed count on every run.
+Only one run is profiled at a time (cProfile and tracemalloc are global);
+a run arriving meanwhile executes unprofiled.
+"""
+
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import cProfile
+import functools
+import io
+import json
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Leaf frames of threads parked with nothing to do (left out of other threads' samples)
+IDLE_LEAVES = {("threading.py", "wait"), ("selectors.py", "select"), ("queue.py", "get")}
+TOP_FUNCTIONS = 30
+TOP_ALLOCATIONS = 20
+
+
+class StackSampler:
+    """Samples the stacks of all threads at a fixed interval into folded-stack counts."""
+
+    def __init__(self, interval_seconds: float, loop_thread: Optional[int] = None):
+        self.interval = interval_seconds
+        self.loop_thread = loop_thread or threading.get_ident()
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                if ident != self.loop_thread and _frame_key(frame) in IDLE_LEAVES:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                thread = "event_loop" if ident == self.loop_thread else names.get(ident, str(ident))
+                self.stacks[";".join([thread] + stack[::-1])] += 1
+            self.samples += 1
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+def _frame_key(frame):
+    return os.path.basename(frame.f_code.co_filename), frame.f_code.co_name
+
+
+def _frame_label(frame) -> str:
+    path = frame.f_code.co_filename
+    short = "/".join(path.replace("\\", "/").rsplit("/", 2)[-2:])
+    return f"{frame.f_code.co_name} ({short}:{frame.f_code.co_firstlineno})"
+
+
+class Profiler:
+    """Runs coroutines under profiling, stores the results and tracks armed scheduled jobs."""
+
+    def __init__(self, directory: str, sample_interval_seconds: float = 0.005, keep: int = 20):
+        self.directory = directory
+        self.sample_interval = sample_interval_seconds
+        self.keep = keep
+        self.armed: Dict[str, int] = {}
+        self._busy = False
+
+    @property
+    def busy(self) -> bool:
+        return self._busy
+
+    async def run(self, label: str, run: Callable[[], Awaitable[Any]], reraise: bool = False) -> Dict[str, Any]:
+        """
+        Await `run()` under the sampler, cProfile and tracemalloc; return the stored summary.
+
+        A failing run is still stored, with its error; `reraise` raises it afterwards.
+        """
+        if self._busy:
+            raise RuntimeError("Another profile is in progress")
+        self._busy = True
+        started_at = datetime.now(timezone.utc)
+        profile_id = f"{started_at:%Y%m%dT%H%M%S%f}-{uuid.uuid4().hex[:6]}"
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        sampler = StackSampler(self.sample_interval)
+        profile = cProfile.Profile()
+        error: Optional[Exception] = None
+        started = time.perf_counter()
+        sampler.start()
+        profile.enable()
+        try:
+            await run()
+        except Exception as e:
+            error = e
+            logger.warning(f"Profiled run {label} failed: {e}")
+        finally:
+            profile.disable()
+            sampler.stop()
+            seconds = time.perf_counter() - started
+            after = tracemalloc.take_snapshot()
+            peak = tracemalloc.get_traced_memory()[1]
+            if started_tracing:
+                tracemalloc.stop()
+            self._busy = False
+
+        summary = {
+            "id": profile_id,
+            "label": label,
+            "started_at": started_at.isoformat(),
+            "seconds": round(seconds, 3),
+            "error": repr(error) if error else None,
+            "samples": sampler.samples,
+            "sample_interval_seconds": self.sample_interval,
+            "peak_traced_bytes": peak,
+            "top_functions": _top_functions(profile),
+            "top_allocations": [
+                {"site": str(stat.traceback[0]), "size_diff_bytes": stat.size_diff, "count_diff": stat.count_diff}
+                for stat in after.compare_to(before, "lineno")[:TOP_ALLOCATIONS]
+            ],
+        }
+        self._store(summary, sampler.folded(), profile)
+        logger.info(f"Profiled {label} in {seconds:.1f}s -> {profile_id}")
+        if error is not None and reraise:
+            raise error
+        return summary
+
+    def arm(self, job_id: str, runs: int):
+        """Profile the next `runs` scheduled runs of a job (0 disarms)."""
+        if runs > 0:
+            self.armed[job_id] = runs
+        else:
+            self.armed.pop(job_id, None)
+
+    def wrap(self, job_id: str, func: Callable[[], Awaitable[Any]]) -> Callable[[], Awaitable[Any]]:
+        """Scheduled job function that runs under profiling while the job is armed."""
+
+        @functools.wraps(func)
+        async def run():
+            if not self.armed.get(job_id) or self._busy:
+                return await func()
+            self.armed[job_id] -= 1
+            if not self.armed[job_id]:
+                del self.armed[job_id]
+            await self.run(f"job:{job_id}", func, reraise=True)
+
+        return run
+
+    # Storage
+
+    def _path(self, profile_id: str, suffix: str) -> str:
+        return os.path.join(self.directory, f"{profile_id}.{suffix}")
+
+    def _store(self, summary: Dict[str, Any], folded: str, profile: cProfile.Profile):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self._path(summary["id"], "folded"), "w") as f:
+            f.write(folded)
+        profile.dump_stats(self._path(summary["id"], "pstats"))
+        with open(self._path(summary["id"], "json"), "w") as f:
+            json.dump(summary, f, indent=2)
+        for stale in self.list()[self.keep:]:
+            for suffix in ("json", "folded", "pstats"):
+                try:
+                    os.remove(self._path(stale["id"], suffix))
+                except FileNotFoundError:
+                    pass
+
+    def list(self) -> List[Dict[str, Any]]:
+        """Stored profiles, newest first (id, label, duration)."""
+        if not os.path.isdir(self.directory):
+            return []
+        profiles = []
+        for name in sorted(os.listdir(self.directory), reverse=True):
+            if name.endswith(".json"):
+                summary = self.get(name[:-len(".json")])
+                if summary:
+                    profiles.append({key: summary[key] for key in ("id", "label", "started_at", "seconds", "error")})
+        return profiles
+
+    def get(self, profile_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._path(os.path.basename(profile_id), "json")) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def file(self, profile_id: str, suffix: str) -> Optional[str]:
+        """Path of a stored profile's folded stacks or pstats, if it exists."""
+        path = self._path(os.path.basename(profile_id), suffix)
+        return path if os.path.exists(path) else None
+
+
+def _top_functions(profile: cProfile.Profile) -> List[Dict[str, Any]]:
+    stats = pstats.Stats(profile, stream=io.StringIO())
+    rows = []
+    for (filename, line, name), (calls, _, own, cumulative, _) in stats.stats.items():
+        rows.append({
+            "function": f"{name} ({'/'.join(filename.rsplit('/', 2)[-2:])}:{line})",
+            "calls": calls,
+            "own_seconds": round(own, 4),
+            "cumulative_seconds": round(cumulative, 4),
+        })
+    return sorted(rows, key=lambda row: row["cumulative_seconds"], reverse=True)[:TOP_FUNCTIONS]
+
+
+# Global profiler
+profiler = Profiler(settings.profile_dir, settings.profile_sample_interval_ms / 1000, settings.profile_keep)
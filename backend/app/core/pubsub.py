@@ -0,0 +1,261 @@
+"""
+Pluggable pub/sub backends for fanning market data out across workers.
+
+Each backend publishes and delivers messages on named channels and keeps
+leased locks, used to elect the one worker that polls prices:
+- "memory": in-process, for a single worker
+- "redis": pub/sub and `SET NX PX` leases, extended and released by Lua
+  scripts, on any Redis-compatible server (Redis, Valkey, KeyDB), spoken
+  over RESP directly
+
+The Redis backend keeps one connection for commands and one for its
+subscriptions; both reconnect after a failure (messages published
+meanwhile are lost, as with any Redis pub/sub client).
+"""
+
+from collections import defaultdict
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import unquote, urlparse
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[str], Awaitable[None]]
+
+# Seconds between reconnection attempts of the subscription connection
+RECONNECT_SECONDS = 1.0
+
+# Compare-and-extend and compare-and-delete of a lease, each atomic on the
+# server: a lease that changed hands since this worker's SET is left alone
+EXTEND_LEASE_SCRIPT = (
+    "if redis.call('GET', KEYS[1]) == ARGV[1] then "
+    "return redis.call('PEXPIRE', KEYS[1], ARGV[2]) else return 0 end"
+)
+RELEASE_LEASE_SCRIPT = (
+    "if redis.call('GET', KEYS[1]) == ARGV[1] then "
+    "return redis.call('DEL', KEYS[1]) else return 0 end"
+)
+
+
+class PubSubError(Exception):
+    """Error reply from the pub/sub server."""
+
+
+class PubSubBackend:
+    """
+    Channel publish/subscribe plus leased locks.
+
+    Subclasses implement `publish`, `hold_lease` and `release_lease`;
+    handlers registered with `subscribe` receive every message published on
+    their channel (by any worker, this one included).
+    """
+
+    name = "backend"
+
+    def __init__(self):
+        self.handlers: Dict[str, List[Handler]] = defaultdict(list)
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    async def subscribe(self, channel: str, handler: Handler):
+        self.handlers[channel].append(handler)
+
+    async def publish(self, channel: str, message: str):
+        raise NotImplementedError
+
+    async def hold_lease(self, name: str, owner: str, ttl_seconds: float) -> bool:
+        """Take the lease, or extend it if `owner` holds it; False while another owner does."""
+        raise NotImplementedError
+
+    async def release_lease(self, name: str, owner: str):
+        raise NotImplementedError
+
+    async def _dispatch(self, channel: str, message: str):
+        for handler in list(self.handlers.get(channel, ())):
+            try:
+                await handler(message)
+            except Exception as e:
+                logger.error(f"Error handling {channel} message: {e}", exc_info=True)
+
+
+class MemoryBackend(PubSubBackend):
+    """Single-process backend: publishing calls this process's handlers."""
+
+    name = "memory"
+
+    def __init__(self):
+        super().__init__()
+        self.leases: Dict[str, Tuple[str, float]] = {}
+
+    async def publish(self, channel: str, message: str):
+        await self._dispatch(channel, message)
+
+    async def hold_lease(self, name: str, owner: str, ttl_seconds: float) -> bool:
+        holder = self.leases.get(name)
+        now = time.monotonic()
+        if holder and holder[0] != owner and holder[1] > now:
+            return False
+        self.leases[name] = (owner, now + ttl_seconds)
+        return True
+
+    async def release_lease(self, name: str, owner: str):
+        if self.leases.get(name, ("",))[0] == owner:
+            del self.leases[name]
+
+
+class RespConnection:
+    """A RESP2 connection: one command at a time, or a stream of pushed pub/sub messages."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self._lock = asyncio.Lock()
+
+    @classmethod
+    async def open(cls, url: str) -> "RespConnection":
+        """Connect to redis://[[user]:password@]host[:port][/db]."""
+        parsed = urlparse(url)
+        if parsed.scheme != "redis":
+            raise ValueError(f"Unsupported pub/sub URL scheme: {parsed.scheme}")
+        reader, writer = await asyncio.open_connection(parsed.hostname or "localhost", parsed.port or 6379)
+        connection = cls(reader, writer)
+        try:
+            if parsed.password:
+                credentials = [unquote(parsed.username), unquote(parsed.password)] if parsed.username else [unquote(parsed.password)]
+                await connection.command("AUTH", *credentials)
+            db = parsed.path.strip("/")
+            if db and db != "0":
+                await connection.command("SELECT", db)
+        except Exception:
+            connection.close()
+            raise
+        return connection
+
+    async def send(self, *args):
+        out = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode()
+            out.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        self.writer.write(b"".join(out))
+        await self.writer.drain()
+
+    async def read(self):
+        line = await self.reader.readline()
+        if not line.endswith(b"\r\n"):
+            raise ConnectionError("Pub/sub connection closed")
+        kind, body = line[:1], line[1:-2]
+        if kind == b"+":
+            return body.decode()
+        if kind == b"-":
+            raise PubSubError(body.decode())
+        if kind == b":":
+            return int(body)
+        if kind == b"$":
+            length = int(body)
+            if length < 0:
+                return None
+            data = await self.reader.readexactly(length + 2)
+            return data[:-2].decode()
+        if kind == b"*":
+            length = int(body)
+            return None if length < 0 else [await self.read() for _ in range(length)]
+        raise ConnectionError(f"Unexpected RESP reply: {line!r}")
+
+    async def command(self, *args):
+        async with self._lock:
+            await self.send(*args)
+            return await self.read()
+
+    def close(self):
+        self.writer.close()
+
+
+class RedisBackend(PubSubBackend):
+    """Backend on a Redis-compatible server, shared by every worker pointed at it."""
+
+    name = "redis"
+
+    def __init__(self, url: str):
+        super().__init__()
+        self.url = url
+        self._commands: Optional[RespConnection] = None
+        self._subscriber: Optional[RespConnection] = None
+        self._listener: Optional[asyncio.Task] = None
+
+    async def start(self):
+        if self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            self._listener = None
+        for connection in (self._commands, self._subscriber):
+            if connection is not None:
+                connection.close()
+        self._commands = self._subscriber = None
+
+    async def subscribe(self, channel: str, handler: Handler):
+        new = channel not in self.handlers
+        await super().subscribe(channel, handler)
+        if new and self._subscriber is not None:
+            # The confirmation is read (and skipped) by the listener
+            await self._subscriber.send("SUBSCRIBE", channel)
+
+    async def _command(self, *args):
+        if self._commands is None:
+            self._commands = await RespConnection.open(self.url)
+        try:
+            return await self._commands.command(*args)
+        except (OSError, ConnectionError, asyncio.IncompleteReadError):
+            # Reconnect on the next command
+            self._commands.close()
+            self._commands = None
+            raise
+
+    async def publish(self, channel: str, message: str):
+        await self._command("PUBLISH", channel, message)
+
+    async def hold_lease(self, name: str, owner: str, ttl_seconds: float) -> bool:
+        ttl_ms = max(1, int(ttl_seconds * 1000))
+        if await self._command("SET", name, owner, "NX", "PX", ttl_ms) == "OK":
+            return True
+        return bool(await self._command("EVAL", EXTEND_LEASE_SCRIPT, 1, name, owner, ttl_ms))
+
+    async def release_lease(self, name: str, owner: str):
+        await self._command("EVAL", RELEASE_LEASE_SCRIPT, 1, name, owner)
+
+    async def _listen(self):
+        while True:
+            try:
+                self._subscriber = await RespConnection.open(self.url)
+                if self.handlers:
+                    await self._subscriber.send("SUBSCRIBE", *self.handlers)
+                while True:
+                    reply = await self._subscriber.read()
+                    if isinstance(reply, list) and len(reply) == 3 and reply[0] == "message":
+                        await self._dispatch(reply[1], reply[2])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Pub/sub subscription connection lost ({e}); reconnecting")
+            finally:
+                if self._subscriber is not None:
+                    self._subscriber.close()
+                    self._subscriber = None
+            await asyncio.sleep(RECONNECT_SECONDS)
+
+
+def create_backend(name: str, url: Optional[str] = None) -> PubSubBackend:
+    """Backend for the BROADCAST_BACKEND setting."""
+    if name == "memory":
+        return MemoryBackend()
+    if name == "redis":
+        return RedisBackend(url or "redis://localhost:6379/0")
+    raise ValueError(f"Unsupported broadcast backend: {name}")
@@ -0,0 +1,48 @@
+"""
+Last-value cache of market quotes.
+
+Holds the latest quote seen per symbol, in AlpacaService's quote format,
+fed by every Alpaca quote lookup and by the market feed (each quote the
+publisher polls reaches every worker). WebSocket subscribers get a price
+from it at once, and lookups that accept a slightly old quote skip Alpaca
+while the cached one is fresh (QUOTE_CACHE_MAX_AGE_SECONDS).
+"""
+
+from typing import Any, Dict, Optional, Tuple
+import time
+
+from app.config import settings
+from app.core.metrics import metrics
+
+
+class QuoteCache:
+    """Latest quote per symbol with the time it was seen."""
+
+    def __init__(self, max_age_seconds: float = 5.0):
+        self.max_age_seconds = max_age_seconds
+        self._quotes: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+
+    def put(self, symbol: str, quote: Dict[str, Any]):
+        self._quotes[symbol] = (time.monotonic(), quote)
+
+    def get(self, symbol: str, max_age_seconds: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """The cached quote if it is at most `max_age_seconds` old (default: the cache's max age)."""
+        entry = self._quotes.get(symbol)
+        max_age = self.max_age_seconds if max_age_seconds is None else max_age_seconds
+        if entry is None or time.monotonic() - entry[0] > max_age:
+            metrics.inc("quote_cache_lookups_total", result="miss")
+            return None
+        metrics.inc("quote_cache_lookups_total", result="hit")
+        return entry[1]
+
+    def age(self, symbol: str) -> Optional[float]:
+        """Seconds since the symbol's quote was cached (None if never)."""
+        entry = self._quotes.get(symbol)
+        return time.monotonic() - entry[0] if entry else None
+
+    def __len__(self) -> int:
+        return len(self._quotes)
+
+
+# Global quote cache
+quote_cache = QuoteCache(settings.quote_cache_max_age_seconds)
@@ -1,15 +1,243 @@
 """
 Background task scheduler using APScheduler.
+
+Jobs never overlap: each runs at most one instance at a time and missed runs
+are coalesced into one. `tracker` records every run's duration, outcome and
+lag behind its scheduled time, counts runs skipped because the previous one
+was still going, and (SCHEDULER_ADAPTIVE_INTERVALS) stretches the interval of
+a job that keeps overrunning it, relaxing it back once runs fit again.
 """
 
+from apscheduler.events import (
+    EVENT_JOB_ERROR,
+    EVENT_JOB_EXECUTED,
+    EVENT_JOB_MAX_INSTANCES,
+    EVENT_JOB_MISSED,
+    EVENT_JOB_SUBMITTED,
+)
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.interval import IntervalTrigger
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import asyncio
+import functools
 import logging
+import math
+import time
+
+from app.core.metrics import metrics
+from app.core.profiling import profiler
 
 logger = logging.getLogger(__name__)
 
+# Runs kept per job for the status API
+RUN_HISTORY = 50
+# A stretched interval leaves this much headroom over the observed duration
+STRETCH_HEADROOM = 1.25
+
 # Create scheduler instance
-scheduler = AsyncIOScheduler()
+scheduler = AsyncIOScheduler(job_defaults={"max_instances": 1, "coalesce": True})
+
+
+class JobStats:
+    """Run history and interval state of one scheduled job."""
+
+    def __init__(self, job_id: str, interval_seconds: Optional[float]):
+        self.job_id = job_id
+        self.base_interval = interval_seconds
+        self.interval = interval_seconds
+        self.runs: deque = deque(maxlen=RUN_HISTORY)
+        self.running_since: Optional[float] = None
+        self.started_at: Optional[datetime] = None
+        self.current_lag = 0.0
+        self.overrun_streak = 0
+        self.fit_streak = 0
+        self.overruns = 0
+        self.skipped = 0
+        self.missed = 0
+        self.errors = 0
+
+    def summary(self) -> Dict[str, Any]:
+        durations = sorted(run["duration_seconds"] for run in self.runs)
+        last = self.runs[-1] if self.runs else None
+        return {
+            "base_interval_seconds": self.base_interval,
+            "interval_seconds": self.interval,
+            "stretched": self.interval != self.base_interval,
+            "running_for_seconds": round(time.perf_counter() - self.running_since, 3) if self.running_since else None,
+            "runs": len(self.runs),
+            "errors": self.errors,
+            "overruns": self.overruns,
+            "skipped_runs": self.skipped,
+            "missed_runs": self.missed,
+            "last_run": last,
+            "p50_seconds": durations[len(durations) // 2] if durations else None,
+            "max_seconds": durations[-1] if durations else None,
+            "max_lag_seconds": max((run["lag_seconds"] for run in self.runs), default=None),
+        }
+
+
+class JobTracker:
+    """
+    Records scheduler job runs from APScheduler events and adapts intervals.
+
+    A run overruns when it takes longer than the job's current interval; after
+    `overrun_streak` overruns in a row the interval is stretched to fit the
+    last run (with headroom), up to `max_stretch` x the configured interval.
+    After as many runs in a row that fit the configured interval, it is
+    relaxed back towards it.
+    """
+
+    def __init__(self, scheduler: AsyncIOScheduler):
+        self.scheduler = scheduler
+        self.jobs: Dict[str, JobStats] = {}
+        self.adaptive = True
+        self.overrun_streak = 3
+        self.max_stretch = 4.0
+        # Held by every run of a job, scheduled or started directly (e.g. profiled)
+        self.locks: Dict[str, asyncio.Lock] = {}
+        scheduler.add_listener(self._on_submitted, EVENT_JOB_SUBMITTED)
+        scheduler.add_listener(self._on_finished, EVENT_JOB_EXECUTED | EVENT_JOB_ERROR)
+        scheduler.add_listener(self._on_skipped, EVENT_JOB_MAX_INSTANCES | EVENT_JOB_MISSED)
+
+    def configure(self, adaptive: bool, overrun_streak: int, max_stretch: float):
+        self.adaptive = adaptive
+        self.overrun_streak = max(1, overrun_streak)
+        self.max_stretch = max(1.0, max_stretch)
+
+    def register(self, job_id: str, interval_seconds: Optional[float]):
+        """Track a job (interval None for cron-style jobs, which are never stretched)."""
+        previous = self.jobs.get(job_id)
+        if previous is None or previous.base_interval != interval_seconds:
+            self.jobs[job_id] = JobStats(job_id, interval_seconds)
+
+    def lock(self, job_id: str) -> asyncio.Lock:
+        """Lock a run of the job must hold; a direct run takes it to keep scheduled runs out."""
+        return self.locks.setdefault(job_id, asyncio.Lock())
+
+    def exclusive(self, job_id: str, func: Callable[[], Awaitable[Any]]) -> Callable[[], Awaitable[Any]]:
+        """Scheduled job function that skips its run while another run of the job holds the lock."""
+
+        @functools.wraps(func)
+        async def run():
+            lock = self.lock(job_id)
+            if lock.locked():
+                self._stats(job_id).skipped += 1
+                logger.warning(f"Job {job_id} skipped: a direct run is still going")
+                return
+            async with lock:
+                return await func()
+
+        return run
+
+    def _stats(self, job_id: str) -> JobStats:
+        if job_id not in self.jobs:
+            self.jobs[job_id] = JobStats(job_id, None)
+        return self.jobs[job_id]
+
+    def _on_submitted(self, event):
+        stats = self._stats(event.job_id)
+        stats.running_since = time.perf_counter()
+        stats.started_at = datetime.now(timezone.utc)
+        scheduled = event.scheduled_run_times[-1] if event.scheduled_run_times else None
+        stats.current_lag = (datetime.now(timezone.utc) - scheduled).total_seconds() if scheduled else 0.0
+
+    def _on_finished(self, event):
+        stats = self._stats(event.job_id)
+        if stats.running_since is None:
+            return
+        duration = time.perf_counter() - stats.running_since
+        stats.running_since = None
+        failed = event.code == EVENT_JOB_ERROR
+        if failed:
+            stats.errors += 1
+        stats.runs.append({
+            "started_at": stats.started_at.isoformat(),
+            "duration_seconds": round(duration, 3),
+            "lag_seconds": round(max(stats.current_lag, 0.0), 3),
+            "outcome": "error" if failed else "ok",
+            "error": repr(event.exception) if failed else None,
+        })
+        if stats.interval is not None:
+            self._adapt(stats, duration)
+
+    def _on_skipped(self, event):
+        stats = self._stats(event.job_id)
+        if event.code == EVENT_JOB_MAX_INSTANCES:
+            stats.skipped += 1
+            logger.warning(f"Job {event.job_id} skipped: previous run still going")
+        else:
+            stats.missed += 1
+
+    def _adapt(self, stats: JobStats, duration: float):
+        if duration > stats.interval:
+            stats.overruns += 1
+            stats.overrun_streak += 1
+            stats.fit_streak = 0
+        else:
+            stats.overrun_streak = 0
+            stats.fit_streak = stats.fit_streak + 1 if duration <= stats.base_interval else 0
+        if not self.adaptive:
+            return
+
+        target = stats.interval
+        if stats.overrun_streak >= self.overrun_streak:
+            target = min(stats.base_interval * self.max_stretch, math.ceil(duration * STRETCH_HEADROOM))
+            stats.overrun_streak = 0
+        elif stats.interval > stats.base_interval and stats.fit_streak >= self.overrun_streak:
+            recent = max(run["duration_seconds"] for run in list(stats.runs)[-self.overrun_streak:])
+            target = min(stats.interval, max(stats.base_interval, math.ceil(recent * STRETCH_HEADROOM)))
+            stats.fit_streak = 0
+        if target != stats.interval:
+            self._reschedule(stats, target)
+
+    def _reschedule(self, stats: JobStats, seconds: float):
+        logger.warning(
+            f"Job {stats.job_id} interval {stats.interval:g}s -> {seconds:g}s "
+            f"(configured {stats.base_interval:g}s)"
+        )
+        stats.interval = seconds
+        metrics.set_gauge("scheduler_job_interval_seconds", seconds, job=stats.job_id)
+        if self.scheduler.get_job(stats.job_id):
+            self.scheduler.reschedule_job(stats.job_id, trigger=IntervalTrigger(seconds=seconds))
+
+    def status(self) -> Dict[str, Any]:
+        """Per-job run statistics, current interval and how far the job is behind its schedule."""
+        now = datetime.now(timezone.utc)
+        jobs = {}
+        for job_id, stats in self.jobs.items():
+            job = self.scheduler.get_job(job_id)
+            summary = stats.summary()
+            summary["next_run_time"] = job.next_run_time.isoformat() if job and job.next_run_time else None
+            # A next run time in the past means the job is waiting on a run that is still going
+            summary["behind_seconds"] = (
+                round(max((now - job.next_run_time).total_seconds(), 0.0), 3) if job and job.next_run_time else None
+            )
+            jobs[job_id] = summary
+        return {"running": self.scheduler.running, "adaptive_intervals": self.adaptive, "jobs": jobs}
+
+    def history(self, job_id: str) -> List[Dict[str, Any]]:
+        stats = self.jobs.get(job_id)
+        return list(stats.runs) if stats else []
+
+
+tracker = JobTracker(scheduler)
+
+
+def add_interval_job(func, job_id: str, name: str, seconds: float):
+    """Add (or replace) a tracked, non-overlapping interval job (profiled while armed)."""
+    tracker.register(job_id, seconds)
+    scheduler.add_job(
+        tracker.exclusive(job_id, profiler.wrap(job_id, func)),
+        trigger=IntervalTrigger(seconds=seconds),
+        id=job_id,
+        name=name,
+        replace_existing=True,
+        max_instances=1,
+        coalesce=True,
+        misfire_grace_time=max(1, int(seconds)),
+    )
 
 
 def setup_autonomous_jobs():
@@ -17,70 +245,64 @@ def setup_autonomous_jobs():
     from app.config import settings
     from app.core.database import AsyncSessionLocal
     from app.services.autonomous_service import (
+        AutonomousService,
         gather_signals_job,
         run_analysis_job,
         monitor_positions_job
     )
-    
+    from app.services.reconciliation_service import reconciler
+    from tradingagents.rate_governor import BACKGROUND, llm_priority
+
+    tracker.configure(
+        settings.scheduler_adaptive_intervals,
+        settings.scheduler_overrun_streak,
+        settings.scheduler_max_interval_stretch,
+    )
+
     async def gather_signals_wrapper():
         """Wrapper to create DB session for gather_signals_job."""
         async with AsyncSessionLocal() as db:
             await gather_signals_job(db)
-    
+
     async def run_analysis_wrapper():
         """Wrapper to create DB session for run_analysis_job."""
-        async with AsyncSessionLocal() as db:
-            await run_analysis_job(db)
-    
+        # Scheduled analyses queue behind interactive requests for LLM budget
+        with llm_priority(BACKGROUND):
+            async with AsyncSessionLocal() as db:
+                await run_analysis_job(db)
+
     async def monitor_positions_wrapper():
         """Wrapper to create DB session for monitor_positions_job."""
         async with AsyncSessionLocal() as db:
             await monitor_positions_job(db)
-    
+
     # Data gathering job - every 30 seconds
-    scheduler.add_job(
-        gather_signals_wrapper,
-        trigger=IntervalTrigger(seconds=settings.data_poll_interval_seconds),
-        id="gather_signals",
-        name="Gather social media signals",
-        replace_existing=True
-    )
-    
-    # Analysis job - every 5 minutes
-    scheduler.add_job(
-        run_analysis_wrapper,
-        trigger=IntervalTrigger(seconds=settings.analyst_interval_seconds),
-        id="run_analysis",
-        name="Run trading analysis",
-        replace_existing=True
-    )
-    
-    # Position monitoring job - every minute
-    scheduler.add_job(
-        monitor_positions_wrapper,
-        trigger=IntervalTrigger(seconds=60),
-        id="monitor_positions",
-        name="Monitor positions",
-        replace_existing=True
-    )
+    add_interval_job(gather_signals_wrapper, "gather_signals", "Gather social media signals",
+                     settings.data_poll_interval_seconds)
+
+    # Analysis job - every 2 minutes
+    add_interval_job(run_analysis_wrapper, "run_analysis", "Run trading analysis",
+                     settings.analyst_interval_seconds)
+
+    # Position monitoring sweep - every minute (exits fire on price ticks; this is the safety net)
+    add_interval_job(monitor_positions_wrapper, "monitor_positions", "Monitor positions", 60)
+
+    # DB/Alpaca reconciliation (also runs on fill events)
+    add_interval_job(reconciler.run, "reconcile_positions", "Reconcile positions with Alpaca",
+                     settings.reconcile_interval_seconds)
 
     # Monitor Watchlist Analysis (The "Morning Report") - every 24 hours (or configurable)
     # For demo purposes, we'll run it every hour
     from app.services.monitor_service import MonitorService
-    
+
     async def run_monitor_analysis_wrapper():
         """Wrapper for watchlist analysis."""
-        async with AsyncSessionLocal() as db:
-            service = MonitorService(db)
-            await service.run_scheduled_analysis()
+        with llm_priority(BACKGROUND):
+            async with AsyncSessionLocal() as db:
+                service = MonitorService(db)
+                await service.run_scheduled_analysis()
 
-    scheduler.add_job(
-        run_monitor_analysis_wrapper,
-        trigger=IntervalTrigger(hours=1), # Run hourly for demo
-        id="monitor_watchlist_analysis",
-        name="Analyze Watchlist",
-        replace_existing=True
-    )
+    add_interval_job(run_monitor_analysis_wrapper, "monitor_watchlist_analysis", "Analyze Watchlist", 3600)
 
     # Capture Portfolio Snapshot - Hourly
     async def capture_snapshot_wrapper():
@@ -88,18 +310,10 @@ def setup_autonomous_jobs():
         async with AsyncSessionLocal() as db:
             service = AutonomousService(db)
             await service.capture_portfolio_snapshot()
-            
-    scheduler.add_job(
-        capture_snapshot_wrapper,
-        trigger=IntervalTrigger(hours=1),
-        id="capture_portfolio_snapshot",
-        name="Capture Portfolio Snapshot",
-        replace_existing=True
-    )
-    
+
+    add_interval_job(capture_snapshot_wrapper, "capture_portfolio_snapshot", "Capture Portfolio Snapshot", 3600)
+
     logger.info("Autonomous trading and Monitor jobs configured")
-    
-    logger.info("Autonomous trading jobs configured")
 
 
 def start_scheduler():
@@ -51,3 +51,26 @@ def verify_kill_switch(credentials: HTTPAuthorizationCredentials = Security(secu
         )
     
     return True
+
+
+def verify_admin(credentials: HTTPAuthorizationCredentials = Security(security)) -> bool:
+    """Verify admin key (profiling and other operator-only endpoints)."""
+    if not settings.admin_api_key:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access not configured"
+        )
+    
+    if not credentials:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Missing authorization header"
+        )
+    
+    if not secrets.compare_digest(credentials.credentials, settings.admin_api_key):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Invalid admin key"
+        )
+    
+    return True
@@ -0,0 +1,82 @@
+"""
+Price trigger index for take-profit and stop-loss exits.
+
+Levels are kept in per-symbol lists sorted by price, so checking a tick
+bisects to the crossed levels: O(log n) plus the triggers that fire.
+"""
+
+from bisect import bisect_left, bisect_right, insort
+from typing import Dict, List, Optional, Set, Tuple
+import math
+
+TAKE_PROFIT = "take_profit"
+STOP_LOSS = "stop_loss"
+
+
+class TriggerIndex:
+    """
+    Take-profit and stop-loss levels of open positions, sorted per symbol.
+
+    A take-profit fires once the price is at or above its level, a
+    stop-loss once it is at or below. Fired triggers stay in the index
+    until removed.
+    """
+
+    def __init__(self):
+        self._take_profits: Dict[str, List[Tuple[float, int]]] = {}
+        self._stop_losses: Dict[str, List[Tuple[float, int]]] = {}
+        # Map of position_id -> (symbol, take-profit level, stop-loss level)
+        self._positions: Dict[int, Tuple[str, Optional[float], Optional[float]]] = {}
+
+    def add(self, position_id: int, symbol: str, take_profit: Optional[float], stop_loss: Optional[float]):
+        """Index a position's levels (replacing any it had)."""
+        self.remove(position_id)
+        if take_profit is not None:
+            insort(self._take_profits.setdefault(symbol, []), (take_profit, position_id))
+        if stop_loss is not None:
+            insort(self._stop_losses.setdefault(symbol, []), (stop_loss, position_id))
+        self._positions[position_id] = (symbol, take_profit, stop_loss)
+
+    def remove(self, position_id: int) -> bool:
+        entry = self._positions.pop(position_id, None)
+        if entry is None:
+            return False
+        symbol, take_profit, stop_loss = entry
+        if take_profit is not None:
+            _discard(self._take_profits, symbol, (take_profit, position_id))
+        if stop_loss is not None:
+            _discard(self._stop_losses, symbol, (stop_loss, position_id))
+        return True
+
+    def check(self, symbol: str, price: float) -> List[Tuple[int, str]]:
+        """(position_id, TAKE_PROFIT or STOP_LOSS) for every level `price` has crossed."""
+        fired = []
+        take_profits = self._take_profits.get(symbol)
+        if take_profits and take_profits[0][0] <= price:
+            end = bisect_right(take_profits, (price, math.inf))
+            fired.extend((position_id, TAKE_PROFIT) for _, position_id in take_profits[:end])
+        stop_losses = self._stop_losses.get(symbol)
+        if stop_losses and stop_losses[-1][0] >= price:
+            start = bisect_left(stop_losses, (price, -math.inf))
+            fired.extend((position_id, STOP_LOSS) for _, position_id in stop_losses[start:])
+        return fired
+
+    def levels(self, position_id: int) -> Optional[Tuple[str, Optional[float], Optional[float]]]:
+        return self._positions.get(position_id)
+
+    def symbols(self) -> Set[str]:
+        return set(self._take_profits) | set(self._stop_losses)
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+
+def _discard(levels: Dict[str, List[Tuple[float, int]]], symbol: str, item: Tuple[float, int]):
+    entries = levels.get(symbol)
+    if not entries:
+        return
+    i = bisect_left(entries, item)
+    if i < len(entries) and entries[i] == item:
+        del entries[i]
+    if not entries:
+        del levels[symbol]
@@ -0,0 +1,106 @@
+"""
+Process-wide persistent vector store.
+
+A single store is opened at startup and shared by the Observer (writer),
+the Sentinel (reader) and the TradingAgents situation memories, so memory
+contents survive restarts and are visible across services.
+
+Backends:
+- "flat": memory-mapped NumPy index (float32, or int8 with exact re-rank)
+- "chroma": Chroma PersistentClient (HNSW)
+"""
+
+import chromadb
+from chromadb.config import Settings as ChromaSettings
+from typing import Dict, Optional
+import logging
+import os
+
+from app.config import settings
+from app.core.flat_index import FlatIndexCollection, list_collections
+
+logger = logging.getLogger(__name__)
+
+
+class VectorStore:
+    """
+    Thin facade over the configured vector backend.
+
+    Exposes the same `get_or_create_collection` call the memory classes
+    already use, so it can be injected wherever a Chroma client was created.
+    Collections are cached so repeated lookups don't hit the backend.
+    """
+
+    def __init__(self, path: str, backend: str = "flat", precision: str = "float32"):
+        if backend not in ("flat", "chroma"):
+            raise ValueError(f"Unsupported vector store backend: {backend}")
+
+        self.path = path
+        self.backend = backend
+        self.precision = precision
+        self._client = None
+        self._collections: Dict[str, object] = {}
+
+    @property
+    def client(self):
+        """Lazily open the underlying persistent Chroma client."""
+        if self._client is None:
+            os.makedirs(self.path, exist_ok=True)
+            self._client = chromadb.PersistentClient(
+                path=self.path,
+                settings=ChromaSettings(anonymized_telemetry=False, allow_reset=True),
+            )
+            logger.info(f"Vector store opened at {self.path}")
+        return self._client
+
+    def get_or_create_collection(self, name: str):
+        """Get a collection by name, creating it on first use."""
+        if name not in self._collections:
+            if self.backend == "flat":
+                self._collections[name] = FlatIndexCollection(name, self.path, precision=self.precision)
+            else:
+                self._collections[name] = self.client.get_or_create_collection(name=name)
+        return self._collections[name]
+
+    def warm_load(self) -> Dict[str, int]:
+        """
+        Open every existing collection so the first query doesn't pay the load cost.
+
+        Returns:
+            Mapping of collection name to document count
+        """
+        if self.backend == "flat":
+            names = list_collections(self.path)
+        else:
+            names = [c if isinstance(c, str) else c.name for c in self.client.list_collections()]
+
+        counts = {name: self.get_or_create_collection(name).count() for name in names}
+
+        logger.info(f"Vector store warm-loaded {len(counts)} collections ({sum(counts.values())} vectors)")
+        return counts
+
+    def stats(self) -> Dict[str, int]:
+        """Get document counts for the collections opened so far."""
+        return {name: collection.count() for name, collection in self._collections.items()}
+
+
+# Global vector store instance (created on first use)
+_vector_store: Optional[VectorStore] = None
+
+
+def get_vector_store() -> VectorStore:
+    """Get the process-wide vector store."""
+    global _vector_store
+    if _vector_store is None:
+        _vector_store = VectorStore(
+            settings.vector_store_path,
+            backend=settings.vector_store_backend,
+            precision=settings.vector_store_precision,
+        )
+    return _vector_store
+
+
+def init_vector_store() -> Dict[str, int]:
+    """Open the vector store and warm-load its collections."""
+    logger.info("Initializing vector store...")
+    return get_vector_store().warm_load()
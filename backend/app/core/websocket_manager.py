@@ -1,110 +1,422 @@
 """
 WebSocket Connection Manager for real-time market data streaming.
 Manages client connections, subscriptions, and broadcasts price updates.
+
+Broadcasts look up a ticker's subscribers in an inverted index and encode
+the message once. Each socket has a bounded outbound queue drained by its
+own writer task, so a slow client only delays itself: when its queue is
+full, broadcasts drop its oldest queued frame. Direct replies to a client
+(`send_personal_message`) wait for room instead of dropping.
+
+Price updates are change-only and conflated: an update whose price, bid and
+ask equal the ticker's last broadcast is not sent, and each client keeps
+only its latest pending update per ticker until the next flush (every
+`flush_interval` seconds, later while its writer is still sending the
+previous flush). Clients that negotiate `batch` on subscribe get one
+`price_updates` frame per flush instead of a `price_update` frame per
+ticker; `encoding: "msgpack"` (when msgpack is installed) sends those
+batches as binary frames.
 """
 
 from fastapi import WebSocket
-from typing import Dict, Set
-import logging
+from collections import Counter, deque
+from typing import Dict, List, Optional, Set
+import asyncio
 import json
+import logging
+
+from app.config import settings
+from app.core.metrics import metrics
+
+try:
+    import msgpack
+except ImportError:  # Optional: binary price frames fall back to JSON
+    msgpack = None
 
 logger = logging.getLogger(__name__)
 
+# Frames queued per socket before broadcasts start dropping the oldest
+OUTBOX_SIZE = 256
+# Seconds between flushes of conflated price updates
+FLUSH_INTERVAL = 0.25
+# Shortest flush interval (the flusher sleeps this long between flushes)
+MIN_FLUSH_INTERVAL = 0.01
+
+
+def encode(message: dict) -> str:
+    """JSON text frame, encoded like Starlette's send_json."""
+    return json.dumps(message, separators=(",", ":"), ensure_ascii=False)
+
+
+class PriceItem:
+    """A ticker's price update, encoded once and shared by every subscriber's buffer."""
+
+    __slots__ = ("ticker", "data", "key", "text", "_frame", "_packed")
+
+    def __init__(self, ticker: str, data: dict):
+        self.ticker = ticker
+        self.data = data
+        self.key = price_key(data)
+        self.text = encode({"ticker": ticker, "data": data})
+        self._frame: Optional[str] = None
+        self._packed: Optional[bytes] = None
+
+    @property
+    def frame(self) -> str:
+        """{"type": "price_update", "ticker": ..., "data": ...} from the item's encoding."""
+        if self._frame is None:
+            self._frame = '{"type":"price_update",' + self.text[1:]
+        return self._frame
+
+    @property
+    def packed(self) -> bytes:
+        if self._packed is None:
+            self._packed = msgpack.packb({"ticker": self.ticker, "data": self.data})
+        return self._packed
+
+
+def price_key(data: dict) -> tuple:
+    """What must change for an update to be sent (timestamps and volume alone do not count)."""
+    return data.get("price"), data.get("bid"), data.get("ask")
+
+
+def batch_frame(items: List[PriceItem]) -> str:
+    """{"type": "price_updates", "updates": [{"ticker": ..., "data": ...}, ...]} from the items' encodings."""
+    return '{"type":"price_updates","updates":[' + ",".join(item.text for item in items) + "]}"
+
+
+def packed_batch_frame(items: List[PriceItem]) -> bytes:
+    """The msgpack form of `batch_frame`, concatenating the items' encodings."""
+    # Map header and the keys up to the (here empty) updates array, then the real array
+    head = msgpack.packb({"type": "price_updates", "updates": []})[:-1]
+    return head + msgpack.Packer().pack_array_header(len(items)) + b"".join(item.packed for item in items)
+
+
+class ClientOutbox:
+    """
+    Bounded buffer of encoded frames for one socket, drained by a writer task.
+
+    The writer wakes once per batch of queued frames rather than per frame.
+    Price updates wait in `prices` (latest per ticker) until the manager
+    flushes them into frames, in the format the client negotiated.
+    """
+
+    def __init__(self, websocket: WebSocket, on_error, size: int = OUTBOX_SIZE):
+        self.websocket = websocket
+        self.size = size
+        self.frames: deque = deque()
+        self.prices: Dict[str, PriceItem] = {}
+        self.batch = False
+        self.encoding = "json"
+        self.dropped = 0
+        self.conflated = 0
+        self._blocked = False
+        self._on_error = on_error
+        self._ready = asyncio.Event()
+        self._room = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self.task = asyncio.create_task(self._drain())
+
+    def offer_price(self, item: PriceItem):
+        """Hold a price update for the next flush, replacing a pending one for the same ticker."""
+        if item.ticker in self.prices:
+            self.conflated += 1
+        self.prices[item.ticker] = item
+
+    def flush_prices(self):
+        """Turn the pending price updates into frames."""
+        if not self.prices:
+            return
+        items = list(self.prices.values())
+        self.prices.clear()
+        if self.conflated:
+            metrics.inc("websocket_conflated_updates_total", self.conflated)
+            self.conflated = 0
+        if self.encoding == "msgpack":
+            self.offer("price_updates", packed_batch_frame(items))
+        elif self.batch:
+            self.offer("price_updates", batch_frame(items))
+        else:
+            for item in items:
+                self.offer("price_update", item.frame)
+
+    def offer(self, kind: str, text):
+        """Queue a frame without waiting, dropping the oldest one if the buffer is full."""
+        frames = self.frames
+        if not frames:
+            # The writer is waiting, or finishing its batch (it re-checks before waiting)
+            self._idle.clear()
+            self._ready.set()
+        elif len(frames) >= self.size:
+            frames.popleft()
+            self.dropped += 1
+            metrics.inc("websocket_dropped_messages_total")
+        frames.append((kind, text))
+
+    async def put(self, kind: str, text):
+        """Queue a frame, waiting while the buffer is full."""
+        while len(self.frames) >= self.size:
+            self._blocked = True
+            self._room.clear()
+            await self._room.wait()
+        self.offer(kind, text)
+
+    async def _drain(self):
+        while True:
+            await self._ready.wait()
+            self._ready.clear()
+            sent = Counter()
+            try:
+                while self.frames:
+                    kind, payload = self.frames.popleft()
+                    if isinstance(payload, bytes):
+                        await self.websocket.send_bytes(payload)
+                    else:
+                        await self.websocket.send_text(payload)
+                    sent[kind] += 1
+                    if self._blocked:
+                        self._blocked = False
+                        self._room.set()
+            except Exception as e:
+                # Use debug level to avoid spam - disconnected clients are normal
+                logger.debug(f"Error sending to client: {e}")
+                self._on_error(self.websocket)
+                return
+            finally:
+                for kind, count in sent.items():
+                    metrics.inc("websocket_messages_total", count, direction="sent", type=kind)
+            if not self.frames:
+                self._idle.set()
+
+    async def wait_idle(self):
+        await self._idle.wait()
+
+    def close(self):
+        """Stop the writer and discard pending frames (so `flush` never waits on a closed socket)."""
+        if self.task is not asyncio.current_task():
+            self.task.cancel()
+        self.frames.clear()
+        self.prices.clear()
+        self._room.set()
+        self._idle.set()
+
 
 class ConnectionManager:
     """Manages WebSocket connections and subscriptions for market data."""
-    
-    def __init__(self):
+
+    def __init__(self, outbox_size: int = OUTBOX_SIZE, flush_interval: float = FLUSH_INTERVAL):
+        self.outbox_size = outbox_size
+        self.flush_interval = max(flush_interval, MIN_FLUSH_INTERVAL)
         # Map of client_id -> set of websockets
         self.active_connections: Dict[str, Set[WebSocket]] = {}
         # Map of websocket -> set of subscribed tickers
         self.subscriptions: Dict[WebSocket, Set[str]] = {}
-    
+        # Map of ticker -> set of subscribed websockets (inverse of subscriptions)
+        self.subscribers: Dict[str, Set[WebSocket]] = {}
+        # Map of websocket -> client_id (inverse of active_connections)
+        self.client_ids: Dict[WebSocket, str] = {}
+        self.outboxes: Dict[WebSocket, ClientOutbox] = {}
+        # Map of ticker -> last broadcast update (change detection, catch-up on subscribe)
+        self.last_prices: Dict[str, PriceItem] = {}
+        # Outboxes holding price updates for the next flush
+        self._dirty: Set[ClientOutbox] = set()
+        self._flusher: Optional[asyncio.Task] = None
+
     async def connect(self, websocket: WebSocket, client_id: str):
         """Accept and register a new WebSocket connection."""
         await websocket.accept()
-        
+
         if client_id not in self.active_connections:
             self.active_connections[client_id] = set()
-        
+
         self.active_connections[client_id].add(websocket)
         self.subscriptions[websocket] = set()
-        
+        self.client_ids[websocket] = client_id
+        self.outboxes[websocket] = ClientOutbox(websocket, self._drop, self.outbox_size)
+        metrics.add_gauge("websocket_connections", 1)
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._flush_loop())
+
         logger.info(f"Client {client_id} connected. Total connections: {self.get_connection_count()}")
-    
+
     def disconnect(self, websocket: WebSocket, client_id: str):
         """Remove a WebSocket connection."""
         if client_id in self.active_connections:
             self.active_connections[client_id].discard(websocket)
-            
+
             # Clean up empty client entries
             if not self.active_connections[client_id]:
                 del self.active_connections[client_id]
-        
+
         if websocket in self.subscriptions:
-            del self.subscriptions[websocket]
-        
+            self._remove_subscribers(websocket, self.subscriptions.pop(websocket))
+            metrics.add_gauge("websocket_connections", -1)
+        self.client_ids.pop(websocket, None)
+        outbox = self.outboxes.pop(websocket, None)
+        if outbox:
+            self._dirty.discard(outbox)
+            outbox.close()
+
         logger.info(f"Client {client_id} disconnected. Total connections: {self.get_connection_count()}")
-    
+
+    def _drop(self, websocket: WebSocket):
+        """Disconnect a socket whose send failed."""
+        client_id = self.client_ids.get(websocket)
+        if client_id is not None:
+            self.disconnect(websocket, client_id)
+
     def subscribe(self, websocket: WebSocket, tickers: list[str]):
         """Subscribe a WebSocket to specific tickers."""
         if websocket in self.subscriptions:
-            self.subscriptions[websocket].update(tickers)
+            subscribed = self.subscriptions[websocket]
+            outbox = self.outboxes[websocket]
+            for ticker in tickers:
+                self.subscribers.setdefault(ticker, set()).add(websocket)
+                # Updates are change-only: catch a new subscriber up with the last one
+                if ticker not in subscribed and ticker in self.last_prices:
+                    self._offer(outbox, self.last_prices[ticker])
+            subscribed.update(tickers)
             logger.debug(f"Subscribed to {tickers}. Total subscriptions: {len(self.subscriptions[websocket])}")
-    
+
     def unsubscribe(self, websocket: WebSocket, tickers: list[str]):
         """Unsubscribe a WebSocket from specific tickers."""
         if websocket in self.subscriptions:
             self.subscriptions[websocket].difference_update(tickers)
+            self._remove_subscribers(websocket, tickers)
+            outbox = self.outboxes[websocket]
+            for ticker in tickers:
+                outbox.prices.pop(ticker, None)
             logger.debug(f"Unsubscribed from {tickers}")
-    
+
+    def _remove_subscribers(self, websocket: WebSocket, tickers):
+        for ticker in tickers:
+            sockets = self.subscribers.get(ticker)
+            if sockets is not None:
+                sockets.discard(websocket)
+                if not sockets:
+                    del self.subscribers[ticker]
+                    self.last_prices.pop(ticker, None)
+
+    def send_snapshot(self, websocket: WebSocket, updates: Dict[str, dict]):
+        """Send one socket the given prices of its subscribed tickers (and any pending updates) now."""
+        outbox = self.outboxes.get(websocket)
+        if outbox is None:
+            return
+        subscribed = self.subscriptions[websocket]
+        for ticker, data in updates.items():
+            if ticker in subscribed:
+                item = PriceItem(ticker, data)
+                # The base for change detection until the ticker's first broadcast
+                self.last_prices.setdefault(ticker, item)
+                outbox.offer_price(item)
+        self._dirty.discard(outbox)
+        outbox.flush_prices()
+
+    def set_delivery(self, websocket: WebSocket, batch: Optional[bool] = None,
+                     encoding: Optional[str] = None) -> Dict[str, object]:
+        """
+        Apply a client's price delivery options (None keeps the current one).
+
+        Unknown encodings, and msgpack without the msgpack package, fall back
+        to JSON; msgpack frames are always batched. Returns what is in effect.
+        """
+        outbox = self.outboxes.get(websocket)
+        if outbox is None:
+            return {"batch": False, "encoding": "json"}
+        if batch is not None:
+            outbox.batch = bool(batch)
+        if encoding is not None:
+            outbox.encoding = "msgpack" if encoding == "msgpack" and msgpack is not None else "json"
+        return {"batch": outbox.batch or outbox.encoding == "msgpack", "encoding": outbox.encoding}
+
     async def send_personal_message(self, message: dict, websocket: WebSocket):
-        """Send a message to a specific WebSocket."""
+        """Send a message to a specific WebSocket (queued behind its pending frames)."""
+        outbox = self.outboxes.get(websocket)
         try:
-            await websocket.send_json(message)
+            if outbox is not None:
+                await outbox.put(message.get("type", "other"), encode(message))
+            else:
+                await websocket.send_json(message)
         except Exception as e:
             # Downgrade to warning as client might have disconnected
             logger.warning(f"Error sending personal message: {e}")
-    
-    async def broadcast_price_update(self, ticker: str, data: dict):
-        """Broadcast price update to all subscribers of a ticker."""
-        message = {
-            "type": "price_update",
-            "ticker": ticker,
-            "data": data
-        }
-        
-        disconnected = []
-        
-        # Iterate over a copy of the items to avoid RuntimeError if subscriptions change
-        for ws, subscribed_tickers in list(self.subscriptions.items()):
-            if ticker in subscribed_tickers:
-                try:
-                    await ws.send_json(message)
-                except Exception as e:
-                    # Use debug level to avoid spam - disconnected clients are normal
-                    logger.debug(f"Error broadcasting to client: {e}")
-                    disconnected.append(ws)
-        
-        # Clean up disconnected websockets
-        for ws in disconnected:
-            # Find client_id for this websocket
-            for client_id, ws_set in self.active_connections.items():
-                if ws in ws_set:
-                    self.disconnect(ws, client_id)
-                    break
-    
+
+    async def broadcast_price_update(self, ticker: str, data: dict) -> bool:
+        """
+        Queue a price update for all subscribers of a ticker, sent on the next flush.
+
+        Returns False when nobody is subscribed or bid/ask/mid did not change.
+        """
+        sockets = self.subscribers.get(ticker)
+        if not sockets:
+            return False
+        last = self.last_prices.get(ticker)
+        if last is not None and last.key == price_key(data):
+            metrics.inc("websocket_unchanged_updates_total")
+            return False
+        item = self.last_prices[ticker] = PriceItem(ticker, data)
+        outboxes, dirty = self.outboxes, self._dirty
+        # ClientOutbox.offer_price inlined: this loop runs once per subscriber
+        for ws in sockets:
+            outbox = outboxes[ws]
+            prices = outbox.prices
+            if not prices:
+                dirty.add(outbox)
+            elif ticker in prices:
+                outbox.conflated += 1
+            prices[ticker] = item
+        return True
+
+    def _offer(self, outbox: ClientOutbox, item: PriceItem):
+        if not outbox.prices:
+            self._dirty.add(outbox)
+        outbox.offer_price(item)
+
+    def _flush_prices(self, wait_for_writers: bool):
+        """
+        Turn pending price updates into frames.
+
+        With `wait_for_writers`, a client still sending its previous frames
+        keeps conflating until the next flush instead of queueing more.
+        """
+        dirty, self._dirty = self._dirty, set()
+        for outbox in dirty:
+            if wait_for_writers and outbox.frames:
+                self._dirty.add(outbox)
+            else:
+                outbox.flush_prices()
+
+    async def _flush_loop(self):
+        while self.outboxes:
+            await asyncio.sleep(self.flush_interval)
+            self._flush_prices(wait_for_writers=True)
+
+    async def flush(self, timeout: Optional[float] = None):
+        """Flush pending price updates now and wait until every frame has been sent (or its socket dropped)."""
+        self._flush_prices(wait_for_writers=False)
+        waits = [outbox.wait_idle() for outbox in list(self.outboxes.values())]
+        if waits:
+            await asyncio.wait_for(asyncio.gather(*waits), timeout)
+
+    async def close(self):
+        """Disconnect every socket and wait for their writers and the flush loop to stop."""
+        tasks = [outbox.task for outbox in self.outboxes.values()]
+        for websocket, client_id in list(self.client_ids.items()):
+            self.disconnect(websocket, client_id)
+        if self._flusher is not None:
+            self._flusher.cancel()
+            tasks.append(self._flusher)
+        await asyncio.gather(*tasks, return_exceptions=True)
+
     def get_all_subscribed_tickers(self) -> Set[str]:
         """Get all tickers that at least one client is subscribed to."""
-        all_tickers = set()
-        for subscribed in self.subscriptions.values():
-            all_tickers.update(subscribed)
-        return all_tickers
-    
+        return set(self.subscribers)
+
     def get_connection_count(self) -> int:
         """Get total number of active connections."""
-        return sum(len(ws_set) for ws_set in self.active_connections.values())
+        return len(self.client_ids)
 
 
 # Global connection manager instance
-manager = ConnectionManager()
+manager = ConnectionManager(flush_interval=settings.websocket_flush_interval_ms / 1000)
@@ -9,10 +9,15 @@ from contextlib import asynccontextmanager
 import logging
 
 from app.config import settings
-from app.core.database import init_db, close_db
-from app.core.scheduler import scheduler
-from app.api import analysis, autonomous, positions, health, observer, sentinel, monitor, market, portfolio, updates, websocket
-from app.core.market_stream import start_market_stream
+from app.core.database import engine, init_db, close_db
+from app.core.instrumentation import install_instrumentation
+from app.core.vector_store import init_vector_store
+from app.core.scheduler import scheduler, setup_autonomous_jobs, start_scheduler
+from app.api import analysis, autonomous, positions, health, observer, sentinel, monitor, market, portfolio, updates, websocket, metrics, profiling
+from app.core.market_stream import market_feed, start_market_stream, stop_market_stream
+from app.services.exit_triggers import exit_triggers
+from app.services.reconciliation_service import reconciler
+from tradingagents.rate_governor import configure_governor
 
 # Configure logging
 logging.basicConfig(
@@ -28,31 +33,28 @@ async def lifespan(app: FastAPI):
     # Startup
     logger.info("Starting Unified Trading Bot...")
     await init_db()
+    configure_governor(settings.get_tradingagents_config())
+    
+    # Open the shared vector store once and warm-load its collections
+    try:
+        init_vector_store()
+    except Exception as e:
+        logger.error(f"Vector store initialization failed: {e}", exc_info=True)
     
     # Start scheduler if autonomous mode is enabled
     if settings.autonomous_enabled:
         logger.info("Starting autonomous trading scheduler...")
-        
-        # 1. Existing Signal/Trading Job
-        # ... exists in autonomous.py but typically logic is added here or in autonomous_service
-        # (Assuming it's managed there for now)
-        
-        # 2. Add Monitor Job (Daily Analysis)
-        # We need a function wrapper to call the async service
-        from app.services.monitor_service import MonitorService
-        from app.core.database import AsyncSessionLocal
-        
-        async def run_daily_monitor():
-             async with AsyncSessionLocal() as db:
-                 service = MonitorService(db)
-                 await service.run_scheduled_analysis()
-                 
-        # Run every morning at 8:00 AM (or strictly periodically for demo)
-        scheduler.add_job(run_daily_monitor, 'cron', hour=8, minute=0, id='daily_monitor_report')
-        
-        scheduler.start()
+        setup_autonomous_jobs()
+        start_scheduler()
+        reconciler.start(trade_updates=settings.reconcile_on_trade_updates)
     
-        scheduler.start()
+    # Take-profit/stop-loss levels of open positions, checked against streamed prices
+    try:
+        await exit_triggers.load()
+    except Exception as e:
+        logger.error(f"Exit trigger index could not be loaded: {e}", exc_info=True)
+    market_feed.watch(exit_triggers.symbols)
+    market_feed.add_tick_listener(exit_triggers.on_prices)
     
     # Start WebSocket market price streaming
     await start_market_stream()
@@ -61,6 +63,8 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     logger.info("Shutting down Unified Trading Bot...")
+    await stop_market_stream()
+    await reconciler.stop()
     if scheduler.running:
         scheduler.shutdown()
     await close_db()
@@ -85,6 +89,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request, SQL, scheduler and outbound-call metrics (no hooks at all when disabled)
+install_instrumentation(app, engine, scheduler, enabled=settings.metrics_enabled)
+
 # Include routers
 app.include_router(health.router, prefix=settings.api_prefix, tags=["Health"])
 app.include_router(analysis.router, prefix=settings.api_prefix, tags=["Analysis"])
@@ -96,7 +103,9 @@ app.include_router(monitor.router, prefix=settings.api_prefix, tags=["Monitor"])
 app.include_router(market.router, prefix=settings.api_prefix, tags=["Market"])
 app.include_router(portfolio.router, prefix=settings.api_prefix, tags=["Portfolio"])
 app.include_router(updates.router, prefix=settings.api_prefix, tags=["Real-Time Updates"])
+app.include_router(profiling.router, prefix=settings.api_prefix, tags=["Profiling"])
 app.include_router(websocket.router, tags=["WebSocket"])  # WebSocket doesn't use prefix
+app.include_router(metrics.router, tags=["Metrics"])  # Prometheus scrapes /metrics
 
 
 @app.exception_handler(Exception)
@@ -70,6 +70,8 @@ class AnalysisResult(Base):
     final_decision = Column(String(10))  # 'BUY', 'HOLD', 'SELL'
     confidence = Column(Float)
     full_state = Column(JSON)
+    metrics = Column(JSON)  # Run instrumentation: per-node/tool/vendor timings and tokens
+    market_snapshot = Column(JSON)  # Price, signal sentiment and analysts at run time (for reuse checks)
     created_at = Column(DateTime, server_default=func.now())
 
 
@@ -16,6 +16,7 @@ class AnalysisRequest(BaseModel):
         default=["market", "fundamentals", "news", "social"],
         description="List of analysts to include"
     )
+    force_refresh: bool = Field(False, description="Always run the graph, even if a fresh stored analysis exists")
 
 
 class AnalysisResponse(BaseModel):
@@ -31,7 +32,11 @@ class AnalysisResponse(BaseModel):
     risk_debate: Optional[Dict[str, Any]] = None
     final_decision: Optional[str] = None
     confidence: Optional[float] = None
+    metrics: Optional[Dict[str, Any]] = None  # Per-node/tool/vendor timings and tokens
     created_at: datetime
+    reused: bool = False  # Served from a stored analysis instead of a new graph run
+    reused_analysis_id: Optional[int] = None
+    reuse_age_seconds: Optional[float] = None
 
 
 # Autonomous Trading Models
@@ -174,3 +179,22 @@ class ManualTradeRequest(BaseModel):
     quantity: float = Field(..., gt=0, description="Quantity to buy/sell")
     side: str = Field(..., pattern="^(buy|sell)$", description="Trade side (buy/sell)")
     reason: Optional[str] = Field(None, description="Reason for trade (for logging)")
+    bracket: bool = Field(False, description="Buy with broker-side take-profit/stop-loss legs (stocks only)")
+    take_profit_pct: Optional[float] = Field(None, gt=0, description="Bracket take-profit %, defaults to the trading config's")
+    stop_loss_pct: Optional[float] = Field(None, gt=0, lt=100, description="Bracket stop-loss %, defaults to the trading config's")
+
+
+class ProfileAnalysisRequest(BaseModel):
+    """Request model for profiling one analysis run."""
+    ticker: str = Field(..., description="Stock ticker symbol")
+    date: Optional[str] = Field(None, description="Analysis date (YYYY-MM-DD), defaults to today")
+    analysts: List[str] = Field(
+        default=["market", "fundamentals", "news", "social"],
+        description="List of analysts to include"
+    )
+    save_db: bool = Field(False, description="Store the analysis like a regular run")
+
+
+class ProfileArmRequest(BaseModel):
+    """Request model for profiling upcoming scheduled runs of a job."""
+    runs: int = Field(1, ge=0, le=20, description="Scheduled runs to profile (0 disarms)")
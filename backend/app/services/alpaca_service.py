@@ -3,40 +3,66 @@ Alpaca API integration service.
 """
 
 from alpaca.trading.client import TradingClient
-from alpaca.trading.requests import MarketOrderRequest, LimitOrderRequest, StopLossRequest
-from alpaca.trading.enums import OrderSide, TimeInForce, OrderType
+from alpaca.trading.requests import (
+    GetOrderByIdRequest, GetOrdersRequest, MarketOrderRequest, LimitOrderRequest, StopLossRequest, TakeProfitRequest,
+)
+from alpaca.trading.enums import OrderClass, OrderSide, QueryOrderStatus, TimeInForce, OrderType
 from alpaca.data.historical import StockHistoricalDataClient, CryptoHistoricalDataClient
 from alpaca.data.requests import StockLatestQuoteRequest, StockBarsRequest, CryptoLatestQuoteRequest, CryptoBarsRequest
 from alpaca.data.timeframe import TimeFrame
+from datetime import datetime, timedelta
 from typing import List, Optional, Dict, Any
 import logging
 
 from app.config import settings
+from app.core.instrumentation import InstrumentedClient
+from app.core.quote_cache import quote_cache
 
 logger = logging.getLogger(__name__)
 
 
+def order_to_dict(order) -> Dict[str, Any]:
+    """An Alpaca order (with its bracket legs, if any) as a plain dict."""
+    return {
+        "order_id": str(order.id),
+        "symbol": order.symbol,
+        "side": order.side.value,
+        "type": order.order_type.value if order.order_type else None,
+        "quantity": float(order.qty) if order.qty else None,
+        "status": order.status.value,
+        "filled_quantity": float(order.filled_qty) if order.filled_qty else 0.0,
+        "filled_avg_price": float(order.filled_avg_price) if order.filled_avg_price else None,
+        "filled_at": order.filled_at.isoformat() if order.filled_at else None,
+        "limit_price": float(order.limit_price) if order.limit_price else None,
+        "stop_price": float(order.stop_price) if order.stop_price else None,
+        "created_at": order.created_at.isoformat() if order.created_at else None,
+        "legs": [order_to_dict(leg) for leg in order.legs or []],
+    }
+
+
 class AlpacaService:
     """Service for interacting with Alpaca API."""
     
     def __init__(self):
         """Initialize Alpaca clients."""
-        self.trading_client = TradingClient(
+        self.trading_client = InstrumentedClient(TradingClient(
             api_key=settings.alpaca_api_key,
             secret_key=settings.alpaca_api_secret,
             paper=settings.alpaca_paper,
             url_override=settings.alpaca_base_url
-        )
+        ), "alpaca")
         
-        self.data_client = StockHistoricalDataClient(
+        self.data_client = InstrumentedClient(StockHistoricalDataClient(
             api_key=settings.alpaca_api_key,
-            secret_key=settings.alpaca_api_secret
-        )
+            secret_key=settings.alpaca_api_secret,
+            url_override=settings.alpaca_data_url
+        ), "alpaca")
         
-        self.crypto_client = CryptoHistoricalDataClient(
+        self.crypto_client = InstrumentedClient(CryptoHistoricalDataClient(
             api_key=settings.alpaca_api_key,
-            secret_key=settings.alpaca_api_secret
-        )
+            secret_key=settings.alpaca_api_secret,
+            url_override=settings.alpaca_data_url
+        ), "alpaca")
         
         logger.info(f"Alpaca service initialized (paper={settings.alpaca_paper})")
     
@@ -102,7 +128,7 @@ class AlpacaService:
                 request = CryptoLatestQuoteRequest(symbol_or_symbols=symbol)
                 quotes = self.crypto_client.get_crypto_latest_quote(request)
                 quote = quotes[symbol]
-                return {
+                result = {
                     "symbol": symbol,
                     "bid_price": float(quote.bid_price),
                     "ask_price": float(quote.ask_price),
@@ -113,17 +139,84 @@ class AlpacaService:
                 request = StockLatestQuoteRequest(symbol_or_symbols=symbol)
                 quotes = self.data_client.get_stock_latest_quote(request)
                 quote = quotes[symbol]
-                return {
+                result = {
                     "symbol": symbol,
                     "bid_price": float(quote.bid_price),
                     "ask_price": float(quote.ask_price),
                     "bid_size": quote.bid_size,
                     "ask_size": quote.ask_size,
                 }
+            quote_cache.put(symbol, result)
+            return result
         except Exception as e:
             logger.error(f"Failed to get quote for {symbol}: {e}")
             return None
+
+    async def get_recent_quote(self, symbol: str, max_age_seconds: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Latest quote from the quote cache if fresh enough, else from Alpaca."""
+        return quote_cache.get(symbol, max_age_seconds) or await self.get_latest_quote(symbol)
     
+    async def get_latest_quotes(self, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Get latest quotes for many symbols (one request per asset class)."""
+        stocks = [s for s in symbols if not ("BTC" in s or "ETH" in s or "/" in s)]
+        cryptos = [s for s in symbols if s not in stocks]
+        quotes = {}
+        try:
+            if stocks:
+                quotes.update(self.data_client.get_stock_latest_quote(StockLatestQuoteRequest(symbol_or_symbols=stocks)))
+            if cryptos:
+                quotes.update(self.crypto_client.get_crypto_latest_quote(CryptoLatestQuoteRequest(symbol_or_symbols=cryptos)))
+        except Exception as e:
+            logger.error(f"Failed to get quotes for {len(symbols)} symbols: {e}")
+
+        results = {
+            symbol: {
+                "symbol": symbol,
+                "bid_price": float(quote.bid_price),
+                "ask_price": float(quote.ask_price),
+                "bid_size": float(quote.bid_size),
+                "ask_size": float(quote.ask_size),
+            }
+            for symbol, quote in quotes.items()
+        }
+        for symbol, result in results.items():
+            quote_cache.put(symbol, result)
+        return results
+
+    async def get_daily_bars(self, symbols: List[str], days: int = 30) -> Dict[str, List[Dict[str, Any]]]:
+        """Get daily OHLCV bars for many symbols (one request per asset class)."""
+        from datetime import datetime, timedelta
+
+        # Calendar days covering `days` trading sessions
+        start_time = datetime.utcnow() - timedelta(days=int(days * 1.6) + 5)
+        stocks = [s for s in symbols if not ("BTC" in s or "ETH" in s or "/" in s)]
+        cryptos = [s for s in symbols if s not in stocks]
+        data = {}
+        try:
+            if stocks:
+                request = StockBarsRequest(symbol_or_symbols=stocks, timeframe=TimeFrame.Day, start=start_time)
+                data.update(self.data_client.get_stock_bars(request).data)
+            if cryptos:
+                request = CryptoBarsRequest(symbol_or_symbols=cryptos, timeframe=TimeFrame.Day, start=start_time)
+                data.update(self.crypto_client.get_crypto_bars(request).data)
+        except Exception as e:
+            logger.error(f"Failed to get daily bars for {len(symbols)} symbols: {e}")
+
+        return {
+            symbol: [
+                {
+                    "timestamp": b.timestamp.isoformat(),
+                    "open": b.open,
+                    "high": b.high,
+                    "low": b.low,
+                    "close": b.close,
+                    "volume": b.volume,
+                }
+                for b in bars[-days:]
+            ]
+            for symbol, bars in data.items()
+        }
+
     async def place_market_order(
         self,
         symbol: str,
@@ -160,6 +253,86 @@ class AlpacaService:
             logger.error(f"Failed to place market order for {symbol}: {e}")
             raise
     
+    async def place_bracket_order(
+        self,
+        symbol: str,
+        quantity: float,
+        take_profit_price: float,
+        stop_loss_price: float
+    ) -> Dict[str, Any]:
+        """
+        Buy at market with broker-side exits: a take-profit limit and a
+        stop-loss stop, one-cancels-other once the entry fills.
+
+        GTC, so the legs keep protecting the position overnight. Stocks only
+        (Alpaca has no bracket orders for crypto).
+        """
+        try:
+            order_data = MarketOrderRequest(
+                symbol=symbol,
+                qty=quantity,
+                side=OrderSide.BUY,
+                time_in_force=TimeInForce.GTC,
+                order_class=OrderClass.BRACKET,
+                take_profit=TakeProfitRequest(limit_price=round(take_profit_price, 2)),
+                stop_loss=StopLossRequest(stop_price=round(stop_loss_price, 2)),
+            )
+            
+            order = self.trading_client.submit_order(order_data)
+            
+            logger.info(f"Bracket order placed: buy {quantity} {symbol} "
+                        f"(TP ${take_profit_price:.2f}, SL ${stop_loss_price:.2f})")
+            return order_to_dict(order)
+        except Exception as e:
+            logger.error(f"Failed to place bracket order for {symbol}: {e}")
+            raise
+    
+    async def get_order(self, order_id: str) -> Optional[Dict[str, Any]]:
+        """Get an order with its legs, or None if Alpaca does not know it."""
+        try:
+            order = self.trading_client.get_order_by_id(order_id, GetOrderByIdRequest(nested=True))
+            return order_to_dict(order)
+        except Exception as e:
+            logger.warning(f"Failed to get order {order_id}: {e}")
+            return None
+    
+    async def get_orders(self, after: Optional[datetime] = None, limit: int = 500) -> List[Dict[str, Any]]:
+        """
+        Get the orders (open and closed, with their legs) submitted after `after`, newest first.
+
+        Alpaca returns at most `limit` orders a call, so full pages are
+        followed by older ones (`until` the oldest order seen) back to `after`.
+        """
+        try:
+            orders: Dict[str, Dict[str, Any]] = {}
+            until = None
+            while True:
+                page = self.trading_client.get_orders(GetOrdersRequest(
+                    status=QueryOrderStatus.ALL,
+                    after=after,
+                    until=until,
+                    limit=limit,
+                    nested=True,
+                ))
+                new = [order for order in page if str(order.id) not in orders]
+                orders.update((str(order.id), order_to_dict(order)) for order in new)
+                if len(page) < limit or not new:
+                    return list(orders.values())
+                # `until` is exclusive: step just past the oldest so orders sharing its time are not skipped
+                until = min(order.submitted_at for order in page) + timedelta(microseconds=1)
+        except Exception as e:
+            logger.error(f"Failed to get orders: {e}")
+            raise
+    
+    async def cancel_order(self, order_id: str):
+        """Cancel an open order."""
+        try:
+            self.trading_client.cancel_order_by_id(order_id)
+            logger.info(f"Cancelled order {order_id}")
+        except Exception as e:
+            logger.error(f"Failed to cancel order {order_id}: {e}")
+            raise
+    
     async def close_position(
         self,
         symbol: str,
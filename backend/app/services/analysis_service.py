@@ -4,15 +4,18 @@ Analysis service integrating TradingAgents framework.
 
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, desc, func
-from typing import List, Optional
-from datetime import datetime, date
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from datetime import datetime, timedelta
+import asyncio
 import logging
 import os
 import sys
 
-from app.models.database import AnalysisResult
+from app.models.database import AnalysisResult, Signal
 from app.models.trading import AnalysisResponse
 from app.config import settings
+from app.core.vector_store import get_vector_store
+from app.core.metrics import metrics
 
 # Add agents directory to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'agents'))
@@ -22,6 +25,22 @@ from tradingagents.dataflows.config import set_config
 
 logger = logging.getLogger(__name__)
 
+# Confidence assumed for BUY/SELL decisions that don't state one
+DEFAULT_CONFIDENCE = 0.7
+
+# Signals averaged for the sentiment part of the reuse check (matches the analysis job)
+SIGNAL_WINDOW = timedelta(hours=2)
+
+# Bounds the graph runs in flight at once (created on first use, on the running loop)
+_analysis_slots: Optional[asyncio.Semaphore] = None
+
+
+def _get_analysis_slots() -> asyncio.Semaphore:
+    global _analysis_slots
+    if _analysis_slots is None:
+        _analysis_slots = asyncio.Semaphore(max(settings.max_concurrent_analyses, 1))
+    return _analysis_slots
+
 
 class AnalysisService:
     """Service for running trading analysis using TradingAgents."""
@@ -53,7 +72,8 @@ class AnalysisService:
         graph = TradingAgentsGraph(
             selected_analysts=analysts,
             debug=settings.debug,
-            config=config
+            config=config,
+            memory_client=get_vector_store()
         )
         
         return graph
@@ -63,7 +83,9 @@ class AnalysisService:
         ticker: str,
         date: Optional[str] = None,
         analysts: List[str] = None,
-        save_db: bool = True
+        save_db: bool = True,
+        on_update: Optional[Callable[[str, Any], None]] = None,
+        reuse: bool = True
     ) -> AnalysisResponse:
         """
         Run full trading analysis for a ticker.
@@ -73,6 +95,10 @@ class AnalysisService:
             date: Analysis date (YYYY-MM-DD), defaults to today
             analysts: List of analysts to include
             save_db: Whether to save results to database (Default: True)
+            on_update: Optional callback(node, state_update) called on the
+                event loop as each node completes
+            reuse: Return a fresh stored analysis for the same ticker/date
+                instead of re-running the graph (see `_find_reusable`)
         
         Returns:
             AnalysisResponse with all analysis results
@@ -86,11 +112,25 @@ class AnalysisService:
         logger.info(f"Running analysis for {ticker} on {date} with analysts: {analysts}")
         
         try:
+            snapshot = await self._market_snapshot(ticker, analysts)
+            if reuse and settings.analysis_reuse_ttl_minutes > 0:
+                reusable = await self._find_reusable(ticker, date, snapshot)
+                if reusable is not None:
+                    age = (datetime.utcnow() - reusable.created_at).total_seconds()
+                    metrics.observe("analysis_reuse_age_seconds", age)
+                    logger.info(f"Reusing analysis {reusable.id} for {ticker} on {date} ({age / 60:.0f} min old)")
+                    return self._to_response(
+                        reusable, reused=True, reused_analysis_id=reusable.id, reuse_age_seconds=round(age, 1)
+                    )
+
             # Get TradingAgentsGraph
             graph = self._get_trading_graph(analysts)
             
-            # Run analysis
-            final_state, decision = graph.propagate(ticker, date)
+            # The graph runs natively async; LLM calls don't hold a thread
+            async with _get_analysis_slots():
+                final_state, decision = await graph.apropagate(ticker, date, on_update)
+            run_metrics = graph.last_run_metrics
+            self._record_run_metrics(ticker, run_metrics)
             
             # Convert state to JSON-serializable format
             serializable_state = self._make_json_serializable(final_state)
@@ -98,8 +138,11 @@ class AnalysisService:
             # Extract decision (decision is a string: "BUY", "SELL", or "HOLD")
             final_decision = decision.strip() if isinstance(decision, str) else None
             
-            # Set default confidence for valid decisions
-            confidence = 0.7 if final_decision in ["BUY", "SELL"] else None
+            # Confidence stated by the Risk Judge; fall back to the previous
+            # fixed default when it gave none
+            confidence = graph.last_signal.get("confidence") if graph.last_signal else None
+            if confidence is None and final_decision in ["BUY", "SELL"]:
+                confidence = DEFAULT_CONFIDENCE
             
             # Extract results
             analysis_data = {
@@ -115,6 +158,8 @@ class AnalysisService:
                 "final_decision": final_decision,
                 "confidence": confidence,
                 "full_state": serializable_state,
+                "metrics": run_metrics,
+                "market_snapshot": snapshot,
             }
             
             # Save to database if requested
@@ -142,6 +187,7 @@ class AnalysisService:
                 risk_debate=analysis_data["risk_debate"],
                 final_decision=analysis_data["final_decision"],
                 confidence=analysis_data["confidence"],
+                metrics=analysis_data["metrics"],
                 created_at=created_at_val
             )
             
@@ -149,6 +195,119 @@ class AnalysisService:
             logger.error(f"Analysis failed for {ticker}: {e}", exc_info=True)
             raise
     
+    async def _market_snapshot(self, ticker: str, analysts: List[str]) -> Dict[str, Any]:
+        """Current mid price and average signal sentiment, stored with a run for later reuse checks."""
+        price = None
+        try:
+            from app.services.alpaca_service import AlpacaService
+            quote = await AlpacaService().get_latest_quote(ticker)
+            if quote:
+                bid, ask = quote.get("bid_price") or 0, quote.get("ask_price") or 0
+                price = (bid + ask) / 2 if bid and ask else (bid or ask or None)
+        except Exception as e:
+            logger.debug(f"No price snapshot for {ticker}: {e}")
+
+        result = await self.db.execute(
+            select(func.avg(Signal.sentiment))
+            .where(Signal.symbol == ticker)
+            .where(Signal.timestamp >= datetime.now() - SIGNAL_WINDOW)
+        )
+        sentiment = result.scalar()
+
+        return {"price": price, "sentiment": sentiment, "analysts": sorted(analysts)}
+
+    async def _find_reusable(self, ticker: str, date: str, snapshot: Dict[str, Any]) -> Optional[AnalysisResult]:
+        """
+        Latest stored analysis for ticker/date that is still fresh.
+
+        Fresh means younger than the reuse TTL, run with at least the requested
+        analysts, and neither price nor average signal sentiment has moved past
+        its threshold since. A value missing on either side is not compared.
+        """
+        cutoff = datetime.utcnow() - timedelta(minutes=settings.analysis_reuse_ttl_minutes)
+        result = await self.db.execute(
+            select(AnalysisResult)
+            .where(AnalysisResult.ticker == ticker)
+            .where(AnalysisResult.trade_date == date)
+            .where(AnalysisResult.created_at >= cutoff)
+            .where(AnalysisResult.final_decision.isnot(None))
+            .order_by(desc(AnalysisResult.created_at))
+            .limit(1)
+        )
+        stored = result.scalar_one_or_none()
+        if stored is None or not stored.market_snapshot:
+            return None
+
+        is_fresh, reason = self._is_fresh(stored.market_snapshot, snapshot)
+        if not is_fresh:
+            logger.info(f"Not reusing analysis {stored.id} for {ticker}: {reason}")
+            return None
+        return stored
+
+    @staticmethod
+    def _is_fresh(then: Dict[str, Any], now: Dict[str, Any]) -> Tuple[bool, str]:
+        """Whether a stored snapshot still describes the market now, and why not."""
+        if not set(now.get("analysts") or []) <= set(then.get("analysts") or []):
+            return False, "different analysts"
+
+        if then.get("price") and now.get("price"):
+            move = abs(now["price"] / then["price"] - 1) * 100
+            if move > settings.analysis_reuse_max_price_move_pct:
+                return False, f"price moved {move:.1f}%"
+
+        if then.get("sentiment") is not None and now.get("sentiment") is not None:
+            move = abs(now["sentiment"] - then["sentiment"])
+            if move > settings.analysis_reuse_max_sentiment_move:
+                return False, f"sentiment moved {move:.2f}"
+
+        return True, "fresh"
+
+    def _to_response(self, r: AnalysisResult, **extra) -> AnalysisResponse:
+        """Response model for a stored analysis result."""
+        return AnalysisResponse(
+            ticker=r.ticker,
+            trade_date=r.trade_date,
+            market_report=r.market_report,
+            sentiment_report=r.sentiment_report,
+            news_report=r.news_report,
+            fundamentals_report=r.fundamentals_report,
+            investment_debate=r.investment_debate,
+            trader_decision=r.trader_decision,
+            risk_debate=r.risk_debate,
+            final_decision=r.final_decision,
+            confidence=r.confidence,
+            metrics=r.metrics,
+            created_at=r.created_at,
+            **extra
+        )
+
+    def _record_run_metrics(self, ticker: str, run_metrics: Optional[dict]):
+        """Feed a run's instrumentation into the histograms and log a summary."""
+        if not run_metrics:
+            return
+
+        metrics.observe("analysis_total_seconds", run_metrics["total_seconds"])
+        for node, entry in run_metrics["nodes"].items():
+            if entry["calls"]:
+                metrics.observe("analysis_node_seconds", entry["wall_seconds"] / entry["calls"], node=node)
+            if entry["llm_calls"]:
+                metrics.observe("analysis_node_llm_seconds", entry["llm_seconds"] / entry["llm_calls"], node=node)
+                metrics.observe("analysis_node_tokens", entry["prompt_tokens"] + entry["completion_tokens"], node=node)
+        for tool, entry in run_metrics["tools"].items():
+            metrics.observe("analysis_tool_seconds", entry["wall_seconds"] / entry["calls"], tool=tool)
+        for vendor, entry in run_metrics["vendors"].items():
+            metrics.observe("analysis_vendor_seconds", entry["seconds"] / entry["calls"], vendor=vendor)
+
+        slowest = sorted(run_metrics["nodes"].items(), key=lambda item: item[1]["wall_seconds"], reverse=True)[:3]
+        logger.info(
+            f"Analysis timing for {ticker}: {run_metrics['total_seconds']:.1f}s total, "
+            f"LLM {run_metrics['llm_seconds']:.1f}s ({run_metrics['llm_calls']} calls), "
+            f"vendors {run_metrics['vendor_seconds']:.1f}s, "
+            f"tokens {run_metrics['prompt_tokens']}+{run_metrics['completion_tokens']}, "
+            f"retries {run_metrics['retries']} | slowest: "
+            + ", ".join(f"{node} {entry['wall_seconds']:.1f}s" for node, entry in slowest)
+        )
+
     def _make_json_serializable(self, obj):
         """Convert object to JSON-serializable format."""
         if isinstance(obj, dict):
@@ -184,23 +343,7 @@ class AnalysisService:
             result = await self.db.execute(stmt)
             results = result.scalars().all()
             
-            return [
-                AnalysisResponse(
-                    ticker=r.ticker,
-                    trade_date=r.trade_date,
-                    market_report=r.market_report,
-                    sentiment_report=r.sentiment_report,
-                    news_report=r.news_report,
-                    fundamentals_report=r.fundamentals_report,
-                    investment_debate=r.investment_debate,
-                    trader_decision=r.trader_decision,
-                    risk_debate=r.risk_debate,
-                    final_decision=r.final_decision,
-                    confidence=r.confidence,
-                    created_at=r.created_at
-                )
-                for r in results
-            ]
+            return [self._to_response(r) for r in results]
         except Exception as e:
             logger.error(f"Failed to get history for {ticker}: {e}", exc_info=True)
             raise
@@ -215,20 +358,7 @@ class AnalysisService:
             if not r:
                 return None
             
-            return AnalysisResponse(
-                ticker=r.ticker,
-                trade_date=r.trade_date,
-                market_report=r.market_report,
-                sentiment_report=r.sentiment_report,
-                news_report=r.news_report,
-                fundamentals_report=r.fundamentals_report,
-                investment_debate=r.investment_debate,
-                trader_decision=r.trader_decision,
-                risk_debate=r.risk_debate,
-                final_decision=r.final_decision,
-                confidence=r.confidence,
-                created_at=r.created_at
-            )
+            return self._to_response(r)
         except Exception as e:
             logger.error(f"Failed to get analysis {analysis_id}: {e}", exc_info=True)
             raise
@@ -263,23 +393,7 @@ class AnalysisService:
             result = await self.db.execute(stmt)
             results = result.scalars().all()
             
-            return [
-                AnalysisResponse(
-                    ticker=r.ticker,
-                    trade_date=r.trade_date,
-                    market_report=r.market_report,
-                    sentiment_report=r.sentiment_report,
-                    news_report=r.news_report,
-                    fundamentals_report=r.fundamentals_report,
-                    investment_debate=r.investment_debate,
-                    trader_decision=r.trader_decision,
-                    risk_debate=r.risk_debate,
-                    final_decision=r.final_decision,
-                    confidence=r.confidence,
-                    created_at=r.created_at
-                )
-                for r in results
-            ]
+            return [self._to_response(r) for r in results]
         except Exception as e:
             logger.error(f"Failed to get batch analysis: {e}", exc_info=True)
             raise
@@ -0,0 +1,189 @@
+"""
+Streaming analysis runs.
+
+Runs the TradingAgents graph in the background and records a progress event
+as each node completes (analyst reports, debate turns, plans, final decision).
+Events are buffered per run with sequential IDs so SSE and WebSocket clients
+can reconnect and resume from the last event they saw.
+"""
+
+from typing import Any, AsyncIterator, Dict, List, Optional
+from datetime import datetime, timedelta
+import asyncio
+import logging
+import uuid
+
+from app.core.database import AsyncSessionLocal
+from app.services.analysis_service import AnalysisService
+
+logger = logging.getLogger(__name__)
+
+# How long finished runs stay available for reconnects
+RUN_RETENTION = timedelta(minutes=30)
+MAX_RUNS = 100
+
+REPORT_FIELDS = ("market_report", "sentiment_report", "news_report", "fundamentals_report")
+RISK_RESPONSE_FIELDS = {
+    "Risky": "current_risky_response",
+    "Safe": "current_safe_response",
+    "Neutral": "current_neutral_response",
+}
+
+
+def progress_event(node: str, update: Any) -> Dict[str, Any]:
+    """Turn a graph node's state update into a UI progress event."""
+    event = {"node": node, "kind": "node_complete"}
+    if not isinstance(update, dict):
+        return event
+
+    for field in REPORT_FIELDS:
+        if update.get(field):
+            return {**event, "kind": "report", "field": field, "content": update[field]}
+
+    if update.get("research_brief"):
+        return {**event, "kind": "research_brief", "content": update["research_brief"]}
+
+    if update.get("final_trade_decision"):
+        return {**event, "kind": "final_decision", "content": update["final_trade_decision"]}
+
+    if update.get("trader_investment_plan"):
+        return {**event, "kind": "trader_plan", "content": update["trader_investment_plan"]}
+
+    if update.get("investment_plan"):
+        return {**event, "kind": "investment_plan", "content": update["investment_plan"]}
+
+    debate = update.get("investment_debate_state")
+    if debate and debate.get("current_response"):
+        return {**event, "kind": "debate_turn", "debate": "investment", "content": debate["current_response"]}
+
+    risk = update.get("risk_debate_state")
+    if risk:
+        field = RISK_RESPONSE_FIELDS.get(risk.get("latest_speaker"))
+        if field and risk.get(field):
+            return {**event, "kind": "debate_turn", "debate": "risk", "content": risk[field]}
+
+    return event
+
+
+class AnalysisRun:
+    """A single streaming analysis and its buffered events."""
+
+    def __init__(self, ticker: str, date: Optional[str], analysts: List[str], reuse: bool = True):
+        self.run_id = uuid.uuid4().hex
+        self.ticker = ticker
+        self.date = date
+        self.analysts = analysts
+        self.reuse = reuse
+        self.status = "running"
+        self.created_at = datetime.utcnow()
+        self.finished_at: Optional[datetime] = None
+        self.events: List[Dict[str, Any]] = []
+        self.task: Optional[asyncio.Task] = None
+        self._changed = asyncio.Event()
+
+    @property
+    def finished(self) -> bool:
+        return self.status != "running"
+
+    def publish(self, event_type: str, data: Dict[str, Any]):
+        """Append an event and wake followers. Must run on the event loop."""
+        self.events.append({"id": len(self.events) + 1, "event": event_type, "data": data})
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    def finish(self, status: str, event_type: str, data: Dict[str, Any]):
+        self.status = status
+        self.finished_at = datetime.utcnow()
+        self.publish(event_type, data)
+
+    async def follow(self, after_id: int = 0, heartbeat: float = 15.0) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """
+        Yield events after `after_id`, then live events until the run finishes.
+
+        Yields None when `heartbeat` seconds pass without an event, so
+        transports can send a keep-alive.
+        """
+        next_index = max(after_id, 0)
+        while True:
+            changed = self._changed
+            while next_index < len(self.events):
+                yield self.events[next_index]
+                next_index += 1
+            if self.finished:
+                return
+            try:
+                await asyncio.wait_for(changed.wait(), timeout=heartbeat)
+            except asyncio.TimeoutError:
+                yield None
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "run_id": self.run_id,
+            "ticker": self.ticker,
+            "date": self.date,
+            "status": self.status,
+            "events": len(self.events),
+            "created_at": self.created_at.isoformat(),
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+
+class AnalysisRunRegistry:
+    """In-process registry of streaming analysis runs."""
+
+    def __init__(self):
+        self._runs: Dict[str, AnalysisRun] = {}
+
+    def start(
+        self, ticker: str, date: Optional[str] = None, analysts: Optional[List[str]] = None, reuse: bool = True
+    ) -> AnalysisRun:
+        """Start an analysis in the background and return its run."""
+        self._prune()
+
+        run = AnalysisRun(ticker, date, analysts or ["market", "fundamentals", "news", "social"], reuse)
+        self._runs[run.run_id] = run
+        run.publish("run_started", run.summary())
+        run.task = asyncio.create_task(self._execute(run))
+        logger.info(f"Started streaming analysis {run.run_id} for {ticker}")
+        return run
+
+    def get(self, run_id: str) -> Optional[AnalysisRun]:
+        return self._runs.get(run_id)
+
+    async def _execute(self, run: AnalysisRun):
+        def on_update(node: str, update: Any):
+            # Called on the event loop by the async graph run
+            run.publish("progress", progress_event(node, update))
+
+        try:
+            async with AsyncSessionLocal() as db:
+                service = AnalysisService(db)
+                result = await service.run_analysis(
+                    ticker=run.ticker,
+                    date=run.date,
+                    analysts=run.analysts,
+                    on_update=on_update,
+                    reuse=run.reuse,
+                )
+            run.finish("completed", "complete", result.model_dump(mode="json"))
+        except asyncio.CancelledError:
+            run.finish("cancelled", "error", {"message": "Analysis cancelled"})
+            raise
+        except Exception as e:
+            logger.error(f"Streaming analysis {run.run_id} failed: {e}", exc_info=True)
+            run.finish("failed", "error", {"message": str(e)})
+
+    def _prune(self):
+        """Drop finished runs past retention, and the oldest finished ones over the cap."""
+        cutoff = datetime.utcnow() - RUN_RETENTION
+        for run_id, run in list(self._runs.items()):
+            if run.finished and run.finished_at < cutoff:
+                del self._runs[run_id]
+
+        finished = sorted((r for r in self._runs.values() if r.finished), key=lambda r: r.finished_at)
+        while len(self._runs) >= MAX_RUNS and finished:
+            del self._runs[finished.pop(0).run_id]
+
+
+# Global registry
+analysis_runs = AnalysisRunRegistry()
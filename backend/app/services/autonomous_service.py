@@ -13,6 +13,8 @@ from app.models.database import Signal, Position, TradingConfig, Trade, Log, Por
 from app.models.trading import AutonomousStatus, PositionResponse, TradeResponse, SignalResponse, PortfolioConfigResponse
 from app.services.alpaca_service import AlpacaService
 from app.services.analysis_service import AnalysisService
+from app.services.exit_triggers import broker_protected, exit_levels, exit_triggers
+from app.services.reconciliation_service import reconciler
 from app.services.signal_service import SignalService
 from app.config import settings
 from app.utils.market_hours import can_trade_symbol, is_crypto_symbol
@@ -75,8 +77,7 @@ class AutonomousService:
             logger.warning(f"Guardrail: Trade value ${trade_value:.2f} exceeds max position size ${config.max_position_size:.2f}")
             return False
             
-        # 2. Budget Limit (Simple check - total allocation)
-        # In a real app we'd query current open positions value
+        # 2. Budget Limit (current_allocation is the open positions' value, kept by reconciliation)
         projected_allocation = config.current_allocation + trade_value
         if projected_allocation > config.total_budget:
              logger.warning(f"Guardrail: Budget exceeded. Available: ${config.total_budget - config.current_allocation:.2f}, Needed: ${trade_value:.2f}")
@@ -271,23 +272,29 @@ class AutonomousService:
         if not position:
             raise ValueError(f"No open position found for {symbol}")
         
+        protected = broker_protected(position)
+        if protected:
+            # The bracket legs hold the shares: cancel them before selling
+            try:
+                await cancel_bracket_legs(self.alpaca, position)
+            except ValueError:
+                reconciler.request()
+                raise
+        
         # Close via Alpaca
         order = await self.alpaca.close_position(symbol)
+        if protected:
+            position.meta_data = {**position.meta_data, "bracket": {**position.meta_data["bracket"], "active": False}}
         
-        # Update database
-        position.status = "closed"
-        position.exit_time = datetime.now()
-        position.exit_reason = reason
-        
-        # Get current price for P&L calculation
-        alpaca_position = await self.alpaca.get_position(symbol)
-        if alpaca_position:
-            position.exit_price = alpaca_position["current_price"]
-            if position.entry_price and position.quantity:
-                position.pnl = (position.exit_price - position.entry_price) * position.quantity
+        # Update database, priced from the bid for now: reconciliation replaces
+        # it with the close order's fill price
+        exit_triggers.untrack(position.id)
+        quote = await self.alpaca.get_recent_quote(symbol) or {}
+        apply_exit(self.db, position, quote.get("bid_price") or quote.get("last_price"), reason, order)
         
         await self.db.commit()
         await self._log("Trading", "position_closed", f"Closed {symbol}: {reason}")
+        reconciler.request()
         
         return order
     
@@ -475,6 +482,19 @@ async def gather_signals_job(db: AsyncSession):
         logger.error(f"Signal gathering job failed: {e}", exc_info=True)
 
 
+async def get_candidate_signals(db: AsyncSession, min_sentiment: float, limit: int) -> List[Signal]:
+    """The analysis job's candidates: signals from the last 2 hours above `min_sentiment`, strongest first."""
+    two_hours_ago = datetime.now() - timedelta(hours=2)
+    result = await db.execute(
+        select(Signal)
+        .where(Signal.timestamp >= two_hours_ago)
+        .where(Signal.sentiment >= min_sentiment)
+        .order_by(Signal.sentiment.desc(), Signal.volume.desc())
+        .limit(limit)
+    )
+    return result.scalars().all()
+
+
 async def run_analysis_job(db: AsyncSession):
     """
     Background job to analyze top signals and execute trades.
@@ -505,29 +525,21 @@ async def run_analysis_job(db: AsyncSession):
         max_positions = config.get("max_positions", 5)
         if open_positions >= max_positions:
             logger.info(f"Max positions ({max_positions}) reached, skipping analysis")
-            await service._log_event("AnalysisJob", "max_positions_reached", 
-                                     f"Already have {open_positions} open positions")
+            await service._log("AnalysisJob", "max_positions_reached",
+                               f"Already have {open_positions} open positions")
             return
         
-        # Get top signals from last 2 hours
-        min_sentiment = config.get("min_sentiment_score", 0.3)
-        two_hours_ago = datetime.now() - timedelta(hours=2)
-        
-        result = await db.execute(
-            select(Signal)
-            .where(Signal.timestamp >= two_hours_ago)
-            .where(Signal.sentiment >= min_sentiment)
-            .order_by(Signal.sentiment.desc(), Signal.volume.desc())
-            .limit(5)
+        # Get top signals from last 2 hours (a wider pool when the pre-screen narrows it)
+        top_signals = await get_candidate_signals(
+            db,
+            min_sentiment=config.get("min_sentiment_score", 0.3),
+            limit=settings.prescreen_max_candidates if settings.prescreen_enabled else 5,
         )
-        top_signals = result.scalars().all()
         
         if not top_signals:
             logger.info("No signals above minimum sentiment threshold")
             return
         
-        logger.info(f"Analyzing {len(top_signals)} top signals")
-        
         # Analyze each signal
         from app.services.analysis_service import AnalysisService
         from app.services.alpaca_service import AlpacaService
@@ -535,12 +547,19 @@ async def run_analysis_job(db: AsyncSession):
         analysis_service = AnalysisService(db)
         alpaca_service = AlpacaService()
         
+        if settings.prescreen_enabled:
+            top_signals = await _prescreen_signals(db, service, alpaca_service, top_signals)
+            if not top_signals:
+                return
+        
+        logger.info(f"Analyzing {len(top_signals)} top signals")
+        
         for signal in top_signals:
             if open_positions >= max_positions:
                 break
             
             try:
-                # Check if we can trade this symbol
+                # Check if we can trade this symbol (always: the pre-screen's filters are configurable)
                 can_trade, reason = can_trade_symbol(signal.symbol, settings.ignore_market_hours)
                 if not can_trade:
                     logger.info(f"Skipping {signal.symbol}: {reason}")
@@ -563,14 +582,11 @@ async def run_analysis_job(db: AsyncSession):
                 # Check if we should trade
                 min_confidence = config.get("min_analyst_confidence", 0.6)
                 if analysis.final_decision == "BUY" and (analysis.confidence or 0) >= min_confidence:
-                    # Calculate position size
-                    account = alpaca_service.get_account()
-                    
-                    # Use PortfolioConfig for sizing
+                    # Size the position from PortfolioConfig
                     max_position_value = pf_config.max_position_size
                     
                     # Get current price
-                    quote = alpaca_service.get_quote(signal.symbol)
+                    quote = await alpaca_service.get_latest_quote(signal.symbol) or {}
                     current_price = quote.get("ask_price") or quote.get("last_price")
                     
                     if not current_price:
@@ -593,14 +609,25 @@ async def run_analysis_job(db: AsyncSession):
                     # Execute buy order
                     logger.info(f"Executing BUY order: {quantity} shares of {signal.symbol} @ ${current_price:.2f}")
                     
-                    order = alpaca_service.place_order(
-                        symbol=signal.symbol,
-                        qty=quantity,
-                        side="buy",
-                        order_type="market"
-                    )
+                    # Bracket entries leave the exits to broker-side legs (no bracket orders for crypto)
+                    use_bracket = settings.bracket_orders_enabled and not is_crypto_symbol(signal.symbol)
+                    if use_bracket:
+                        take_profit_price, stop_loss_price = exit_levels(
+                            current_price, config.get("take_profit_pct", 10.0), config.get("stop_loss_pct", 5.0))
+                        order = await alpaca_service.place_bracket_order(
+                            signal.symbol, quantity, take_profit_price, stop_loss_price)
+                    else:
+                        order = await alpaca_service.place_market_order(signal.symbol, quantity, side="buy")
                     
                     if order:
+                        meta_data = {
+                            "analysis_id": analysis.id if hasattr(analysis, 'id') else None,
+                            "signal_source": signal.source,
+                            "order_id": order.get("order_id")
+                        }
+                        if use_bracket:
+                            meta_data["bracket"] = bracket_meta(order, take_profit_price, stop_loss_price)
+                        
                         # Create position record
                         position = Position(
                             symbol=signal.symbol,
@@ -611,11 +638,7 @@ async def run_analysis_job(db: AsyncSession):
                             entry_reason=f"Analysis: {analysis.final_decision}, Confidence: {analysis.confidence:.2%}, Signal: {signal.reason}",
                             quantity=quantity,
                             status="open",
-                            meta_data={
-                                "analysis_id": analysis.id if hasattr(analysis, 'id') else None,
-                                "signal_source": signal.source,
-                                "order_id": order.get("id")
-                            }
+                            meta_data=meta_data
                         )
                         db.add(position)
                         
@@ -626,9 +649,9 @@ async def run_analysis_job(db: AsyncSession):
                             side="buy",
                             quantity=quantity,
                             price=current_price,
-                            order_type="market",
+                            order_type="bracket" if use_bracket else "market",
                             status=order.get("status"),
-                            alpaca_order_id=order.get("id"),
+                            alpaca_order_id=order.get("order_id"),
                             executed_at=datetime.now(),
                             meta_data={"analysis_confidence": analysis.confidence}
                         )
@@ -640,11 +663,13 @@ async def run_analysis_job(db: AsyncSession):
                         # Update trade with position_id
                         trade.position_id = position.id
                         await db.commit()
+                        exit_triggers.track(position, config.get("take_profit_pct", 10.0),
+                                            config.get("stop_loss_pct", 5.0))
                         
                         open_positions += 1
                         
-                        await service._log_event(
-                            "AnalysisJob", 
+                        await service._log(
+                            "AnalysisJob",
                             "trade_executed",
                             f"Bought {quantity} shares of {signal.symbol} @ ${current_price:.2f}",
                             "INFO"
@@ -669,15 +694,165 @@ async def run_analysis_job(db: AsyncSession):
         logger.error(f"Analysis job failed: {e}", exc_info=True)
 
 
+async def _prescreen_signals(db: AsyncSession, service: AutonomousService, alpaca_service, signals: List[Signal]) -> List[Signal]:
+    """
+    Run the quantitative pre-screen over candidate signals.
+
+    Keeps the strongest signal per symbol, screens all symbols in one pass
+    and returns the top survivors' signals, in sentiment order.
+    """
+    from app.services.prescreen_service import PreScreenService, format_funnel
+
+    by_symbol: Dict[str, Signal] = {}
+    for signal in signals:
+        by_symbol.setdefault(signal.symbol, signal)
+
+    result = await db.execute(select(Position.symbol).where(Position.status == "open"))
+    held = set(result.scalars().all())
+
+    survivors, report = await PreScreenService(alpaca_service).screen_symbols(list(by_symbol), held)
+    await service._log("AnalysisJob", "prescreen_funnel", format_funnel(report))
+
+    return [by_symbol[symbol] for symbol in survivors[: settings.prescreen_max_survivors]]
+
+
+def exit_reason(pnl_pct: float, take_profit_pct: float, stop_loss_pct: float) -> Optional[str]:
+    """Why a position at `pnl_pct` should be closed, or None to keep it."""
+    if pnl_pct >= take_profit_pct:
+        return f"Take-profit triggered at {pnl_pct:+.2f}% (target: {take_profit_pct}%)"
+    if pnl_pct <= -stop_loss_pct:
+        return f"Stop-loss triggered at {pnl_pct:+.2f}% (limit: -{stop_loss_pct}%)"
+    return None
+
+
+async def exit_position(db: AsyncSession, service: AutonomousService, alpaca_service, position: Position,
+                        current_price: float, close_reason: str) -> bool:
+    """Sell a position at market and record the exit; False if the order failed."""
+    # Execute sell order
+    logger.info(f"Closing position: {position.quantity} shares of {position.symbol} @ ${current_price:.2f}")
+
+    order = await alpaca_service.place_market_order(position.symbol, position.quantity, side="sell")
+
+    if not order:
+        logger.error(f"Failed to close position for {position.symbol}")
+        return False
+
+    pnl_dollars = apply_exit(db, position, current_price, close_reason, order)
+    await db.commit()
+    exit_triggers.untrack(position.id)
+
+    await service._log(
+        "PositionMonitor",
+        "position_closed",
+        f"Closed {position.symbol}: {close_reason}, P&L: ${pnl_dollars:+.2f}",
+        "INFO"
+    )
+
+    logger.info(f"✅ Position closed: {position.symbol}, P&L: ${pnl_dollars:+.2f}")
+    return True
+
+
+def apply_exit(db: AsyncSession, position: Position, exit_price: Optional[float], close_reason: str,
+               order: Dict[str, Any], order_type: str = "market") -> Optional[float]:
+    """
+    Mark a position closed and add the sell trade that exited it (not committed).
+
+    Returns the P&L in dollars (None without an exit price; reconciliation
+    fills it in from the sell order once it fills).
+    """
+    entry_price = position.entry_price or 0
+    pnl_pct = pnl_dollars = None
+    if exit_price is not None:
+        pnl_pct = ((exit_price - entry_price) / entry_price * 100) if entry_price > 0 else 0
+        pnl_dollars = (exit_price - entry_price) * position.quantity
+
+    # Update position
+    position.exit_time = datetime.now()
+    position.exit_price = exit_price
+    position.exit_reason = close_reason
+    position.status = "closed"
+    position.pnl = pnl_dollars
+
+    # Create trade record
+    trade = Trade(
+        position_id=position.id,
+        symbol=position.symbol,
+        side="sell",
+        quantity=position.quantity,
+        price=exit_price,
+        order_type=order_type,
+        status=order.get("status"),
+        alpaca_order_id=order.get("order_id"),
+        executed_at=datetime.now(),
+        meta_data={
+            "pnl_pct": pnl_pct,
+            "pnl_dollars": pnl_dollars,
+            "reason": close_reason
+        }
+    )
+    db.add(trade)
+    return pnl_dollars
+
+
+# Order states after which an order can no longer fill
+FINAL_ORDER_STATUSES = {"filled", "canceled", "expired", "rejected"}
+
+# How long a close waits for its cancelled bracket legs, and how often it checks them
+LEG_CANCEL_TIMEOUT_SECONDS = 10.0
+LEG_CANCEL_POLL_SECONDS = 0.25
+
+
+def bracket_meta(order: Dict[str, Any], take_profit_price: float, stop_loss_price: float) -> Dict[str, Any]:
+    """Position meta_data entry for the exit legs of a bracket entry order."""
+    legs = {leg.get("type"): leg.get("order_id") for leg in order.get("legs") or []}
+    return {
+        "active": True,
+        "take_profit_price": round(take_profit_price, 2),
+        "stop_loss_price": round(stop_loss_price, 2),
+        "take_profit_order_id": legs.get("limit"),
+        "stop_loss_order_id": legs.get("stop"),
+    }
+
+
+async def cancel_bracket_legs(alpaca_service, position: Position, timeout_seconds: float = LEG_CANCEL_TIMEOUT_SECONDS):
+    """
+    Cancel the bracket legs of a position that are still open at the broker,
+    and wait until every leg has reached a final status.
+
+    Raises TimeoutError if a leg is still open after `timeout_seconds`, and
+    ValueError if a leg filled meanwhile (the broker has closed the position).
+    """
+    order_id = (position.meta_data or {}).get("order_id")
+    entry = await alpaca_service.get_order(order_id) or {}
+    for leg in entry.get("legs", []):
+        if leg["status"] not in FINAL_ORDER_STATUSES:
+            await alpaca_service.cancel_order(leg["order_id"])
+
+    deadline = asyncio.get_running_loop().time() + timeout_seconds
+    while not all(leg["status"] in FINAL_ORDER_STATUSES for leg in entry.get("legs", [])):
+        if asyncio.get_running_loop().time() >= deadline:
+            raise TimeoutError(f"Bracket legs of {position.symbol} still open after {timeout_seconds}s")
+        await asyncio.sleep(LEG_CANCEL_POLL_SECONDS)
+        # A failed lookup keeps the last legs read
+        entry = await alpaca_service.get_order(order_id) or entry
+
+    if any(leg["status"] == "filled" for leg in entry.get("legs", [])):
+        raise ValueError(f"{position.symbol} was already closed by its bracket leg")
+
+
 async def monitor_positions_job(db: AsyncSession):
     """
-    Background job to monitor open positions and execute take-profit/stop-loss.
-    
-    This job:
-    1. Gets all open positions
+    Background safety sweep over open positions for take-profit/stop-loss.
+
+    Exits normally fire from streamed prices (see exit_triggers); this job:
+    1. Gets all open positions and resyncs the exit trigger index with them
     2. Checks current prices
     3. Calculates P&L
-    4. Executes take-profit or stop-loss if thresholds are met
+    4. Executes take-profit or stop-loss if thresholds are met (for
+       positions no tick-driven exit is already closing)
+    
+    Positions entered with bracket orders are left to their broker-side
+    legs while those are live (reconciliation records the fills).
     """
     try:
         service = AutonomousService(db)
@@ -686,6 +861,7 @@ async def monitor_positions_job(db: AsyncSession):
         config = await service.get_config()
         if not config.get("enabled"):
             logger.debug("Autonomous mode disabled, skipping position monitoring")
+            exit_triggers.clear()
             return
         
         logger.info("Monitoring positions...")
@@ -696,6 +872,10 @@ async def monitor_positions_job(db: AsyncSession):
         )
         open_positions = result.scalars().all()
         
+        take_profit_pct = config.get("take_profit_pct", 10.0)
+        stop_loss_pct = config.get("stop_loss_pct", 5.0)
+        exit_triggers.sync(open_positions, take_profit_pct, stop_loss_pct)
+        
         if not open_positions:
             logger.debug("No open positions to monitor")
             return
@@ -705,13 +885,17 @@ async def monitor_positions_job(db: AsyncSession):
         from app.services.alpaca_service import AlpacaService
         alpaca_service = AlpacaService()
         
-        take_profit_pct = config.get("take_profit_pct", 10.0)
-        stop_loss_pct = config.get("stop_loss_pct", 5.0)
-        
         for position in open_positions:
+            if not exit_triggers.claim(position.id):
+                # A tick-driven exit is closing it
+                continue
             try:
-                # Get current price
-                quote = alpaca_service.get_quote(position.symbol)
+                if broker_protected(position):
+                    # The broker holds the exits
+                    continue
+                
+                # Get current price (the WebSocket feed keeps watched symbols' quotes fresh in the cache)
+                quote = await alpaca_service.get_recent_quote(position.symbol) or {}
                 current_price = quote.get("bid_price") or quote.get("last_price")
                 
                 if not current_price:
@@ -725,80 +909,20 @@ async def monitor_positions_job(db: AsyncSession):
                 
                 logger.info(f"{position.symbol}: Entry=${entry_price:.2f}, Current=${current_price:.2f}, P&L={pnl_pct:+.2f}% (${pnl_dollars:+.2f})")
                 
-                should_close = False
-                close_reason = ""
-                
-                # Check take-profit
-                if pnl_pct >= take_profit_pct:
-                    should_close = True
-                    close_reason = f"Take-profit triggered at {pnl_pct:+.2f}% (target: {take_profit_pct}%)"
-                    logger.info(f"🎯 {close_reason}")
-                
-                # Check stop-loss
-                elif pnl_pct <= -stop_loss_pct:
-                    should_close = True
-                    close_reason = f"Stop-loss triggered at {pnl_pct:+.2f}% (limit: -{stop_loss_pct}%)"
-                    logger.info(f"🛑 {close_reason}")
-                
-                if should_close:
-                    # Execute sell order
-                    logger.info(f"Closing position: {position.quantity} shares of {position.symbol} @ ${current_price:.2f}")
-                    
-                    order = alpaca_service.place_order(
-                        symbol=position.symbol,
-                        qty=position.quantity,
-                        side="sell",
-                        order_type="market"
-                    )
-                    
-                    if order:
-                        # Update position
-                        position.exit_time = datetime.now()
-                        position.exit_price = current_price
-                        position.exit_reason = close_reason
-                        position.status = "closed"
-                        position.pnl = pnl_dollars
-                        
-                        # Create trade record
-                        trade = Trade(
-                            position_id=position.id,
-                            symbol=position.symbol,
-                            side="sell",
-                            quantity=position.quantity,
-                            price=current_price,
-                            order_type="market",
-                            status=order.get("status"),
-                            alpaca_order_id=order.get("id"),
-                            executed_at=datetime.now(),
-                            meta_data={
-                                "pnl_pct": pnl_pct,
-                                "pnl_dollars": pnl_dollars,
-                                "reason": close_reason
-                            }
-                        )
-                        db.add(trade)
-                        
-                        await db.commit()
-                        
-                        await service._log(
-                            "PositionMonitor",
-                            "position_closed",
-                            f"Closed {position.symbol}: {close_reason}, P&L: ${pnl_dollars:+.2f}",
-                            "INFO"
-                        )
-                        
-                        logger.info(f"✅ Position closed: {position.symbol}, P&L: ${pnl_dollars:+.2f}")
-                    else:
-                        logger.error(f"Failed to close position for {position.symbol}")
+                close_reason = exit_reason(pnl_pct, take_profit_pct, stop_loss_pct)
+                if close_reason:
+                    logger.info(f"{'🎯' if pnl_pct > 0 else '🛑'} {close_reason}")
+                    await exit_position(db, service, alpaca_service, position, current_price, close_reason)
                         
             except Exception as e:
                 logger.error(f"Error monitoring position {position.symbol}: {e}", exc_info=True)
                 await service._log("PositionMonitor", "monitor_error",
                                         f"Error monitoring {position.symbol}: {str(e)}", "ERROR")
                 continue
+            finally:
+                exit_triggers.release(position.id)
         
         logger.info("Position monitoring completed")
         
     except Exception as e:
         logger.error(f"Position monitoring job failed: {e}", exc_info=True)
-
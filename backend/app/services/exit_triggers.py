@@ -0,0 +1,140 @@
+"""
+Event-driven take-profit/stop-loss exits.
+
+Open positions' exit levels (entry price +/- TradingConfig's
+take_profit_pct/stop_loss_pct) live in a TriggerIndex. The market data
+publisher checks every quote it polls against the index and exits a
+position as soon as its bid crosses a level, instead of waiting for the
+next monitor_positions_job sweep. The sweep stays as a safety net and
+resyncs the index with the DB. The publisher polls the symbols of open
+positions even when no WebSocket client watches them.
+
+Only the publisher worker fires exits. A position opened by another
+worker is indexed there at the next sweep. Positions entered with a
+bracket order are left out while their broker-side legs are live.
+"""
+
+from sqlalchemy import select
+from typing import Dict, Iterable, Set, Tuple
+import asyncio
+import logging
+
+from app.core.database import AsyncSessionLocal
+from app.core.trigger_index import TAKE_PROFIT, TriggerIndex
+from app.models.database import Position
+
+logger = logging.getLogger(__name__)
+
+
+def exit_levels(entry_price: float, take_profit_pct: float, stop_loss_pct: float) -> Tuple[float, float]:
+    """(take-profit price, stop-loss price) for an entry price."""
+    return entry_price * (1 + take_profit_pct / 100), entry_price * (1 - stop_loss_pct / 100)
+
+
+def broker_protected(position: Position) -> bool:
+    """Whether live bracket legs at the broker hold the position's exits."""
+    return bool(((position.meta_data or {}).get("bracket") or {}).get("active"))
+
+
+class ExitTriggers:
+    """Trigger index of open positions, and the exits it fires."""
+
+    def __init__(self, session_factory=AsyncSessionLocal):
+        self.session_factory = session_factory
+        self.index = TriggerIndex()
+        # Positions being closed (by a tick-driven exit or the sweep)
+        self.closing: Set[int] = set()
+        self._tasks: Set[asyncio.Task] = set()
+
+    def track(self, position: Position, take_profit_pct: float, stop_loss_pct: float):
+        """Index an open position's exit levels."""
+        if not position.entry_price or broker_protected(position):
+            return
+        self.index.add(position.id, position.symbol, *exit_levels(position.entry_price, take_profit_pct, stop_loss_pct))
+
+    def untrack(self, position_id: int):
+        self.index.remove(position_id)
+
+    def sync(self, positions: Iterable[Position], take_profit_pct: float, stop_loss_pct: float):
+        """Rebuild the index from the open positions."""
+        self.index = TriggerIndex()
+        for position in positions:
+            self.track(position, take_profit_pct, stop_loss_pct)
+
+    def clear(self):
+        self.index = TriggerIndex()
+
+    async def load(self):
+        """Rebuild the index from the DB (at startup)."""
+        from app.services.autonomous_service import AutonomousService
+
+        async with self.session_factory() as db:
+            config = await AutonomousService(db).get_config()
+            if not config.get("enabled"):
+                self.clear()
+                return
+            result = await db.execute(select(Position).where(Position.status == "open"))
+            self.sync(result.scalars().all(), config.get("take_profit_pct", 10.0), config.get("stop_loss_pct", 5.0))
+        logger.info(f"Exit triggers loaded for {len(self.index)} open positions")
+
+    def symbols(self) -> Set[str]:
+        """Symbols with open positions (polled by the market data publisher)."""
+        return self.index.symbols()
+
+    def claim(self, position_id: int) -> bool:
+        """Mark a position as being closed; False if something else already is."""
+        if position_id in self.closing:
+            return False
+        self.closing.add(position_id)
+        return True
+
+    def release(self, position_id: int):
+        self.closing.discard(position_id)
+
+    async def on_prices(self, updates: Dict[str, dict]):
+        """Check a poll cycle's price updates (ticker -> data) and start the exits they trigger."""
+        for symbol, data in updates.items():
+            bid = data.get("bid")
+            if not bid:
+                continue
+            for position_id, kind in self.index.check(symbol, bid):
+                # Fired once: the sweep re-indexes the position if the exit does not go through
+                self.index.remove(position_id)
+                if self.claim(position_id):
+                    logger.info(f"{'🎯 Take-profit' if kind == TAKE_PROFIT else '🛑 Stop-loss'} level crossed "
+                                f"for {symbol} position {position_id} at ${bid:.2f}")
+                    task = asyncio.create_task(self._exit(position_id, bid))
+                    self._tasks.add(task)
+                    task.add_done_callback(self._tasks.discard)
+
+    async def _exit(self, position_id: int, price: float):
+        from app.services.autonomous_service import AutonomousService, AlpacaService, exit_position, exit_reason
+
+        try:
+            async with self.session_factory() as db:
+                position = await db.get(Position, position_id)
+                if position is None or position.status != "open":
+                    return
+                service = AutonomousService(db)
+                config = await service.get_config()
+                if not config.get("enabled"):
+                    return
+                entry_price = position.entry_price or 0
+                pnl_pct = ((price - entry_price) / entry_price * 100) if entry_price > 0 else 0
+                # Recheck against the current config (the levels were set at the last sync)
+                reason = exit_reason(pnl_pct, config.get("take_profit_pct", 10.0), config.get("stop_loss_pct", 5.0))
+                if reason:
+                    await exit_position(db, service, AlpacaService(), position, price, reason)
+        except Exception as e:
+            logger.error(f"Tick-driven exit of position {position_id} failed: {e}", exc_info=True)
+        finally:
+            self.release(position_id)
+
+    async def wait(self):
+        """Wait for the exits in progress."""
+        if self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+
+# Global exit triggers
+exit_triggers = ExitTriggers()
@@ -1,22 +1,30 @@
-import chromadb
-from chromadb.config import Settings
 from openai import OpenAI
+import numpy as np
 import logging
 import os
-from typing import List, Dict
+import sys
+from typing import List, Dict, Optional
 import uuid
 
 from app.config import settings
+from app.core.vector_store import get_vector_store
+
+# Add agents directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'agents'))
+
+from tradingagents.rate_governor import embedding_usage, estimate_tokens, governor
 
 logger = logging.getLogger(__name__)
 
+EMBEDDING_DIM = 1536
+
 class UserHistoryMemory:
     """
     Memory system for tracking user trading history and psychology.
     Stores 'User Activity' with rich context (News, Sentiment) to enable
     'The Sentinel' to find patterns like "You trade X when News Y happens".
     """
-    def __init__(self, user_id="default_user"):
+    def __init__(self, user_id="default_user", store=None):
         self.user_id = user_id
         
         # Use settings object which properly loads from .env file
@@ -26,34 +34,51 @@ class UserHistoryMemory:
         self.client = OpenAI(api_key=api_key, base_url=base_url)
         self.embedding_model = "text-embedding-3-small"
         
-        # Initialize ChromaDB
-        self.chroma_client = chromadb.Client(Settings(allow_reset=True))
+        # Shared persistent vector store (injected in tests)
+        self.chroma_client = store or get_vector_store()
         self.collection_name = f"user_history_{user_id}"
         self.collection = self.chroma_client.get_or_create_collection(name=self.collection_name)
 
-    def get_embedding(self, text):
-        """Get OpenAI embedding for a text"""
+    def get_embedding(self, text) -> np.ndarray:
+        """Get OpenAI embedding for a text as a float32 array"""
         try:
-            response = self.client.embeddings.create(
-                model=self.embedding_model, input=text
+            response = governor.call(
+                self.embedding_model,
+                lambda: self.client.embeddings.create(model=self.embedding_model, input=text),
+                tokens=estimate_tokens(text),
+                usage=embedding_usage,
+                vendor="openai",
             )
-            return response.data[0].embedding
+            return np.asarray(response.data[0].embedding, dtype=np.float32)
         except Exception as e:
             logger.error(f"Embedding generation failed: {e}")
-            return [0.0] * 1536 # Return zero vector on failure (fallback)
+            return np.zeros(EMBEDDING_DIM, dtype=np.float32) # Return zero vector on failure (fallback)
+
+    def get_embeddings(self, texts: List[str]) -> np.ndarray:
+        """Get OpenAI embeddings for a batch of texts in a single request, as one float32 matrix."""
+        response = governor.call(
+            self.embedding_model,
+            lambda: self.client.embeddings.create(model=self.embedding_model, input=texts),
+            tokens=sum(estimate_tokens(text) for text in texts),
+            usage=embedding_usage,
+            vendor="openai",
+        )
+        data = sorted(response.data, key=lambda d: d.index)
+        return np.asarray([item.embedding for item in data], dtype=np.float32)
 
-    def add_activity(self, activity_text: str, metadata: dict):
+    def add_activity(self, activity_text: str, metadata: dict, doc_id: Optional[str] = None):
         """
         Add a user activity to memory.
         
         Args:
             activity_text: Descriptive text (e.g., "Bought AAPL after positive earnings news")
             metadata: Dict containing raw data (symbol, side, quantity, news_summary, etc.)
+            doc_id: Stable document ID (re-adding the same ID overwrites it)
         """
         embedding = self.get_embedding(activity_text)
-        doc_id = str(uuid.uuid4())
+        doc_id = doc_id or str(uuid.uuid4())
         
-        self.collection.add(
+        self.collection.upsert(
             documents=[activity_text],
             metadatas=[metadata],
             embeddings=[embedding],
@@ -61,6 +86,33 @@ class UserHistoryMemory:
         )
         logger.info(f"Added activity to memory: {activity_text[:50]}...")
 
+    def add_activities(self, activities: List[Dict], batch_size: int = 100) -> int:
+        """
+        Bulk-add activities, embedding them in batches.
+        
+        Args:
+            activities: List of dicts with "id", "text" and "metadata" keys
+            batch_size: Number of texts per embedding request
+        
+        Returns:
+            Number of activities written
+        """
+        written = 0
+        for start in range(0, len(activities), batch_size):
+            batch = activities[start:start + batch_size]
+            texts = [a["text"] for a in batch]
+            
+            self.collection.upsert(
+                documents=texts,
+                metadatas=[a["metadata"] for a in batch],
+                embeddings=self.get_embeddings(texts),
+                ids=[a["id"] for a in batch]
+            )
+            written += len(batch)
+            logger.info(f"Embedded {written}/{len(activities)} activities")
+        
+        return written
+
     def find_similar_situations(self, current_news_or_context: str, n_matches=3):
         """
         Find past user actions that occurred in similar contexts.
@@ -84,3 +136,29 @@ class UserHistoryMemory:
                 })
 
         return matched_results
+
+
+def activity_document_id(activity) -> str:
+    """Stable vector-store ID for a UserActivity row."""
+    return f"activity-{activity.id}"
+
+
+def build_activity_text(activity) -> str:
+    """Build the descriptive memory text for a UserActivity row."""
+    text = f"User {activity.activity_type} on {activity.symbol}. "
+    if activity.side:
+        text += f"Side: {activity.side}. "
+    text += f"Context: {activity.news_context}. Sentiment: {activity.sentiment_score}."
+    return text
+
+
+def build_activity_metadata(activity) -> dict:
+    """Build the metadata stored alongside a UserActivity embedding."""
+    metadata = {
+        "activity_id": activity.id,
+        "symbol": activity.symbol,
+        "activity_type": activity.activity_type,
+        "timestamp": activity.timestamp.isoformat() if activity.timestamp else None
+    }
+    # Chroma rejects None metadata values
+    return {k: v for k, v in metadata.items() if v is not None}
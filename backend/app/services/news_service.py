@@ -1,11 +1,18 @@
 
 from typing import List, Dict, Any, Optional
 import logging
+import os
+import sys
 from ddgs import DDGS
 from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
 from app.config import settings
 
+# Add agents directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'agents'))
+
+from tradingagents.rate_governor import governed
+
 logger = logging.getLogger(__name__)
 
 class NewsService:
@@ -18,7 +25,7 @@ class NewsService:
         # Initialize LLM only if key is set, otherwise fall back to raw search
         try:
             if settings.openai_api_key:
-                self.llm = ChatOpenAI(
+                self.llm = governed(ChatOpenAI)(
                     model_name="gpt-4o", # Use 4o for speed/quality if available
                     temperature=0,
                     openai_api_key=settings.openai_api_key
@@ -1,6 +1,7 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, desc
 from datetime import datetime, timedelta
+import asyncio
 import logging
 from typing import Optional, List, Dict, Any
 
@@ -9,7 +10,12 @@ from app.models.trading import UserActionCreate
 from app.services.signal_service import SignalService
 from app.services.news_service import NewsService
 
-from app.services.memory_service import UserHistoryMemory
+from app.services.memory_service import (
+    UserHistoryMemory,
+    activity_document_id,
+    build_activity_metadata,
+    build_activity_text,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -52,22 +58,14 @@ class ObserverService:
         await self.db.commit()
         await self.db.refresh(activity)
         
-        # 3. Add to Memory (Async in production, sync here for simplicity)
+        # 3. Add to Memory (blocking embedding call, so in a worker thread)
         try:
-            # Create a descriptive text for the memory
-            memory_text = f"User {action.activity_type} on {action.symbol}. "
-            if action.side:
-                memory_text += f"Side: {action.side}. "
-            memory_text += f"Context: {context.get('news_summary')}. Sentiment: {context.get('sentiment')}."
-            
-            self.memory.add_activity(
-                activity_text=memory_text,
-                metadata={
-                    "activity_id": activity.id,
-                    "symbol": activity.symbol,
-                    "activity_type": activity.activity_type,
-                    "timestamp": activity.timestamp.isoformat()
-                }
+            # Stable ID so a later rehydration overwrites instead of duplicating
+            await asyncio.to_thread(
+                self.memory.add_activity,
+                activity_text=build_activity_text(activity),
+                metadata=build_activity_metadata(activity),
+                doc_id=activity_document_id(activity)
             )
         except Exception as e:
             logger.error(f"Failed to add activity to memory: {e}")
@@ -130,3 +128,38 @@ class ObserverService:
             .limit(limit)
         )
         return result.scalars().all()
+
+    async def rehydrate_memory(self, user_id: str = "default_user", batch_size: int = 100) -> int:
+        """
+        Bulk-embed a user's historical UserActivity rows into the vector store.
+        Safe to re-run: rows are keyed by activity ID, so existing vectors are overwritten.
+        
+        Returns:
+            Number of activities embedded
+        """
+        result = await self.db.execute(
+            select(UserActivity)
+            .where(UserActivity.user_id == user_id)
+            .order_by(UserActivity.id)
+        )
+        activities = result.scalars().all()
+        
+        if not activities:
+            logger.info(f"No activities to rehydrate for {user_id}")
+            return 0
+        
+        memory = self.memory if self.memory.user_id == user_id else UserHistoryMemory(user_id)
+        
+        logger.info(f"Rehydrating memory for {user_id} from {len(activities)} activities...")
+        return await asyncio.to_thread(
+            memory.add_activities,
+            [
+                {
+                    "id": activity_document_id(a),
+                    "text": build_activity_text(a),
+                    "metadata": build_activity_metadata(a),
+                }
+                for a in activities
+            ],
+            batch_size=batch_size
+        )
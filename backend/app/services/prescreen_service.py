@@ -0,0 +1,280 @@
+"""
+Quantitative pre-screen for analysis candidates.
+
+Cheap filters computed from daily bars and latest quotes decide which
+signals are worth a full multi-LLM analysis. Features are computed for all
+candidates at once (one bars request, one quotes request, column-wise
+pandas/NumPy math), so a cycle's screen takes milliseconds once bars are
+cached. Each cycle produces a funnel report of how many candidates each
+filter cut.
+"""
+
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+from datetime import datetime
+import logging
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.config import settings
+from app.core.metrics import metrics
+from app.utils.market_hours import can_trade_symbol
+
+logger = logging.getLogger(__name__)
+
+# Feature columns of the screen frame (one row per candidate symbol)
+FEATURE_COLUMNS = (
+    "last_close",
+    "avg_dollar_volume",
+    "volatility_pct",
+    "trend_pct",
+    "bid",
+    "ask",
+    "spread_pct",
+    "held",
+    "market_open",
+)
+
+
+class ScreenFilter(ABC):
+    """
+    A vectorized pre-screen filter.
+
+    Subclasses implement `mask(frame)`, returning a boolean Series over the
+    candidates (True = passes). Missing data (NaN) should fail the filter.
+    """
+
+    name = "filter"
+
+    @abstractmethod
+    def mask(self, frame: pd.DataFrame) -> pd.Series:
+        """Boolean Series over the candidates, True where they pass."""
+
+
+class TradableFilter(ScreenFilter):
+    """Market open for the symbol (crypto always) and a live two-sided quote."""
+
+    name = "tradable"
+
+    def mask(self, frame: pd.DataFrame) -> pd.Series:
+        return frame["market_open"] & (frame["bid"] > 0) & (frame["ask"] > 0)
+
+
+class ExposureFilter(ScreenFilter):
+    """Skip symbols we already hold."""
+
+    name = "exposure"
+
+    def mask(self, frame: pd.DataFrame) -> pd.Series:
+        return ~frame["held"]
+
+
+class LiquidityFilter(ScreenFilter):
+    name = "liquidity"
+
+    def __init__(self, min_dollar_volume: float):
+        self.min_dollar_volume = min_dollar_volume
+
+    def mask(self, frame: pd.DataFrame) -> pd.Series:
+        return frame["avg_dollar_volume"] >= self.min_dollar_volume
+
+
+class SpreadFilter(ScreenFilter):
+    name = "spread"
+
+    def __init__(self, max_spread_pct: float):
+        self.max_spread_pct = max_spread_pct
+
+    def mask(self, frame: pd.DataFrame) -> pd.Series:
+        return frame["spread_pct"] <= self.max_spread_pct
+
+
+class VolatilityFilter(ScreenFilter):
+    """Daily return volatility within a band: enough movement, but not a lottery ticket."""
+
+    name = "volatility"
+
+    def __init__(self, min_pct: float, max_pct: float):
+        self.min_pct = min_pct
+        self.max_pct = max_pct
+
+    def mask(self, frame: pd.DataFrame) -> pd.Series:
+        return frame["volatility_pct"].between(self.min_pct, self.max_pct)
+
+
+class TrendFilter(ScreenFilter):
+    """Last close not too far below its SMA (we only open longs)."""
+
+    name = "trend"
+
+    def __init__(self, min_trend_pct: float):
+        self.min_trend_pct = min_trend_pct
+
+    def mask(self, frame: pd.DataFrame) -> pd.Series:
+        return frame["trend_pct"] >= self.min_trend_pct
+
+
+# Filter name -> factory reading its thresholds from settings
+FILTERS: Dict[str, Callable[[], ScreenFilter]] = {
+    "tradable": TradableFilter,
+    "exposure": ExposureFilter,
+    "liquidity": lambda: LiquidityFilter(settings.prescreen_min_dollar_volume),
+    "spread": lambda: SpreadFilter(settings.prescreen_max_spread_pct),
+    "volatility": lambda: VolatilityFilter(settings.prescreen_min_volatility_pct, settings.prescreen_max_volatility_pct),
+    "trend": lambda: TrendFilter(settings.prescreen_min_trend_pct),
+}
+
+
+def register_filter(name: str, factory: Callable[[], ScreenFilter]):
+    """Make a custom filter available to the `prescreen_filters` setting."""
+    FILTERS[name] = factory
+
+
+def build_frame(
+    symbols: List[str],
+    bars: Dict[str, List[Dict]],
+    quotes: Dict[str, Dict],
+    held: Set[str],
+    market_open: Dict[str, bool],
+    sma_days: int = 20,
+) -> pd.DataFrame:
+    """
+    Screen features for all candidates in one pass.
+
+    Bars are pivoted into date x symbol matrices so every feature is a
+    column-wise reduction; symbols without bars or quotes get NaN features.
+    """
+    frame = pd.DataFrame(index=pd.Index(symbols, name="symbol"))
+
+    rows = [(symbol, bar["timestamp"], bar["close"], bar["volume"]) for symbol in symbols for bar in bars.get(symbol, [])]
+    if rows:
+        long = pd.DataFrame(rows, columns=["symbol", "timestamp", "close", "volume"])
+        wide = long.drop_duplicates(["timestamp", "symbol"], keep="last").pivot(index="timestamp", columns="symbol").sort_index()
+        close, volume = wide["close"], wide["volume"]
+
+        returns = np.log(close).diff()
+        sma = close.rolling(sma_days, min_periods=1).mean()
+        frame["last_close"] = close.ffill().iloc[-1]
+        frame["avg_dollar_volume"] = (close * volume).mean()
+        frame["volatility_pct"] = returns.std() * 100
+        frame["trend_pct"] = (close.ffill().iloc[-1] / sma.iloc[-1] - 1) * 100
+    else:
+        for column in ("last_close", "avg_dollar_volume", "volatility_pct", "trend_pct"):
+            frame[column] = np.nan
+
+    quote_frame = pd.DataFrame.from_dict(
+        {s: (q.get("bid_price"), q.get("ask_price")) for s, q in quotes.items()},
+        orient="index",
+        columns=["bid", "ask"],
+        dtype=float,
+    )
+    frame = frame.join(quote_frame)
+    mid = (frame["bid"] + frame["ask"]) / 2
+    frame["spread_pct"] = (frame["ask"] - frame["bid"]) / mid.where(mid > 0) * 100
+
+    frame["held"] = frame.index.isin(list(held))
+    frame["market_open"] = frame.index.map(lambda s: market_open.get(s, False)).astype(bool)
+    return frame[list(FEATURE_COLUMNS)]
+
+
+class PreScreen:
+    """An ordered set of filters applied to a candidate frame."""
+
+    def __init__(self, filters: Iterable[ScreenFilter]):
+        self.filters = list(filters)
+
+    @classmethod
+    def from_settings(cls) -> "PreScreen":
+        unknown = [name for name in settings.prescreen_filters if name not in FILTERS]
+        if unknown:
+            raise ValueError(f"Unknown pre-screen filters: {unknown}")
+        return cls(FILTERS[name]() for name in settings.prescreen_filters)
+
+    def run(self, frame: pd.DataFrame) -> Tuple[List[str], Dict]:
+        """
+        Apply the filters in order.
+
+        Returns:
+            (surviving symbols in input order, funnel report)
+        """
+        started = time.perf_counter()
+        alive = pd.Series(True, index=frame.index)
+        stages = []
+        rejected: Dict[str, str] = {}
+
+        for screen_filter in self.filters:
+            passed = screen_filter.mask(frame).fillna(False).astype(bool)
+            cut = alive & ~passed
+            for symbol in frame.index[cut]:
+                rejected[symbol] = screen_filter.name
+            alive &= passed
+            stages.append({"filter": screen_filter.name, "cut": int(cut.sum()), "remaining": int(alive.sum())})
+
+        survivors = list(frame.index[alive])
+        report = {
+            "candidates": len(frame),
+            "stages": stages,
+            "survivors": survivors,
+            "rejected": rejected,
+            "seconds": round(time.perf_counter() - started, 6),
+        }
+        return survivors, report
+
+
+def format_funnel(report: Dict) -> str:
+    """One-line funnel, e.g. '40 candidates -> tradable -12 -> liquidity -20 -> 8 survivors'."""
+    steps = " -> ".join(f"{stage['filter']} -{stage['cut']}" for stage in report["stages"])
+    return f"{report['candidates']} candidates -> {steps} -> {len(report['survivors'])} survivors"
+
+
+class PreScreenService:
+    """Fetches bars/quotes for candidates (bars cached) and runs the pre-screen."""
+
+    # symbol -> (fetched_at monotonic, bars); shared across cycles
+    _bar_cache: Dict[str, Tuple[float, List[Dict]]] = {}
+    # Funnel report of the most recent cycle
+    last_report: Optional[Dict] = None
+
+    def __init__(self, alpaca, screen: Optional[PreScreen] = None):
+        self.alpaca = alpaca
+        self.screen = screen or PreScreen.from_settings()
+
+    async def _get_bars(self, symbols: List[str]) -> Dict[str, List[Dict]]:
+        now = time.monotonic()
+        ttl = settings.prescreen_bar_ttl_seconds
+        missing = [s for s in symbols if s not in self._bar_cache or now - self._bar_cache[s][0] > ttl]
+        if missing:
+            fetched = await self.alpaca.get_daily_bars(missing, days=settings.prescreen_lookback_days)
+            for symbol in missing:
+                # Cache empty results too, so unknown symbols aren't refetched every cycle
+                self._bar_cache[symbol] = (now, fetched.get(symbol, []))
+        return {s: self._bar_cache[s][1] for s in symbols}
+
+    async def screen_symbols(self, symbols: List[str], held: Set[str]) -> Tuple[List[str], Dict]:
+        """Screen candidate symbols; returns (survivors, funnel report)."""
+        if not symbols:
+            return [], {"candidates": 0, "stages": [], "survivors": [], "rejected": {}, "seconds": 0.0}
+
+        fetch_started = time.perf_counter()
+        bars = await self._get_bars(symbols)
+        quotes = await self.alpaca.get_latest_quotes(symbols)
+        fetch_seconds = time.perf_counter() - fetch_started
+
+        screen_started = time.perf_counter()
+        market_open = {s: can_trade_symbol(s, settings.ignore_market_hours)[0] for s in symbols}
+        frame = build_frame(symbols, bars, quotes, held, market_open, settings.prescreen_trend_sma_days)
+        survivors, report = self.screen.run(frame)
+        report["seconds"] = round(time.perf_counter() - screen_started, 6)
+        report["fetch_seconds"] = round(fetch_seconds, 3)
+        report["screened_at"] = datetime.utcnow().isoformat()
+        PreScreenService.last_report = report
+
+        metrics.observe("prescreen_seconds", report["seconds"])
+        metrics.observe("prescreen_fetch_seconds", fetch_seconds)
+        logger.info(f"Pre-screen: {format_funnel(report)} ({report['seconds'] * 1000:.1f}ms screen)")
+        return survivors, report
+
+
+metrics.register("prescreen_seconds", (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1))
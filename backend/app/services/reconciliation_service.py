@@ -0,0 +1,293 @@
+"""
+Reconciliation of the DB's positions and trades with Alpaca.
+
+Each cycle reads the DB first (open positions, and trades whose orders
+had not finished), then makes two Alpaca calls: all broker positions, and
+the orders submitted since the oldest of those records. One pass over the
+DB rows diffs them against the broker and corrects them in a single
+commit:
+
+- a pending trade takes its order's final status and fill price; a buy
+  fill sets its position's entry price, a sell fill its exit price and
+  P&L. An entry that never filled drops its position, and a sell that
+  never filled reopens it
+- a bracket position closes at its filled leg's price, or goes back to
+  local monitoring when its legs ended unfilled
+- a position the broker no longer holds closes at the symbol's latest
+  sell fill (without a price if there is none)
+- a position whose quantity differs from the broker's takes the broker's
+- PortfolioConfig.current_allocation becomes the open positions' market value
+
+It runs every RECONCILE_INTERVAL_SECONDS, and shortly after Alpaca trade
+update (fill) events and manual closes.
+"""
+
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, Dict, List, Optional
+import asyncio
+import logging
+import threading
+
+from app.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.database import Log, PortfolioConfig, Position, Trade
+from app.services.exit_triggers import broker_protected, exit_triggers
+
+logger = logging.getLogger(__name__)
+
+# Trade update events after which the books may be out of date
+FILL_EVENTS = {"fill", "partial_fill", "canceled", "expired", "rejected"}
+
+
+def as_utc(moment: datetime, local: bool = True) -> datetime:
+    """
+    A DB time as an aware UTC time. The app writes naive local times
+    (datetime.now()); columns defaulting to the database's now() are naive
+    UTC (SQLite's CURRENT_TIMESTAMP), so pass local=False for those.
+    """
+    if moment.tzinfo is None and not local:
+        return moment.replace(tzinfo=timezone.utc)
+    return moment.astimezone(timezone.utc)
+
+
+def symbol_key(symbol: str) -> str:
+    """Orders name crypto pairs "BTC/USD", positions "BTCUSD"."""
+    return symbol.replace("/", "").upper()
+
+
+class ReconciliationService:
+    """Diffs the DB's open positions and pending trades against Alpaca and corrects the DB."""
+
+    def __init__(self, db: AsyncSession, alpaca_service):
+        self.db = db
+        self.alpaca = alpaca_service
+
+    async def reconcile(self, user_id: str = "default_user") -> Dict[str, Any]:
+        """Run one cycle; returns counts of what was corrected and the new allocation."""
+        from app.services.autonomous_service import FINAL_ORDER_STATUSES, apply_exit
+
+        # The DB first: every order behind these rows was submitted before the broker is read
+        result = await self.db.execute(select(Position).where(Position.status == "open"))
+        open_positions = result.scalars().all()
+        result = await self.db.execute(
+            select(Trade)
+            .where(Trade.alpaca_order_id.isnot(None))
+            .where(or_(Trade.status.is_(None), Trade.status.notin_(FINAL_ORDER_STATUSES)))
+            .order_by(Trade.id)
+        )
+        pending = result.scalars().all()
+
+        positions = {position.id: position for position in open_positions}
+        missing = {trade.position_id for trade in pending if trade.position_id is not None} - set(positions)
+        if missing:
+            result = await self.db.execute(select(Position).where(Position.id.in_(missing)))
+            positions.update((position.id, position) for position in result.scalars().all())
+
+        counts = {"fills": 0, "closed": 0, "reopened": 0, "resized": 0}
+        # Positions an exit in progress owns are left to it
+        owned = [position for position in open_positions if exit_triggers.claim(position.id)]
+        owned_ids = {position.id for position in owned}
+        try:
+            held: Dict[str, Dict[str, Any]] = {}
+            orders: Dict[str, Dict[str, Any]] = {}
+            sells: List[Dict[str, Any]] = []
+            times = [as_utc(position.entry_time) for position in open_positions if position.entry_time]
+            times += [as_utc(trade.executed_at) if trade.executed_at else as_utc(trade.created_at, local=False)
+                      for trade in pending if trade.executed_at or trade.created_at]
+            if times:
+                held = {symbol_key(p["symbol"]): p for p in await self.alpaca.get_positions()}
+                since = min(times) - timedelta(minutes=1)
+                for order in await self.alpaca.get_orders(after=since):
+                    orders[order["order_id"]] = order
+                    orders.update((leg["order_id"], leg) for leg in order["legs"])
+                    if order["side"] == "sell" and order["status"] == "filled":
+                        sells.append(order)
+
+            closed: List[Position] = []
+
+            # Pending trades: final status and fill prices
+            for trade in pending:
+                order = orders.get(trade.alpaca_order_id)
+                if order is None or order["status"] not in FINAL_ORDER_STATUSES:
+                    continue
+                position = positions.get(trade.position_id)
+                if position is not None and position.status == "open" and position.id not in owned_ids:
+                    continue
+                trade.status = order["status"]
+                if order["status"] == "filled":
+                    counts["fills"] += 1
+                    trade.price = order["filled_avg_price"] or trade.price
+                    if position is None:
+                        continue
+                    if trade.side == "buy":
+                        position.entry_price = trade.price
+                    else:
+                        position.exit_price = trade.price
+                    if position.status == "closed" and position.exit_price is not None and position.entry_price:
+                        position.pnl = (position.exit_price - position.entry_price) * position.quantity
+                elif position is not None and not order["filled_quantity"]:
+                    if trade.side == "buy" and position.status == "open":
+                        position.status = "closed"
+                        position.exit_time = datetime.now()
+                        position.exit_reason = f"Entry order {order['status']} before filling"
+                        position.pnl = 0.0
+                        closed.append(position)
+                    elif trade.side == "sell" and position.status == "closed" and symbol_key(position.symbol) in held:
+                        position.status = "open"
+                        position.exit_time = position.exit_price = position.exit_reason = position.pnl = None
+                        counts["reopened"] += 1
+
+            # Open positions against the broker's
+            by_symbol: Dict[str, List[Position]] = {}
+            for position in owned:
+                if position.status == "open":
+                    by_symbol.setdefault(symbol_key(position.symbol), []).append(position)
+
+            for key, symbol_positions in by_symbol.items():
+                for position in symbol_positions:
+                    entry = orders.get((position.meta_data or {}).get("order_id"))
+                    if entry is not None and entry["status"] not in FINAL_ORDER_STATUSES:
+                        # Not filled yet
+                        continue
+
+                    if broker_protected(position):
+                        if entry is None:
+                            continue
+                        bracket = dict(position.meta_data["bracket"])
+                        filled = next((leg for leg in entry["legs"] if leg["status"] == "filled"), None)
+                        if filled:
+                            bracket["active"] = False
+                            position.meta_data = {**position.meta_data, "bracket": bracket}
+                            price = filled["filled_avg_price"]
+                            kind = "Take-profit" if filled["type"] == "limit" else "Stop-loss"
+                            apply_exit(self.db, position, price, f"{kind} filled by broker at ${price:.2f}",
+                                       filled, order_type=filled["type"])
+                            closed.append(position)
+                            continue
+                        if not all(leg["status"] in FINAL_ORDER_STATUSES for leg in entry["legs"]):
+                            continue
+                        logger.warning(f"Bracket legs of {position.symbol} ended unfilled; monitoring its exits locally")
+                        bracket["active"] = False
+                        position.meta_data = {**position.meta_data, "bracket": bracket}
+
+                    if key not in held:
+                        entry_time = as_utc(position.entry_time)
+                        sell = next((order for order in sells if symbol_key(order["symbol"]) == key
+                                     and order["created_at"]
+                                     and datetime.fromisoformat(order["created_at"]) >= entry_time), None)
+                        if sell:
+                            apply_exit(self.db, position, sell["filled_avg_price"], "Closed at broker", sell)
+                        else:
+                            position.status = "closed"
+                            position.exit_time = datetime.now()
+                            position.exit_reason = "No longer held at broker"
+                        closed.append(position)
+
+                if key in held and len(symbol_positions) == 1:
+                    position = symbol_positions[0]
+                    if position.status == "open" and abs((position.quantity or 0) - held[key]["quantity"]) > 1e-9:
+                        logger.warning(f"{position.symbol}: DB quantity {position.quantity} != broker {held[key]['quantity']}")
+                        position.quantity = held[key]["quantity"]
+                        counts["resized"] += 1
+
+            counts["closed"] = len(closed)
+
+            # Allocation: what the open positions are worth now
+            allocation = sum(
+                (position.quantity or 0) * (held[symbol_key(position.symbol)]["current_price"]
+                                            if symbol_key(position.symbol) in held else position.entry_price or 0)
+                for position in positions.values()
+                if position.status == "open"
+            )
+            result = await self.db.execute(select(PortfolioConfig).where(PortfolioConfig.user_id == user_id))
+            config = result.scalar_one_or_none()
+            if config is not None:
+                config.current_allocation = round(allocation, 2)
+
+            if any(counts.values()):
+                self.db.add(Log(
+                    timestamp=datetime.now(),
+                    agent="Reconciliation",
+                    action="positions_reconciled",
+                    message=", ".join(f"{name}={count}" for name, count in counts.items()),
+                    level="INFO",
+                ))
+            await self.db.commit()
+            for position in closed:
+                exit_triggers.untrack(position.id)
+        finally:
+            for position_id in owned_ids:
+                exit_triggers.release(position_id)
+
+        if any(counts.values()):
+            logger.info(f"Reconciled positions with Alpaca: {counts}")
+        return {**counts, "allocation": round(allocation, 2)}
+
+
+class Reconciler:
+    """Runs reconciliation cycles one at a time, on a schedule and on trade update (fill) events."""
+
+    def __init__(self, session_factory=AsyncSessionLocal, delay_seconds: float = 1.0):
+        self.session_factory = session_factory
+        self.delay_seconds = delay_seconds
+        self._lock = asyncio.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending: Optional[asyncio.Task] = None
+        self._stream = None
+
+    async def run(self, alpaca_service=None) -> Optional[Dict[str, Any]]:
+        """One reconciliation cycle (None if it failed)."""
+        from app.services.alpaca_service import AlpacaService
+
+        async with self._lock:
+            try:
+                async with self.session_factory() as db:
+                    return await ReconciliationService(db, alpaca_service or AlpacaService()).reconcile()
+            except Exception as e:
+                logger.error(f"Position reconciliation failed: {e}", exc_info=True)
+                return None
+
+    def start(self, trade_updates: bool = True):
+        """Accept reconcile requests, and listen for Alpaca trade updates on a background thread."""
+        self._loop = asyncio.get_running_loop()
+        if trade_updates:
+            from alpaca.trading.stream import TradingStream
+
+            self._stream = TradingStream(settings.alpaca_api_key, settings.alpaca_api_secret, paper=settings.alpaca_paper)
+            self._stream.subscribe_trade_updates(self._on_trade_update)
+            threading.Thread(target=self._stream.run, name="alpaca-trade-updates", daemon=True).start()
+            logger.info("Listening for Alpaca trade updates")
+
+    async def stop(self):
+        if self._stream is not None:
+            try:
+                await asyncio.to_thread(self._stream.stop)
+            except Exception as e:
+                logger.debug(f"Trade update stream stop: {e}")
+            self._stream = None
+        if self._pending is not None:
+            self._pending.cancel()
+        self._loop = None
+
+    async def _on_trade_update(self, update):
+        # Runs on the stream's thread
+        event = getattr(update.event, "value", update.event)
+        if event in FILL_EVENTS and self._loop is not None:
+            self._loop.call_soon_threadsafe(self.request)
+
+    def request(self):
+        """Reconcile shortly (a burst of fills makes one cycle); ignored until started."""
+        if self._loop is None:
+            return
+        if self._pending is None or self._pending.done():
+            self._pending = self._loop.create_task(self._run_soon())
+
+    async def _run_soon(self):
+        await asyncio.sleep(self.delay_seconds)
+        await self.run()
+
+
+# Global reconciler
+reconciler = Reconciler(delay_seconds=settings.reconcile_fill_delay_seconds)
@@ -1,5 +1,6 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, desc
+import asyncio
 import logging
 from datetime import datetime
 from typing import List, Optional
@@ -17,7 +18,7 @@ class SentinelService:
 
     def __init__(self, db: AsyncSession):
         self.db = db
-        self.memory = UserHistoryMemory() # Connects to ChromaDB
+        self.memory = UserHistoryMemory() # Shared persistent vector store
 
     async def process_signal(self, signal: Signal) -> Optional[Alert]:
         """
@@ -30,7 +31,8 @@ class SentinelService:
             query_text = f"News about {signal.symbol}: {signal.reason}. {signal.source_detail or ''}"
             
             # 2. Query Memory
-            matches = self.memory.find_similar_situations(query_text, n_matches=1)
+            # Embedding + search are blocking (and rate governed): keep them off the event loop
+            matches = await asyncio.to_thread(self.memory.find_similar_situations, query_text, n_matches=1)
             
             if not matches:
                 return None
@@ -15,6 +15,7 @@ import math
 from app.models.database import Signal, UserActivity
 from sqlalchemy import select, distinct
 from app.config import settings
+from app.core.instrumentation import vendor_transport
 
 logger = logging.getLogger(__name__)
 
@@ -74,7 +75,7 @@ class SignalService:
         
         # 1. StockTwits Specific Stream
         try:
-            async with httpx.AsyncClient() as client:
+            async with httpx.AsyncClient(transport=vendor_transport("symbol_stream")) as client:
                 stream_response = await client.get(
                     f"https://api.stocktwits.com/api/2/streams/symbol/{symbol}.json?limit=30",
                     headers={"User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"},
@@ -231,7 +232,7 @@ class SignalService:
         signals = []
         source_weight = self.source_weights["stocktwits"]
         
-        async with httpx.AsyncClient() as client:
+        async with httpx.AsyncClient(transport=vendor_transport("trending")) as client:
             try:
                 # Get trending symbols
                 response = await client.get(
@@ -325,7 +326,7 @@ class SignalService:
         subreddits = ["wallstreetbets", "stocks", "investing", "options"]
         ticker_data = {}
         
-        async with httpx.AsyncClient() as client:
+        async with httpx.AsyncClient(transport=vendor_transport("hot")) as client:
             for sub in subreddits:
                 source_weight = self.source_weights.get(f"reddit_{sub}", 0.7)
                 
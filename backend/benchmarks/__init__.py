@@ -0,0 +1,22 @@
+"""
+Micro-benchmarks for the backend's hot paths.
+
+See `benchmarks/run.py` for usage. Datasets come from the synthetic
+generators in `scripts/generate_demo_data.py`. `benchmarks/cycle.py`
+times whole autonomous cycles against the stand-ins in
+`benchmarks/standins.py`, and `benchmarks/ws_load.py` load-tests
+/ws/market with thousands of clients.
+"""
+
+import os
+import sys
+
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts")
+
+
+def demo_data():
+    """The demo data generator module (scripts/ is not a package)."""
+    if SCRIPTS_DIR not in sys.path:
+        sys.path.insert(0, SCRIPTS_DIR)
+    import generate_demo_data
+    return generate_demo_data
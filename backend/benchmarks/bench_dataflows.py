@@ -0,0 +1,56 @@
+"""
+Technical indicator dataflows on a cached synthetic price history (no network).
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+
+import pandas as pd
+
+from benchmarks import demo_data
+from benchmarks.harness import benchmark, teardown
+
+# Add agents directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app", "agents"))
+
+from tradingagents.dataflows.config import set_config
+from tradingagents.dataflows.y_finance import _get_stock_stats_bulk, get_stock_stats_indicators_window
+
+SYMBOL = "BENCH"
+_cache_dirs = []
+
+
+def _seed_price_cache() -> str:
+    """Write the synthetic history where the online path looks for today's cache file."""
+    cache_dir = tempfile.mkdtemp(prefix="bench-dataflows-")
+    _cache_dirs.append(cache_dir)
+    today = pd.Timestamp.today()
+    start = (today - pd.DateOffset(years=15)).strftime("%Y-%m-%d")
+    path = os.path.join(cache_dir, f"{SYMBOL}-YFin-data-{start}-{today.strftime('%Y-%m-%d')}.csv")
+    demo_data().synthetic_price_history().to_csv(path, index=False)
+    set_config({"data_cache_dir": cache_dir, "data_vendors": {"technical_indicators": "yfinance"}})
+    return cache_dir
+
+
+@teardown
+def remove_price_caches():
+    for cache_dir in _cache_dirs:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+@benchmark("dataflows.stock_stats_bulk")
+def stock_stats_bulk(scale: int):
+    """_get_stock_stats_bulk: 15 years of daily bars, one indicator (scale-independent)."""
+    _seed_price_cache()
+    curr_date = pd.Timestamp.today().strftime("%Y-%m-%d")
+    return lambda: _get_stock_stats_bulk(SYMBOL, "macd", curr_date)
+
+
+@benchmark("dataflows.indicators_window")
+def indicators_window(scale: int):
+    """get_stock_stats_indicators_window: 30-day RSI report (scale-independent)."""
+    _seed_price_cache()
+    curr_date = pd.Timestamp.today().strftime("%Y-%m-%d")
+    return lambda: get_stock_stats_indicators_window(SYMBOL, "rsi", curr_date, 30)
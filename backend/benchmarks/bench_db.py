@@ -0,0 +1,78 @@
+"""
+Signal and AnalysisResult queries on a seeded in-memory database.
+"""
+
+from sqlalchemy import desc, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from benchmarks import demo_data
+from benchmarks.harness import benchmark, teardown
+from app.core.database import Base
+from app.models.database import AnalysisResult, Signal
+from app.services.analysis_service import AnalysisService
+from app.services.autonomous_service import get_candidate_signals
+
+_sessions = {}
+_engines = []
+
+
+async def _seeded_session(scale: int) -> AsyncSession:
+    """One seeded database per scale, shared by the query benchmarks."""
+    if scale in _sessions:
+        return _sessions[scale]
+
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    _engines.append(engine)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    generator = demo_data()
+    session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)()
+    await session.run_sync(lambda s: s.bulk_insert_mappings(Signal, generator.synthetic_signals(scale)))
+    await session.run_sync(lambda s: s.bulk_insert_mappings(AnalysisResult, generator.synthetic_analysis_results(scale)))
+    await session.commit()
+    _sessions[scale] = session
+    return session
+
+
+@teardown
+async def close_databases():
+    for session in _sessions.values():
+        await session.close()
+    for engine in _engines:
+        await engine.dispose()
+
+
+@benchmark("db.top_signals")
+async def top_signals(scale: int):
+    """The analysis job's candidate query (get_candidate_signals), sentiment >= 0.3, top 50 (500 x scale signals)."""
+    db = await _seeded_session(scale)
+    return lambda: get_candidate_signals(db, min_sentiment=0.3, limit=50)
+
+
+@benchmark("db.recent_signals")
+async def recent_signals(scale: int):
+    """The updates feed query: latest 50 signals (500 x scale signals)."""
+    db = await _seeded_session(scale)
+
+    async def query():
+        result = await db.execute(select(Signal).order_by(desc(Signal.timestamp)).limit(50))
+        return result.scalars().all()
+
+    return query
+
+
+@benchmark("db.analysis_history")
+async def analysis_history(scale: int):
+    """AnalysisService.get_history for one ticker (50 x scale results)."""
+    service = AnalysisService(await _seeded_session(scale))
+    return lambda: service.get_history("AAPL", limit=10)
+
+
+@benchmark("db.analysis_latest_batch")
+async def analysis_latest_batch(scale: int):
+    """AnalysisService.get_latest_batch for all demo tickers (50 x scale results)."""
+    service = AnalysisService(await _seeded_session(scale))
+    tickers = demo_data().SYNTHETIC_TICKERS
+    return lambda: service.get_latest_batch(tickers)
@@ -0,0 +1,15 @@
+"""
+Serialization of a finished graph state for storage.
+"""
+
+from benchmarks import demo_data
+from benchmarks.harness import benchmark
+from app.services.analysis_service import AnalysisService
+
+
+@benchmark("analysis.make_json_serializable")
+def make_json_serializable(scale: int):
+    """AnalysisService._make_json_serializable on 10 final states with 60 messages and long reports (scale-independent)."""
+    service = AnalysisService(db=None)
+    states = [demo_data().synthetic_final_state() for _ in range(10)]
+    return lambda: [service._make_json_serializable(state) for state in states]
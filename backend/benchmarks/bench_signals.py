@@ -0,0 +1,27 @@
+"""
+Reddit post parsing in SignalService over synthetic hot.json dumps.
+"""
+
+from benchmarks import demo_data
+from benchmarks.harness import benchmark
+from app.services.signal_service import SignalService
+
+
+def _texts(scale: int):
+    return [f"{post['title']} {post['selftext']}" for post in demo_data().synthetic_reddit_posts(scale)]
+
+
+@benchmark("signals.extract_tickers")
+def extract_tickers(scale: int):
+    """SignalService._extract_tickers over 200 x scale posts."""
+    service = SignalService(db=None)
+    texts = _texts(scale)
+    return lambda: [service._extract_tickers(text) for text in texts]
+
+
+@benchmark("signals.detect_sentiment")
+def detect_sentiment(scale: int):
+    """SignalService._detect_sentiment over 200 x scale posts."""
+    service = SignalService(db=None)
+    texts = _texts(scale)
+    return lambda: [service._detect_sentiment(text) for text in texts]
@@ -0,0 +1,71 @@
+"""
+Price update fan-out in ConnectionManager to fake sockets.
+"""
+
+import itertools
+import json
+import random
+
+from benchmarks import demo_data
+from benchmarks.harness import benchmark, teardown
+from app.core.websocket_manager import ConnectionManager
+
+# Sockets per unit of scale
+BASE_SOCKETS = 10
+# Price updates per timed call (one per demo ticker, repeated), to keep a call ms-scale
+UPDATES_PER_CALL = 400
+
+# Managers created by the benchmark, closed at teardown
+_managers = []
+
+
+class FakeWebSocket:
+    """Accepts and discards frames; send_json pays for the JSON encoding like Starlette's."""
+
+    async def accept(self):
+        pass
+
+    async def send_json(self, message):
+        # Starlette encodes per call before sending the text frame
+        json.dumps(message, separators=(",", ":"), ensure_ascii=False)
+
+    async def send_text(self, text):
+        pass
+
+    async def send_bytes(self, data):
+        pass
+
+
+@benchmark("websocket.broadcast_price_update")
+async def broadcast_price_update(scale: int):
+    """400 changed prices across the demo tickers to 10 x scale sockets, each subscribed to 5 tickers, until sent."""
+    rng = random.Random(42)
+    tickers = demo_data().SYNTHETIC_TICKERS
+    manager = ConnectionManager()
+    _managers.append(manager)
+    for i in range(BASE_SOCKETS * scale):
+        ws = FakeWebSocket()
+        await manager.connect(ws, f"client{i}")
+        manager.subscribe(ws, rng.sample(tickers, 5))
+
+    updates = [tickers[i % len(tickers)] for i in range(UPDATES_PER_CALL)]
+    # Every update moves the price, so change-only delivery skips none of them
+    ticks = itertools.count()
+
+    async def broadcast():
+        for ticker in updates:
+            price = round(150 + next(ticks) % 5000 * 0.01, 2)
+            await manager.broadcast_price_update(ticker, {
+                "price": price, "bid": price - 0.01, "ask": price + 0.01,
+                "volume": 1200, "timestamp": "2025-01-10T15:30:00Z",
+            })
+        # Conflated into frames at the flush; sends happen in the per-socket writer tasks
+        await manager.flush()
+
+    return broadcast
+
+
+@teardown
+async def close_managers():
+    for manager in _managers:
+        await manager.close()
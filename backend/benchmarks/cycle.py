@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmark of one autonomous trading cycle against local stand-ins.
+
+Runs gather_signals_job -> run_analysis_job -> monitor_positions_job, as the
+scheduler does, with the social feeds, Alpaca and the LLM/embedding API
+served by `benchmarks/standins.py`, over a grid of symbol universe sizes and
+open position counts. Each grid point starts from a fresh database seeded
+with the autopilot enabled, user history for a tenth of the universe (the
+Sentinel's per-symbol fetches) and the open positions, a third of which hit
+take-profit and a third stop-loss.
+
+Reports per-stage wall time, time spent in SQL, stand-in requests per
+service and the share of each stage's schedule interval it used; a cycle
+overruns when a stage takes longer than its interval, since the scheduler
+then skips or stacks runs.
+
+Run: cd backend && uv run python -m benchmarks.cycle [--symbols 20,100,500] [--positions 10,100,1000] [--llm-latency 0.5]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+import warnings
+from collections import Counter
+
+# Add backend directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.harness import format_seconds
+from benchmarks.standins import StandIns, price, symbols
+
+# Position monitoring runs every 60s (fixed in app/core/scheduler.py)
+MONITOR_INTERVAL_SECONDS = 60
+# Entry prices relative to the current bid: take-profit, stop-loss, hold
+POSITION_ENTRY_FACTORS = [0.85, 1.1, 1.0]
+
+
+def configure_environment(standins: StandIns, workdir: str):
+    """Point the app's settings at the stand-ins and a scratch database/vector store (before importing it)."""
+    os.environ.update({
+        "API_KEY": "benchmark",
+        "ALPACA_API_KEY": "benchmark",
+        "ALPACA_API_SECRET": "benchmark",
+        "ALPACA_BASE_URL": standins.url,
+        "ALPACA_DATA_URL": standins.url,
+        "LLM_PROVIDER": "openai",
+        "OPENAI_API_KEY": "benchmark",
+        "BACKEND_URL": f"{standins.url}/v1",
+        "DATABASE_URL": f"sqlite:///{os.path.join(workdir, 'cycle.db')}",
+        "VECTOR_STORE_PATH": os.path.join(workdir, "vectors"),
+        "IGNORE_MARKET_HOURS": "true",
+        "LLM_CACHE_MODE": "off",
+        "CASSETTE_MODE": "off",
+        # Every cycle runs the full graph instead of reusing a stored analysis
+        "ANALYSIS_REUSE_TTL_MINUTES": "0",
+        "DEBUG": "false",
+    })
+
+
+class SQLTimer:
+    """Accumulates time spent executing SQL statements, per stage."""
+
+    def __init__(self, engine):
+        from sqlalchemy import event
+
+        self.stage = None
+        self.seconds = Counter()
+        self.statements = Counter()
+        event.listen(engine.sync_engine, "before_cursor_execute", self._before)
+        event.listen(engine.sync_engine, "after_cursor_execute", self._after)
+
+    def reset(self):
+        self.seconds.clear()
+        self.statements.clear()
+
+    def _before(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        self.seconds[self.stage] += elapsed
+        self.statements[self.stage] += 1
+
+
+async def seed(universe_size: int, position_count: int):
+    """Fresh database: autopilot on, user history for niche symbols, open positions on their own symbols."""
+    from datetime import datetime, timedelta
+
+    from app.config import settings
+    from app.core.database import AsyncSessionLocal, Base, engine, init_db
+    from app.models.database import PortfolioConfig, Position, TradingConfig, UserActivity
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+    await init_db()
+
+    async with AsyncSessionLocal() as db:
+        db.add(TradingConfig(user_id=1, enabled=True, max_positions=position_count + settings.prescreen_max_survivors,
+                             min_sentiment_score=0.3, min_analyst_confidence=0.6, take_profit_pct=10.0, stop_loss_pct=5.0))
+        db.add(PortfolioConfig(user_id="default_user", is_autonomous_active=True, total_budget=1e9,
+                               current_allocation=0.0, max_position_size=10_000.0))
+        now = datetime.now()
+        for symbol in symbols("X", max(1, universe_size // 10)):
+            db.add(UserActivity(activity_type="trade_attempt", symbol=symbol, side="buy", quantity=10,
+                                price_at_action=price(symbol), news_context=f"{symbol} contract win", timestamp=now - timedelta(days=30)))
+        for i, symbol in enumerate(symbols("Z", position_count)):
+            db.add(Position(symbol=symbol, entry_time=now - timedelta(hours=2), quantity=10, status="open",
+                            entry_price=round(price(symbol) * POSITION_ENTRY_FACTORS[i % 3], 2)))
+        await db.commit()
+
+
+async def run_cycle(standins: StandIns, timer: SQLTimer) -> dict:
+    """Run the three jobs in order; per-stage wall time, SQL time and requests, plus what the cycle did."""
+    from sqlalchemy import func, select
+
+    from app.core.database import AsyncSessionLocal
+    from app.models.database import AnalysisResult, Signal, Trade
+    from app.services.autonomous_service import gather_signals_job, monitor_positions_job, run_analysis_job
+    from tradingagents.rate_governor import BACKGROUND, llm_priority
+
+    stages = {}
+    for name, job in [("gather", gather_signals_job), ("analysis", run_analysis_job), ("monitor", monitor_positions_job)]:
+        timer.stage = name
+        requests_before = Counter(standins.requests)
+        started = time.perf_counter()
+        with llm_priority(BACKGROUND):
+            async with AsyncSessionLocal() as db:
+                await job(db)
+        stages[name] = {
+            "seconds": time.perf_counter() - started,
+            "sql_seconds": timer.seconds[name],
+            "sql_statements": timer.statements[name],
+            "requests": dict(Counter(standins.requests) - requests_before),
+        }
+    timer.stage = None
+
+    async with AsyncSessionLocal() as db:
+        async def count(model, *where):
+            return (await db.execute(select(func.count()).select_from(model).where(*where))).scalar()
+
+        outcome = {
+            "signals": await count(Signal),
+            "analyses": await count(AnalysisResult),
+            "buys": await count(Trade, Trade.side == "buy"),
+            "sells": await count(Trade, Trade.side == "sell"),
+        }
+    return {"stages": stages, "outcome": outcome}
+
+
+async def run_grid(standins: StandIns, universe_sizes, position_counts) -> list:
+    from app.config import settings
+    from app.core.database import engine
+    import app.services.signal_service as signal_service
+
+    # The feeds use module-level httpx with absolute URLs; send them to the stand-ins
+    signal_service.httpx = standins.httpx_module()
+    intervals = {
+        "gather": settings.data_poll_interval_seconds,
+        "analysis": settings.analyst_interval_seconds,
+        "monitor": MONITOR_INTERVAL_SECONDS,
+    }
+
+    timer = SQLTimer(engine)
+    results = []
+    for universe_size in universe_sizes:
+        for position_count in position_counts:
+            standins.reset(symbols("Q", universe_size))
+            await seed(universe_size, position_count)
+            timer.reset()
+            started = time.perf_counter()
+            result = await run_cycle(standins, timer)
+            result.update({
+                "symbols": universe_size,
+                "positions": position_count,
+                "cycle_seconds": time.perf_counter() - started,
+                "sql_seconds": sum(timer.seconds.values()),
+                "overruns": [name for name, stage in result["stages"].items() if stage["seconds"] > intervals[name]],
+                "interval_share": {name: stage["seconds"] / intervals[name] for name, stage in result["stages"].items()},
+            })
+            results.append(result)
+            print_row(result)
+    return results
+
+
+def print_header():
+    print(f"{'symbols':>7} {'positions':>9}  {'gather':>9} {'analysis':>9} {'monitor':>9}  {'cycle':>9} {'sql':>9}  "
+          f"{'requests':>8}  {'sig/ana/buy/sell':>16}  interval use (g/a/m)")
+
+
+def print_row(result: dict):
+    stages = result["stages"]
+    requests = sum(sum(stage["requests"].values()) for stage in stages.values())
+    outcome = result["outcome"]
+    counts = f"{outcome['signals']}/{outcome['analyses']}/{outcome['buys']}/{outcome['sells']}"
+    shares = "/".join(f"{result['interval_share'][name]:.0%}" for name in ("gather", "analysis", "monitor"))
+    flag = f"  ❌ overruns: {', '.join(result['overruns'])}" if result["overruns"] else ""
+    print(
+        f"{result['symbols']:>7} {result['positions']:>9}  "
+        f"{format_seconds(stages['gather']['seconds']):>9} {format_seconds(stages['analysis']['seconds']):>9} "
+        f"{format_seconds(stages['monitor']['seconds']):>9}  {format_seconds(result['cycle_seconds']):>9} "
+        f"{format_seconds(result['sql_seconds']):>9}  {requests:>8}  {counts:>16}  {shares}{flag}"
+    )
+
+
+def _counts(value: str):
+    return [int(part) for part in value.split(",") if part]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--symbols", type=_counts, default=[20, 100, 500], help="Symbol universe sizes, comma separated")
+    parser.add_argument("--positions", type=_counts, default=[10, 100, 1000], help="Open position counts, comma separated")
+    parser.add_argument("--feed-latency", type=float, default=0.0, help="Seconds added to each StockTwits/Reddit request")
+    parser.add_argument("--broker-latency", type=float, default=0.0, help="Seconds added to each Alpaca request")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Seconds added to each chat/embedding request")
+    parser.add_argument("--output", help="Also write the results as JSON to this file")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Show the app's INFO logs")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING)
+    if not args.verbose:
+        # langchain-openai's parsed structured outputs trip pydantic's serializer checks on every Risk Judge call
+        warnings.filterwarnings("ignore", message="Pydantic serializer warnings")
+    standins = StandIns(args.feed_latency, args.broker_latency, args.llm_latency).start()
+    workdir = tempfile.mkdtemp(prefix="bench-cycle-")
+    configure_environment(standins, workdir)
+
+    print(f"📊 Autonomous cycle: {len(args.symbols) * len(args.positions)} grid points, stand-ins at {standins.url}")
+    print(f"   latency: feeds {args.feed_latency}s, broker {args.broker_latency}s, LLM {args.llm_latency}s per request\n")
+    print_header()
+    try:
+        results = asyncio.run(run_grid(standins, args.symbols, args.positions))
+    finally:
+        standins.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n💾 Results written to {args.output}")
+
+    overrun = next((result for result in results if result["overruns"]), None)
+    if overrun is None:
+        print("\n✅ Every stage finished within its schedule interval")
+    else:
+        print(f"\n❌ First overrun at {overrun['symbols']} symbols / {overrun['positions']} positions: "
+              f"{', '.join(overrun['overruns'])}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,168 @@
+"""
+Minimal micro-benchmark harness.
+
+Benchmarks register a setup function with `@benchmark(name)`. Setup receives
+the dataset scale and returns the callable to time (sync or async; setup may
+itself be async). Each benchmark is calibrated so one sample takes at least
+MIN_SAMPLE_SECONDS, then sampled SAMPLES times.
+
+Baselines are stored relative to a fixed pure-Python reference workload
+timed in the same run, so they carry over between machines and absorb
+load on a shared runner; each benchmark's workload is sized so one call
+takes at least MIN_CALL_SECONDS, where timer and scheduling noise stop
+dominating.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+import asyncio
+import inspect
+import json
+import os
+import statistics
+import time
+
+BASELINES_PATH = os.path.join(os.path.dirname(__file__), "baselines.json")
+
+SAMPLES = 7
+MIN_SAMPLE_SECONDS = 0.05
+MAX_NUMBER = 10_000
+MIN_CALL_SECONDS = 1e-3
+
+
+@dataclass
+class Benchmark:
+    name: str
+    setup: Callable[[int], Any]
+    description: str = ""
+
+
+BENCHMARKS: Dict[str, Benchmark] = {}
+TEARDOWNS: List[Callable[[], Any]] = []
+
+
+def benchmark(name: str):
+    """Register a setup function: setup(scale) -> callable to time."""
+    def register(setup):
+        BENCHMARKS[name] = Benchmark(name, setup, (setup.__doc__ or "").strip())
+        return setup
+    return register
+
+
+def _sample(loop: asyncio.AbstractEventLoop, fn: Callable, number: int, is_async: bool) -> float:
+    if is_async:
+        async def run():
+            for _ in range(number):
+                await fn()
+        started = time.perf_counter()
+        loop.run_until_complete(run())
+    else:
+        started = time.perf_counter()
+        for _ in range(number):
+            fn()
+    return time.perf_counter() - started
+
+
+def run_benchmark(loop: asyncio.AbstractEventLoop, bench: Benchmark, scale: int, samples: int = SAMPLES) -> Dict[str, float]:
+    """Time one benchmark; returns per-call seconds (median/min/max) and calls per sample."""
+    fn = bench.setup(scale)
+    if inspect.isawaitable(fn):
+        fn = loop.run_until_complete(fn)
+
+    # Warm-up call, which also tells whether fn returns awaitables
+    probe = fn()
+    is_async = inspect.isawaitable(probe)
+    if is_async:
+        loop.run_until_complete(probe)
+
+    # Calibrate: double the calls per sample until a sample is long enough to time reliably
+    number = 1
+    while number < MAX_NUMBER and _sample(loop, fn, number, is_async) < MIN_SAMPLE_SECONDS:
+        number *= 2
+
+    timings = [_sample(loop, fn, number, is_async) / number for _ in range(samples)]
+    return {
+        "median": statistics.median(timings),
+        "min": min(timings),
+        "max": max(timings),
+        "number": number,
+    }
+
+
+def _reference_workload():
+    """Fixed interpreter-bound work: sort, hash and format 20k items."""
+    values = sorted((i * 7919) % 20_011 for i in range(20_000))
+    return len({f"{v}:{v % 97}" for v in values})
+
+
+def run_reference(loop: asyncio.AbstractEventLoop, samples: int = SAMPLES) -> float:
+    """Median seconds per reference workload on this machine, right now."""
+    return run_benchmark(loop, Benchmark("reference", lambda scale: _reference_workload), 1, samples)["median"]
+
+
+def teardown(fn: Callable[[], Any]):
+    """Register cleanup (sync or async) to run after all benchmarks."""
+    TEARDOWNS.append(fn)
+    return fn
+
+
+def run_teardowns(loop: asyncio.AbstractEventLoop):
+    for fn in TEARDOWNS:
+        result = fn()
+        if inspect.isawaitable(result):
+            loop.run_until_complete(result)
+
+
+def load_baselines(path: str = BASELINES_PATH) -> Dict[str, Dict[str, Dict[str, float]]]:
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_baselines(results: Dict[str, Dict[str, float]], scale: int, reference: float, path: str = BASELINES_PATH):
+    """Store medians relative to `reference` for `scale`, keeping other scales' and other benchmarks' baselines."""
+    baselines = load_baselines(path)
+    scale_baselines = baselines.setdefault(str(scale), {})
+    for name, result in results.items():
+        scale_baselines[name] = {"relative": round(result["median"] / reference, 4)}
+    with open(path, "w") as f:
+        json.dump(baselines, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def compare(
+    results: Dict[str, Dict[str, float]], scale: int, reference: float, tolerance: float, path: str = BASELINES_PATH
+) -> List[Dict[str, Any]]:
+    """
+    One row per result with its cost relative to the reference workload, its
+    ratio to the baseline's relative cost and whether it regressed past
+    `tolerance`. Results under MIN_CALL_SECONDS are reported but not gated.
+    """
+    baselines = load_baselines(path).get(str(scale), {})
+    rows = []
+    for name, result in results.items():
+        relative = result["median"] / reference
+        baseline: Optional[float] = baselines.get(name, {}).get("relative")
+        ratio = relative / baseline if baseline else None
+        gated = result["median"] >= MIN_CALL_SECONDS
+        rows.append({
+            "name": name,
+            **result,
+            "relative": relative,
+            "baseline": baseline,
+            "ratio": ratio,
+            "gated": gated,
+            "regressed": gated and ratio is not None and ratio > tolerance,
+        })
+    return rows
+
+
+def format_seconds(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return "-"
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.1f}µs"
+    if seconds < 1:
+        return f"{seconds * 1e3:.2f}ms"
+    return f"{seconds:.2f}s"
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Run the micro-benchmarks and compare against stored baselines.
+
+Run: cd backend && uv run python -m benchmarks.run [--scale 10] [-k websocket] [--save-baseline]
+
+Exits non-zero when any benchmark's median, measured in units of the
+reference workload timed in the same run, is more than --tolerance times
+its baseline at the same scale, so it can gate CI. Relative baselines
+carry over between machines better than raw timings, but re-record them
+with --save-baseline when the gate runs on a very different interpreter.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+
+# Add backend directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("API_KEY", "benchmark")
+os.environ.setdefault("ALPACA_API_KEY", "benchmark")
+os.environ.setdefault("ALPACA_API_SECRET", "benchmark")
+
+from benchmarks import bench_dataflows, bench_db, bench_serialization, bench_signals, bench_websocket  # noqa: F401 (registration)
+from benchmarks.harness import (
+    BENCHMARKS,
+    MIN_CALL_SECONDS,
+    compare,
+    format_seconds,
+    run_benchmark,
+    run_reference,
+    run_teardowns,
+    save_baselines,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=int, default=10, help="Dataset scale (1, 10, 100)")
+    parser.add_argument("-k", dest="filter", default="", help="Only run benchmarks whose name contains this")
+    parser.add_argument("--tolerance", type=float, default=2.0, help="Allowed relative cost / baseline ratio")
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the baseline")
+    args = parser.parse_args()
+
+    selected = {name: bench for name, bench in sorted(BENCHMARKS.items()) if args.filter in name}
+    loop = asyncio.new_event_loop()
+    results = {}
+    print(f"📊 {len(selected)} benchmarks at {args.scale}x\n")
+    reference = run_reference(loop)
+    for name, bench in selected.items():
+        results[name] = run_benchmark(loop, bench, args.scale)
+    # Time the reference again afterwards and take the faster, in case the machine got busier
+    reference = min(reference, run_reference(loop))
+    run_teardowns(loop)
+    loop.close()
+
+    rows = compare(results, args.scale, reference, args.tolerance)
+    width = max(len(name) for name in selected) if selected else 10
+    print(f"reference workload: {format_seconds(reference)}\n")
+    print(f"{'benchmark':<{width}}  {'median':>10}  {'min':>10}  {'relative':>9}  {'baseline':>9}  ratio")
+    for row in rows:
+        ratio = f"{row['ratio']:.2f}x" if row["ratio"] is not None else "new"
+        baseline = f"{row['baseline']:.3f}" if row["baseline"] is not None else "-"
+        flag = "  ❌ REGRESSION" if row["regressed"] else ""
+        if not row["gated"]:
+            flag = f"  ⚠️  under {format_seconds(MIN_CALL_SECONDS)}/call, not gated"
+        print(
+            f"{row['name']:<{width}}  {format_seconds(row['median']):>10}  {format_seconds(row['min']):>10}  "
+            f"{row['relative']:>9.3f}  {baseline:>9}  {ratio}{flag}"
+        )
+
+    if args.save_baseline:
+        save_baselines(results, args.scale, reference)
+        print(f"\n✅ Saved baselines for {args.scale}x")
+        return 0
+
+    regressions = [row["name"] for row in rows if row["regressed"]]
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s) over {args.tolerance}x baseline: {', '.join(regressions)}")
+        return 1
+    print("\n✅ No regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,312 @@
+"""
+Local stand-ins for the services an autonomous cycle talks to.
+
+One FastAPI app, served by uvicorn on a background thread, plays:
+
+- StockTwits (trending symbols, symbol streams) and Reddit (hot posts)
+- the Alpaca trading API (account, clock, orders) and market data API
+  (latest quotes, daily bars)
+- an OpenAI-compatible chat model and embedding endpoint
+
+Every response is derived from a hash of its inputs, so runs are
+repeatable. The social feeds mention the symbols in `universe`; the
+chat model ends every analysis in a confident BUY (and answers forced
+tool calls and JSON-schema requests with the same decision), so the
+order path is exercised. Per-service latency is configurable. Nothing
+here imports the app: the benchmark starts the stand-ins first and
+points the app's settings at them.
+"""
+
+import asyncio
+import base64
+import hashlib
+import json
+import socket
+import string
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+import httpx
+import numpy as np
+import uvicorn
+from fastapi import FastAPI, Request
+
+EMBEDDING_DIMENSIONS = 64
+STREAM_MESSAGES = 30
+POSTS_PER_SUBREDDIT = 25
+SUBREDDITS = ["wallstreetbets", "stocks", "investing", "options"]
+DAILY_BARS = 60
+
+# Request path prefix -> service, for per-service counts and latency
+SERVICES = [
+    ("/api/2/", "stocktwits"),
+    ("/r/", "reddit"),
+    ("/v2/stocks/", "alpaca_data"),
+    ("/v2/", "alpaca_trading"),
+    ("/v1/chat/", "llm"),
+    ("/v1/embeddings", "embeddings"),
+]
+LATENCY_GROUPS = {
+    "stocktwits": "feed",
+    "reddit": "feed",
+    "alpaca_data": "broker",
+    "alpaca_trading": "broker",
+    "llm": "llm",
+    "embeddings": "llm",
+}
+
+
+def symbols(prefix: str, count: int) -> List[str]:
+    """`count` distinct four-letter symbols starting with `prefix` (QAAA, QAAB, ...)."""
+    letters = string.ascii_uppercase
+    return [prefix + letters[i // 676 % 26] + letters[i // 26 % 26] + letters[i % 26] for i in range(count)]
+
+
+def _hash(*parts) -> int:
+    return int(hashlib.sha256("|".join(map(str, parts)).encode("utf-8")).hexdigest()[:12], 16)
+
+
+def price(symbol: str) -> float:
+    """Deterministic bid price of a symbol, $20-$500."""
+    return round(20 + _hash("price", symbol) % 48_000 / 100, 2)
+
+
+def _iso(moment: datetime) -> str:
+    return moment.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+class StandIns:
+    """The stand-in server and its state (universe, counters, latencies)."""
+
+    def __init__(self, feed_latency: float = 0.0, broker_latency: float = 0.0, llm_latency: float = 0.0):
+        self.latency = {"feed": feed_latency, "broker": broker_latency, "llm": llm_latency}
+        self.universe: List[str] = []
+        self.requests: Counter = Counter()
+        self.orders: List[Dict] = []
+        self.port = _free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        self._server: Optional[uvicorn.Server] = None
+        self._thread: Optional[threading.Thread] = None
+
+    # Lifecycle
+
+    def start(self) -> "StandIns":
+        config = uvicorn.Config(self.app(), host="127.0.0.1", port=self.port, log_level="warning", access_log=False)
+        self._server = uvicorn.Server(config)
+        self._thread = threading.Thread(target=self._server.run, name="standins", daemon=True)
+        self._thread.start()
+        deadline = time.monotonic() + 10
+        while not self._server.started:
+            if time.monotonic() > deadline:
+                raise RuntimeError("Stand-in server did not start")
+            time.sleep(0.01)
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.should_exit = True
+            self._thread.join(timeout=5)
+
+    def reset(self, universe: List[str]):
+        """New symbol universe for the feeds; clears counters and orders."""
+        self.universe = list(universe)
+        self.requests.clear()
+        self.orders.clear()
+
+    def httpx_module(self):
+        """Stand-in for the `httpx` module whose AsyncClient sends every request here."""
+        transport = _RewriteTransport(self.url)
+
+        class AsyncClient(httpx.AsyncClient):
+            def __init__(self, *args, **kwargs):
+                kwargs["transport"] = transport
+                super().__init__(*args, **kwargs)
+
+        return type("httpx", (), {"AsyncClient": AsyncClient, "HTTPError": httpx.HTTPError})
+
+    # App
+
+    def app(self) -> FastAPI:
+        app = FastAPI()
+
+        @app.middleware("http")
+        async def count_and_delay(request: Request, call_next):
+            service = next((name for prefix, name in SERVICES if request.url.path.startswith(prefix)), "other")
+            self.requests[service] += 1
+            delay = self.latency.get(LATENCY_GROUPS.get(service, ""), 0.0)
+            if delay:
+                await asyncio.sleep(delay)
+            return await call_next(request)
+
+        @app.get("/api/2/trending/symbols.json")
+        async def trending():
+            return {"symbols": [{"symbol": symbol} for symbol in self.universe[:30]]}
+
+        @app.get("/api/2/streams/symbol/{symbol}.json")
+        async def stream(symbol: str):
+            now = datetime.now(timezone.utc)
+            messages = []
+            for i in range(STREAM_MESSAGES):
+                roll = _hash("stream", symbol, i) % 10
+                messages.append({
+                    "id": i,
+                    "body": f"${symbol} looking strong into the close, adding on dips #{i}",
+                    "created_at": _iso(now - timedelta(minutes=roll * 6)),
+                    "entities": {"sentiment": {"basic": "Bearish" if roll == 0 else "Bullish" if roll < 8 else None}},
+                })
+            return {"messages": messages}
+
+        @app.get("/r/{sub}/hot.json")
+        async def hot(sub: str):
+            # The universe spread over all subreddits' posts, several symbols per post
+            slots = len(SUBREDDITS) * POSTS_PER_SUBREDDIT
+            offset = SUBREDDITS.index(sub) * POSTS_PER_SUBREDDIT if sub in SUBREDDITS else 0
+            now = time.time()
+            children = []
+            for i in range(POSTS_PER_SUBREDDIT):
+                mentioned = self.universe[(offset + i) % slots::slots]
+                children.append({"data": {
+                    "title": " ".join(f"${symbol} calls" for symbol in mentioned) or "Market thread",
+                    "selftext": "Bullish breakout, buying more. To the moon",
+                    "created_utc": now - _hash("post", sub, i) % 7200,
+                    "ups": _hash("ups", sub, i) % 1500,
+                    "num_comments": _hash("comments", sub, i) % 300,
+                }})
+            return {"data": {"children": children}}
+
+        @app.get("/v2/account")
+        async def account():
+            return {
+                "id": "00000000-0000-0000-0000-000000000001", "account_number": "BENCH", "status": "ACTIVE",
+                "currency": "USD", "cash": "1000000", "portfolio_value": "1000000", "equity": "1000000",
+                "buying_power": "2000000",
+            }
+
+        @app.get("/v2/clock")
+        async def clock():
+            now = datetime.now(timezone.utc)
+            return {"timestamp": _iso(now), "is_open": True, "next_open": _iso(now + timedelta(days=1)),
+                    "next_close": _iso(now + timedelta(hours=6))}
+
+        @app.post("/v2/orders")
+        async def submit_order(request: Request):
+            body = await request.json()
+            now = _iso(datetime.now(timezone.utc))
+            order = {
+                "id": str(uuid.uuid4()), "client_order_id": body.get("client_order_id") or str(uuid.uuid4()),
+                "created_at": now, "updated_at": now, "submitted_at": now, "filled_at": now,
+                "asset_id": str(uuid.UUID(int=_hash("asset", body["symbol"]))), "symbol": body["symbol"],
+                "asset_class": "us_equity", "qty": str(body.get("qty")), "filled_qty": str(body.get("qty")),
+                "filled_avg_price": str(price(body["symbol"])), "order_class": "simple", "order_type": body.get("type", "market"),
+                "type": body.get("type", "market"), "side": body["side"], "time_in_force": body.get("time_in_force", "day"),
+                "status": "filled", "extended_hours": False,
+            }
+            self.orders.append(order)
+            return order
+
+        @app.get("/v2/stocks/quotes/latest")
+        async def latest_quotes(symbols: str):
+            now = _iso(datetime.now(timezone.utc))
+            return {"quotes": {
+                symbol: {"bp": price(symbol), "ap": round(price(symbol) * 1.0005, 2), "bs": 3, "as": 2, "t": now,
+                         "bx": "V", "ax": "V", "c": ["R"], "z": "C"}
+                for symbol in symbols.split(",")
+            }}
+
+        @app.get("/v2/stocks/bars")
+        async def bars(symbols: str):
+            today = datetime.now(timezone.utc).replace(hour=4, minute=0, second=0, microsecond=0)
+            return {"bars": {symbol: _daily_bars(symbol, today) for symbol in symbols.split(",")}, "next_page_token": None}
+
+        @app.post("/v1/chat/completions")
+        async def chat(request: Request):
+            return _chat_completion(await request.json())
+
+        @app.post("/v1/embeddings")
+        async def embeddings(request: Request):
+            body = await request.json()
+            texts = body["input"] if isinstance(body["input"], list) else [body["input"]]
+            data = []
+            for i, text in enumerate(texts):
+                vector = np.random.default_rng(_hash("embedding", text)).standard_normal(EMBEDDING_DIMENSIONS).astype(np.float32)
+                encoded = (base64.b64encode(vector.tobytes()).decode("ascii")
+                           if body.get("encoding_format") == "base64" else vector.tolist())
+                data.append({"object": "embedding", "index": i, "embedding": encoded})
+            tokens = sum(len(str(text)) // 4 for text in texts)
+            return {"object": "list", "data": data, "model": body.get("model"),
+                    "usage": {"prompt_tokens": tokens, "total_tokens": tokens}}
+
+        return app
+
+
+def _daily_bars(symbol: str, today: datetime) -> List[Dict]:
+    """A gently rising random walk ending at the symbol's price, 2% daily moves, $ millions traded."""
+    rng = np.random.default_rng(_hash("bars", symbol))
+    returns = rng.normal(0.002, 0.02, DAILY_BARS)
+    # Close i is the final price discounted by the returns after day i
+    after = np.append(np.cumsum(returns[::-1])[::-1][1:], 0.0)
+    closes = price(symbol) / np.exp(after)
+    result = []
+    for i, close in enumerate(closes):
+        day = today - timedelta(days=DAILY_BARS - i)
+        result.append({"t": _iso(day), "o": round(close * 0.995, 2), "h": round(close * 1.01, 2),
+                       "l": round(close * 0.99, 2), "c": round(float(close), 2), "v": 2_000_000, "n": 10_000,
+                       "vw": round(float(close), 2)})
+    return result
+
+
+def _chat_completion(body: Dict) -> Dict:
+    """A deterministic answer that ends in a BUY decision, as text, JSON or a forced tool call."""
+    prompt = json.dumps(body.get("messages", []), sort_keys=True)
+    digest = _hash("chat", prompt)
+    rationale = f"Synthetic analysis {digest:012x}: momentum and sentiment support a position with a tight stop."
+    decision = {"rationale": rationale, "decision": "BUY", "confidence": 0.8}
+    message: Dict = {"role": "assistant", "content": None}
+
+    tool_choice = body.get("tool_choice")
+    response_format = body.get("response_format") or {}
+    if isinstance(tool_choice, dict) and tool_choice.get("function"):
+        message["tool_calls"] = [{
+            "id": f"call_{digest:012x}", "type": "function",
+            "function": {"name": tool_choice["function"]["name"], "arguments": json.dumps(decision)},
+        }]
+        finish_reason = "tool_calls"
+    elif response_format.get("type") == "json_schema":
+        message["content"] = json.dumps(decision)
+        finish_reason = "stop"
+    else:
+        message["content"] = f"{rationale}\n\nFINAL TRANSACTION PROPOSAL: **BUY**\nCONFIDENCE: 0.80"
+        finish_reason = "stop"
+
+    prompt_tokens = len(prompt) // 4
+    completion_tokens = len(json.dumps(message)) // 4
+    return {
+        "id": f"chatcmpl-{digest:012x}", "object": "chat.completion", "created": int(time.time()),
+        "model": body.get("model", "stand-in"),
+        "choices": [{"index": 0, "message": message, "finish_reason": finish_reason, "logprobs": None}],
+        "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                  "total_tokens": prompt_tokens + completion_tokens},
+    }
+
+
+class _RewriteTransport(httpx.AsyncHTTPTransport):
+    """Sends every request to the stand-in server, keeping its path and query."""
+
+    def __init__(self, base_url: str):
+        super().__init__()
+        self.base = httpx.URL(base_url)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        request.url = request.url.copy_with(scheme=self.base.scheme, host=self.base.host, port=self.base.port)
+        request.headers["host"] = f"{self.base.host}:{self.base.port}"
+        return await super().handle_async_request(request)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
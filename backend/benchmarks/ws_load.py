@@ -0,0 +1,406 @@
+#!/usr/bin/env python3
+"""
+Load test for /ws/market: thousands of clients against a fake price feed.
+
+Starts the real WebSocket router and ConnectionManager under uvicorn in a
+subprocess, with a fake feed in place of the Alpaca quote poller: every
+tick it broadcasts one update per subscribed ticker, stamped with the
+tick's start time. Client processes open the connections (ramped), subscribe to
+a few tickers each, churn subscriptions and ping at a steady cadence, and
+record fan-out latency (tick start to client receive, same host clock, so
+how stale an update is on arrival, including the manager's flush interval)
+and ping round trips. With --batch, clients negotiate one batched frame per
+flush instead of a frame per ticker.
+
+Reports connection failures, latency p50/p99/max, server CPU (seconds and
+share of one core), peak server RSS and server CPU per thousand delivered
+messages. The server's CPU cost per message and p99 latency, both in units
+of the reference workload of `benchmarks/harness.py`, can be stored with
+--save-baseline and checked with --check, exiting non-zero when either
+exceeds --tolerance x baseline: a regression gate for ConnectionManager.
+
+Run: cd backend && uv run python -m benchmarks.ws_load [--connections 2000] [--duration 30] [--check]
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import resource
+import socket
+import subprocess
+import sys
+import time
+from contextlib import asynccontextmanager
+
+# Add backend directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("API_KEY", "benchmark")
+os.environ.setdefault("ALPACA_API_KEY", "benchmark")
+os.environ.setdefault("ALPACA_API_SECRET", "benchmark")
+
+BASELINES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ws_baselines.json")
+# Concurrent handshakes per client process while ramping up
+RAMP_CONCURRENCY = 100
+
+
+def _raise_fd_limit():
+    """Thousands of sockets need more than the usual 1024 file descriptors."""
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if hard == resource.RLIM_INFINITY or soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard if hard != resource.RLIM_INFINITY else 65536, hard))
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _percentile(sorted_values, q: float):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def universe(size: int):
+    return [f"T{i:03d}" for i in range(size)]
+
+
+# Server
+
+def serve(port: int, tick_seconds: float):
+    """The /ws/market router with a fake price feed, plus /stats for the load generator."""
+    import uvicorn
+    from fastapi import FastAPI
+
+    from app.api import websocket
+    from app.core.websocket_manager import manager
+
+    feed = {"ticks": 0, "broadcasts": 0, "tick_seconds": 0.0}
+
+    async def fake_feed():
+        prices = {}
+        while True:
+            await asyncio.sleep(tick_seconds)
+            started = time.perf_counter()
+            # One stamp per tick: latency covers every update of the tick, however the manager orders sends
+            stamp = time.time()
+            for ticker in manager.get_all_subscribed_tickers():
+                price = prices[ticker] = prices.get(ticker, 100.0) * (1 + random.uniform(-0.001, 0.001))
+                await manager.broadcast_price_update(ticker, {
+                    "price": round(price, 2),
+                    "bid": round(price - 0.01, 2),
+                    "ask": round(price + 0.01, 2),
+                    "timestamp": "",
+                    "server_ts": stamp,
+                })
+                feed["broadcasts"] += 1
+            feed["ticks"] += 1
+            feed["tick_seconds"] += time.perf_counter() - started
+
+    @asynccontextmanager
+    async def lifespan(app):
+        task = asyncio.create_task(fake_feed())
+        yield
+        task.cancel()
+
+    app = FastAPI(lifespan=lifespan)
+    app.include_router(websocket.router)
+
+    @app.get("/stats")
+    async def stats():
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        return {
+            "cpu_seconds": usage.ru_utime + usage.ru_stime,
+            # ru_maxrss is KiB on Linux, bytes on macOS
+            "max_rss_bytes": usage.ru_maxrss * (1 if sys.platform == "darwin" else 1024),
+            "connections": manager.get_connection_count(),
+            **feed,
+        }
+
+    _raise_fd_limit()
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning", ws_max_queue=1024)
+
+
+def start_server(tick_seconds: float):
+    port = _free_port()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.ws_load", "--serve", str(port), "--tick", str(tick_seconds)],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    )
+    import httpx
+    for _ in range(200):
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/stats", timeout=1)
+            return process, port
+        except httpx.HTTPError:
+            if process.poll() is not None:
+                raise RuntimeError("WebSocket server exited during startup")
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError("WebSocket server did not start")
+
+
+def server_stats(port: int) -> dict:
+    import httpx
+    return httpx.get(f"http://127.0.0.1:{port}/stats", timeout=60).json()
+
+
+# Clients
+
+async def client(uri: str, tickers, options: dict, ramp: asyncio.Semaphore, deadline: float, warm_at: float, out: dict):
+    import websockets
+
+    rng = random.Random()
+    try:
+        async with ramp:
+            ws = await websockets.connect(uri, ping_interval=None, max_queue=None, open_timeout=30)
+    except Exception:
+        out["failed"] += 1
+        return
+    out["connected"] += 1
+    subscribed = set(rng.sample(tickers, options["subscriptions"]))
+    pings = {}
+
+    async def reader():
+        async for raw in ws:
+            message = json.loads(raw)
+            now = time.time()
+            kind = message.get("type")
+            if kind == "price_update":
+                out["received"] += 1
+                if now >= warm_at:
+                    out["latencies"].append(now - message["data"]["server_ts"])
+            elif kind == "price_updates":
+                out["received"] += len(message["updates"])
+                if now >= warm_at:
+                    out["latencies"].extend(now - update["data"]["server_ts"] for update in message["updates"])
+            elif kind == "pong" and message.get("timestamp") in pings:
+                out["ping_rtts"].append(time.perf_counter() - pings.pop(message["timestamp"]))
+
+    async def actions():
+        await ws.send(json.dumps({"type": "subscribe", "tickers": sorted(subscribed), "batch": options["batch"]}))
+        next_ping = time.time() + rng.uniform(0, options["ping_interval"])
+        next_churn = time.time() + rng.expovariate(1 / options["churn_interval"])
+        while time.time() < deadline:
+            await asyncio.sleep(max(0.0, min(next_ping, next_churn, deadline) - time.time()))
+            now = time.time()
+            if now >= next_ping:
+                stamp = f"{id(ws)}-{now}"
+                pings[stamp] = time.perf_counter()
+                await ws.send(json.dumps({"type": "ping", "timestamp": stamp}))
+                next_ping = now + options["ping_interval"]
+            if now >= next_churn:
+                dropped = rng.choice(sorted(subscribed))
+                added = rng.choice([t for t in tickers if t not in subscribed])
+                await ws.send(json.dumps({"type": "unsubscribe", "tickers": [dropped]}))
+                await ws.send(json.dumps({"type": "subscribe", "tickers": [added]}))
+                subscribed.symmetric_difference_update({dropped, added})
+                out["churns"] += 1
+                next_churn = now + rng.expovariate(1 / options["churn_interval"])
+
+    read_task = asyncio.create_task(reader())
+    try:
+        await actions()
+    except Exception:
+        out["errors"] += 1
+    finally:
+        await ws.close()
+        read_task.cancel()
+
+
+async def run_clients(uri: str, count: int, options: dict) -> dict:
+    out = {"connected": 0, "failed": 0, "errors": 0, "received": 0, "churns": 0, "latencies": [], "ping_rtts": []}
+    tickers = universe(options["tickers"])
+    ramp = asyncio.Semaphore(RAMP_CONCURRENCY)
+    start = time.time()
+    deadline = start + options["ramp"] + options["duration"]
+    await asyncio.gather(*[
+        client(uri, tickers, options, ramp, deadline, start + options["ramp"], out) for _ in range(count)
+    ])
+    return out
+
+
+def client_process(args) -> dict:
+    uri, count, options = args
+    _raise_fd_limit()
+    return asyncio.run(run_clients(uri, count, options))
+
+
+def run_load(args) -> dict:
+    _raise_fd_limit()
+    server, port = start_server(args.tick)
+    try:
+        options = {
+            "tickers": args.tickers,
+            "subscriptions": args.subscriptions,
+            "ping_interval": args.ping_interval,
+            "churn_interval": args.churn_interval,
+            "ramp": args.ramp,
+            "duration": args.duration,
+            "batch": args.batch,
+        }
+        uri = f"ws://127.0.0.1:{port}/ws/market"
+        shards = [args.connections // args.processes + (i < args.connections % args.processes)
+                  for i in range(args.processes)]
+
+        # Measure the server over the steady-state window only (after the ramp)
+        with multiprocessing.get_context("spawn").Pool(args.processes) as pool:
+            pending = pool.map_async(client_process, [(uri, count, options) for count in shards])
+            time.sleep(args.ramp)
+            warm = server_stats(port)
+            time.sleep(args.duration)
+            after = server_stats(port)
+            outputs = pending.get()
+    finally:
+        server.terminate()
+        server.wait()
+
+    latencies = sorted(value for out in outputs for value in out["latencies"])
+    rtts = sorted(value for out in outputs for value in out["ping_rtts"])
+    cpu = after["cpu_seconds"] - warm["cpu_seconds"]
+    delivered = len(latencies)
+    ticks = after["ticks"] - warm["ticks"]
+    return {
+        "connections": args.connections,
+        "connected": sum(out["connected"] for out in outputs),
+        "failed": sum(out["failed"] for out in outputs),
+        "errors": sum(out["errors"] for out in outputs),
+        "server_connections": warm["connections"],
+        "churns": sum(out["churns"] for out in outputs),
+        "delivered": delivered,
+        "latency_p50": _percentile(latencies, 0.5),
+        "latency_p99": _percentile(latencies, 0.99),
+        "latency_max": latencies[-1] if latencies else None,
+        "ping_rtt_p50": _percentile(rtts, 0.5),
+        "ping_rtt_p99": _percentile(rtts, 0.99),
+        "server_cpu_seconds": cpu,
+        "server_cpu_share": cpu / args.duration,
+        "server_max_rss_bytes": after["max_rss_bytes"],
+        "server_cpu_per_1k_messages": cpu / delivered * 1000 if delivered else None,
+        "mean_tick_seconds": (after["tick_seconds"] - warm["tick_seconds"]) / ticks if ticks else None,
+    }
+
+
+# Baselines
+
+def gated_costs(result: dict, reference: float) -> dict:
+    """Gated figures in units of the reference workload, which carry over between machines better."""
+    return {
+        "cpu_per_1k_messages": result["server_cpu_per_1k_messages"] / reference,
+        "latency_p99": result["latency_p99"] / reference,
+    }
+
+
+def check(result: dict, reference: float, tolerance: float, path: str) -> list:
+    """Gated figures above tolerance x their baseline at the same connection count."""
+    try:
+        with open(path) as f:
+            baseline = json.load(f).get(str(result["connections"]))
+    except FileNotFoundError:
+        baseline = None
+    if baseline is None:
+        print(f"⚠️  No baseline for {result['connections']} connections in {path}")
+        return []
+    costs = gated_costs(result, reference)
+    regressions = []
+    for name, value in costs.items():
+        ratio = value / baseline[name]
+        flag = "  ❌ REGRESSION" if ratio > tolerance else ""
+        print(f"   {name:<20} {value:>10.3f}  baseline {baseline[name]:>10.3f}  {ratio:.2f}x{flag}")
+        if ratio > tolerance:
+            regressions.append(name)
+    return regressions
+
+
+def save_baseline(result: dict, reference: float, path: str):
+    try:
+        with open(path) as f:
+            baselines = json.load(f)
+    except FileNotFoundError:
+        baselines = {}
+    baselines[str(result["connections"])] = gated_costs(result, reference)
+    with open(path, "w") as f:
+        json.dump(baselines, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def print_report(result: dict):
+    from benchmarks.harness import format_seconds
+
+    print(f"🔌 connections: {result['connected']}/{result['connections']} "
+          f"({result['failed']} failed, {result['errors']} errored, {result['server_connections']} open on the server after the ramp)")
+    print(f"📨 delivered {result['delivered']} price updates, {result['churns']} subscription churns")
+    print(f"⏱️  fan-out latency p50 {format_seconds(result['latency_p50'])}, p99 {format_seconds(result['latency_p99'])}, "
+          f"max {format_seconds(result['latency_max'])}")
+    print(f"🏓 ping RTT p50 {format_seconds(result['ping_rtt_p50'])}, p99 {format_seconds(result['ping_rtt_p99'])}")
+    print(f"🖥️  server CPU {result['server_cpu_seconds']:.2f}s ({result['server_cpu_share']:.0%} of a core), "
+          f"peak RSS {result['server_max_rss_bytes'] / 2**20:.0f} MiB, "
+          f"{format_seconds(result['server_cpu_per_1k_messages'])} CPU per 1k messages, "
+          f"feed tick {format_seconds(result['mean_tick_seconds'])}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--connections", type=int, default=2000, help="Concurrent WebSocket clients")
+    parser.add_argument("--processes", type=int, default=max(1, min(4, (os.cpu_count() or 2) - 1)),
+                        help="Client processes (keep the load generator from being the bottleneck)")
+    parser.add_argument("--duration", type=float, default=30.0, help="Measured seconds, after the ramp")
+    parser.add_argument("--ramp", type=float, default=20.0, help="Seconds allowed for connecting before measuring")
+    parser.add_argument("--tickers", type=int, default=200, help="Ticker universe size")
+    parser.add_argument("--subscriptions", type=int, default=5, help="Tickers each client subscribes to")
+    parser.add_argument("--tick", type=float, default=1.0, help="Seconds between fake feed broadcasts")
+    parser.add_argument("--ping-interval", type=float, default=15.0, help="Seconds between a client's pings")
+    parser.add_argument("--churn-interval", type=float, default=10.0,
+                        help="Mean seconds between a client's unsubscribe/subscribe swaps")
+    parser.add_argument("--batch", action="store_true", help="Clients negotiate one batched frame per flush")
+    parser.add_argument("--output", help="Also write the result as JSON to this file")
+    parser.add_argument("--save-baseline", action="store_true", help="Store the gated figures as the baseline")
+    parser.add_argument("--check", action="store_true", help="Exit non-zero on a regression against the baseline")
+    parser.add_argument("--tolerance", type=float, default=2.0, help="Allowed ratio to the baseline")
+    parser.add_argument("--baselines", default=BASELINES_PATH, help="Baseline file")
+    parser.add_argument("--serve", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.tick)
+        return 0
+
+    from benchmarks.harness import run_reference
+
+    print(f"📊 /ws/market load: {args.connections} clients over {args.processes} process(es), "
+          f"{args.subscriptions}/{args.tickers} tickers each, feed tick {args.tick}s, "
+          f"{args.ramp:.0f}s ramp + {args.duration:.0f}s measured\n")
+    loop = asyncio.new_event_loop()
+    reference = run_reference(loop)
+    result = run_load(args)
+    reference = min(reference, run_reference(loop))
+    loop.close()
+    print_report(result)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"\n💾 Result written to {args.output}")
+    if not result["delivered"]:
+        print("\n❌ No price updates delivered")
+        return 1
+    if args.save_baseline:
+        save_baseline(result, reference, args.baselines)
+        print(f"\n✅ Saved baseline for {args.connections} connections")
+        return 0
+    if args.check:
+        print()
+        regressions = check(result, reference, args.tolerance, args.baselines)
+        if regressions:
+            print(f"\n❌ Regression over {args.tolerance}x baseline: {', '.join(regressions)}")
+            return 1
+        print("\n✅ Within baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Benchmark the flat vector index at float32 and int8 precision.
+
+Reports memory scanned per 10k vectors, query latency (p50/p99) and int8
+recall@k against exact float32 search, using random unit vectors at the
+embedding dimension used by the memory classes.
+
+Run: cd backend && uv run python scripts/benchmark_vector_index.py [n_vectors] [n_queries]
+"""
+
+import sys
+import os
+import time
+import tempfile
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.flat_index import FlatIndexCollection
+from app.services.memory_service import EMBEDDING_DIM
+
+TOP_K = 5
+
+
+def build(path: str, precision: str, vectors: np.ndarray) -> FlatIndexCollection:
+    collection = FlatIndexCollection("bench", path, precision=precision)
+    ids = [f"v{i}" for i in range(len(vectors))]
+    for start in range(0, len(vectors), 10_000):
+        collection.upsert(ids=ids[start:start + 10_000], embeddings=vectors[start:start + 10_000])
+    return collection
+
+
+def time_queries(collection: FlatIndexCollection, queries: np.ndarray):
+    latencies, results = [], []
+    for query in queries:
+        start = time.perf_counter()
+        rows, _ = collection.search(query, TOP_K)
+        latencies.append((time.perf_counter() - start) * 1000)
+        results.append(set(rows.tolist()))
+    return np.asarray(latencies), results
+
+
+def main(n_vectors: int, n_queries: int):
+    rng = np.random.default_rng(42)
+    vectors = rng.standard_normal((n_vectors, EMBEDDING_DIM), dtype=np.float32)
+    # Queries near stored vectors, as real lookups are
+    queries = vectors[rng.integers(0, n_vectors, n_queries)] + 0.5 * rng.standard_normal((n_queries, EMBEDDING_DIM), dtype=np.float32)
+
+    print(f"📊 {n_vectors:,} vectors x {EMBEDDING_DIM} dims, {n_queries} queries, top-{TOP_K}\n")
+
+    exact = None
+    with tempfile.TemporaryDirectory() as tmp:
+        for precision in ("float32", "int8"):
+            collection = build(os.path.join(tmp, precision), precision, vectors)
+            latencies, results = time_queries(collection, queries)
+
+            per_10k = collection.nbytes() / n_vectors * 10_000 / 2**20
+            line = (
+                f"{precision:>8}: {per_10k:6.1f} MiB / 10k vectors | "
+                f"p50 {np.percentile(latencies, 50):6.2f} ms | p99 {np.percentile(latencies, 99):6.2f} ms"
+            )
+            if exact is None:
+                exact = results
+            else:
+                recall = np.mean([len(a & b) / TOP_K for a, b in zip(exact, results)])
+                line += f" | recall@{TOP_K} {recall:.3f}"
+            print(line)
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 50_000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 200,
+    )
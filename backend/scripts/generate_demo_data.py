@@ -7,10 +7,16 @@ Creates realistic mock data for demonstrating the Sentinel alert system:
 2. Outcomes (profits/losses)
 3. Matching signals to trigger alerts
 
-Run: cd backend && uv run python scripts/generate_demo_data.py
+Run: cd backend && uv run python scripts/generate_demo_data.py [--scale N] [--skip-memory]
+
+--scale N adds synthetic signals, trades and analysis results at N times the
+demo volume (e.g. 10 or 100) for load and benchmark runs. The synthetic_*
+generators are deterministic (seeded) and also used by benchmarks/.
 """
 
+import argparse
 import asyncio
+import random
 import sys
 import os
 from datetime import datetime, timedelta
@@ -20,7 +26,7 @@ from random import uniform, choice
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app.core.database import AsyncSessionLocal
-from app.models.database import UserActivity, Signal
+from app.models.database import UserActivity, Signal, AnalysisResult
 from app.services.sentinel_service import SentinelService
 
 
@@ -200,6 +206,168 @@ TRIGGER_SIGNALS = [
 ]
 
 
+# Synthetic data at scale (for load tests and benchmarks/)
+SYNTHETIC_TICKERS = ["AAPL", "TSLA", "NVDA", "MSFT", "GOOGL", "AMZN", "AMD", "PLTR", "GME", "SOFI", "META", "NFLX"]
+SUBREDDITS = ["wallstreetbets", "stocks", "investing", "options", "pennystocks"]
+# Rows per unit of scale
+BASE_POSTS = 200
+BASE_SIGNALS = 500
+BASE_ANALYSES = 50
+
+POST_TEMPLATES = [
+    "${ticker} calls are printing, this thing is going to the moon 🚀",
+    "{ticker} stock breakout above resistance, loading shares before earnings",
+    "Thinking about buying puts on {ticker}, feels overvalued and due for a dump",
+    "DD: why {ticker} is the most undervalued play in the sector (long term hold)",
+    "{ticker} shares tank after guidance cut, bagholders in shambles",
+    "Is anyone else watching ${ticker} and ${other}? Volume is insane today",
+    "YOLO'd my savings into {ticker} calls. Diamond hands. Short squeeze incoming",
+    "The Fed meeting tomorrow will decide where the market goes, stay careful",
+]
+
+
+def synthetic_reddit_posts(scale: int = 1, seed: int = 42) -> list:
+    """Reddit hot.json post payloads (the `data` of each child) with ticker mentions and slang."""
+    rng = random.Random(seed)
+    now = datetime.utcnow().timestamp()
+    posts = []
+    for i in range(BASE_POSTS * scale):
+        ticker, other = rng.sample(SYNTHETIC_TICKERS, 2)
+        title = rng.choice(POST_TEMPLATES).format(ticker=ticker, other=other)
+        body = " ".join(rng.choice(POST_TEMPLATES).format(ticker=rng.choice(SYNTHETIC_TICKERS), other=other) for _ in range(rng.randint(0, 4)))
+        posts.append({
+            "id": f"post{i}",
+            "subreddit": rng.choice(SUBREDDITS),
+            "title": title,
+            "selftext": body,
+            "ups": rng.randint(0, 5000),
+            "num_comments": rng.randint(0, 800),
+            "created_utc": now - rng.uniform(0, 24 * 3600),
+        })
+    return posts
+
+
+def synthetic_signals(scale: int = 1, seed: int = 42) -> list:
+    """Signal row kwargs spread over the last 24 hours."""
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    signals = []
+    for i in range(BASE_SIGNALS * scale):
+        symbol = rng.choice(SYNTHETIC_TICKERS)
+        source = rng.choice(["stocktwits", "reddit", "news"])
+        sentiment = round(rng.uniform(-1, 1), 3)
+        signals.append({
+            "symbol": symbol,
+            "source": source,
+            "source_detail": f"{source}_synthetic",
+            "sentiment": sentiment,
+            "raw_sentiment": sentiment,
+            "volume": rng.randint(1, 3000),
+            "freshness": round(rng.uniform(0.2, 1.0), 3),
+            "source_weight": 0.8,
+            "reason": f"{source.title()}: synthetic mention #{i} of {symbol}",
+            "timestamp": now - timedelta(seconds=rng.uniform(0, 24 * 3600)),
+            "meta_data": {"synthetic": True},
+        })
+    return signals
+
+
+def synthetic_trades(scale: int = 1, seed: int = 42) -> list:
+    """MOCK_TRADES repeated `scale` times with jittered prices, sentiment and dates."""
+    rng = random.Random(seed)
+    trades = []
+    for _ in range(scale):
+        for trade in MOCK_TRADES:
+            trades.append({
+                **trade,
+                "price": round(trade["price"] * rng.uniform(0.9, 1.1), 2),
+                "sentiment": round(min(1.0, max(0.0, trade["sentiment"] + rng.uniform(-0.1, 0.1))), 2),
+                "days_ago": rng.randint(1, 90),
+            })
+    return trades
+
+
+def synthetic_price_history(days: int = 15 * 252, seed: int = 42, start: float = 100.0):
+    """Daily OHLCV frame (Date, Open, High, Low, Close, Volume) as a geometric random walk."""
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    close = start * np.exp(np.cumsum(rng.normal(0.0003, 0.02, days)))
+    spread = close * rng.uniform(0.002, 0.02, days)
+    dates = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=days)
+    return pd.DataFrame({
+        "Date": dates,
+        "Open": close + rng.uniform(-1, 1, days) * spread / 2,
+        "High": close + spread,
+        "Low": close - spread,
+        "Close": close,
+        "Volume": rng.integers(1_000_000, 50_000_000, days),
+    })
+
+
+def synthetic_final_state(seed: int = 42, ticker: str = "AAPL", words: int = 600) -> dict:
+    """A graph final state shaped like TradingAgentsGraph's, with LangChain messages and long reports."""
+    from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+    rng = random.Random(seed)
+    vocabulary = ["revenue", "margin", "guidance", "momentum", "RSI", "support", "resistance", "valuation",
+                  "earnings", "catalyst", "volatility", "sentiment", "downside", "upside", "risk", "macro"]
+
+    def report():
+        return " ".join(rng.choice(vocabulary) for _ in range(words))
+
+    messages = []
+    for i in range(20):
+        messages.append(HumanMessage(content=report()[:200]))
+        messages.append(AIMessage(content="", tool_calls=[{"name": "get_indicators", "args": {"symbol": ticker, "indicator": "rsi"}, "id": f"call{i}"}]))
+        messages.append(ToolMessage(content=report(), tool_call_id=f"call{i}"))
+    debate = {"history": report(), "bull_history": report(), "bear_history": report(), "current_response": report(), "judge_decision": report(), "count": 2}
+    risk = {"history": report(), "risky_history": report(), "safe_history": report(), "neutral_history": report(),
+            "latest_speaker": "Judge", "current_risky_response": report(), "current_safe_response": report(),
+            "current_neutral_response": report(), "judge_decision": report(), "count": 3}
+    return {
+        "messages": messages,
+        "company_of_interest": ticker,
+        "trade_date": datetime.utcnow().strftime("%Y-%m-%d"),
+        "sender": "Risk Judge",
+        "market_report": report(),
+        "sentiment_report": report(),
+        "news_report": report(),
+        "fundamentals_report": report(),
+        "investment_debate_state": debate,
+        "investment_plan": report(),
+        "trader_investment_plan": report(),
+        "risk_debate_state": risk,
+        "final_trade_decision": report() + " FINAL TRANSACTION PROPOSAL: **BUY**",
+    }
+
+
+def synthetic_analysis_results(scale: int = 1, seed: int = 42) -> list:
+    """AnalysisResult row kwargs across the synthetic tickers over the last 30 days."""
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    state = synthetic_final_state(seed, words=100)
+    results = []
+    for _ in range(BASE_ANALYSES * scale):
+        created_at = now - timedelta(minutes=rng.uniform(0, 30 * 24 * 60))
+        results.append({
+            "ticker": rng.choice(SYNTHETIC_TICKERS),
+            "trade_date": created_at.strftime("%Y-%m-%d"),
+            "market_report": state["market_report"],
+            "sentiment_report": state["sentiment_report"],
+            "news_report": state["news_report"],
+            "fundamentals_report": state["fundamentals_report"],
+            "investment_debate": {"bull_history": state["investment_debate_state"]["bull_history"]},
+            "trader_decision": state["trader_investment_plan"],
+            "risk_debate": {"judge_decision": state["risk_debate_state"]["judge_decision"]},
+            "final_decision": rng.choice(["BUY", "HOLD", "SELL"]),
+            "confidence": round(rng.uniform(0.5, 0.95), 2),
+            "created_at": created_at,
+        })
+    return results
+
+
 async def clear_demo_data(db):
     """Clear existing demo data"""
     print("🧹 Clearing existing demo data...")
@@ -215,16 +383,19 @@ async def clear_demo_data(db):
     from app.models.database import Alert
     await db.execute(delete(Alert))
     
+    # Delete synthetic analysis results from earlier --scale runs
+    await db.execute(delete(AnalysisResult).where(AnalysisResult.metrics["synthetic"].as_boolean()))
+    
     await db.commit()
     print("✅ Cleared existing data\n")
 
 
-async def create_past_trades(db):
+async def create_past_trades(db, trades=MOCK_TRADES):
     """Create mock past trades"""
     print("📊 Creating past trades...")
     
     activities = []
-    for trade in MOCK_TRADES:
+    for trade in trades:
         timestamp = datetime.utcnow() - timedelta(days=trade["days_ago"])
         
         activity = UserActivity(
@@ -248,7 +419,8 @@ async def create_past_trades(db):
         db.add(activity)
         activities.append(activity)
         
-        print(f"  ✓ {trade['symbol']}: {trade['scenario']} - {trade['outcome']}")
+        if len(trades) <= len(MOCK_TRADES):
+            print(f"  ✓ {trade['symbol']}: {trade['scenario']} - {trade['outcome']}")
     
     await db.commit()
     
@@ -375,7 +547,22 @@ async def display_summary(db):
     print("🌐 Open http://localhost:3000 and click 'Alerts' tab\n")
 
 
-async def main():
+async def create_synthetic_rows(db, scale: int):
+    """Bulk-insert synthetic signals and analysis results at `scale` x the base volume"""
+    print(f"🧪 Creating synthetic data at {scale}x...")
+    
+    signals = synthetic_signals(scale)
+    analyses = synthetic_analysis_results(scale)
+    await db.run_sync(lambda session: session.bulk_insert_mappings(Signal, signals))
+    await db.run_sync(lambda session: session.bulk_insert_mappings(
+        AnalysisResult, [{**row, "metrics": {"synthetic": True}} for row in analyses]
+    ))
+    await db.commit()
+    
+    print(f"\n✅ Created {len(signals):,} signals and {len(analyses):,} analysis results\n")
+
+
+async def main(scale: int = 1, skip_memory: bool = False):
     """Main function"""
     print("\n" + "=" * 70)
     print("🚀 HACKATHON DEMO DATA GENERATOR")
@@ -386,13 +573,16 @@ async def main():
         await clear_demo_data(db)
         
         # Step 2: Create past trades
-        activities = await create_past_trades(db)
+        activities = await create_past_trades(db, MOCK_TRADES if scale == 1 else synthetic_trades(scale))
         
-        # Step 3: Populate memory with past trades
-        await populate_memory(activities)
+        # Step 3: Populate memory with past trades (one embedding call per trade)
+        if not skip_memory:
+            await populate_memory(activities)
         
         # Step 4: Create trigger signals
         signals = await create_trigger_signals(db)
+        if scale > 1:
+            await create_synthetic_rows(db, scale)
         
         # Step 5: Process signals to generate alerts
         await process_signals_for_alerts(db, signals)
@@ -402,8 +592,12 @@ async def main():
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=int, default=1, help="Multiply data volume (e.g. 10, 100)")
+    parser.add_argument("--skip-memory", action="store_true", help="Don't embed trades into vector memory")
+    args = parser.parse_args()
     try:
-        asyncio.run(main())
+        asyncio.run(main(args.scale, args.skip_memory))
     except Exception as e:
         print(f"\n❌ Error: {e}")
         import traceback
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Rehydrate the persistent vector store from the database.
+
+Bulk-embeds every historical UserActivity row for a user so the Sentinel can
+match against history recorded before the store existed (or after it was wiped).
+Safe to re-run: vectors are keyed by activity ID.
+
+Run: cd backend && uv run python scripts/rehydrate_memory.py [user_id]
+"""
+
+import asyncio
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.database import AsyncSessionLocal, init_db, close_db
+from app.core.vector_store import init_vector_store, get_vector_store
+from app.services.observer_service import ObserverService
+
+
+async def main(user_id: str):
+    await init_db()
+    init_vector_store()
+
+    async with AsyncSessionLocal() as db:
+        service = ObserverService(db)
+        count = await service.rehydrate_memory(user_id=user_id)
+
+    print(f"✅ Rehydrated {count} activities for {user_id}")
+    print(f"📦 Collections: {get_vector_store().stats()}")
+
+    await close_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(sys.argv[1] if len(sys.argv) > 1 else "default_user"))
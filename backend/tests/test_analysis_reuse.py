@@ -0,0 +1,63 @@
+"""
+Tests for reusing fresh stored analyses instead of re-running the graph.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models.database import AnalysisResult
+from app.services.analysis_service import AnalysisService
+
+ANALYSTS = ["fundamentals", "market"]
+
+
+async def store_result(db, minutes_old: int, price: float, sentiment: float = 0.5) -> AnalysisResult:
+    result = AnalysisResult(
+        ticker="AAPL",
+        trade_date="2025-01-10",
+        final_decision="BUY",
+        confidence=0.8,
+        market_snapshot={"price": price, "sentiment": sentiment, "analysts": ANALYSTS},
+        created_at=datetime.utcnow() - timedelta(minutes=minutes_old),
+    )
+    db.add(result)
+    await db.commit()
+    return result
+
+
+def use_snapshot(monkeypatch, price: float, sentiment: float = 0.5):
+    async def snapshot(self, ticker, analysts):
+        return {"price": price, "sentiment": sentiment, "analysts": sorted(analysts)}
+
+    monkeypatch.setattr(AnalysisService, "_market_snapshot", snapshot)
+
+
+@pytest.mark.asyncio
+async def test_fresh_result_is_reused(test_db, monkeypatch):
+    """Test that a recent analysis with an unmoved price is returned and marked as reused."""
+    stored = await store_result(test_db, minutes_old=10, price=100.0)
+    use_snapshot(monkeypatch, price=100.5)
+
+    response = await AnalysisService(test_db).run_analysis("AAPL", date="2025-01-10", analysts=["market", "fundamentals"])
+
+    assert response.reused is True
+    assert response.reused_analysis_id == stored.id
+    assert response.final_decision == "BUY"
+
+
+@pytest.mark.asyncio
+async def test_moved_or_expired_results_are_not_reused(test_db, monkeypatch):
+    """Test that a price move past the threshold, an expired TTL or extra analysts force a new run."""
+    service = AnalysisService(test_db)
+
+    await store_result(test_db, minutes_old=10, price=100.0)
+    use_snapshot(monkeypatch, price=105.0)
+    assert await service._find_reusable("AAPL", "2025-01-10", await service._market_snapshot("AAPL", ANALYSTS)) is None
+
+    use_snapshot(monkeypatch, price=100.0)
+    assert await service._find_reusable("AAPL", "2025-01-10", await service._market_snapshot("AAPL", ANALYSTS + ["news"])) is None
+
+    await test_db.execute(AnalysisResult.__table__.delete())
+    await store_result(test_db, minutes_old=24 * 60, price=100.0)
+    assert await service._find_reusable("AAPL", "2025-01-10", await service._market_snapshot("AAPL", ANALYSTS)) is None
@@ -0,0 +1,42 @@
+"""
+Tests for streaming analysis runs.
+"""
+
+import asyncio
+
+import pytest
+
+from app.services.analysis_stream import AnalysisRun, progress_event
+
+
+def test_progress_events_by_node():
+    """Test that node updates map to report, debate and decision events."""
+    report = progress_event("Market Analyst", {"messages": [], "market_report": "RSI 70"})
+    assert report == {"node": "Market Analyst", "kind": "report", "field": "market_report", "content": "RSI 70"}
+
+    turn = progress_event("Safe Analyst", {"risk_debate_state": {"latest_speaker": "Safe", "current_safe_response": "Trim size."}})
+    assert turn["kind"] == "debate_turn" and turn["debate"] == "risk"
+
+    decision = progress_event("Risk Judge", {"risk_debate_state": {}, "final_trade_decision": "FINAL TRANSACTION PROPOSAL: **BUY**"})
+    assert decision["kind"] == "final_decision"
+
+    assert progress_event("tools_market", {"messages": []})["kind"] == "node_complete"
+
+
+@pytest.mark.asyncio
+async def test_follow_replays_then_streams_live_events():
+    """Test that a follower resumes after a given event ID and ends with the run."""
+    run = AnalysisRun("AAPL", None, ["market"])
+    run.publish("run_started", {})
+    run.publish("progress", {"node": "Market Analyst"})
+
+    async def collect(after_id):
+        return [event["id"] async for event in run.follow(after_id, heartbeat=1) if event]
+
+    follower = asyncio.create_task(collect(1))
+    await asyncio.sleep(0)
+    run.publish("progress", {"node": "Trader"})
+    run.finish("completed", "complete", {})
+
+    assert await asyncio.wait_for(follower, 1) == [2, 3, 4]
+    assert await collect(3) == [4]
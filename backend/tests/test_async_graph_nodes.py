@@ -0,0 +1,86 @@
+"""
+Tests for the async variants of the agent graph nodes.
+"""
+
+from typing import TypedDict
+
+import pytest
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langgraph.graph import END, START, StateGraph
+
+from tradingagents.agents import create_bull_researcher, create_trader
+from tradingagents.instrumentation import GraphInstrumentation
+
+STATE = {
+    "company_of_interest": "AAPL",
+    "trade_date": "2025-01-10",
+    "market_report": "RSI 71, price above 50 SMA.",
+    "sentiment_report": "Mostly bullish chatter.",
+    "news_report": "New product launch next week.",
+    "fundamentals_report": "Revenue +8% YoY.",
+    "investment_plan": "Buy on dips.",
+    "investment_debate_state": {"history": "", "bull_history": "", "bear_history": "", "current_response": "", "count": 0},
+}
+
+
+class FakeMemory:
+    def __init__(self):
+        self.calls = []
+
+    def get_memories(self, situation, n_matches=1):
+        self.calls.append("sync")
+        return [{"recommendation": "Size down into earnings."}]
+
+    async def aget_memories(self, situation, n_matches=1):
+        self.calls.append("async")
+        return [{"recommendation": "Size down into earnings."}]
+
+
+@pytest.mark.asyncio
+async def test_async_node_matches_sync_node():
+    """Test that a node's ainvoke produces the same update as invoke, via the async memory lookup."""
+    memory = FakeMemory()
+    node = create_bull_researcher(FakeListChatModel(responses=["Growth is strong."]), memory)
+
+    sync_update = node.invoke(STATE)
+    async_update = await node.ainvoke(STATE)
+
+    assert async_update == sync_update
+    assert async_update["investment_debate_state"]["current_response"] == "Bull Analyst: Growth is strong."
+    assert memory.calls == ["sync", "async"]
+
+
+@pytest.mark.asyncio
+async def test_async_graph_run_is_instrumented_per_node():
+    """Test that an ainvoke graph run is attributed to its nodes like a sync run."""
+
+    class State(TypedDict, total=False):
+        company_of_interest: str
+        trade_date: str
+        market_report: str
+        sentiment_report: str
+        news_report: str
+        fundamentals_report: str
+        investment_plan: str
+        investment_debate_state: dict
+        trader_investment_plan: str
+        messages: list
+        sender: str
+
+    llm = FakeListChatModel(responses=["Bullish.", "FINAL TRANSACTION PROPOSAL: **BUY**"])
+    workflow = StateGraph(State)
+    workflow.add_node("Bull Researcher", create_bull_researcher(llm, FakeMemory()))
+    workflow.add_node("Trader", create_trader(llm, FakeMemory()))
+    workflow.add_edge(START, "Bull Researcher")
+    workflow.add_edge("Bull Researcher", "Trader")
+    workflow.add_edge("Trader", END)
+    graph = workflow.compile()
+
+    instrumentation = GraphInstrumentation()
+    with instrumentation:
+        final_state = await graph.ainvoke(STATE, config={"callbacks": [instrumentation]})
+
+    summary = instrumentation.summary()
+    assert final_state["trader_investment_plan"] == "FINAL TRANSACTION PROPOSAL: **BUY**"
+    assert summary["nodes"]["Bull Researcher"]["llm_calls"] == 1
+    assert summary["nodes"]["Trader"]["calls"] == 1
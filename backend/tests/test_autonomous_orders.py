@@ -0,0 +1,158 @@
+"""
+Tests for the order paths of the autonomous analysis and monitor jobs.
+"""
+
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from app.config import settings
+from app.models.database import PortfolioConfig, Position, Signal, Trade, TradingConfig
+from app.services import autonomous_service
+from app.services.analysis_service import AnalysisService
+from sqlalchemy import select
+
+
+async def enable_autopilot(db):
+    db.add(TradingConfig(user_id=1, enabled=True, max_positions=5, min_sentiment_score=0.3,
+                         min_analyst_confidence=0.6, take_profit_pct=10.0, stop_loss_pct=5.0))
+    db.add(PortfolioConfig(user_id="default_user", is_autonomous_active=True, total_budget=10_000.0,
+                           current_allocation=0.0, max_position_size=1_000.0))
+    await db.commit()
+
+
+@pytest.mark.asyncio
+async def test_buy_decision_places_order_and_opens_position(test_db, fake_alpaca, monkeypatch):
+    """Test that a confident BUY prices the order from the quote, submits it and records position and trade."""
+    await enable_autopilot(test_db)
+    test_db.add(Signal(symbol="AAPL", source="reddit", sentiment=0.8, volume=10, reason="Reddit: AAPL calls",
+                       timestamp=datetime.now()))
+    await test_db.commit()
+    fake_alpaca.quotes["AAPL"] = {"bid_price": 199.0, "ask_price": 200.0}
+    monkeypatch.setattr(settings, "prescreen_enabled", False)
+
+    async def run_analysis(self, ticker, **kwargs):
+        return SimpleNamespace(final_decision="BUY", confidence=0.9)
+
+    monkeypatch.setattr(AnalysisService, "run_analysis", run_analysis)
+
+    await autonomous_service.run_analysis_job(test_db)
+
+    assert fake_alpaca.orders == [("AAPL", 5, "buy")]
+    position = (await test_db.execute(select(Position))).scalar_one()
+    trade = (await test_db.execute(select(Trade))).scalar_one()
+    assert (position.symbol, position.quantity, position.entry_price, position.status) == ("AAPL", 5, 200.0, "open")
+    assert position.meta_data["order_id"] == trade.alpaca_order_id == "order-1"
+    assert trade.position_id == position.id
+
+
+@pytest.mark.asyncio
+async def test_take_profit_closes_position_with_sell_order(test_db, fake_alpaca):
+    """Test that a position past its take-profit is sold at the bid and closed with its P&L."""
+    await enable_autopilot(test_db)
+    test_db.add(Position(symbol="MSFT", entry_time=datetime.now(), entry_price=100.0, quantity=3, status="open"))
+    test_db.add(Position(symbol="NVDA", entry_time=datetime.now(), entry_price=100.0, quantity=2, status="open"))
+    await test_db.commit()
+    fake_alpaca.quotes["MSFT"] = {"bid_price": 115.0, "ask_price": 115.5}
+    fake_alpaca.quotes["NVDA"] = {"bid_price": 101.0, "ask_price": 101.5}
+
+    await autonomous_service.monitor_positions_job(test_db)
+
+    assert fake_alpaca.orders == [("MSFT", 3, "sell")]
+    positions = {p.symbol: p for p in (await test_db.execute(select(Position))).scalars()}
+    assert positions["MSFT"].status == "closed" and positions["MSFT"].pnl == pytest.approx(45.0)
+    assert positions["NVDA"].status == "open"
+    trade = (await test_db.execute(select(Trade))).scalar_one()
+    assert (trade.side, trade.alpaca_order_id) == ("sell", "order-1")
+
+
+@pytest.mark.asyncio
+async def test_closed_market_blocks_orders_even_with_prescreen(test_db, fake_alpaca, monkeypatch):
+    """Test that the market-hours guard applies when the pre-screen runs without its tradable filter."""
+    await enable_autopilot(test_db)
+    test_db.add(Signal(symbol="AAPL", source="reddit", sentiment=0.8, volume=10, reason="Reddit: AAPL calls",
+                       timestamp=datetime.now()))
+    await test_db.commit()
+    fake_alpaca.quotes["AAPL"] = {"bid_price": 199.0, "ask_price": 200.0}
+    monkeypatch.setattr(settings, "prescreen_enabled", True)
+    monkeypatch.setattr(settings, "ignore_market_hours", False)
+    monkeypatch.setattr(autonomous_service, "can_trade_symbol", lambda symbol, ignore: (False, "Market closed"))
+
+    async def prescreen(db, service, alpaca, signals):
+        return signals
+
+    analyzed = []
+
+    async def run_analysis(self, ticker, **kwargs):
+        analyzed.append(ticker)
+        return SimpleNamespace(final_decision="BUY", confidence=0.9)
+
+    monkeypatch.setattr(autonomous_service, "_prescreen_signals", prescreen)
+    monkeypatch.setattr(AnalysisService, "run_analysis", run_analysis)
+
+    await autonomous_service.run_analysis_job(test_db)
+
+    assert analyzed == [] and fake_alpaca.orders == []
+
+
+@pytest.mark.asyncio
+async def test_bracket_entry_leaves_exits_to_the_broker(test_db, fake_alpaca, monkeypatch):
+    """Test that a bracket entry carries legs at the configured levels and the monitor neither prices nor sells it."""
+    await enable_autopilot(test_db)
+    test_db.add(Signal(symbol="AAPL", source="reddit", sentiment=0.8, volume=10, reason="Reddit: AAPL calls",
+                       timestamp=datetime.now()))
+    await test_db.commit()
+    fake_alpaca.quotes["AAPL"] = {"bid_price": 199.0, "ask_price": 200.0}
+    monkeypatch.setattr(settings, "prescreen_enabled", False)
+    monkeypatch.setattr(settings, "bracket_orders_enabled", True)
+
+    async def run_analysis(self, ticker, **kwargs):
+        return SimpleNamespace(final_decision="BUY", confidence=0.9)
+
+    monkeypatch.setattr(AnalysisService, "run_analysis", run_analysis)
+
+    await autonomous_service.run_analysis_job(test_db)
+
+    assert fake_alpaca.orders == [("AAPL", 5, "bracket", 220.0, 190.0)]
+    position = (await test_db.execute(select(Position))).scalar_one()
+    assert position.meta_data["bracket"]["active"] is True
+    assert position.meta_data["bracket"]["stop_loss_order_id"] == "order-1-sl"
+
+    # Past the stop-loss with the legs still live: the broker owns the exit
+    fake_alpaca.quotes["AAPL"] = {"bid_price": 180.0, "ask_price": 180.5}
+    await autonomous_service.monitor_positions_job(test_db)
+
+    assert len(fake_alpaca.orders) == 1
+    await test_db.refresh(position)
+    assert position.status == "open"
+
+
+@pytest.mark.asyncio
+async def test_closing_a_bracket_position_waits_for_its_legs_to_cancel(test_db, fake_alpaca, monkeypatch):
+    """Test that a close sells only once both legs are canceled, and keeps the bracket active if the sell fails."""
+    monkeypatch.setattr(autonomous_service, "LEG_CANCEL_POLL_SECONDS", 0)
+    entry = await fake_alpaca().place_bracket_order("AAPL", 5, 220.0, 190.0)
+    position = Position(symbol="AAPL", entry_time=datetime.now(), entry_price=200.0, quantity=5, status="open",
+                        meta_data={"order_id": entry["order_id"], "bracket": autonomous_service.bracket_meta(entry, 220.0, 190.0)})
+    test_db.add(position)
+    await test_db.commit()
+    fake_alpaca.orders = []
+    service = autonomous_service.AutonomousService(test_db)
+
+    async def rejected(symbol, quantity=None):
+        raise RuntimeError("insufficient qty available for order")
+
+    service.alpaca.close_position = rejected
+    with pytest.raises(RuntimeError):
+        await service.close_position("AAPL")
+    assert position.meta_data["bracket"]["active"] is True
+    del service.alpaca.close_position
+
+    await service.close_position("AAPL")
+
+    assert fake_alpaca.orders == [("order-1-tp", "cancel"), ("order-1-sl", "cancel"), ("AAPL", "close")]
+    await test_db.refresh(position)
+    assert position.status == "closed"
+    assert position.meta_data["bracket"]["active"] is False
+
@@ -0,0 +1,79 @@
+"""
+Tests for record/replay cassettes of vendor and LLM calls.
+"""
+
+import asyncio
+
+import pytest
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+from tradingagents.cassette import Cassette, CassetteMissError, RecordedCallError, configure_cassette, get_cassette, use_cassette
+from tradingagents.dataflows import interface
+from tradingagents.rate_governor import governed
+
+
+def test_recorded_run_replays_offline(tmp_path, monkeypatch):
+    """Test that vendor and LLM calls recorded to a cassette are served from it without the live services."""
+    path = str(tmp_path / "run.json.gz")
+    monkeypatch.setattr(interface, "_route_to_vendor", lambda method, *args: f"{method}:{','.join(args)}")
+
+    with Cassette(path, mode="record"):
+        data = interface.route_to_vendor("get_stock_data", "AAPL", "2025-01-01", "2025-01-10")
+        answer = governed(FakeListChatModel)(responses=["Bullish on AAPL."]).invoke("Summarize AAPL").content
+
+    def offline(*args, **kwargs):
+        raise AssertionError("live call during replay")
+
+    monkeypatch.setattr(interface, "_route_to_vendor", offline)
+    with Cassette(path, mode="replay", latency_scale=0) as cassette:
+        assert interface.route_to_vendor("get_stock_data", "AAPL", "2025-01-01", "2025-01-10") == data
+        model = governed(FakeListChatModel)(responses=["Bullish on AAPL."])
+        assert model.invoke("Summarize AAPL").content == answer
+        assert model.i == 0  # the fake model itself was never called
+        with pytest.raises(CassetteMissError):
+            interface.route_to_vendor("get_stock_data", "MSFT", "2025-01-01", "2025-01-10")
+
+    assert cassette.stats()["recordings"] == {"vendor": 1, "llm": 1}
+    assert (cassette.replayed, cassette.misses) == (2, 1)
+
+
+def test_repeated_calls_and_errors_replay_in_order(tmp_path):
+    """Test that identical calls replay their recordings in order and recorded failures fail again."""
+    path = str(tmp_path / "calls.json.gz")
+    results = iter(["first", "second"])
+
+    with Cassette(path, mode="record") as cassette:
+        assert cassette.call("vendor", "get_news", ["AAPL"], lambda: next(results)) == "first"
+        assert cassette.call("vendor", "get_news", ["AAPL"], lambda: next(results)) == "second"
+        with pytest.raises(StopIteration):
+            cassette.call("vendor", "get_global_news", [], lambda: next(results))
+
+    replay = Cassette(path, mode="replay", latency_scale=0)
+    assert [replay.call("vendor", "get_news", ["AAPL"], None) for _ in range(3)] == ["first", "second", "second"]
+    with pytest.raises(RecordedCallError, match="StopIteration"):
+        replay.call("vendor", "get_global_news", [], None)
+
+
+@pytest.mark.asyncio
+async def test_active_cassette_is_context_local(tmp_path):
+    """Test that an unconfigured graph keeps the caller's cassette and concurrent runs replay independently."""
+    path = str(tmp_path / "calls.json.gz")
+    results = iter(["first", "second"])
+    with Cassette(path, mode="record") as recorded:
+        assert configure_cassette({"cassette_mode": "off"}) is None
+        assert get_cassette() is recorded
+        for _ in range(2):
+            get_cassette().call("vendor", "get_news", ["AAPL"], lambda: next(results))
+    assert get_cassette() is None
+
+    replay = configure_cassette({"cassette_mode": "replay", "cassette_path": path, "cassette_latency_scale": 0})
+    assert get_cassette() is None
+
+    async def run():
+        with use_cassette(replay):
+            first = await asyncio.to_thread(get_cassette().call, "vendor", "get_news", ["AAPL"], None)
+            await asyncio.sleep(0)
+            return first, get_cassette().call("vendor", "get_news", ["AAPL"], None)
+
+    assert await asyncio.gather(run(), run()) == [("first", "second"), ("first", "second")]
+    assert get_cassette() is None
@@ -0,0 +1,62 @@
+"""
+Tests for the take-profit/stop-loss trigger index and the exits it fires on price ticks.
+"""
+
+from datetime import datetime
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.trigger_index import STOP_LOSS, TAKE_PROFIT, TriggerIndex
+from app.models.database import Position, Trade, TradingConfig
+from app.services.exit_triggers import ExitTriggers
+
+
+def test_index_fires_only_crossed_levels():
+    """Test that a price fires the take-profits at or below it and the stop-losses at or above it."""
+    index = TriggerIndex()
+    index.add(1, "AAPL", 110.0, 95.0)
+    index.add(2, "AAPL", 120.0, 90.0)
+    index.add(3, "MSFT", 105.0, 98.0)
+
+    assert index.check("AAPL", 100.0) == []
+    assert index.check("AAPL", 110.0) == [(1, TAKE_PROFIT)]
+    assert sorted(index.check("AAPL", 125.0)) == [(1, TAKE_PROFIT), (2, TAKE_PROFIT)]
+    assert sorted(index.check("AAPL", 92.0)) == [(1, STOP_LOSS)]
+
+    index.remove(1)
+    assert index.check("AAPL", 89.0) == [(2, STOP_LOSS)]
+    index.remove(2)
+    assert index.symbols() == {"MSFT"}
+    assert len(index) == 1
+
+
+@pytest.mark.asyncio
+async def test_crossing_tick_sells_and_closes_the_position(test_engine, test_db, fake_alpaca):
+    """Test that a tick past the stop-loss sells the position once and closes it without waiting for the sweep."""
+    test_db.add(TradingConfig(user_id=1, enabled=True, take_profit_pct=10.0, stop_loss_pct=5.0))
+    position = Position(symbol="NVDA", entry_time=datetime.now(), entry_price=100.0, quantity=4, status="open")
+    test_db.add(position)
+    await test_db.commit()
+
+    triggers = ExitTriggers(async_sessionmaker(test_engine, class_=AsyncSession, expire_on_commit=False))
+    await triggers.load()
+    assert triggers.symbols() == {"NVDA"}
+
+    await triggers.on_prices({"NVDA": {"price": 97.0, "bid": 96.9, "ask": 97.1}})
+    await triggers.wait()
+    assert fake_alpaca.orders == []
+
+    await triggers.on_prices({"NVDA": {"price": 94.1, "bid": 94.0, "ask": 94.2}})
+    await triggers.on_prices({"NVDA": {"price": 93.1, "bid": 93.0, "ask": 93.2}})
+    await triggers.wait()
+    assert fake_alpaca.orders == [("NVDA", 4, "sell")]
+    assert triggers.symbols() == set()
+
+    await test_db.refresh(position)
+    assert position.status == "closed"
+    assert position.exit_reason.startswith("Stop-loss")
+    assert position.exit_price == 94.0
+    trades = (await test_db.execute(select(Trade))).scalars().all()
+    assert [(trade.side, trade.quantity) for trade in trades] == [("sell", 4)]
@@ -0,0 +1,88 @@
+"""
+Tests for the flat vector index.
+"""
+
+import numpy as np
+
+from app.core.flat_index import FlatIndexCollection
+
+
+def _vectors(n=500, dim=64, seed=0):
+    return np.random.default_rng(seed).standard_normal((n, dim)).astype(np.float32)
+
+
+def test_query_returns_nearest_first():
+    """Test that a stored vector is its own nearest neighbour."""
+    vectors = _vectors()
+    collection = FlatIndexCollection("test")
+    collection.upsert(ids=[f"v{i}" for i in range(len(vectors))], embeddings=vectors)
+
+    result = collection.query(query_embeddings=[vectors[42]], n_results=3)
+
+    assert result["ids"][0][0] == "v42"
+    assert abs(result["distances"][0][0]) < 1e-5
+    assert result["distances"][0] == sorted(result["distances"][0])
+
+
+def test_distances_match_chroma_squared_l2():
+    """Test that distances are Chroma's squared L2 (2 - 2cos) so similarity thresholds carry over."""
+    collection = FlatIndexCollection("metric")
+    collection.upsert(ids=["x", "y"], embeddings=[[1.0, 0.0], [0.0, 3.0]])
+
+    result = collection.query(query_embeddings=[[1.0, 1.0]], n_results=2)
+
+    cos = 1 / np.sqrt(2)
+    np.testing.assert_allclose(result["distances"][0], [2 - 2 * cos, 2 - 2 * cos], rtol=1e-6)
+
+
+def test_int8_matches_float32_top_k():
+    """Test that int8 search with exact re-rank recovers the float32 top-k."""
+    vectors = _vectors()
+    ids = [f"v{i}" for i in range(len(vectors))]
+    exact = FlatIndexCollection("exact", precision="float32")
+    quantized = FlatIndexCollection("quantized", precision="int8")
+    exact.upsert(ids=ids, embeddings=vectors)
+    quantized.upsert(ids=ids, embeddings=vectors)
+
+    queries = vectors[:20] + 0.3 * _vectors(20, seed=1)
+    for query in queries:
+        exact_rows, exact_scores = exact.search(query, 5)
+        rows, scores = quantized.search(query, 5)
+        assert rows.tolist() == exact_rows.tolist()
+        np.testing.assert_allclose(scores, exact_scores, rtol=1e-5)
+
+    assert quantized.nbytes() < exact.nbytes() / 3
+
+
+def test_upsert_overwrites_and_persists(tmp_path):
+    """Test that upserts replace rows in place and survive a reload."""
+    vectors = _vectors(100)
+    collection = FlatIndexCollection("memory", str(tmp_path))
+    collection.upsert(ids=[f"v{i}" for i in range(100)], embeddings=vectors, documents=[str(i) for i in range(100)])
+    collection.upsert(ids=["v0"], embeddings=vectors[1:2], documents=["replaced"])
+
+    reloaded = FlatIndexCollection("memory", str(tmp_path), precision="int8")
+
+    assert reloaded.count() == 100
+    result = reloaded.query(query_embeddings=[vectors[1]], n_results=2)
+    assert set(result["ids"][0]) == {"v0", "v1"}
+    assert "replaced" in result["documents"][0]
+
+
+def test_upserts_are_journaled_and_seen_by_other_instances(tmp_path):
+    """Test that small upserts append to the journal, and an open instance (another worker) sees them."""
+    vectors = _vectors(10)
+    writer = FlatIndexCollection("shared", str(tmp_path))
+    reader = FlatIndexCollection("shared", str(tmp_path))
+    writer.upsert(ids=["v0"], embeddings=vectors[:1], documents=["first"])
+    snapshot = (tmp_path / "shared.meta.json").read_text()
+
+    for i in range(1, 10):
+        writer.upsert(ids=[f"v{i}"], embeddings=vectors[i:i + 1], documents=[str(i)])
+    writer.upsert(ids=["v0"], embeddings=vectors[:1], documents=["updated"])
+
+    assert (tmp_path / "shared.meta.json").read_text() == snapshot
+    assert len((tmp_path / "shared.meta.log").read_text().splitlines()) == 10
+    assert reader.count() == 10
+    result = reader.query(query_embeddings=[vectors[0]], n_results=1)
+    assert (result["ids"][0], result["documents"][0]) == (["v0"], ["updated"])
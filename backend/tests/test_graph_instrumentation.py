@@ -0,0 +1,72 @@
+"""
+Tests for per-node graph instrumentation.
+"""
+
+from typing import TypedDict
+
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langgraph.graph import StateGraph, START, END
+
+from app.core.metrics import MetricsRegistry
+from tradingagents.instrumentation import GraphInstrumentation, record_vendor_call
+
+
+class _State(TypedDict):
+    report: str
+
+
+def _build_graph():
+    llm = FakeListChatModel(responses=["bullish", "BUY"])
+
+    def analyst(state):
+        record_vendor_call("get_stock_data", "yfinance", 0.25)
+        return {"report": llm.invoke("analyze").content}
+
+    def trader(state):
+        return {"report": llm.invoke(state["report"]).content}
+
+    workflow = StateGraph(_State)
+    workflow.add_node("Market Analyst", analyst)
+    workflow.add_node("Trader", trader)
+    workflow.add_edge(START, "Market Analyst")
+    workflow.add_edge("Market Analyst", "Trader")
+    workflow.add_edge("Trader", END)
+    return workflow.compile()
+
+
+def test_records_time_and_llm_calls_per_node():
+    """Test that node wall time, LLM calls and vendor calls are attributed."""
+    instrumentation = GraphInstrumentation()
+    with instrumentation:
+        _build_graph().invoke({"report": ""}, config={"callbacks": [instrumentation]})
+
+    summary = instrumentation.summary()
+
+    assert set(summary["nodes"]) == {"Market Analyst", "Trader"}
+    assert summary["nodes"]["Market Analyst"]["calls"] == 1
+    assert summary["nodes"]["Trader"]["llm_calls"] == 1
+    assert summary["llm_calls"] == 2
+    assert summary["vendors"]["get_stock_data:yfinance"]["calls"] == 1
+    assert summary["vendor_seconds"] == 0.25
+
+
+def test_vendor_calls_outside_a_run_are_ignored():
+    """Test that vendor timing is a no-op without active instrumentation."""
+    instrumentation = GraphInstrumentation()
+    record_vendor_call("get_news", "alpha_vantage", 1.0)
+
+    assert instrumentation.summary()["vendors"] == {}
+
+
+def test_histogram_quantiles():
+    """Test that histograms bucket observations per label set."""
+    registry = MetricsRegistry()
+    for value in (0.2, 0.4, 3.0, 40.0):
+        registry.observe("analysis_node_seconds", value, node="Trader")
+
+    series = registry.snapshot("analysis_")["analysis_node_seconds"][0]
+
+    assert series["labels"] == {"node": "Trader"}
+    assert series["count"] == 4
+    assert series["p50"] == 0.5
+    assert series["buckets"]["+Inf"] == 4
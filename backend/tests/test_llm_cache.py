@@ -0,0 +1,42 @@
+"""
+Tests for the exact-match LLM response cache.
+"""
+
+import pytest
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+from tradingagents.graph.llm_cache import LLMCacheMissError, LLMResponseCache
+
+
+def test_repeated_prompt_is_served_from_cache(tmp_path):
+    """Test that an identical call is answered without invoking the model."""
+    cache = LLMResponseCache(str(tmp_path / "cache.sqlite"))
+    llm = FakeListChatModel(responses=["BUY", "SELL"], cache=cache)
+
+    assert llm.invoke("Analyze AAPL").content == "BUY"
+    assert llm.invoke("Analyze AAPL").content == "BUY"
+    assert llm.invoke("Analyze MSFT").content == "SELL"
+    assert cache.stats()["hits"] == 1
+
+
+def test_expired_entries_are_misses(tmp_path):
+    """Test that entries older than the TTL are re-fetched."""
+    cache = LLMResponseCache(str(tmp_path / "cache.sqlite"), ttl_seconds=-1)
+    llm = FakeListChatModel(responses=["BUY", "SELL"], cache=cache)
+
+    llm.invoke("Analyze AAPL")
+
+    assert llm.invoke("Analyze AAPL").content == "SELL"
+
+
+def test_replay_mode_fails_on_miss(tmp_path):
+    """Test that replay serves recorded responses and raises on unknown calls."""
+    path = str(tmp_path / "cache.sqlite")
+    FakeListChatModel(responses=["HOLD"], cache=LLMResponseCache(path)).invoke("Analyze AAPL")
+
+    # Same model params as the recording, so the keys match
+    replay = FakeListChatModel(responses=["HOLD"], cache=LLMResponseCache(path, mode="replay"))
+
+    assert replay.invoke("Analyze AAPL").content == "HOLD"
+    with pytest.raises(LLMCacheMissError):
+        replay.invoke("Analyze TSLA")
@@ -0,0 +1,75 @@
+"""
+Tests for the metrics registry, its Prometheus rendering and the /metrics endpoint.
+"""
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app.config import settings
+from app.core.instrumentation import InstrumentedClient
+from app.core.metrics import MetricsRegistry, metrics
+
+
+def test_render_prometheus_text_format():
+    """Test that counters, gauges and cumulative histogram buckets render in the exposition format."""
+    registry = MetricsRegistry()
+    registry.register("job_seconds", (1, 5))
+    registry.inc("jobs_total", job="monitor")
+    registry.inc("jobs_total", job="monitor")
+    registry.add_gauge("websocket_connections", 3)
+    registry.observe("job_seconds", 0.5, job="monitor")
+    registry.observe("job_seconds", 7, job="monitor")
+
+    lines = registry.render_prometheus().splitlines()
+    assert '# TYPE jobs_total counter' in lines
+    assert 'jobs_total{job="monitor"} 2' in lines
+    assert 'websocket_connections 3' in lines
+    assert 'job_seconds_bucket{job="monitor",le="1"} 1' in lines
+    assert 'job_seconds_bucket{job="monitor",le="5"} 1' in lines
+    assert 'job_seconds_bucket{job="monitor",le="+Inf"} 2' in lines
+    assert 'job_seconds_sum{job="monitor"} 7.5' in lines
+    assert 'job_seconds_count{job="monitor"} 2' in lines
+
+
+def test_disabled_registry_records_nothing():
+    """Test that updates to a disabled registry are dropped."""
+    registry = MetricsRegistry()
+    registry.enabled = False
+    registry.inc("jobs_total")
+    registry.set_gauge("websocket_connections", 1)
+    registry.observe("job_seconds", 1.0)
+    assert registry.render_prometheus() == "\n"
+
+
+def test_instrumented_client_counts_swallowed_errors():
+    """Test that SDK calls are timed per method and failures count as errors even if the caller catches them."""
+    class Client:
+        def get_account(self):
+            return "account"
+
+        def submit_order(self, order):
+            raise RuntimeError("rejected")
+
+    client = InstrumentedClient(Client(), "test_broker")
+    assert client.get_account() == "account"
+    with pytest.raises(RuntimeError):
+        client.submit_order("order")
+
+    counts = metrics.values("outbound_requests_total")
+    assert counts[(("operation", "get_account"), ("outcome", "ok"), ("vendor", "test_broker"))] == 1
+    assert counts[(("operation", "submit_order"), ("outcome", "error"), ("vendor", "test_broker"))] == 1
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_reports_route_latency():
+    """Test that /metrics requires the API key and reports request latency by route template."""
+    from app.main import app
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        assert (await client.get("/metrics")).status_code in (401, 403)
+        await client.get("/api/v1/health")
+        response = await client.get("/metrics", headers={"Authorization": f"Bearer {settings.api_key}"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert 'http_request_duration_seconds_count{method="GET",route="/api/v1/health",status="2xx"}' in response.text
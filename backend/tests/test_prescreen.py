@@ -0,0 +1,65 @@
+"""
+Tests for the quantitative pre-screen.
+"""
+
+from app.services.prescreen_service import (
+    ExposureFilter,
+    LiquidityFilter,
+    PreScreen,
+    SpreadFilter,
+    TradableFilter,
+    TrendFilter,
+    VolatilityFilter,
+    build_frame,
+    format_funnel,
+)
+
+
+def make_bars(start: float, step: float, volume: float, days: int = 30):
+    """Daily bars with a zig-zag around a linear drift (so volatility is non-zero)."""
+    return [
+        {"timestamp": f"2025-01-{day + 1:02d}", "close": start + step * day + (0.5 if day % 2 else -0.5), "volume": volume}
+        for day in range(days)
+    ]
+
+
+def test_funnel_counts_cuts_per_filter():
+    """Test that each candidate is cut by the first filter it fails and only clean ones survive."""
+    symbols = ["GOOD", "THIN", "WIDE", "HELD", "SHUT", "DOWN"]
+    bars = {
+        "GOOD": make_bars(50, 0.2, 1_000_000),
+        "THIN": make_bars(50, 0.2, 1_000),
+        "WIDE": make_bars(50, 0.2, 1_000_000),
+        "HELD": make_bars(50, 0.2, 1_000_000),
+        "SHUT": make_bars(50, 0.2, 1_000_000),
+        "DOWN": make_bars(80, -1.0, 1_000_000),
+    }
+    quotes = {s: {"bid_price": 99.9, "ask_price": 100.0} for s in symbols}
+    quotes["WIDE"] = {"bid_price": 95.0, "ask_price": 100.0}
+    market_open = {s: s != "SHUT" for s in symbols}
+
+    frame = build_frame(symbols, bars, quotes, held={"HELD"}, market_open=market_open)
+    screen = PreScreen([
+        TradableFilter(),
+        ExposureFilter(),
+        LiquidityFilter(1_000_000),
+        SpreadFilter(1.0),
+        VolatilityFilter(0.1, 10.0),
+        TrendFilter(-2.0),
+    ])
+    survivors, report = screen.run(frame)
+
+    assert survivors == ["GOOD"]
+    assert [stage["cut"] for stage in report["stages"]] == [1, 1, 1, 1, 0, 1]
+    assert report["rejected"] == {"SHUT": "tradable", "HELD": "exposure", "THIN": "liquidity", "WIDE": "spread", "DOWN": "trend"}
+    assert format_funnel(report).endswith("-> 1 survivors")
+
+
+def test_missing_data_fails_closed():
+    """Test that a symbol without bars or a quote is rejected rather than passed."""
+    frame = build_frame(["NODATA"], bars={}, quotes={}, held=set(), market_open={"NODATA": True})
+
+    survivors, report = PreScreen([TradableFilter(), LiquidityFilter(1.0)]).run(frame)
+
+    assert survivors == []
+    assert report["rejected"] == {"NODATA": "tradable"}
@@ -0,0 +1,81 @@
+"""
+Tests for on-demand profiling of analysis and job runs.
+"""
+
+import asyncio
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app.config import settings
+from app.core.profiling import Profiler
+
+
+def busy_work():
+    """CPU work for the sampler to catch."""
+    blocks = []
+    for i in range(200):
+        blocks.append(bytearray(10_000))
+        sum(range(20_000))
+    return blocks
+
+
+@pytest.mark.asyncio
+async def test_profiled_run_stores_folded_stacks_functions_and_allocations(tmp_path):
+    """Test that a profile covers event-loop and worker-thread work and is stored and listed."""
+    profiler = Profiler(str(tmp_path), sample_interval_seconds=0.001)
+
+    async def run():
+        kept = busy_work()
+        await asyncio.to_thread(busy_work)
+        return kept
+
+    summary = await profiler.run("job:test", run)
+
+    folded = open(profiler.file(summary["id"], "folded")).read()
+    assert "event_loop;" in folded and "busy_work" in folded
+    assert any(line.split(";", 1)[0] != "event_loop" and "busy_work" in line for line in folded.splitlines())
+    assert any("busy_work" in row["function"] for row in summary["top_functions"])
+    assert summary["top_allocations"] and summary["peak_traced_bytes"] > 0
+    assert profiler.file(summary["id"], "pstats")
+    assert profiler.list()[0]["id"] == summary["id"]
+
+
+@pytest.mark.asyncio
+async def test_armed_job_profiles_only_its_next_runs(tmp_path):
+    """Test that arming a job profiles exactly the next N runs and failures are still stored and re-raised."""
+    profiler = Profiler(str(tmp_path), sample_interval_seconds=0.001)
+    calls = []
+
+    async def job():
+        calls.append(1)
+        if len(calls) == 2:
+            raise ValueError("vendor down")
+
+    wrapped = profiler.wrap("gather_signals", job)
+    profiler.arm("gather_signals", 2)
+    await wrapped()
+    with pytest.raises(ValueError):
+        await wrapped()
+    await wrapped()
+
+    assert len(calls) == 3
+    assert profiler.armed == {}
+    profiles = profiler.list()
+    assert len(profiles) == 2
+    assert sum(profile["error"] is not None for profile in profiles) == 1
+
+
+@pytest.mark.asyncio
+async def test_profiling_endpoints_require_admin_key(monkeypatch):
+    """Test that profiling is refused without a configured admin key and with the regular API key."""
+    from app.main import app
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        api_key = {"Authorization": f"Bearer {settings.api_key}"}
+        assert (await client.get("/api/v1/profiling/profiles", headers=api_key)).status_code == 403
+
+        monkeypatch.setattr(settings, "admin_api_key", "admin-secret")
+        assert (await client.get("/api/v1/profiling/profiles", headers=api_key)).status_code == 403
+        response = await client.get("/api/v1/profiling/armed", headers={"Authorization": "Bearer admin-secret"})
+        assert response.status_code == 200
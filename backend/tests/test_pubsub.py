@@ -0,0 +1,175 @@
+"""
+Tests for the market data fan-out across workers, against a local Redis stand-in.
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from app.core.market_stream import MarketFeed
+from app.core.pubsub import EXTEND_LEASE_SCRIPT, RELEASE_LEASE_SCRIPT, RedisBackend
+from app.core.websocket_manager import ConnectionManager
+from tests.conftest import RecordingWebSocket
+
+
+class RedisStandIn:
+    """The RESP subset the redis backend uses: PUBLISH/SUBSCRIBE, SET NX PX leases and the lease scripts."""
+
+    def __init__(self):
+        self.keys = {}
+        self.channels = {}
+        self.server = None
+
+    async def start(self) -> str:
+        self.server = await asyncio.start_server(self._client, "127.0.0.1", 0)
+        return f"redis://127.0.0.1:{self.server.sockets[0].getsockname()[1]}/0"
+
+    async def stop(self):
+        self.server.close()
+        for writers in self.channels.values():
+            for writer in writers:
+                writer.close()
+
+    def _get(self, key):
+        value, expires = self.keys.get(key, (None, 0))
+        return value if expires > time.monotonic() else None
+
+    async def _client(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    return
+                args = []
+                for _ in range(int(line[1:])):
+                    length = int((await reader.readline())[1:])
+                    args.append((await reader.readexactly(length + 2))[:-2].decode())
+                writer.write(self._reply(args, writer))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            for writers in self.channels.values():
+                writers.discard(writer)
+
+    def _reply(self, args, writer) -> bytes:
+        command = args[0].upper()
+        if command == "SUBSCRIBE":
+            out = b""
+            for i, channel in enumerate(args[1:], 1):
+                self.channels.setdefault(channel, set()).add(writer)
+                out += b"*3\r\n" + bulk("subscribe") + bulk(channel) + b":%d\r\n" % i
+            return out
+        if command == "PUBLISH":
+            receivers = self.channels.get(args[1], set())
+            for receiver in receivers:
+                receiver.write(b"*3\r\n" + bulk("message") + bulk(args[1]) + bulk(args[2]))
+            return b":%d\r\n" % len(receivers)
+        if command == "SET":
+            if "NX" in args and self._get(args[1]) is not None:
+                return b"$-1\r\n"
+            self.keys[args[1]] = (args[2], time.monotonic() + int(args[args.index("PX") + 1]) / 1000)
+            return b"+OK\r\n"
+        if command == "GET":
+            value = self._get(args[1])
+            return b"$-1\r\n" if value is None else bulk(value)
+        if command == "PEXPIRE":
+            if self._get(args[1]) is None:
+                return b":0\r\n"
+            self.keys[args[1]] = (self.keys[args[1]][0], time.monotonic() + int(args[2]) / 1000)
+            return b":1\r\n"
+        if command == "DEL":
+            return b":%d\r\n" % (self.keys.pop(args[1], None) is not None)
+        if command == "EVAL" and args[1] in (EXTEND_LEASE_SCRIPT, RELEASE_LEASE_SCRIPT):
+            # The lease scripts: compare the owner, then PEXPIRE or DEL, in one step
+            key, owner = args[3], args[4]
+            if self._get(key) != owner:
+                return b":0\r\n"
+            if args[1] == EXTEND_LEASE_SCRIPT:
+                return self._reply(["PEXPIRE", key, args[5]], writer)
+            return self._reply(["DEL", key], writer)
+        return b"-ERR unknown command\r\n"
+
+
+def bulk(text: str) -> bytes:
+    data = text.encode()
+    return b"$%d\r\n%s\r\n" % (len(data), data)
+
+
+async def fake_source(feed: MarketFeed):
+    """Publish a rising price for every subscribed ticker, tagged with the publishing worker."""
+    price = 0
+    while True:
+        price += 1
+        tickers = feed.subscribed_tickers()
+        if tickers:
+            await feed.publish_prices({ticker: {"price": price, "worker": feed.worker_id} for ticker in tickers})
+        await asyncio.sleep(feed.poll_interval)
+
+
+async def wait_for(condition, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        await asyncio.sleep(0.02)
+
+
+@pytest.mark.asyncio
+async def test_lease_changes_hands_only_through_expiry():
+    """Test that a worker whose lease expired and was taken neither extends nor releases its successor's."""
+    standin = RedisStandIn()
+    url = await standin.start()
+    first, second = RedisBackend(url), RedisBackend(url)
+    try:
+        assert await first.hold_lease("publisher", "a", 0.05)
+        assert await first.hold_lease("publisher", "a", 0.05)
+        assert not await second.hold_lease("publisher", "b", 5.0)
+        await asyncio.sleep(0.1)
+        assert await second.hold_lease("publisher", "b", 5.0)
+
+        assert not await first.hold_lease("publisher", "a", 0.05)
+        await first.release_lease("publisher", "a")
+        assert standin._get("publisher") == "b"
+        assert await second.hold_lease("publisher", "b", 5.0)
+
+        await second.release_lease("publisher", "b")
+        assert standin._get("publisher") is None
+    finally:
+        await first.stop()
+        await second.stop()
+        await standin.stop()
+
+
+@pytest.mark.asyncio
+async def test_one_publisher_fans_out_to_every_worker_and_fails_over():
+    """Test that one elected worker polls for every worker's tickers, each worker serves its sockets, and a successor takes over."""
+    standin = RedisStandIn()
+    url = await standin.start()
+    workers = []
+    for name, ticker in (("a", "AAPL"), ("b", "NVDA")):
+        manager = ConnectionManager(flush_interval=0.02)
+        ws = RecordingWebSocket()
+        await manager.connect(ws, name)
+        manager.subscribe(ws, [ticker])
+        feed = MarketFeed(RedisBackend(url), manager, source=fake_source, worker_id=name,
+                          poll_interval=0.05, lease_seconds=0.3)
+        await feed.start()
+        workers.append((feed, manager, ws))
+    try:
+        await wait_for(lambda: all(len(ws.prices()) >= 2 for _, _, ws in workers))
+        publishers = [feed for feed, _, _ in workers if feed.is_publisher]
+        assert len(publishers) == 1
+        assert {frame["ticker"] for frame in workers[0][2].frames} == {"AAPL"}
+        assert {frame["ticker"] for frame in workers[1][2].frames} == {"NVDA"}
+
+        # The publisher leaves; the other worker takes over polling
+        leaving = publishers[0]
+        await leaving.stop()
+        survivor, _, ws = next(worker for worker in workers if worker[0] is not leaving)
+        await wait_for(lambda: survivor.is_publisher)
+        await wait_for(lambda: ws.frames[-1]["data"]["worker"] == survivor.worker_id)
+    finally:
+        for feed, _, _ in workers:
+            await feed.stop()
+        await standin.stop()
@@ -0,0 +1,55 @@
+"""
+Tests for the last-value quote cache and the snapshot sent on subscribe.
+"""
+
+
+import pytest
+
+from app.core.market_stream import MarketFeed
+from app.core.pubsub import MemoryBackend
+from app.core.quote_cache import QuoteCache, quote_cache
+from app.core.websocket_manager import ConnectionManager
+from app.services.alpaca_service import AlpacaService
+from tests.conftest import RecordingWebSocket
+
+
+class UnreachableClient:
+    """Fails the test if a quote lookup reaches Alpaca."""
+
+    def __getattr__(self, name):
+        raise AssertionError(f"Alpaca called: {name}")
+
+
+@pytest.mark.asyncio
+async def test_recent_quotes_are_served_from_the_cache_while_fresh():
+    """Test that get_recent_quote skips Alpaca for a fresh cached quote and that stale entries miss."""
+    quote = {"symbol": "AAPL", "bid_price": 189.9, "ask_price": 190.1, "bid_size": 1.0, "ask_size": 2.0}
+    quote_cache.put("AAPL", quote)
+    alpaca = AlpacaService()
+    alpaca.data_client = UnreachableClient()
+    assert await alpaca.get_recent_quote("AAPL") == quote
+
+    cache = QuoteCache(max_age_seconds=60)
+    cache.put("NVDA", quote)
+    assert cache.get("NVDA") == quote
+    assert cache.get("NVDA", max_age_seconds=0) is None
+    assert cache.get("TSLA") is None
+
+
+@pytest.mark.asyncio
+async def test_subscriber_gets_a_snapshot_without_waiting_for_the_feed():
+    """Test that a subscriber immediately receives the last broadcast or cached price of its tickers."""
+    manager = ConnectionManager(flush_interval=60)
+    feed = MarketFeed(MemoryBackend(), manager)
+    quote_cache.put("MSFT", {"symbol": "MSFT", "bid_price": 409.9, "ask_price": 410.1})
+    watcher, late = RecordingWebSocket(), RecordingWebSocket()
+    await manager.connect(watcher, "watcher")
+    await manager.connect(late, "late")
+    manager.subscribe(watcher, ["AAPL"])
+    await manager.broadcast_price_update("AAPL", {"price": 190.0, "bid": 189.9, "ask": 190.1})
+
+    manager.subscribe(late, ["AAPL", "MSFT", "NOPE"])
+    await feed.send_snapshot(late, ["AAPL", "MSFT", "NOPE"])
+    await manager.flush(timeout=1)
+    prices = {frame["ticker"]: frame["data"]["price"] for frame in late.frames}
+    assert prices == {"AAPL": 190.0, "MSFT": 410.0}
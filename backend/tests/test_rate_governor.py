@@ -0,0 +1,116 @@
+"""
+Tests for the process-wide LLM rate governor.
+"""
+
+import asyncio
+
+import pytest
+
+from tradingagents.rate_governor import BACKGROUND, ModelLimits, RateGovernor, llm_priority
+
+
+class RateLimitError(Exception):
+    status_code = 429
+
+
+@pytest.mark.asyncio
+async def test_interactive_calls_are_admitted_before_queued_background_calls():
+    """Test that when a slot frees up, a later interactive caller goes ahead of an earlier background one."""
+    governor = RateGovernor(default_limits=ModelLimits(max_concurrency=1))
+    held = await governor.aacquire("gpt-4o-mini")
+    order = []
+
+    async def call(name):
+        async def fn():
+            order.append(name)
+        await governor.acall("gpt-4o-mini", fn)
+
+    with llm_priority(BACKGROUND):
+        background = asyncio.create_task(call("background"))
+    await asyncio.sleep(0.05)
+    interactive = asyncio.create_task(call("interactive"))
+    await asyncio.sleep(0.05)
+
+    usage = governor.utilization()["gpt-4o-mini"]
+    assert (usage["in_flight"], usage["waiting"], usage["waiting_background"]) == (1, 2, 1)
+
+    governor.release(held)
+    await asyncio.gather(background, interactive)
+    assert order == ["interactive", "background"]
+
+
+def test_rate_limited_call_backs_off_retries_and_records_usage():
+    """Test that a 429 is retried after a cool-down and reported token usage replaces the estimate."""
+    governor = RateGovernor(default_limits=ModelLimits(rpm=10, tpm=1000), backoff_seconds=0.01)
+    attempts = []
+
+    def fn():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RateLimitError("slow down")
+        return 120
+
+    assert governor.call("text-embedding-3-small", fn, tokens=50, usage=lambda tokens: tokens) == 120
+
+    usage = governor.utilization()["text-embedding-3-small"]
+    assert len(attempts) == 2
+    assert (usage["rate_limited"], usage["retries"], usage["in_flight"]) == (1, 1, 0)
+    assert (usage["rpm"], usage["tpm"], usage["tpm_utilization"]) == (2, 170, 0.17)
+
+
+def test_non_rate_limit_errors_are_not_retried():
+    """Test that other provider errors propagate immediately."""
+    governor = RateGovernor()
+
+    def fn():
+        raise ValueError("bad request")
+
+    with pytest.raises(ValueError):
+        governor.call("gpt-4o-mini", fn)
+    assert governor.utilization()["gpt-4o-mini"]["retries"] == 0
+
+
+@pytest.mark.asyncio
+async def test_blocking_acquire_is_refused_on_the_event_loop():
+    """Test that a sync call on the loop raises instead of stalling it, and works from a worker thread."""
+    governor = RateGovernor(default_limits=ModelLimits(max_concurrency=1))
+    release = asyncio.Event()
+
+    async def in_flight():
+        await release.wait()
+        return "async"
+
+    first = asyncio.create_task(governor.acall("text-embedding-3-small", in_flight))
+    await asyncio.sleep(0.05)
+
+    with pytest.raises(RuntimeError, match="event loop"):
+        governor.call("text-embedding-3-small", lambda: "sync")
+
+    threaded = asyncio.create_task(asyncio.to_thread(governor.call, "text-embedding-3-small", lambda: "sync"))
+    await asyncio.sleep(0.05)
+    assert not threaded.done()
+    release.set()
+    assert await asyncio.wait_for(asyncio.gather(first, threaded), timeout=5) == ["async", "sync"]
+
+
+def test_web_search_calls_go_through_the_governor(monkeypatch):
+    """Test that the OpenAI web-search data tools are budgeted under the quick-thinking model."""
+    from types import SimpleNamespace
+
+    from tradingagents.dataflows import openai as openai_tools
+    from tradingagents.dataflows.config import get_config
+
+    text = SimpleNamespace(text="headlines")
+    response = SimpleNamespace(output=[None, SimpleNamespace(content=[text])], usage=SimpleNamespace(total_tokens=42))
+    client = SimpleNamespace(responses=SimpleNamespace(create=lambda **kwargs: response))
+    governed = []
+
+    def call(model, fn, tokens=0, usage=None, vendor="llm"):
+        governed.append((model, usage(fn())))
+        return response
+
+    monkeypatch.setattr(openai_tools, "OpenAI", lambda base_url: client)
+    monkeypatch.setattr(openai_tools.governor, "call", call)
+
+    assert openai_tools.get_global_news_openai("2024-05-01") == "headlines"
+    assert governed == [(get_config()["quick_think_llm"], 42)]
@@ -0,0 +1,181 @@
+"""
+Tests for the bulk reconciliation of DB positions and trades with Alpaca.
+"""
+
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+import os
+import time
+
+import pytest
+from sqlalchemy import select
+
+from app.models.database import PortfolioConfig, Position, Trade
+from app.services import autonomous_service
+from app.services.alpaca_service import AlpacaService
+from app.services.reconciliation_service import ReconciliationService
+
+
+class FakeBroker:
+    """Serves fixed broker positions and orders, counting the calls."""
+
+    def __init__(self, positions, orders):
+        self.positions = positions
+        self.orders = orders
+        self.calls = []
+
+    async def get_positions(self):
+        self.calls.append("get_positions")
+        return self.positions
+
+    async def get_orders(self, after=None, limit=500):
+        self.calls.append("get_orders")
+        return [order for order in self.orders if after is None or datetime.fromisoformat(order["created_at"]) > after]
+
+    async def close_position(self, symbol, quantity=None):
+        return {"order_id": "close-1", "symbol": symbol, "status": "accepted"}
+
+    async def get_recent_quote(self, symbol, max_age_seconds=None):
+        return {"bid_price": 99.0, "ask_price": 99.2}
+
+
+def order(order_id, symbol, side, status, fill_price=None, legs=(), order_type="market"):
+    """An order as AlpacaService.get_orders returns it."""
+    return {"order_id": order_id, "symbol": symbol, "side": side, "type": order_type, "status": status,
+            "filled_quantity": 1.0 if status == "filled" else 0.0, "filled_avg_price": fill_price,
+            "created_at": datetime.now(timezone.utc).isoformat(), "legs": list(legs)}
+
+
+def held(symbol, quantity, current_price):
+    return {"symbol": symbol, "quantity": quantity, "current_price": current_price}
+
+
+@pytest.mark.asyncio
+async def test_one_pass_applies_fills_exits_and_allocation(test_db):
+    """Test that one cycle records fills, closes positions the broker exited and sets the allocation from two broker calls."""
+    an_hour_ago = datetime.now() - timedelta(hours=1)
+    test_db.add(PortfolioConfig(user_id="default_user", total_budget=10_000.0, current_allocation=0.0))
+    aapl = Position(symbol="AAPL", entry_time=an_hour_ago, entry_price=200.0, quantity=5, status="open",
+                    meta_data={"order_id": "buy-aapl"})
+    msft = Position(symbol="MSFT", entry_time=an_hour_ago, entry_price=100.0, quantity=2, status="open",
+                    meta_data={"order_id": "buy-msft", "bracket": {"active": True}})
+    tsla = Position(symbol="TSLA", entry_time=an_hour_ago, entry_price=240.0, quantity=1, status="open")
+    test_db.add_all([aapl, msft, tsla])
+    await test_db.commit()
+    test_db.add(Trade(position_id=aapl.id, symbol="AAPL", side="buy", quantity=5, price=200.0,
+                      status="accepted", alpaca_order_id="buy-aapl"))
+    await test_db.commit()
+    broker = FakeBroker(
+        [held("AAPL", 6, 210.0)],
+        [
+            order("buy-aapl", "AAPL", "buy", "filled", 200.5),
+            order("buy-msft", "MSFT", "buy", "filled", 100.0, legs=[
+                order("msft-tp", "MSFT", "sell", "filled", 110.2, order_type="limit"),
+                order("msft-sl", "MSFT", "sell", "canceled", order_type="stop"),
+            ]),
+            order("sell-tsla", "TSLA", "sell", "filled", 250.0),
+        ],
+    )
+
+    result = await ReconciliationService(test_db, broker).reconcile()
+
+    assert broker.calls == ["get_positions", "get_orders"]
+    assert result == {"fills": 1, "closed": 2, "reopened": 0, "resized": 1, "allocation": 1260.0}
+    for position in (aapl, msft, tsla):
+        await test_db.refresh(position)
+    assert (aapl.status, aapl.entry_price, aapl.quantity) == ("open", 200.5, 6)
+    assert (msft.status, msft.exit_price, msft.pnl) == ("closed", 110.2, pytest.approx(20.4))
+    assert (tsla.status, tsla.exit_price, tsla.pnl) == ("closed", 250.0, pytest.approx(10.0))
+    config = (await test_db.execute(select(PortfolioConfig))).scalar_one()
+    assert config.current_allocation == 1260.0
+
+
+@pytest.mark.asyncio
+async def test_manual_close_takes_its_exit_price_from_the_fill(test_db, monkeypatch):
+    """Test that a manual close no longer asks Alpaca for the closed position and reconciliation prices it from the fill."""
+    monkeypatch.setattr(autonomous_service, "AlpacaService", lambda: FakeBroker([], []))
+    position = Position(symbol="NVDA", entry_time=datetime.now() - timedelta(hours=1), entry_price=100.0,
+                        quantity=4, status="open", meta_data={"order_id": "buy-nvda"})
+    test_db.add(position)
+    await test_db.commit()
+
+    await autonomous_service.AutonomousService(test_db).close_position("NVDA")
+    await test_db.refresh(position)
+    assert (position.status, position.exit_price) == ("closed", 99.0)
+
+    broker = FakeBroker([], [order("close-1", "NVDA", "sell", "filled", 98.5)])
+    await ReconciliationService(test_db, broker).reconcile()
+
+    await test_db.refresh(position)
+    trade = (await test_db.execute(select(Trade))).scalar_one()
+    assert (trade.status, trade.price) == ("filled", 98.5)
+    assert (position.exit_price, position.pnl) == (98.5, pytest.approx(-6.0))
+
+
+@pytest.fixture
+def new_york_time():
+    """Run with the process's local time five hours behind UTC."""
+    previous = os.environ.get("TZ")
+    os.environ["TZ"] = "EST+5"
+    time.tzset()
+    yield
+    if previous is None:
+        del os.environ["TZ"]
+    else:
+        os.environ["TZ"] = previous
+    time.tzset()
+
+
+@pytest.mark.asyncio
+async def test_orders_window_holds_outside_utc(test_db, monkeypatch, new_york_time):
+    """Test that a trade's database-stamped (UTC) time and local app times give one window when local time is not UTC."""
+    monkeypatch.setattr(autonomous_service, "AlpacaService", lambda: FakeBroker([], []))
+    position = Position(symbol="NVDA", entry_time=datetime.now() - timedelta(hours=1), entry_price=100.0,
+                        quantity=4, status="open", meta_data={"order_id": "buy-nvda"})
+    test_db.add(position)
+    await test_db.commit()
+    await autonomous_service.AutonomousService(test_db).close_position("NVDA")
+    trade = (await test_db.execute(select(Trade))).scalar_one()
+    trade.executed_at = None
+    await test_db.commit()
+
+    broker = FakeBroker([], [order("close-1", "NVDA", "sell", "filled", 98.5)])
+    await ReconciliationService(test_db, broker).reconcile()
+
+    await test_db.refresh(trade)
+    assert (trade.status, trade.price) == ("filled", 98.5)
+
+
+class PagedTradingClient:
+    """Serves orders newest first, `limit` at a time, like Alpaca's order list."""
+
+    def __init__(self, count):
+        start = datetime(2026, 1, 5, 15, 0, tzinfo=timezone.utc)
+        self.orders = [SimpleNamespace(
+            id=f"order-{i}", symbol="AAPL", side=SimpleNamespace(value="buy"), order_type=SimpleNamespace(value="market"),
+            qty="1", status=SimpleNamespace(value="filled"), filled_qty="1", filled_avg_price="100", filled_at=None,
+            limit_price=None, stop_price=None, legs=None,
+            # Pairs of orders submitted at the same moment
+            submitted_at=start + timedelta(seconds=i // 2), created_at=start + timedelta(seconds=i // 2),
+        ) for i in range(count)]
+        self.requests = 0
+
+    def get_orders(self, request):
+        self.requests += 1
+        orders = [order for order in reversed(self.orders)
+                  if (request.after is None or order.submitted_at > request.after)
+                  and (request.until is None or order.submitted_at < request.until)]
+        return orders[:request.limit]
+
+
+@pytest.mark.asyncio
+async def test_get_orders_pages_back_past_the_limit():
+    """Test that get_orders follows full pages back to `after` without skipping orders that share a time."""
+    alpaca = AlpacaService()
+    alpaca.trading_client = PagedTradingClient(11)
+
+    orders = await alpaca.get_orders(limit=4)
+
+    assert [o["order_id"] for o in orders] == [f"order-{i}" for i in reversed(range(11))]
+    assert alpaca.trading_client.requests > 1
+
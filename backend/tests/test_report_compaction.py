@@ -0,0 +1,57 @@
+"""
+Tests for report compaction in debate prompts.
+"""
+
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+from tradingagents.agents.utils.compaction import (
+    RISK_REPORT_LABELS,
+    ReportCompactor,
+    history_for_prompt,
+    reports_for_prompt,
+)
+
+STATE = {
+    "company_of_interest": "AAPL",
+    "trade_date": "2025-01-10",
+    "market_report": "RSI 71, price above 50 SMA. " * 200,
+    "sentiment_report": "Mostly bullish chatter. " * 200,
+    "news_report": "New product launch next week. " * 200,
+    "fundamentals_report": "Revenue +8% YoY, margins stable. " * 200,
+}
+
+
+def test_raw_reports_without_compactor():
+    """Test that prompts are unchanged when compaction is off."""
+    reports = reports_for_prompt(STATE, RISK_REPORT_LABELS)
+
+    assert reports.startswith("Market Research Report: RSI 71")
+    assert history_for_prompt({"history": "Bull Analyst: up"}) == ("Bull Analyst: up", {})
+
+
+def test_brief_replaces_reports():
+    """Test that downstream prompts get the bounded brief instead of the reports."""
+    compactor = ReportCompactor(FakeListChatModel(responses=["Key Metrics: RSI 71. Bottom Line: lean BUY."]))
+
+    update = compactor.create_brief_node().invoke(STATE)
+    reports = compactor.format_reports({**STATE, **update}, RISK_REPORT_LABELS)
+
+    assert "Bottom Line: lean BUY." in reports
+    assert update["compaction_stats"]["brief_tokens_est"] < update["compaction_stats"]["raw_report_tokens_est"]
+    assert compactor.stats()["saved_tokens_est"] > 0
+
+
+def test_history_rolls_into_summary_over_budget():
+    """Test that older debate turns are folded into a summary once over budget."""
+    compactor = ReportCompactor(FakeListChatModel(responses=["Bull: growth; Bear: valuation."]), history_budget_chars=200)
+    history = "".join(f"\n{'Bull' if i % 2 else 'Bear'} Analyst: argument {i} " + "x" * 40 for i in range(10))
+
+    text, updates = compactor.history({"history": history})
+
+    assert text.startswith("(Summary of earlier debate) Bull: growth; Bear: valuation.")
+    assert len(history) - updates["summarized_upto"] <= 100
+    assert history.endswith(text[-50:])
+
+    # Under budget on the next turn: no new summary call, summary carried forward
+    text, updates = compactor.history({"history": history, **updates})
+    assert compactor.stats()["history_summaries"] == 1
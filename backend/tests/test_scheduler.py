@@ -0,0 +1,83 @@
+"""
+Tests for the overlap-safe scheduler: run tracking, skipped runs and adaptive intervals.
+"""
+
+import asyncio
+
+import pytest
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+
+from app.core.scheduler import JobTracker
+
+
+@pytest.mark.asyncio
+async def test_overlapping_runs_are_skipped_and_recorded():
+    """Test that a job outlasting its interval never runs twice at once and the skipped runs are counted."""
+    scheduler = AsyncIOScheduler(job_defaults={"max_instances": 1, "coalesce": True})
+    tracker = JobTracker(scheduler)
+    tracker.configure(adaptive=False, overrun_streak=3, max_stretch=4.0)
+    tracker.register("slow", 0.1)
+    running, peak = 0, 0
+
+    async def slow():
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.35)
+        running -= 1
+
+    scheduler.add_job(slow, "interval", seconds=0.1, id="slow", misfire_grace_time=1)
+    scheduler.start()
+    await asyncio.sleep(1.0)
+    scheduler.shutdown(wait=False)
+
+    status = tracker.status()["jobs"]["slow"]
+    assert peak == 1
+    assert status["runs"] >= 1
+    assert status["skipped_runs"] >= 1
+    assert status["overruns"] == status["runs"]
+    assert status["last_run"]["outcome"] == "ok"
+
+
+def test_interval_stretches_after_overrun_streak_and_relaxes():
+    """Test that repeated overruns stretch the interval (capped) and fitting runs bring it back."""
+    scheduler = AsyncIOScheduler()
+    tracker = JobTracker(scheduler)
+    tracker.configure(adaptive=True, overrun_streak=2, max_stretch=3.0)
+    tracker.register("gather", 30)
+    stats = tracker.jobs["gather"]
+
+    def finish(duration):
+        stats.runs.append({"duration_seconds": duration, "lag_seconds": 0.0})
+        tracker._adapt(stats, duration)
+
+    finish(45)
+    assert stats.interval == 30
+    finish(48)
+    assert stats.interval == 60  # ceil(48 * 1.25)
+    finish(200)
+    finish(200)
+    assert stats.interval == 90  # capped at 3x
+
+    finish(10)
+    finish(12)
+    assert stats.interval == 30
+
+
+@pytest.mark.asyncio
+async def test_scheduled_run_is_skipped_while_a_direct_run_holds_the_job():
+    """Test that a scheduled run does not start while the job is run directly (e.g. profiled)."""
+    tracker = JobTracker(AsyncIOScheduler())
+    tracker.register("run_analysis", 120)
+    runs = []
+
+    async def job():
+        runs.append("scheduled")
+
+    scheduled = tracker.exclusive("run_analysis", job)
+    async with tracker.lock("run_analysis"):
+        await scheduled()
+    assert runs == [] and tracker.jobs["run_analysis"].skipped == 1
+
+    await scheduled()
+    assert runs == ["scheduled"]
@@ -0,0 +1,64 @@
+"""
+Tests for the deterministic trade decision parser.
+"""
+
+from unittest.mock import MagicMock
+
+from tradingagents.graph.signal_processing import SignalProcessor, parse_signal
+
+
+def test_marker_and_confidence_are_parsed():
+    """Test the FINAL TRANSACTION PROPOSAL marker and confidence line."""
+    text = "Rationale...\n\nFINAL TRANSACTION PROPOSAL: **SELL**\nCONFIDENCE: 0.82"
+    assert parse_signal(text) == ("SELL", 0.82)
+
+
+def test_last_marker_wins_and_percent_confidence():
+    """Test that the final marker overrides earlier ones and % is normalized."""
+    text = "FINAL TRANSACTION PROPOSAL: **HOLD**\n...revised...\nfinal transaction proposal: buy\nConfidence: 65%"
+    assert parse_signal(text) == ("BUY", 0.65)
+
+
+def test_sentence_ending_period_after_confidence():
+    """Test that a full stop after the confidence does not hide it."""
+    assert parse_signal("FINAL TRANSACTION PROPOSAL: **BUY**\nConfidence: 0.75.") == ("BUY", 0.75)
+    assert parse_signal("Confidence: 80%.")[1] == 0.8
+
+
+def test_echoed_template_is_not_a_decision():
+    """Test that the prompt's BUY/HOLD/SELL and <0.0-1.0> placeholders parse as nothing."""
+    template = "FINAL TRANSACTION PROPOSAL: **BUY/HOLD/SELL**\nCONFIDENCE: <0.0-1.0>"
+    assert parse_signal(template) == (None, None)
+    assert parse_signal("FINAL TRANSACTION PROPOSAL: HOLD | SELL\nConfidence: 0.0-1.0") == (None, None)
+    assert parse_signal("FINAL TRANSACTION PROPOSAL: **SELL**\n\n" + template)[0] == "SELL"
+
+
+def test_confidence_scales():
+    """Test x/10 scores, bare percentages and unparseable values above 1."""
+    assert parse_signal("Confidence: 8/10")[1] == 0.8
+    assert parse_signal("CONFIDENCE: 80")[1] == 0.8
+    assert parse_signal("CONFIDENCE: 1")[1] == 1.0
+    assert parse_signal("CONFIDENCE: 1.5")[1] is None
+    assert parse_signal("Confidence: 2")[1] is None
+    assert parse_signal("CONFIDENCE: 250")[1] is None
+
+
+def test_conflicting_bold_decisions_are_ambiguous():
+    """Test that text without a marker and mixed decisions yields no decision."""
+    assert parse_signal("Bulls say **BUY**, bears say **SELL**.")[0] is None
+    assert parse_signal("My recommendation: **Hold**.")[0] == "HOLD"
+
+
+def test_llm_only_called_when_ambiguous():
+    """Test that the LLM fallback is skipped when the text is parseable."""
+    llm = MagicMock()
+    llm.invoke.return_value.content = "SELL"
+    processor = SignalProcessor(llm)
+
+    assert processor.extract_signal("FINAL TRANSACTION PROPOSAL: **BUY**")["source"] == "parsed"
+    assert processor.extract_signal("", structured={"decision": "HOLD", "confidence": 0.6})["source"] == "structured"
+    llm.invoke.assert_not_called()
+
+    signal = processor.extract_signal("Mixed signals, lean bearish.")
+    assert signal == {"decision": "SELL", "confidence": None, "source": "llm"}
+    llm.invoke.assert_called_once()
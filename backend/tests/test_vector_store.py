@@ -0,0 +1,85 @@
+"""
+Tests for the shared persistent vector store and the memories stored in it.
+"""
+
+import hashlib
+
+import numpy as np
+import pytest
+
+import app.core.vector_store as vector_store
+from app.core.vector_store import VectorStore
+from app.models.database import UserActivity
+from app.services.memory_service import UserHistoryMemory, build_activity_text
+from app.services.observer_service import ObserverService
+from tradingagents.agents.utils.memory import FinancialSituationMemory
+
+
+def fake_embedding(text: str) -> np.ndarray:
+    """Deterministic 16-d embedding derived from the text."""
+    seed = int(hashlib.sha256(text.encode("utf-8")).hexdigest()[:8], 16)
+    return np.random.default_rng(seed).standard_normal(16).astype(np.float32)
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    store = VectorStore(str(tmp_path / "vectors"), backend="flat")
+    monkeypatch.setattr(vector_store, "_vector_store", store)
+    monkeypatch.setattr(FinancialSituationMemory, "get_embedding", lambda self, text: fake_embedding(text))
+    monkeypatch.setattr(UserHistoryMemory, "get_embedding", lambda self, text: fake_embedding(text))
+    monkeypatch.setattr(UserHistoryMemory, "get_embeddings", lambda self, texts: np.stack([fake_embedding(t) for t in texts]))
+    return store
+
+
+def test_collections_are_shared_and_persist(store, tmp_path):
+    """Test that one collection object is shared per name and its vectors survive reopening the store."""
+    assert store.get_or_create_collection("bull_memory") is store.get_or_create_collection("bull_memory")
+
+    memory = FinancialSituationMemory("bull_memory", {"backend_url": "https://api.openai.com/v1"}, store)
+    memory.add_situations([("Rates rising, tech selling off", "Trim growth exposure")])
+
+    reopened = VectorStore(store.path, backend="flat")
+    assert reopened.warm_load() == {"bull_memory": 1}
+    matches = FinancialSituationMemory("bull_memory", {"backend_url": "https://api.openai.com/v1"}, reopened).get_memories(
+        "Rates rising, tech selling off"
+    )
+    assert matches[0]["recommendation"] == "Trim growth exposure"
+    assert matches[0]["similarity_score"] == pytest.approx(1.0, abs=1e-5)
+
+
+def test_situation_ids_do_not_collide_across_graphs(store):
+    """Test that two graphs adding memories to one collection keep both, and re-adding a lesson is a no-op."""
+    config = {"backend_url": "https://api.openai.com/v1"}
+    first = FinancialSituationMemory("trader_memory", config, store)
+    second = FinancialSituationMemory("trader_memory", config, store)
+
+    first.add_situations([("Earnings beat, guidance cut", "Wait for the dip")])
+    second.add_situations([("Short squeeze on heavy volume", "Do not chase")])
+    first.add_situations([("Earnings beat, guidance cut", "Wait for the dip")])
+
+    collection = store.get_or_create_collection("trader_memory")
+    assert collection.count() == 2
+    recommendations = {m["recommendation"] for m in second.get_memories("anything", n_matches=2)}
+    assert recommendations == {"Wait for the dip", "Do not chase"}
+
+
+@pytest.mark.asyncio
+async def test_rehydrate_memory_is_idempotent(store, test_db):
+    """Test that rehydration embeds every activity once under its stable ID and re-runs overwrite."""
+    activities = [
+        UserActivity(activity_type="trade_attempt", symbol=symbol, side="buy", news_context=f"{symbol} news")
+        for symbol in ("AAPL", "TSLA", "NVDA")
+    ]
+    test_db.add_all(activities)
+    await test_db.commit()
+
+    observer = ObserverService(test_db)
+    assert await observer.rehydrate_memory() == 3
+    assert await observer.rehydrate_memory() == 3
+
+    collection = store.get_or_create_collection("user_history_default_user")
+    assert collection.count() == 3
+    matches = observer.memory.find_similar_situations(build_activity_text(activities[1]), n_matches=1)
+    assert matches[0]["metadata"] == {"activity_id": activities[1].id, "symbol": "TSLA", "activity_type": "trade_attempt",
+                                      "timestamp": activities[1].timestamp.isoformat()}
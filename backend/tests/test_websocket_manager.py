@@ -0,0 +1,108 @@
+"""
+Tests for ConnectionManager's subscription index, per-client outbound queues and conflated price delivery.
+"""
+
+import asyncio
+
+import pytest
+
+from app.core.websocket_manager import ConnectionManager
+from tests.conftest import RecordingWebSocket
+
+
+@pytest.mark.asyncio
+async def test_broadcast_reaches_only_subscribers_and_index_follows_churn():
+    """Test that updates go only to a ticker's subscribers and unsubscribe/disconnect clean the index."""
+    manager = ConnectionManager()
+    first, second = RecordingWebSocket(), RecordingWebSocket()
+    await manager.connect(first, "a")
+    await manager.connect(second, "b")
+    manager.subscribe(first, ["AAPL", "NVDA"])
+    manager.subscribe(second, ["NVDA"])
+
+    await manager.broadcast_price_update("AAPL", {"price": 1})
+    await manager.broadcast_price_update("NVDA", {"price": 2})
+    await manager.broadcast_price_update("TSLA", {"price": 3})
+    await manager.flush(timeout=1)
+    assert first.tickers() == ["AAPL", "NVDA"]
+    assert second.tickers() == ["NVDA"]
+
+    manager.unsubscribe(first, ["AAPL"])
+    manager.disconnect(second, "b")
+    assert manager.get_all_subscribed_tickers() == {"NVDA"}
+    assert manager.subscribers["NVDA"] == {first}
+    assert manager.get_connection_count() == 1
+
+
+@pytest.mark.asyncio
+async def test_slow_client_does_not_stall_others_and_failed_sockets_are_dropped():
+    """Test that a slow socket only delays itself and keeps its latest frames, and a failing one is disconnected."""
+    manager = ConnectionManager(outbox_size=3)
+    fast, slow, broken = RecordingWebSocket(), RecordingWebSocket(delay=0.05), RecordingWebSocket(fail=True)
+    for i, ws in enumerate((fast, slow, broken)):
+        await manager.connect(ws, f"client{i}")
+        manager.subscribe(ws, ["AAPL"])
+
+    for price in range(10):
+        await manager.broadcast_price_update("AAPL", {"price": price})
+        # Flush every update into a frame, as if the flush interval were shorter than the writes
+        manager._flush_prices(wait_for_writers=False)
+        await asyncio.sleep(0)
+
+    assert [frame["data"]["price"] for frame in fast.frames] == list(range(10))
+    assert len(slow.frames) <= 1
+    assert manager.get_connection_count() == 2
+    assert broken not in manager.subscribers["AAPL"]
+
+    await manager.flush(timeout=1)
+    assert [frame["data"]["price"] for frame in slow.frames][-3:] == [7, 8, 9]
+    assert manager.outboxes[slow].dropped > 0
+
+
+@pytest.mark.asyncio
+async def test_updates_are_change_only_conflated_and_batched_on_request():
+    """Test that unchanged quotes are skipped, a flush sends the latest per ticker, and batch clients get one frame."""
+    manager = ConnectionManager(flush_interval=60)
+    plain, batched = RecordingWebSocket(), RecordingWebSocket()
+    for i, ws in enumerate((plain, batched)):
+        await manager.connect(ws, f"client{i}")
+        manager.subscribe(ws, ["AAPL", "NVDA"])
+    assert manager.set_delivery(batched, batch=True, encoding="unknown") == {"batch": True, "encoding": "json"}
+
+    quote = {"price": 10.0, "bid": 9.99, "ask": 10.01, "timestamp": "t1"}
+    assert await manager.broadcast_price_update("AAPL", quote)
+    assert not await manager.broadcast_price_update("AAPL", {**quote, "timestamp": "t2"})
+    assert await manager.broadcast_price_update("AAPL", {**quote, "price": 10.5})
+    assert await manager.broadcast_price_update("NVDA", quote)
+    assert plain.frames == [] and batched.frames == []
+
+    await manager.flush(timeout=1)
+    assert [(frame["ticker"], frame["data"]["price"]) for frame in plain.frames] == [("AAPL", 10.5), ("NVDA", 10.0)]
+    assert len(batched.frames) == 1
+    assert batched.frames[0]["type"] == "price_updates"
+    assert [update["ticker"] for update in batched.frames[0]["updates"]] == ["AAPL", "NVDA"]
+
+    # A new subscriber is caught up with the last update, since unchanged quotes are not resent
+    late = RecordingWebSocket()
+    await manager.connect(late, "late")
+    manager.subscribe(late, ["NVDA"])
+    await manager.flush(timeout=1)
+    assert late.tickers() == ["NVDA"]
+
+
+@pytest.mark.asyncio
+async def test_msgpack_clients_get_binary_batches():
+    """Test that a client negotiating msgpack receives batched binary price frames."""
+    msgpack = pytest.importorskip("msgpack")
+    manager = ConnectionManager(flush_interval=60)
+    ws = RecordingWebSocket()
+    await manager.connect(ws, "client")
+    manager.subscribe(ws, ["AAPL"])
+    assert manager.set_delivery(ws, encoding="msgpack") == {"batch": True, "encoding": "msgpack"}
+
+    await manager.broadcast_price_update("AAPL", {"price": 10.0, "bid": 9.99, "ask": 10.01})
+    await manager.flush(timeout=1)
+    assert msgpack.unpackb(ws.frames[0]) == {
+        "type": "price_updates",
+        "updates": [{"ticker": "AAPL", "data": {"price": 10.0, "bid": 9.99, "ask": 10.01}}],
+    }
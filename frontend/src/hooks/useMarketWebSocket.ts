@@ -70,7 +70,8 @@ export function useMarketWebSocket({
                 if (tickers.length > 0 && socket.readyState === WebSocket.OPEN) {
                     socket.send(JSON.stringify({
                         type: 'subscribe',
-                        tickers: tickers
+                        tickers: tickers,
+                        batch: true
                     }));
                     console.log('[WebSocket] Subscribed to:', tickers);
                 }
@@ -100,6 +101,18 @@ export function useMarketWebSocket({
                             }
                             break;
 
+                        case 'price_updates':
+                            // Batched updates: the latest changed price per ticker since the last flush
+                            if (onPriceUpdateRef.current && Array.isArray(message.updates)) {
+                                for (const update of message.updates) {
+                                    onPriceUpdateRef.current({
+                                        ticker: update.ticker,
+                                        ...update.data
+                                    });
+                                }
+                            }
+                            break;
+
                         case 'error':
                             console.error('[WebSocket] Server error:', message.message);
                             setError(message.message);